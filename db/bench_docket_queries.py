@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Time the per-docket queries that partitioning (``partition_tables.py``) targets.
+
+Each query runs ``--repeat`` times for each sample docket (the ``--dockets``
+given, or the ``--top`` dockets with the most comments) after one warm-up
+pass; p50 / p95 / mean latency in milliseconds is printed per query.
+
+Compare the layouts by saving a run before partitioning and comparing the
+run after against it:
+
+    python db/bench_docket_queries.py --out before.json
+    python db/partition_tables.py
+    python db/bench_docket_queries.py --compare before.json
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import statistics
+import time
+from pathlib import Path
+
+from migrate import get_connection
+
+log = logging.getLogger(__name__)
+
+QUERIES = {
+    "document_count": "SELECT count(*) FROM documentsWithFRdoc WHERE docket_id = %s",
+    "comment_count": "SELECT count(*) FROM comments WHERE docket_id = %s",
+    "comment_page": (
+        "SELECT comment_id, comment_title, posted_date FROM comments "
+        "WHERE docket_id = %s ORDER BY posted_date DESC, comment_id LIMIT 50"
+    ),
+    # DBLayer._fetch_docket_totals
+    "document_totals": (
+        "SELECT docket_id, COUNT(*) FROM documentsWithFRdoc "
+        "WHERE docket_id = ANY(ARRAY[%s]) GROUP BY docket_id"
+    ),
+}
+
+TOP_DOCKETS_SQL = (
+    "SELECT docket_id FROM comments WHERE docket_id IS NOT NULL "
+    "GROUP BY docket_id ORDER BY count(*) DESC LIMIT %s"
+)
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def time_query(cur, sql: str, params: tuple, repeat: int) -> list[float]:
+    cur.execute(sql, params)
+    cur.fetchall()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        cur.execute(sql, params)
+        cur.fetchall()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def run(conn, dockets: list[str], repeat: int) -> dict[str, dict[str, float]]:
+    """``query name -> {"p50", "p95", "mean"}`` in milliseconds over every docket."""
+    results = {}
+    with conn.cursor() as cur:
+        for name, sql in QUERIES.items():
+            timings = []
+            for docket_id in dockets:
+                timings += time_query(cur, sql, (docket_id,), repeat)
+            results[name] = {
+                "p50": percentile(timings, 0.5),
+                "p95": percentile(timings, 0.95),
+                "mean": statistics.fmean(timings),
+            }
+    conn.rollback()
+    return results
+
+
+def format_results(results: dict, baseline: dict | None = None) -> str:
+    lines = [f"{'query':<18}{'p50 ms':>10}{'p95 ms':>10}{'mean ms':>10}"
+             + (f"{'p50 before':>12}{'speedup':>9}" if baseline else "")]
+    for name, row in results.items():
+        line = f"{name:<18}{row['p50']:>10.2f}{row['p95']:>10.2f}{row['mean']:>10.2f}"
+        if baseline and name in baseline:
+            before = baseline[name]["p50"]
+            speedup = before / row["p50"] if row["p50"] else float("inf")
+            line += f"{before:>12.2f}{speedup:>8.1f}x"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark per-docket Postgres queries.")
+    parser.add_argument("--dbname", help="Database name (default: DATABASE_URL / DB_NAME)")
+    parser.add_argument("--dockets", nargs="*", help="Docket ids to query")
+    parser.add_argument("--top", type=int, default=20, help="Sample the N most-commented dockets")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--out", type=Path, help="Write the results as JSON")
+    parser.add_argument("--compare", type=Path, help="JSON from an earlier run to compare with")
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> None:
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
+    args = parse_args(argv)
+    conn = get_connection(args.dbname)
+    try:
+        dockets = args.dockets
+        if not dockets:
+            with conn.cursor() as cur:
+                cur.execute(TOP_DOCKETS_SQL, (args.top,))
+                dockets = [d for (d,) in cur.fetchall()]
+        if not dockets:
+            log.error("No dockets with comments to benchmark")
+            return
+        log.info("Timing %d docket(s) x %d run(s)", len(dockets), args.repeat)
+        results = run(conn, dockets, args.repeat)
+    finally:
+        conn.close()
+    baseline = json.loads(args.compare.read_text()) if args.compare else None
+    print(format_results(results, baseline))
+    if args.out:
+        args.out.write_text(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
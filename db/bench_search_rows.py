@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Time and count the allocations of ``InternalLogic.search`` over a large
+candidate set, with the database and OpenSearch replaced by canned rows.
+
+``--candidates`` dockets (default 10,000) come back from
+``search_with_hits`` as raw result tuples, all of them OpenSearch hits, so
+the run covers everything the search pipeline does to a row in Python:
+building rows, match counts and totals, ranking, and paginating. Each
+``--sort`` mode is timed ``--repeat`` times after one warm-up call; p50 /
+mean latency in milliseconds and, from one ``tracemalloc`` run, the memory
+allocated and the peak are printed per mode.
+
+Compare two versions of the pipeline by saving a run from each:
+
+    git stash && python db/bench_search_rows.py --out before.json
+    git stash pop && python db/bench_search_rows.py --compare before.json
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import statistics
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from mirrsearch.combined_search import TITLE_LIMIT, split_hits
+from mirrsearch.internal_logic import InternalLogic
+
+SORT_MODES = ["relevance", "modify_date", "comment_count", "document_count"]
+
+
+class CannedDb:
+    """The ``DBLayer`` calls ``InternalLogic.search`` makes, answered from memory."""
+
+    def __init__(self, candidates: int, seed: int = 0):
+        rnd = random.Random(seed)
+        base = datetime(2020, 1, 1)
+        self.rows = []
+        self.hits = []
+        self.comment_totals = {}
+        for i in range(candidates):
+            docket_id = f"AGENCY-{2000 + i % 25}-{i:06d}"
+            refs = [{"title": "40", "cfrParts": {str(80 + i % 7): f"https://ecfr/40/{80 + i % 7}"}}]
+            self.rows.append((
+                docket_id, f"Docket {i}", f"AGENCY{i % 40}", "Rulemaking",
+                base + timedelta(hours=rnd.randint(0, 50_000)), refs,
+                rnd.randint(1, 200), i < TITLE_LIMIT,
+            ))
+            self.hits.append({
+                "docket_id": docket_id,
+                "document_match_count": rnd.randint(0, 20),
+                "comment_match_count": rnd.randint(0, 500),
+            })
+            self.comment_totals[docket_id] = rnd.randint(0, 5000)
+
+    def text_match_terms(self, terms, opensearch_client=None):  # pylint: disable=unused-argument
+        return list(self.hits)
+
+    def search_with_hits(self, query, docket_ids, *filters):  # pylint: disable=unused-argument
+        return split_hits(self.rows)
+
+    def get_comment_totals(self, docket_ids, opensearch_client=None):  # pylint: disable=unused-argument
+        return {d: self.comment_totals[d] for d in docket_ids}
+
+
+def measure(logic: InternalLogic, sort_by: str, repeat: int) -> dict[str, float]:
+    """``{"p50", "mean"}`` in milliseconds and ``{"alloc_kib", "peak_kib"}`` for one mode."""
+    logic.search("docket", sort_by=sort_by)
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        logic.search("docket", sort_by=sort_by)
+        timings.append((time.perf_counter() - start) * 1000)
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        logic.search("docket", sort_by=sort_by)
+        allocated, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        "p50": statistics.median(timings),
+        "mean": statistics.fmean(timings),
+        "alloc_kib": (allocated - before) / 1024,
+        "peak_kib": (peak - before) / 1024,
+    }
+
+
+def run(candidates: int, repeat: int, sort_modes: list[str]) -> dict[str, dict[str, float]]:
+    logic = InternalLogic("bench", db_layer=CannedDb(candidates))
+    return {mode: measure(logic, mode, repeat) for mode in sort_modes}
+
+
+def format_results(results: dict, baseline: dict | None = None) -> str:
+    lines = [f"{'sort':<16}{'p50 ms':>10}{'mean ms':>10}{'peak KiB':>11}"
+             + (f"{'p50 before':>12}{'speedup':>9}{'peak before':>13}" if baseline else "")]
+    for name, row in results.items():
+        line = f"{name:<16}{row['p50']:>10.2f}{row['mean']:>10.2f}{row['peak_kib']:>11.0f}"
+        if baseline and name in baseline:
+            before = baseline[name]
+            speedup = before["p50"] / row["p50"] if row["p50"] else float("inf")
+            line += f"{before['p50']:>12.2f}{speedup:>8.1f}x{before['peak_kib']:>13.0f}"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark the search result pipeline.")
+    parser.add_argument("--candidates", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--sort", nargs="*", choices=SORT_MODES, default=SORT_MODES)
+    parser.add_argument("--out", type=Path, help="Write the results as JSON")
+    parser.add_argument("--compare", type=Path, help="JSON from an earlier run to compare with")
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> None:
+    args = parse_args(argv)
+    results = run(args.candidates, args.repeat, args.sort)
+    baseline = json.loads(args.compare.read_text()) if args.compare else None
+    print(format_results(results, baseline))
+    if args.out:
+        args.out.write_text(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
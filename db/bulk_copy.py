@@ -0,0 +1,298 @@
+"""
+Shared COPY-based bulk writer for the ``db/`` loaders.
+
+Rows are streamed into a session temp staging table with
+``COPY ... FROM STDIN (FORMAT csv)`` and merged into the target table with a
+single ``INSERT ... SELECT ... ON CONFLICT``. Updates are change-aware: a
+conflicting row is only rewritten when some updated column IS DISTINCT FROM
+the incoming value, and each merge reports inserted / updated / unchanged
+counts (``MergeResult``). Temp tables are never WAL-logged,
+so the staging step costs no more than an unlogged table and stays private to
+the connection (safe with several loaders running at once).
+
+Typical use::
+
+    target = CopyTarget("cfrparts", ("frdocnum", "title", "cfrpart"),
+                        conflict=("frdocnum", "title", "cfrpart"))
+    result = copy_upsert(cur, target, rows)   # result.inserted, .updated, ...
+
+or, for unbounded streams, ``BulkWriter`` which flushes whenever the buffered
+rows exceed ``max_rows`` or ``max_bytes`` (``BULK_MAX_ROWS`` /
+``BULK_MAX_BYTES`` env vars by default).
+"""
+from __future__ import annotations
+
+import datetime as _dt
+import decimal
+import io
+import json
+import os
+from dataclasses import dataclass, field
+from typing import Any, Callable, Iterable, Mapping, Sequence
+
+
+def _positive_int_env(name: str, default: int) -> int:
+    raw = os.environ.get(name)
+    if raw is None or not raw.strip():
+        return default
+    try:
+        value = int(raw)
+    except ValueError:
+        return default
+    return value if value > 0 else default
+
+
+DEFAULT_MAX_ROWS = _positive_int_env("BULK_MAX_ROWS", 50_000)
+DEFAULT_MAX_BYTES = _positive_int_env("BULK_MAX_BYTES", 64 * 1024 * 1024)
+
+_NULL = "\\N"
+
+
+@dataclass(frozen=True)
+class CopyTarget:
+    """
+    Where and how staged rows are merged.
+
+    ``conflict`` — unique key columns; ``None`` means a plain INSERT.
+    ``update`` — ``None`` for ``DO NOTHING``; a sequence of columns for
+    ``col = EXCLUDED.col``; or a mapping of column → SQL expression.
+    """
+
+    table: str
+    columns: Sequence[str]
+    conflict: Sequence[str] | None = None
+    update: Sequence[str] | Mapping[str, str] | None = None
+
+    @property
+    def stage(self) -> str:
+        return f"{self.table.lower()}_stage"
+
+    def key_indexes(self) -> tuple[int, ...]:
+        if not self.conflict:
+            return ()
+        return tuple(self.columns.index(c) for c in self.conflict)
+
+
+def stage_ddl(target: CopyTarget) -> str:
+    return (
+        f"CREATE TEMP TABLE IF NOT EXISTS {target.stage} "
+        f"(LIKE {target.table} INCLUDING DEFAULTS) ON COMMIT DELETE ROWS"
+    )
+
+
+def copy_sql(target: CopyTarget) -> str:
+    return (
+        f"COPY {target.stage} ({', '.join(target.columns)}) "
+        f"FROM STDIN WITH (FORMAT csv, NULL '{_NULL}')"
+    )
+
+
+def _update_pairs(target: CopyTarget) -> list[tuple[str, str]]:
+    if target.update is None:
+        return []
+    if isinstance(target.update, Mapping):
+        return list(target.update.items())
+    return [(c, f"EXCLUDED.{c}") for c in target.update]
+
+
+def _update_clause(target: CopyTarget) -> str:
+    pairs = _update_pairs(target)
+    if not pairs:
+        return "DO NOTHING"
+    sets = ",\n".join(f"{c} = {expr}" for c, expr in pairs)
+    current = ", ".join(f"{target.table}.{c}" for c, _ in pairs)
+    incoming = ", ".join(expr for _, expr in pairs)
+    # Skip the rewrite (and its WAL / dead tuple) when nothing would change.
+    return f"DO UPDATE SET\n{sets}\nWHERE ({current}) IS DISTINCT FROM ({incoming})"
+
+
+def merge_sql(target: CopyTarget) -> str:
+    """
+    Merge the stage into ``target.table``.
+
+    With a conflict key the statement returns one row per inserted or updated
+    row: the key columns followed by ``inserted`` (``xmax = 0``). Rows left
+    unchanged, or skipped by ``DO NOTHING``, return nothing.
+    """
+    cols = ", ".join(target.columns)
+    sql = f"INSERT INTO {target.table} ({cols})\nSELECT {cols} FROM {target.stage}"
+    if target.conflict:
+        keys = ", ".join(target.conflict)
+        sql += f"\nON CONFLICT ({keys}) {_update_clause(target)}"
+        sql += f"\nRETURNING {keys}, (xmax = 0) AS inserted"
+    return sql
+
+
+@dataclass
+class MergeResult:
+    """Outcome of one or more merges; ``changed_keys`` only when requested."""
+
+    inserted: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    changed_keys: list[tuple] = field(default_factory=list)
+
+    @property
+    def changed(self) -> int:
+        return self.inserted + self.updated
+
+    @property
+    def total(self) -> int:
+        return self.inserted + self.updated + self.unchanged
+
+    def add(self, other: "MergeResult") -> "MergeResult":
+        self.inserted += other.inserted
+        self.updated += other.updated
+        self.unchanged += other.unchanged
+        self.changed_keys.extend(other.changed_keys)
+        return self
+
+    def summary(self) -> str:
+        return f"{self.inserted} inserted, {self.updated} updated, {self.unchanged} unchanged"
+
+
+def _array_literal(values: Iterable[Any]) -> str:
+    parts = []
+    for v in values:
+        if v is None:
+            parts.append("NULL")
+        else:
+            s = str(v).replace("\\", "\\\\").replace('"', '\\"')
+            parts.append(f'"{s}"')
+    return "{" + ",".join(parts) + "}"
+
+
+def csv_field(value: Any) -> str:
+    """Encode one value for ``COPY ... (FORMAT csv, NULL '\\N')``."""
+    if value is None:
+        return _NULL
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    if isinstance(value, (int, float, decimal.Decimal)):
+        return str(value)
+    if isinstance(value, (_dt.date, _dt.datetime, _dt.time)):
+        return value.isoformat()
+    if isinstance(value, (list, tuple)):
+        text = _array_literal(value)
+    elif isinstance(value, dict):
+        text = json.dumps(value)
+    else:
+        text = str(value)
+    # Quoted fields are never read as NULL, so a literal "\N" stays text.
+    return '"' + text.replace('"', '""') + '"'
+
+
+def csv_line(row: Sequence[Any]) -> str:
+    return ",".join(csv_field(v) for v in row) + "\n"
+
+
+def _copy_and_merge(
+    cur: Any,
+    target: CopyTarget,
+    lines: Iterable[str],
+    n_rows: int,
+    before_merge: Callable[[Any, CopyTarget], None] | None,
+    keep_keys: bool,
+) -> MergeResult:
+    cur.execute(stage_ddl(target))
+    cur.execute(f"TRUNCATE {target.stage}")
+    buf = io.StringIO("".join(lines))
+    cur.copy_expert(copy_sql(target), buf)
+    if before_merge is not None:
+        before_merge(cur, target)
+    cur.execute(merge_sql(target))
+    if not target.conflict:
+        return MergeResult(inserted=n_rows)
+
+    result = MergeResult()
+    n_keys = len(target.conflict)
+    for row in cur.fetchall():
+        if row[n_keys]:
+            result.inserted += 1
+        else:
+            result.updated += 1
+        if keep_keys:
+            result.changed_keys.append(tuple(row[:n_keys]))
+    result.unchanged = n_rows - result.changed
+    return result
+
+
+@dataclass
+class BulkWriter:
+    """
+    Buffer rows for ``target`` and COPY/merge them in memory-bounded batches.
+
+    Rows sharing a conflict key are collapsed (last one wins) before the merge,
+    since ``ON CONFLICT DO UPDATE`` cannot touch the same row twice in one
+    statement. ``before_merge(cur, target)`` runs after COPY and before the
+    merge, e.g. to fix up staged rows with set-based SQL. Counts accumulate in
+    ``result``; set ``keep_keys`` to also collect the conflict keys of rows
+    that were inserted or updated. The caller owns the transaction; ``flush``
+    does not commit.
+    """
+
+    cur: Any
+    target: CopyTarget
+    max_rows: int = DEFAULT_MAX_ROWS
+    max_bytes: int = DEFAULT_MAX_BYTES
+    before_merge: Callable[[Any, CopyTarget], None] | None = None
+    on_flush: Callable[[int, MergeResult], None] | None = None
+    keep_keys: bool = False
+    result: MergeResult = field(default_factory=MergeResult)
+    _buffer: dict[Any, str] = field(default_factory=dict, repr=False)
+    _bytes: int = 0
+
+    def add(self, row: Sequence[Any]) -> None:
+        line = csv_line(row)
+        idx = self.target.key_indexes()
+        key = tuple(row[i] for i in idx) if idx else len(self._buffer)
+        old = self._buffer.pop(key, None)
+        if old is not None:
+            self._bytes -= len(old)
+        self._buffer[key] = line
+        self._bytes += len(line)
+        if len(self._buffer) >= self.max_rows or self._bytes >= self.max_bytes:
+            self.flush()
+
+    def extend(self, rows: Iterable[Sequence[Any]]) -> None:
+        for row in rows:
+            self.add(row)
+
+    def flush(self) -> MergeResult:
+        """COPY buffered rows and merge them; returns this batch's result."""
+        if not self._buffer:
+            return MergeResult()
+        n_rows = len(self._buffer)
+        batch = _copy_and_merge(
+            self.cur, self.target, self._buffer.values(), n_rows,
+            self.before_merge, self.keep_keys,
+        )
+        self._buffer.clear()
+        self._bytes = 0
+        self.result.add(batch)
+        if self.on_flush is not None:
+            self.on_flush(n_rows, batch)
+        return batch
+
+    def pending(self) -> int:
+        return len(self._buffer)
+
+
+def copy_upsert(
+    cur: Any,
+    target: CopyTarget,
+    rows: Iterable[Sequence[Any]],
+    *,
+    before_merge: Callable[[Any, CopyTarget], None] | None = None,
+    keep_keys: bool = False,
+    max_rows: int = DEFAULT_MAX_ROWS,
+    max_bytes: int = DEFAULT_MAX_BYTES,
+) -> MergeResult:
+    """Stage and merge ``rows`` into ``target``; returns the merged counts."""
+    writer = BulkWriter(
+        cur, target, max_rows=max_rows, max_bytes=max_bytes,
+        before_merge=before_merge, keep_keys=keep_keys,
+    )
+    writer.extend(rows)
+    writer.flush()
+    return writer.result
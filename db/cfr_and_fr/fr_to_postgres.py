@@ -25,13 +25,18 @@ import json
 import os
 import re
 import sys
+from pathlib import Path
+
+# Shared helpers live one level up in db/.
+_DB_DIR = Path(__file__).resolve().parent.parent
+if str(_DB_DIR) not in sys.path:
+    sys.path.insert(0, str(_DB_DIR))
+
+from bulk_copy import CopyTarget, copy_upsert
+from fr_client import get_fr_client
 
 # ── Dependency check ──────────────────────────────────────────────────────────
 missing_packages = []
-try:
-    import requests
-except ImportError:
-    missing_packages.append("requests")
 try:
     import psycopg2
     from psycopg2 import sql
@@ -53,7 +58,6 @@ if missing_packages:
 
 APP_DB_NAME = "frtocfr"
 TABLE_NAME  = "cfr_references"
-FR_API_URL  = "https://www.federalregister.gov/api/v1/documents/{doc_number}.json"
 
 
 # ── .env / DB helpers ─────────────────────────────────────────────────────────
@@ -197,23 +201,14 @@ def ensure_table_exists(conn):
 # ── Federal Register API ──────────────────────────────────────────────────────
 
 def fetch_cfr_references(fr_doc_number: str) -> list[dict]:
-    url     = FR_API_URL.format(doc_number=fr_doc_number)
-    params  = {"fields[]": "cfr_references"}
-    headers = {"accept": "*/*"}
-
+    # Full documents go through the shared cache, so prefetch + re-runs stay offline.
     print(f"  Fetching CFR references for FR doc: {fr_doc_number} ...")
-    try:
-        response = requests.get(url, params=params, headers=headers, timeout=30)
-    except requests.ConnectionError:
-        print("  ERROR: Could not reach the Federal Register API.")
+    doc = get_fr_client().get_document(fr_doc_number)
+    if not doc:
+        print(f"  ERROR: FR doc '{fr_doc_number}' not found or API unreachable.")
         return []
 
-    if response.status_code == 404:
-        print(f"  ERROR: FR doc '{fr_doc_number}' not found.")
-        return []
-
-    response.raise_for_status()
-    cfr_refs = response.json().get("cfr_references", [])
+    cfr_refs = doc.get("cfr_references") or []
     if not cfr_refs:
         print("  WARNING: No CFR references found for this document.")
     return cfr_refs
@@ -221,12 +216,10 @@ def fetch_cfr_references(fr_doc_number: str) -> list[dict]:
 
 # ── DB insert ─────────────────────────────────────────────────────────────────
 
-def insert_references(conn, docket_id: str, cfr_refs: list[dict]) -> int:
-    insert_sql = sql.SQL("""
-        INSERT INTO {table} (docket_id, cfr_title, cfr_section)
-        VALUES (%s, %s, %s)
-    """).format(table=sql.Identifier(TABLE_NAME))
+REFERENCES_TARGET = CopyTarget(TABLE_NAME, ("docket_id", "cfr_title", "cfr_section"))
 
+
+def insert_references(conn, docket_id: str, cfr_refs: list[dict]) -> int:
     rows = []
     for ref in cfr_refs:
         title = ref.get("title")
@@ -241,7 +234,7 @@ def insert_references(conn, docket_id: str, cfr_refs: list[dict]) -> int:
         return 0
 
     with conn.cursor() as cur:
-        cur.executemany(insert_sql, rows)
+        copy_upsert(cur, REFERENCES_TARGET, rows)
     conn.commit()
     return len(rows)
 
@@ -464,6 +457,12 @@ def main():
     ensure_table_exists(conn)
     print(f"Table '{TABLE_NAME}' is ready.\n")
 
+    # Fetch every FR doc concurrently up front; process_entry then reads the cache.
+    fr_client = get_fr_client()
+    for _ in fr_client.get_documents(fr_doc for fr_doc, _docket in entries):
+        pass
+    print(f"Federal Register API: {fr_client.stats.summary()}\n")
+
     # Process each entry
     total_rows = 0
     for idx, (fr_doc, docket_id) in enumerate(entries, start=1):
@@ -5,58 +5,93 @@ Stream-load Federal Register bulk JSON into FR-native Postgres tables.
 Usage:
     python db/cfr_and_fr/load_fr_bulk.py
     python db/cfr_and_fr/load_fr_bulk.py /path/to/documents.json
+    python db/cfr_and_fr/load_fr_bulk.py --workers 8 /path/to/documents.json
+    python db/cfr_and_fr/load_fr_bulk.py /path/to/split/          # *.jsonl / *.jsonl.gz
+
+The input is cut into independent shards that are parsed in parallel worker
+processes (C ijson backend), each writing through its own connection:
+
+- a JSON array (documents.json) is split into byte ranges at top-level record
+  boundaries; a boundary is proposed where a whole object carrying a
+  ``document_number`` starts, and kept only once the bytes before it are
+  checked to close every string, object and array they open (so it sits at
+  array depth 1, not inside a nested ``{...}, {...}`` list); if that check
+  fails the file is loaded as a single shard;
+- an uncompressed .jsonl file is split into byte ranges at newlines;
+- each .jsonl.gz file (or every *.jsonl / *.jsonl.gz in a directory) is one
+  pre-split shard.
+
+Upserts are ``ON CONFLICT DO NOTHING``, so re-running after an interruption
+is safe. Progress is printed as shards finish.
 """
 
 from __future__ import annotations
 
 import argparse
+import gzip
+import io
+import json
 import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Any
+from typing import Any, BinaryIO, Iterator
 
 import ijson
 import psycopg2
-from psycopg2.extras import execute_values
+import psycopg2.errors
 from dotenv import load_dotenv
 
-
-BATCH_SIZE = 500
-PROGRESS_EVERY = 10_000
-
-
-INSERT_FR_DOCUMENTS_SQL = """
-INSERT INTO federal_register_documents (
-    document_number,
-    document_id,
-    document_title,
-    document_type,
-    abstract,
-    publication_date,
-    effective_on,
-    docket_ids,
-    agency_id,
-    agency_names,
-    topics,
-    significant,
-    regulation_id_numbers,
-    html_url,
-    pdf_url,
-    json_url,
-    start_page,
-    end_page
+# Shared helpers live one level up in db/.
+_DB_DIR = Path(__file__).resolve().parent.parent
+if str(_DB_DIR) not in sys.path:
+    sys.path.insert(0, str(_DB_DIR))
+
+from bulk_copy import CopyTarget, copy_upsert
+from docket_cfr import refresh_for_frdocnums
+from ingest_federal_registry_document import CFRPARTS_TARGET
+
+
+BATCH_SIZE = int(os.getenv("FR_BULK_BATCH_SIZE", "5000"))
+DEFAULT_WORKERS = int(os.getenv("FR_BULK_WORKERS", str(min(8, os.cpu_count() or 1))))
+SHARDS_PER_WORKER = 4
+DEADLOCK_RETRIES = 3
+# Largest single record the boundary probe will try to decode.
+MAX_RECORD_BYTES = 64 * 1024 * 1024
+# Bytes read at a time when checking a shard boundary's depth.
+VERIFY_BLOCK_BYTES = 16 * 1024 * 1024
+
+
+FR_DOCUMENTS_TARGET = CopyTarget(
+    "federal_register_documents",
+    (
+        "document_number",
+        "document_id",
+        "document_title",
+        "document_type",
+        "abstract",
+        "publication_date",
+        "effective_on",
+        "docket_ids",
+        "agency_id",
+        "agency_names",
+        "topics",
+        "significant",
+        "regulation_id_numbers",
+        "html_url",
+        "pdf_url",
+        "json_url",
+        "start_page",
+        "end_page",
+    ),
+    conflict=("document_number",),
 )
-VALUES %s
-ON CONFLICT (document_number) DO NOTHING
-"""
-
-INSERT_CFRPARTS_SQL = """
-INSERT INTO cfrparts (frdocnum, title, cfrpart)
-VALUES %s
-ON CONFLICT (frdocnum, title, cfrpart) DO NOTHING
-"""
 
 
-def parse_args() -> argparse.Namespace:
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
     parser = argparse.ArgumentParser(
         description="Load Federal Register bulk JSON into PostgreSQL tables."
     )
@@ -64,9 +99,24 @@ def parse_args() -> argparse.Namespace:
         "json_path",
         nargs="?",
         default="documents.json",
-        help="Path to FR bulk JSON file (default: documents.json)",
+        help=(
+            "FR bulk JSON array, a .jsonl / .jsonl.gz file, or a directory of "
+            "pre-split .jsonl(.gz) files (default: documents.json)"
+        ),
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=DEFAULT_WORKERS,
+        help="Parser/writer processes, one DB connection each (default: %(default)s)",
     )
-    return parser.parse_args()
+    parser.add_argument(
+        "--shards",
+        type=int,
+        default=None,
+        help=f"Byte-range shards to cut a single file into (default: {SHARDS_PER_WORKER} x workers)",
+    )
+    return parser.parse_args(argv)
 
 
 def load_environment() -> None:
@@ -168,67 +218,342 @@ def flush_batch(
     conn: Any,
     doc_rows: list[tuple[Any, ...]],
     cfr_rows: list[tuple[Any, ...]],
-) -> int:
+) -> None:
     if doc_rows:
-        execute_values(
-            cur, INSERT_FR_DOCUMENTS_SQL, doc_rows, page_size=BATCH_SIZE
-        )
+        copy_upsert(cur, FR_DOCUMENTS_TARGET, doc_rows)
     if cfr_rows:
-        execute_values(
-            cur, INSERT_CFRPARTS_SQL, cfr_rows, page_size=BATCH_SIZE * 4
-        )
+        copy_upsert(cur, CFRPARTS_TARGET, cfr_rows)
+        refresh_for_frdocnums(cur, (r[0] for r in cfr_rows))
     conn.commit()
-    return 0
 
 
-def main() -> None:
-    args = parse_args()
-    json_path = Path(args.json_path).expanduser().resolve()
-    if not json_path.exists():
-        raise SystemExit(f"JSON file not found: {json_path}")
+def _ijson_backend() -> Any:
+    try:
+        return ijson.get_backend("yajl2_c")
+    except ImportError:
+        return ijson
+
+
+@dataclass(frozen=True)
+class Shard:
+    """``kind`` is ``array`` (elements of a JSON array) or ``jsonl``; ``end=None`` reads to EOF."""
+
+    path: str
+    kind: str
+    start: int = 0
+    end: int | None = None
+
+    def __str__(self) -> str:
+        return f"{Path(self.path).name}[{self.start}:{'' if self.end is None else self.end}]"
+
+
+@dataclass
+class ShardStats:
+    shard: str
+    processed: int = 0
+    skipped: int = 0
+    error: str | None = None
+
+
+class _RangeReader(io.RawIOBase):
+    """Bytes ``[start, end)`` of a file, optionally wrapped in ``prefix`` / ``suffix``."""
+
+    def __init__(self, handle: BinaryIO, start: int, end: int, prefix: bytes = b"", suffix: bytes = b""):
+        super().__init__()
+        handle.seek(start)
+        self._handle = handle
+        self._remaining = end - start
+        self._pending = [prefix]
+        self._suffix = suffix
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buf: Any) -> int:
+        while self._pending and not self._pending[0]:
+            self._pending.pop(0)
+        if self._pending:
+            chunk = self._pending.pop(0)
+        elif self._remaining > 0:
+            chunk = self._handle.read(min(len(buf), self._remaining))
+            self._remaining -= len(chunk)
+            if not chunk:
+                self._remaining = 0
+        elif self._suffix:
+            chunk, self._suffix = self._suffix, b""
+        else:
+            return 0
+        if len(chunk) > len(buf):
+            self._pending.insert(0, chunk[len(buf):])
+            chunk = chunk[:len(buf)]
+        buf[:len(chunk)] = chunk
+        return len(chunk)
+
+
+_WS = b" \t\r\n"
+_RECORD_GAP = re.compile(rb"\}\s*,\s*\{")
+_JSON_STRING = re.compile(rb'"[^"\\]*(?:\\.[^"\\]*)*"')
+
+
+def _array_bounds(handle: BinaryIO, size: int) -> tuple[int, int]:
+    """Offsets just inside the outer ``[`` and at the closing ``]``."""
+    handle.seek(0)
+    head = handle.read(4096)
+    if not head.lstrip(_WS).startswith(b"["):
+        raise SystemExit("Expected a JSON array (or use .jsonl / .jsonl.gz input)")
+    tail_at = max(0, size - 4096)
+    handle.seek(tail_at)
+    return head.index(b"[") + 1, tail_at + handle.read().rindex(b"]")
+
+
+def _is_record_start(handle: BinaryIO, offset: int, limit: int) -> bool:
+    """True if a whole top-level FR document object starts at ``offset``."""
+    decoder = json.JSONDecoder()
+    window = 1 << 16
+    while True:
+        handle.seek(offset)
+        data = handle.read(min(window, limit - offset))
+        try:
+            obj, used = decoder.raw_decode(data.decode("utf-8", errors="replace"))
+        except json.JSONDecodeError:
+            if window >= MAX_RECORD_BYTES or offset + window >= limit:
+                return False
+            window *= 4
+            continue
+        if not isinstance(obj, dict) or "document_number" not in obj:
+            return False
+        rest = data.decode("utf-8", errors="replace")[used:].lstrip()
+        return rest.startswith(",") or (rest == "" and offset + len(data) >= limit)
+
+
+def _next_record_start(handle: BinaryIO, offset: int, limit: int) -> tuple[int, int] | None:
+    """``(comma, brace)`` offsets of the first top-level record boundary at or after ``offset``."""
+    step = 1 << 20
+    pos = offset
+    while pos < limit:
+        handle.seek(pos)
+        chunk = handle.read(min(step + 64, limit - pos))
+        for match in _RECORD_GAP.finditer(chunk):
+            if match.start() >= step:
+                break
+            brace = pos + match.end() - 1
+            if _is_record_start(handle, brace, limit):
+                return pos + match.start() + match.group().index(b","), brace
+        pos += step
+    return None
 
-    load_environment()
-
-    processed = 0
-    skipped = 0
 
+def _closes_every_value(path: str, start: int, end: int) -> bool:
+    """
+    True if bytes ``[start, end)`` close every string, object and array they
+    open, so ``end`` is at the same depth as ``start``.
+    """
+    depth = 0
+    carry = b""
+    with open(path, "rb") as handle:
+        handle.seek(start)
+        remaining = end - start
+        while remaining > 0:
+            block = handle.read(min(VERIFY_BLOCK_BYTES, remaining))
+            if not block:
+                return False
+            remaining -= len(block)
+            data = carry + block
+            bare = _JSON_STRING.sub(b"", data)
+            # A quote left over opens a string that runs into the next block.
+            open_at = bare.find(b'"')
+            if open_at < 0:
+                open_at = len(bare)
+            carry = data[len(data) - (len(bare) - open_at):]
+            bare = bare[:open_at]
+            depth += bare.count(b"{") + bare.count(b"[") - bare.count(b"}") - bare.count(b"]")
+    return depth == 0 and not carry
+
+
+def _cuts_verified(ranges: list[Shard], workers: int) -> bool:
+    """
+    Whether every cut is between top-level records: the first range starts
+    inside the outer array, so it holds if each range before a cut closes
+    everything it opens.
+    """
+    checks = [(shard.path, shard.start, shard.end) for shard in ranges[:-1]]
+    if workers <= 1:
+        return all(_closes_every_value(*check) for check in checks)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return all(pool.map(_closes_every_value, *zip(*checks)))
+
+
+def split_json_array(path: Path, shards: int, workers: int = 1) -> list[Shard]:
+    size = path.stat().st_size
+    with path.open("rb") as handle:
+        start, end = _array_bounds(handle, size)
+        cuts: list[tuple[int, int]] = []
+        for i in range(1, shards):
+            target = start + (end - start) * i // shards
+            if cuts and target <= cuts[-1][1]:
+                continue
+            found = _next_record_start(handle, target, end)
+            if found is None:
+                break
+            if not cuts or found[1] > cuts[-1][1]:
+                cuts.append(found)
+    ranges = []
+    begin = start
+    for comma, brace in cuts:
+        ranges.append(Shard(str(path), "array", begin, comma))
+        begin = brace
+    ranges.append(Shard(str(path), "array", begin, end))
+    if len(ranges) > 1 and not _cuts_verified(ranges, workers):
+        print(f"Could not verify shard boundaries in {path.name}; loading it as one shard.")
+        return [Shard(str(path), "array", start, end)]
+    return ranges
+
+
+def split_jsonl(path: Path, shards: int) -> list[Shard]:
+    size = path.stat().st_size
+    offsets = [0]
+    with path.open("rb") as handle:
+        for i in range(1, shards):
+            target = size * i // shards
+            if target <= offsets[-1]:
+                continue
+            handle.seek(target)
+            handle.readline()
+            if handle.tell() >= size:
+                break
+            if handle.tell() > offsets[-1]:
+                offsets.append(handle.tell())
+    offsets.append(size)
+    return [Shard(str(path), "jsonl", a, b) for a, b in zip(offsets, offsets[1:])]
+
+
+def plan_shards(json_path: Path, shards: int, workers: int = 1) -> list[Shard]:
+    if json_path.is_dir():
+        files = sorted(
+            p for p in json_path.iterdir()
+            if p.name.endswith(".jsonl") or p.name.endswith(".jsonl.gz")
+        )
+        if not files:
+            raise SystemExit(f"No .jsonl or .jsonl.gz files in {json_path}")
+        return [Shard(str(p), "jsonl") for p in files]
+    if json_path.name.endswith(".gz"):
+        return [Shard(str(json_path), "jsonl")]
+    if json_path.suffix == ".jsonl":
+        return split_jsonl(json_path, shards)
+    return split_json_array(json_path, shards, workers)
+
+
+def iter_shard_docs(shard: Shard) -> Iterator[Any]:
+    backend = _ijson_backend()
+    path = Path(shard.path)
+    if path.name.endswith(".gz"):
+        with gzip.open(path, "rb") as handle:
+            yield from backend.items(handle, "", multiple_values=True)
+        return
+    with path.open("rb") as handle:
+        end = path.stat().st_size if shard.end is None else shard.end
+        if shard.kind == "array":
+            reader = _RangeReader(handle, shard.start, end, b"[", b"]")
+            yield from backend.items(io.BufferedReader(reader), "item")
+        else:
+            reader = _RangeReader(handle, shard.start, end)
+            yield from backend.items(io.BufferedReader(reader), "", multiple_values=True)
+
+
+def _flush_with_retry(
+    cur: Any,
+    conn: Any,
+    doc_rows: list[tuple[Any, ...]],
+    cfr_rows: list[tuple[Any, ...]],
+) -> None:
+    for attempt in range(DEADLOCK_RETRIES):
+        try:
+            flush_batch(cur, conn, doc_rows, cfr_rows)
+            return
+        except psycopg2.errors.DeadlockDetected:
+            conn.rollback()
+            if attempt == DEADLOCK_RETRIES - 1:
+                raise
+            time.sleep(0.1 * (attempt + 1))
+
+
+def load_shard(shard: Shard, config: dict[str, Any]) -> ShardStats:
+    """Worker entry point: parse one shard and upsert it through its own connection."""
+    stats = ShardStats(str(shard))
     doc_rows: list[tuple[Any, ...]] = []
     cfr_rows: list[tuple[Any, ...]] = []
-
-    print(f"Loading: {json_path}")
-    print("Starting stream parse + batch insert...")
-
-    conn = psycopg2.connect(**db_config())
+    conn = psycopg2.connect(**config)
     try:
-        with conn.cursor() as cur, json_path.open("rb") as handle:
-            for doc in ijson.items(handle, "item"):
-                processed += 1
-                row = build_document_row(doc)
+        with conn.cursor() as cur:
+            for doc in iter_shard_docs(shard):
+                stats.processed += 1
+                row = build_document_row(doc) if isinstance(doc, dict) else None
                 if row is None:
-                    skipped += 1
-                else:
-                    doc_rows.append(row)
-                    cfr_rows.extend(build_cfr_rows(doc, row[0]))
-
+                    stats.skipped += 1
+                    continue
+                doc_rows.append(row)
+                cfr_rows.extend(build_cfr_rows(doc, row[0]))
                 if len(doc_rows) >= BATCH_SIZE:
-                    flush_batch(cur, conn, doc_rows, cfr_rows)
+                    _flush_with_retry(cur, conn, doc_rows, cfr_rows)
                     doc_rows.clear()
                     cfr_rows.clear()
-
-                if processed % PROGRESS_EVERY == 0:
-                    print(
-                        f"processed={processed:,} skipped={skipped:,}"
-                    )
-
             if doc_rows:
-                flush_batch(cur, conn, doc_rows, cfr_rows)
-                doc_rows.clear()
-                cfr_rows.clear()
-
-        print("Load complete.")
-        print(f"processed={processed:,} skipped={skipped:,}")
+                _flush_with_retry(cur, conn, doc_rows, cfr_rows)
+    except (ijson.JSONError, ValueError, psycopg2.Error) as exc:
+        conn.rollback()
+        stats.error = f"{type(exc).__name__}: {exc}"
     finally:
         conn.close()
+    return stats
+
+
+def run(shards: list[Shard], config: dict[str, Any], workers: int) -> tuple[int, int, list[ShardStats]]:
+    processed = 0
+    skipped = 0
+    failed: list[ShardStats] = []
+    done = 0
+
+    def report(stats: ShardStats) -> None:
+        nonlocal processed, skipped, done
+        done += 1
+        processed += stats.processed
+        skipped += stats.skipped
+        if stats.error:
+            failed.append(stats)
+            print(f"shard {stats.shard} FAILED: {stats.error}")
+        print(f"shards={done}/{len(shards)} processed={processed:,} skipped={skipped:,}")
+
+    if workers <= 1:
+        for shard in shards:
+            report(load_shard(shard, config))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(load_shard, shard, config) for shard in shards]
+            for future in as_completed(futures):
+                report(future.result())
+    return processed, skipped, failed
+
+
+def main(argv: list[str] | None = None) -> None:
+    args = parse_args(argv)
+    json_path = Path(args.json_path).expanduser().resolve()
+    if not json_path.exists():
+        raise SystemExit(f"JSON file not found: {json_path}")
+
+    load_environment()
+
+    workers = max(1, args.workers)
+    shard_count = args.shards or workers * SHARDS_PER_WORKER
+    print(f"Loading: {json_path}")
+    shards = plan_shards(json_path, shard_count, workers)
+    print(f"Starting parallel parse + batch insert: {len(shards)} shard(s), {workers} worker(s)...")
+
+    processed, skipped, failed = run(shards, db_config(), workers)
+
+    print("Load complete." if not failed else f"Load finished with {len(failed)} failed shard(s).")
+    print(f"processed={processed:,} skipped={skipped:,}")
+    if failed:
+        raise SystemExit(1)
 
 
 if __name__ == "__main__":
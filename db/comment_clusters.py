@@ -0,0 +1,152 @@
+"""
+Near-duplicate (form-letter) clustering for comment text.
+
+Mass comment campaigns post thousands of copies of the same letter, sometimes
+with a name or a sentence changed. ``FormLetterClusterer`` groups them in one
+streaming pass so ingest can index a single representative per group:
+
+- text is normalised (lower-case word tokens) and split into word shingles;
+- each comment gets a MinHash signature using one-permutation hashing: every
+  shingle is hashed once and the hash picks one of ``num_perm`` bins, each
+  bin keeping its minimum value;
+- signatures are banded (LSH) so a new comment is only compared with
+  representatives that share at least one band;
+- a candidate joins a cluster when its estimated Jaccard similarity with the
+  representative is at least ``threshold``; exact normalised duplicates join
+  without any comparison.
+
+The first comment of a cluster is its representative, so the result depends
+on input order (ingest feeds comments in sorted file order, which keeps it
+stable across runs). State is per docket: create one clusterer per docket.
+
+Usage::
+
+    clusterer = FormLetterClusterer()
+    for comment_id, text in comments:
+        cluster_id = clusterer.assign(comment_id, text)
+    clusterer.sizes()   # {representative_id: member count incl. itself}, sizes > 1
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+import re
+from typing import Iterable
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+_EMPTY = (1 << 64) - 1
+
+
+def _float_env(name: str, default: float) -> float:
+    try:
+        value = float(os.environ.get(name, default))
+    except ValueError:
+        return default
+    return value if 0 < value <= 1 else default
+
+
+DEFAULT_THRESHOLD = _float_env("COMMENT_CLUSTER_THRESHOLD", 0.8)
+DEFAULT_NUM_PERM = 64
+DEFAULT_BANDS = 16
+DEFAULT_SHINGLE = 3
+
+
+def tokens(text: str) -> list[str]:
+    return _TOKEN.findall(text.lower())
+
+
+def shingles(words: list[str], size: int = DEFAULT_SHINGLE) -> set[str]:
+    """Word ``size``-grams; a text shorter than ``size`` words is a single shingle."""
+    if len(words) <= size:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+def _hash64(value: str) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def signature(items: Iterable[str], num_perm: int = DEFAULT_NUM_PERM) -> tuple[int, ...]:
+    """One-permutation MinHash: one hash per shingle, minimum kept per bin."""
+    bins = [_EMPTY] * num_perm
+    for item in items:
+        h = _hash64(item)
+        b, v = h % num_perm, h // num_perm
+        if v < bins[b]:
+            bins[b] = v
+    return tuple(bins)
+
+
+def similarity(a: tuple[int, ...], b: tuple[int, ...]) -> float:
+    """Estimated Jaccard similarity of two signatures (bins empty in both are ignored)."""
+    same = used = 0
+    for x, y in zip(a, b):
+        if x == _EMPTY and y == _EMPTY:
+            continue
+        used += 1
+        same += x == y
+    return same / used if used else 0.0
+
+
+class FormLetterClusterer:
+    """Streaming MinHash/LSH clustering; ``assign`` returns the comment's cluster id."""
+
+    def __init__(
+        self,
+        threshold: float = DEFAULT_THRESHOLD,
+        num_perm: int = DEFAULT_NUM_PERM,
+        bands: int = DEFAULT_BANDS,
+        shingle_size: int = DEFAULT_SHINGLE,
+    ):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        self._exact: dict[str, str] = {}
+        self._buckets: dict[tuple, list[str]] = {}
+        self._signatures: dict[str, tuple[int, ...]] = {}
+        self._sizes: dict[str, int] = {}
+
+    def _band_keys(self, sig: tuple[int, ...]) -> list[tuple]:
+        r = self.rows
+        return [(i, sig[i * r:(i + 1) * r]) for i in range(self.bands)]
+
+    def assign(self, comment_id: str, text: str | None) -> str:
+        words = tokens(text or "")
+        if not words:
+            self._sizes.setdefault(comment_id, 1)
+            return comment_id
+        digest = hashlib.sha1(" ".join(words).encode("utf-8")).hexdigest()
+        rep = self._exact.get(digest)
+        if rep is None:
+            sig = signature(shingles(words, self.shingle_size), self.num_perm)
+            keys = self._band_keys(sig)
+            rep = self._best_candidate(sig, keys)
+            if rep is None:
+                rep = comment_id
+                self._signatures[rep] = sig
+                for key in keys:
+                    self._buckets.setdefault(key, []).append(rep)
+            self._exact[digest] = rep
+        self._sizes[rep] = self._sizes.get(rep, 0) + 1
+        return rep
+
+    def _best_candidate(self, sig: tuple[int, ...], keys: list[tuple]) -> str | None:
+        best, best_score = None, self.threshold
+        seen: set[str] = set()
+        for key in keys:
+            for rep in self._buckets.get(key, ()):
+                if rep in seen:
+                    continue
+                seen.add(rep)
+                score = similarity(sig, self._signatures[rep])
+                if score >= best_score:
+                    best, best_score = rep, score
+        return best
+
+    def sizes(self) -> dict[str, int]:
+        """Representative id → member count (including itself) for clusters of two or more."""
+        return {rep: n for rep, n in self._sizes.items() if n > 1}
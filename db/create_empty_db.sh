@@ -65,6 +65,9 @@ createdb "$DB_NAME"
 echo "Loading schema..."
 psql -q -d "$DB_NAME" -f "$SCHEMA_FILE"
 
+echo "Applying migrations..."
+python3 "$SCRIPT_DIR/migrate.py" --dbname "$DB_NAME"
+
 # Verify: expect all 9 tables from schema-postgres.sql
 TABLES=$(psql -d "$DB_NAME" -tAc "SELECT count(*) FROM information_schema.tables WHERE table_schema='public' AND table_name IN ('dockets','documentswithfrdoc','comments','links','cfrparts','federal_register_documents','users','collections','collection_dockets','admins','authorized_users');")
 echo "Created $TABLES tables."
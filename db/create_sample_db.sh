@@ -55,9 +55,15 @@ createdb "$DB_NAME"
 echo "Loading schema..."
 psql -v ON_ERROR_STOP=1 -d "$DB_NAME" -f "$SCHEMA_FILE"
 
+echo "Applying migrations..."
+python3 "$SCRIPT_DIR/migrate.py" --dbname "$DB_NAME"
+
 echo "Loading sample data..."
 psql -v ON_ERROR_STOP=1 -d "$DB_NAME" -f "$SAMPLE_FILE"
 
+echo "Building docket_cfr..."
+python3 "$SCRIPT_DIR/docket_cfr.py" --dbname "$DB_NAME"
+
 # Verify: tables that have sample data should have rows.
 TABLES=("dockets" "documentsWithFRdoc" "links" "cfrparts" "federal_register_documents")
 for table_name in "${TABLES[@]}"; do
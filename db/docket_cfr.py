@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Maintain ``docket_cfr``, the denormalised docket → CFR part (+ eCFR link) map.
+
+Search, hydration and CFR filters read ``docket_cfr`` instead of joining
+``dockets → documentsWithFRdoc → cfrparts → links`` per query. The table is
+derived data; the loaders that change its inputs refresh the affected rows
+in the same transaction:
+
+- ``refresh_for_frdocnums`` after ``cfrparts`` rows are written
+  (``ingest_federal_registry_document``, ``cfr_and_fr/load_fr_bulk``);
+- ``refresh_for_dockets`` after a docket's documents are upserted
+  (``ingest_docket``), replacing that docket's rows;
+- ``refresh_links`` after ``links`` rows are written (``populate_links``).
+
+``db/migrations/0003_docket_cfr.sql`` creates the table and backfills it.
+Data loaded with plain SQL (``sample-data.sql``) bypasses the loaders; rebuild
+the whole map afterwards with:
+
+    python db/docket_cfr.py --dbname mirrulations
+"""
+from __future__ import annotations
+
+import argparse
+import logging
+from typing import Any, Iterable
+
+from migrate import get_connection
+
+log = logging.getLogger(__name__)
+
+_SELECT_MAPPINGS = """
+    SELECT DISTINCT doc.docket_id, cp.title, cp.cfrpart, l.link
+    FROM cfrparts cp
+    JOIN documentsWithFRdoc doc ON doc.frdocnum = cp.frdocnum
+    JOIN dockets d ON d.docket_id = doc.docket_id
+    LEFT JOIN links l ON l.title = cp.title AND l.cfrpart = cp.cfrpart
+"""
+
+_UPSERT = (
+    "INSERT INTO docket_cfr (docket_id, title, cfrpart, link) {select} "
+    "ON CONFLICT (docket_id, title, cfrpart) DO UPDATE SET link = EXCLUDED.link "
+    "WHERE docket_cfr.link IS DISTINCT FROM EXCLUDED.link"
+)
+
+REFRESH_FRDOCNUMS_SQL = _UPSERT.format(select=_SELECT_MAPPINGS + " WHERE cp.frdocnum = ANY(%s)")
+REFRESH_DOCKETS_SQL = _UPSERT.format(select=_SELECT_MAPPINGS + " WHERE doc.docket_id = ANY(%s)")
+REBUILD_SQL = _UPSERT.format(select=_SELECT_MAPPINGS)
+REFRESH_LINKS_SQL = """
+    UPDATE docket_cfr dc SET link = l.link
+    FROM links l
+    WHERE l.title = dc.title AND l.cfrpart = dc.cfrpart
+      AND dc.title = ANY(%s)
+      AND dc.link IS DISTINCT FROM l.link
+"""
+
+
+def _distinct(values: Iterable[Any]) -> list[str]:
+    return sorted({str(v) for v in values if v})
+
+
+def refresh_for_frdocnums(cur: Any, frdocnums: Iterable[str]) -> None:
+    """Add (or re-link) the mappings reachable from these FR document numbers."""
+    keys = _distinct(frdocnums)
+    if keys:
+        cur.execute(REFRESH_FRDOCNUMS_SQL, (keys,))
+
+
+def refresh_for_dockets(cur: Any, docket_ids: Iterable[str]) -> None:
+    """Rebuild the mappings of these dockets (drops ones no longer reachable)."""
+    keys = _distinct(docket_ids)
+    if keys:
+        cur.execute("DELETE FROM docket_cfr WHERE docket_id = ANY(%s)", (keys,))
+        cur.execute(REFRESH_DOCKETS_SQL, (keys,))
+
+
+def refresh_links(cur: Any, titles: Iterable[str]) -> None:
+    """Copy current ``links.link`` onto the mappings of these CFR titles."""
+    keys = _distinct(titles)
+    if keys:
+        cur.execute(REFRESH_LINKS_SQL, (keys,))
+
+
+def rebuild_all(conn) -> None:
+    """Recompute every mapping, dropping ones whose sources are gone."""
+    with conn.cursor() as cur:
+        cur.execute("DELETE FROM docket_cfr")
+        cur.execute(REBUILD_SQL)
+        log.info("docket_cfr rebuilt: %d mapping(s)", max(cur.rowcount, 0))
+    conn.commit()
+
+
+def main(argv: list[str] | None = None) -> None:
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
+    parser = argparse.ArgumentParser(description="Rebuild the docket_cfr mapping table.")
+    parser.add_argument("--dbname", help="Database name (default: DATABASE_URL / DB_NAME)")
+    args = parser.parse_args(argv)
+    conn = get_connection(args.dbname)
+    try:
+        rebuild_all(conn)
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
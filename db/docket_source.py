@@ -0,0 +1,159 @@
+"""
+Where the ingest stages read a docket's regulations.gov JSON from.
+
+``LocalDocketSource`` reads ``<docket_dir>/raw-data/<area>/*.json`` from a
+downloaded bundle. ``S3DocketSource`` reads the same files straight from the
+mirrulations bucket (``raw-data/<AGENCY>/<DOCKET>/text-<DOCKET>/<area>/``):
+object bodies are fetched on a small thread pool with at most
+``read_ahead_depth`` objects in flight and parsed in memory, so nothing is written to disk.
+
+Both yield ``(name, payload)`` pairs in key order, with ``payload`` None for
+objects that cannot be read or parsed. ``area`` is one of ``docket``,
+``documents`` or ``comments``. Point ``S3_ENDPOINT_URL`` at a local S3
+stand-in, or pass ``client=``, to run the S3 source without AWS.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import random
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Iterable, Iterator, TypeVar, Union
+
+from s3_download import S3_BUCKET, _normalize_docket_id, _s3, docket_jobs, iter_s3_objects
+
+log = logging.getLogger(__name__)
+
+AREAS = ("docket", "documents", "comments")
+DEFAULT_READ_AHEAD = int(os.getenv("S3_READ_AHEAD", "16"))
+GET_ATTEMPTS = 3
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+def read_ahead(items: Iterable[T], fetch: Callable[[T], R], depth: int) -> Iterator[tuple[T, R]]:
+    """
+    Yield ``(item, fetch(item))`` in input order, running up to ``depth``
+    fetches ahead of the consumer on a thread pool.
+    """
+    depth = max(1, depth)
+    with ThreadPoolExecutor(max_workers=depth, thread_name_prefix="read-ahead") as pool:
+        pending: deque = deque()
+        for item in items:
+            pending.append((item, pool.submit(fetch, item)))
+            if len(pending) >= depth:
+                head, fut = pending.popleft()
+                yield head, fut.result()
+        while pending:
+            head, fut = pending.popleft()
+            yield head, fut.result()
+
+
+def _parse(name: str, data: bytes | str) -> dict | None:
+    try:
+        return json.loads(data)
+    except ValueError as exc:
+        log.warning("Skipping %s — %s", name, exc)
+        return None
+
+
+class LocalDocketSource:
+    """JSON files of a downloaded docket bundle under ``docket_dir``."""
+
+    def __init__(self, docket_dir: Path):
+        self.docket_dir = Path(docket_dir)
+
+    def __str__(self) -> str:
+        return str(self.docket_dir)
+
+    @property
+    def docket_id(self) -> str:
+        return self.docket_dir.name
+
+    def paths(self, area: str) -> list[Path]:
+        return sorted(p for p in (self.docket_dir / "raw-data" / area).glob("*.json") if p.is_file())
+
+    def names(self, area: str) -> list[str]:
+        return [p.name for p in self.paths(area)]
+
+    def iter_json(self, area: str) -> Iterator[tuple[str, dict | None]]:
+        for path in self.paths(area):
+            try:
+                data = path.read_bytes()
+            except OSError as exc:
+                log.warning("Skipping %s — %s", path, exc)
+                yield path.name, None
+                continue
+            yield path.name, _parse(str(path), data)
+
+
+class S3DocketSource:
+    """
+    A docket's text bundle read directly from S3 with bounded read-ahead.
+
+    Keys are listed once per area (metadata only) and cached; bodies are
+    streamed into the JSON parser and dropped after use.
+    """
+
+    def __init__(
+        self,
+        docket_id: str,
+        client: Any = None,
+        read_ahead_depth: int = DEFAULT_READ_AHEAD,
+    ):
+        self.docket_id = _normalize_docket_id(docket_id)
+        self.client = client or _s3()
+        self.read_ahead_depth = read_ahead_depth
+        self._prefixes = {
+            job.file_type: job.prefix
+            for job in docket_jobs(self.docket_id)
+            if job.file_type in AREAS
+        }
+        self._keys: dict[str, list[str]] = {}
+
+    def __str__(self) -> str:
+        return f"s3://{S3_BUCKET}/{self._prefixes['docket'][:-len('docket/')]}"
+
+    def keys(self, area: str) -> list[str]:
+        if area not in self._keys:
+            prefix = self._prefixes[area]
+            self._keys[area] = sorted(
+                obj["Key"]
+                for obj in iter_s3_objects(self.client, prefix)
+                if obj["Key"].endswith(".json") and "/" not in obj["Key"][len(prefix):]
+            )
+        return self._keys[area]
+
+    def names(self, area: str) -> list[str]:
+        return [k.rsplit("/", 1)[-1] for k in self.keys(area)]
+
+    def _get(self, key: str) -> bytes | None:
+        for attempt in range(1, GET_ATTEMPTS + 1):
+            try:
+                return self.client.get_object(Bucket=S3_BUCKET, Key=key)["Body"].read()
+            except Exception as exc:  # pylint: disable=broad-except
+                if attempt == GET_ATTEMPTS:
+                    log.warning("Skipping s3://%s/%s — %s", S3_BUCKET, key, exc)
+                    return None
+                time.sleep(0.2 * (2 ** (attempt - 1)) * random.uniform(0.5, 1.5))
+        return None
+
+    def iter_json(self, area: str) -> Iterator[tuple[str, dict | None]]:
+        for key, data in read_ahead(self.keys(area), self._get, self.read_ahead_depth):
+            name = key.rsplit("/", 1)[-1]
+            yield name, None if data is None else _parse(key, data)
+
+
+DocketSource = Union[LocalDocketSource, S3DocketSource]
+
+
+def as_source(docket: Path | str | DocketSource) -> DocketSource:
+    """Wrap a docket directory in ``LocalDocketSource``; sources pass through."""
+    if isinstance(docket, (LocalDocketSource, S3DocketSource)):
+        return docket
+    return LocalDocketSource(Path(docket))
@@ -0,0 +1,350 @@
+#!/usr/bin/env python3
+"""
+Extract text from downloaded comment attachment binaries.
+
+``ingest_docket.py --include-binary`` mirrors ``raw-data/binary-<DOCKET-ID>/``
+but nothing turned those files into text; only upstream ``extracted_txt``
+reached OpenSearch. This stage fills the gap:
+
+- attachments named ``<commentId>_attachment_<n>.{pdf,docx,txt}`` are found
+  under ``raw-data/binary-*/``; ones that already have an
+  ``<commentId>_attachment_<n>_extracted.txt`` in the extracted tree are left
+  alone (upstream text wins);
+- PDFs go through pypdf, DOCX through the document XML in the zip, plain text
+  is decoded as UTF-8;
+- extraction runs in a process pool; each worker caps its address space at
+  ``EXTRACT_MAX_MEMORY_MB`` and each file at ``EXTRACT_TIMEOUT`` seconds, so a
+  hostile or huge PDF fails on its own without taking the run down (a worker
+  that dies outright breaks the pool; the files it leaves unfinished are
+  counted as failed and retried on the next run);
+- an attachment with no text leaves an ``<commentId>_attachment_<n>_extracted.empty``
+  marker instead of an output file, so it is not submitted again;
+- text is cached by the SHA-256 of the binary under ``EXTRACT_CACHE_DIR``, so
+  the same attachment re-posted to many dockets (or a re-run) is extracted
+  once;
+- output is written as
+  ``extracted_txt/comments_extracted_text/<method>/<commentId>_attachment_<n>_extracted.txt``,
+  the layout ``read_derived_extracted_plain_text`` reads.
+
+``extract_attachments`` yields one record per new text file as soon as its
+worker finishes, in the shape ``ingest_extracted_text_to_comments_extracted_text``
+takes, so ``ingest.py`` indexes while extraction is still running.
+
+Usage:
+    python db/extract_attachments.py dockets/FAA-2025-0618
+    python db/extract_attachments.py --workers 4 --timeout 60 dockets/FAA-2025-0618
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import logging
+import os
+import re
+import signal
+import sys
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Iterator
+from xml.etree import ElementTree
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+try:
+    from pypdf import PdfReader
+except ImportError:
+    PdfReader = None
+
+log = logging.getLogger(__name__)
+
+
+def _positive_int_env(name: str, default: int) -> int:
+    try:
+        value = int(os.environ.get(name, default))
+    except ValueError:
+        return default
+    return value if value >= 0 else default
+
+
+DEFAULT_WORKERS = _positive_int_env("EXTRACT_WORKERS", min(8, os.cpu_count() or 1)) or 1
+DEFAULT_TIMEOUT = _positive_int_env("EXTRACT_TIMEOUT", 120)
+DEFAULT_MEMORY_MB = _positive_int_env("EXTRACT_MAX_MEMORY_MB", 1024)
+DEFAULT_CACHE_DIR = Path(
+    os.environ.get("EXTRACT_CACHE_DIR", Path.home() / ".cache" / "mirrsearch" / "extracted")
+)
+HASH_BLOCK = 1024 * 1024
+# Marker left in place of the output file when an attachment has no text.
+EMPTY_SUFFIX = ".empty"
+
+_ATTACHMENT_NAME = re.compile(
+    r"^(?P<comment_id>.+)_attachment_(?P<attach>\d+)\.(?P<ext>pdf|docx|txt)$",
+    re.IGNORECASE,
+)
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+
+
+class ExtractionTimeout(Exception):
+    """Raised inside a worker when one file exceeds the per-file time limit."""
+
+
+def extract_pdf(path: Path) -> str:
+    if PdfReader is None:
+        raise RuntimeError("pypdf is not installed")
+    reader = PdfReader(str(path))
+    return "\n".join(page.extract_text() or "" for page in reader.pages)
+
+
+def extract_docx(path: Path) -> str:
+    """Paragraph text of ``word/document.xml``, parsed incrementally."""
+    paragraphs: list[str] = []
+    parts: list[str] = []
+    with zipfile.ZipFile(path) as zf, zf.open("word/document.xml") as fh:
+        for _event, elem in ElementTree.iterparse(fh):
+            if elem.tag == f"{_W}t" and elem.text:
+                parts.append(elem.text)
+            elif elem.tag == f"{_W}tab":
+                parts.append("\t")
+            elif elem.tag == f"{_W}p":
+                paragraphs.append("".join(parts))
+                parts = []
+                elem.clear()
+    return "\n".join(paragraphs)
+
+
+def extract_plain(path: Path) -> str:
+    return path.read_text(encoding="utf-8", errors="replace")
+
+
+# extension -> (extractedMethod, extractor); the method names the output directory.
+EXTRACTORS: dict[str, tuple[str, Callable[[Path], str]]] = {
+    "pdf": ("pypdf", extract_pdf),
+    "docx": ("docx", extract_docx),
+    "txt": ("text", extract_plain),
+}
+
+
+@dataclass(frozen=True)
+class Attachment:
+    path: Path
+    comment_id: str
+    attachment_id: str
+    ext: str
+
+    @property
+    def output_name(self) -> str:
+        return f"{self.attachment_id}_extracted.txt"
+
+    @property
+    def method(self) -> str:
+        return EXTRACTORS[self.ext][0]
+
+
+@dataclass
+class ExtractResult:
+    attachment: Attachment
+    method: str
+    status: str  # "extracted", "cached", "empty" or "failed"
+    output: Path | None = None
+    error: str | None = None
+
+
+def iter_attachment_binaries(docket_dir: Path) -> list[Attachment]:
+    """Comment attachments under ``raw-data/binary-*/`` that have an extractor."""
+    raw = docket_dir / "raw-data"
+    if not raw.is_dir():
+        return []
+    found = []
+    for binary_dir in sorted(raw.glob("binary-*")):
+        for path in sorted(binary_dir.rglob("*")):
+            m = _ATTACHMENT_NAME.match(path.name)
+            if not m or not path.is_file():
+                continue
+            comment_id = m.group("comment_id")
+            found.append(Attachment(
+                path,
+                comment_id,
+                f"{comment_id}_attachment_{int(m.group('attach'))}",
+                m.group("ext").lower(),
+            ))
+    return found
+
+
+def content_hash(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for block in iter(lambda: fh.read(HASH_BLOCK), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _write_atomic(path: Path, text: str) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".part")
+    tmp.write_text(text, encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def _on_alarm(_signum, _frame):
+    raise ExtractionTimeout()
+
+
+def _init_worker(memory_mb: int) -> None:
+    if resource is not None and memory_mb:
+        limit = memory_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    if hasattr(signal, "SIGALRM"):
+        signal.signal(signal.SIGALRM, _on_alarm)
+
+
+def extract_one(
+    attachment: Attachment, out_root: Path, cache_dir: Path, timeout: int
+) -> ExtractResult:
+    """Extract one attachment (worker side); never raises."""
+    method, extractor = EXTRACTORS[attachment.ext]
+    output = out_root / "comments_extracted_text" / method / attachment.output_name
+    try:
+        digest = content_hash(attachment.path)
+        cached = cache_dir / digest[:2] / f"{digest}.{method}.txt"
+        if cached.is_file():
+            status = "cached"
+            text = cached.read_text(encoding="utf-8")
+        else:
+            status = "extracted"
+            if timeout and hasattr(signal, "SIGALRM"):
+                signal.alarm(timeout)
+            try:
+                text = extractor(attachment.path)
+            finally:
+                if timeout and hasattr(signal, "SIGALRM"):
+                    signal.alarm(0)
+            # Empty results are cached too: a scanned PDF stays empty on every run.
+            _write_atomic(cached, text)
+        if not text.strip():
+            _write_atomic(output.with_suffix(EMPTY_SUFFIX), "")
+            return ExtractResult(attachment, method, "empty")
+        _write_atomic(output, text)
+        return ExtractResult(attachment, method, status, output)
+    except ExtractionTimeout:
+        error = f"timed out after {timeout}s"
+    except MemoryError:
+        error = "memory limit exceeded"
+    except Exception as exc:  # pylint: disable=broad-except
+        error = f"{type(exc).__name__}: {exc}"
+    return ExtractResult(attachment, method, "failed", error=error)
+
+
+def _done_names(out_root: Path) -> set[str]:
+    """Lower-cased output names that already have text or an empty marker."""
+    if not out_root.is_dir():
+        return set()
+    names = {p.name.lower() for p in out_root.rglob("*_extracted.txt")}
+    names.update(
+        p.with_suffix(".txt").name.lower() for p in out_root.rglob(f"*_extracted{EMPTY_SUFFIX}")
+    )
+    return names
+
+
+def _result(future: Any, attachment: Attachment) -> ExtractResult:
+    """The future's result; a worker that died or a lost result is a failure."""
+    try:
+        return future.result()
+    except BrokenProcessPool:
+        error = "worker process died"
+    except Exception as exc:  # pylint: disable=broad-except
+        error = f"{type(exc).__name__}: {exc}"
+    return ExtractResult(attachment, attachment.method, "failed", error=error)
+
+
+def extract_attachments(
+    docket_dir: Path,
+    out_root: Path | None = None,
+    *,
+    cache_dir: Path = DEFAULT_CACHE_DIR,
+    workers: int = DEFAULT_WORKERS,
+    timeout: int = DEFAULT_TIMEOUT,
+    memory_mb: int = DEFAULT_MEMORY_MB,
+    counts: dict[str, int] | None = None,
+) -> Iterator[dict[str, Any]]:
+    """
+    Extract attachments without existing text; yield an extracted-text record
+    (``extractedTextPath`` set) for each non-empty result as workers finish.
+    Per-status totals are added to ``counts`` when given.
+    """
+    docket_dir = Path(docket_dir)
+    out_root = out_root or docket_dir / "derived-data" / "mirrulations" / "extracted_txt"
+    done = _done_names(out_root)
+    todo = [a for a in iter_attachment_binaries(docket_dir) if a.output_name.lower() not in done]
+    if not todo:
+        return
+    if PdfReader is None and any(a.ext == "pdf" for a in todo):
+        log.warning("pypdf is not installed; PDF attachments will not be extracted")
+    counts = counts if counts is not None else {}
+    with ProcessPoolExecutor(
+        max_workers=max(workers, 1),
+        initializer=_init_worker,
+        initargs=(memory_mb,),
+    ) as pool:
+        futures = {pool.submit(extract_one, a, out_root, cache_dir, timeout): a for a in todo}
+        for future in as_completed(futures):
+            result = _result(future, futures[future])
+            counts[result.status] = counts.get(result.status, 0) + 1
+            if result.status == "failed":
+                log.warning("Could not extract %s: %s", result.attachment.path, result.error)
+            if result.output is None:
+                continue
+            yield {
+                "docketId": docket_dir.name,
+                "commentId": result.attachment.comment_id,
+                "attachmentId": result.attachment.attachment_id,
+                "extractedMethod": result.method,
+                "extractedTextPath": str(result.output),
+            }
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Extract text from downloaded comment attachments into extracted_txt/."
+    )
+    parser.add_argument("docket_dir", help="Docket folder containing raw-data/binary-<DOCKET-ID>/")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    parser.add_argument(
+        "--timeout", type=int, default=DEFAULT_TIMEOUT, help="Seconds per file (0 disables)"
+    )
+    parser.add_argument(
+        "--memory-mb", type=int, default=DEFAULT_MEMORY_MB, help="Per-worker limit (0 disables)"
+    )
+    parser.add_argument("--cache-dir", type=Path, default=DEFAULT_CACHE_DIR)
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> None:
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
+    args = parse_args(argv)
+    docket_dir = Path(args.docket_dir).expanduser().resolve()
+    if not docket_dir.is_dir():
+        log.error("Docket directory not found: %s", docket_dir)
+        sys.exit(1)
+    counts: dict[str, int] = {}
+    written = sum(1 for _ in extract_attachments(
+        docket_dir,
+        cache_dir=args.cache_dir,
+        workers=args.workers,
+        timeout=args.timeout,
+        memory_mb=args.memory_mb,
+        counts=counts,
+    ))
+    log.info(
+        "Wrote %d extracted text file(s) (%s)",
+        written,
+        ", ".join(f"{k} {v}" for k, v in sorted(counts.items())) or "nothing to do",
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -4,14 +4,20 @@ load_documents.py — Bulk-load regulations.gov document JSON files into the
 documentswithfrdoc table in the Mirrulations PostgreSQL database.
 
 WHAT IT DOES:
-    Scans a data directory recursively for files matching **/documents/*.json,
-    parses each file, maps the fields to the database schema, and inserts them
-    in batches using upsert (ON CONFLICT DO UPDATE). If a document already
-    exists, key fields like modify_date, topics, and comment dates are updated.
-
-    A checkpoint file tracks which files have been successfully inserted. If
+    Splits the data directory into agency/docket subtrees and hands them to a
+    pool of worker processes. Each worker walks its subtree for
+    documents/*.json files, parses them, and maps the fields to the database
+    schema. The parent process is the single writer: it loads the mapped rows
+    in batches with COPY into a staging table followed by one upsert
+    (ON CONFLICT DO UPDATE). If a document already exists, key fields like
+    modify_date, topics, and comment dates are updated.
+
+    A SQLite checkpoint database tracks which files have been successfully
+    inserted, keyed by a hash of the path together with the file's mtime. If
     the script is interrupted, re-running it will skip already-processed files
-    and resume from where it left off.
+    and resume from where it left off; files that changed since they were
+    loaded are picked up again. Lookups hit the index, so startup cost does
+    not grow with the number of files already loaded.
 
 HOW TO USE:
     1. Set the following environment variables (or provide a .env file)
@@ -24,8 +30,14 @@ HOW TO USE:
         DB_PASSWORD     Database password
         DATA_ROOT       Root directory containing the document JSON files
                         (default: /mnt/search-data/data)
-        CHECKPOINT_FILE Path to the checkpoint file used for resume support
+        CHECKPOINT_DB   Path to the SQLite checkpoint used for resume support
+                        (default: /mnt/search-data/load_documents_checkpoint.sqlite)
+        CHECKPOINT_FILE Old plain-text checkpoint; if it exists it is imported
+                        into CHECKPOINT_DB the first time the script runs
                         (default: /mnt/search-data/load_documents_checkpoint.txt)
+        LOAD_WORKERS    Worker processes used to walk and parse (default: CPU count)
+        SHARD_DEPTH     Directory depth of one work unit below DATA_ROOT
+                        (default: 2, i.e. <agency>/<docket>)
 
     2. Ensure the RDS SSL certificate is present at /certs/global-bundle.pem.
 
@@ -36,17 +48,28 @@ HOW TO USE:
         Check the output with:
         tail -f ~/load_output.log
 
-    To restart from scratch, delete the checkpoint file before running.
+    To restart from scratch, delete the checkpoint database before running.
 """
 
 import os
+import sys
 import json
+import hashlib
 import logging
+import sqlite3
+import multiprocessing
 import psycopg2
-from psycopg2.extras import execute_values
+from dataclasses import dataclass, field
 from pathlib import Path
 from dotenv import load_dotenv
 
+# Shared helpers live one level up in db/.
+_DB_DIR = Path(__file__).resolve().parent.parent
+if str(_DB_DIR) not in sys.path:
+    sys.path.insert(0, str(_DB_DIR))
+
+from bulk_copy import CopyTarget, copy_upsert
+
 load_dotenv()
 
 logging.basicConfig(
@@ -66,24 +89,83 @@ DB_CONFIG = {
 }
 
 DATA_ROOT = Path(os.environ.get("DATA_ROOT", "/mnt/search-data/data"))
+CHECKPOINT_DB = Path(os.environ.get("CHECKPOINT_DB", "/mnt/search-data/load_documents_checkpoint.sqlite"))
 CHECKPOINT_FILE = Path(os.environ.get("CHECKPOINT_FILE", "/mnt/search-data/load_documents_checkpoint.txt"))
 
 BATCH_SIZE = 500
-
-
-def load_checkpoint():
-    if CHECKPOINT_FILE.exists():
-        with open(CHECKPOINT_FILE, "r") as f:
-            paths = {line.strip() for line in f if line.strip()}
-        log.info("Resuming — %d files already processed", len(paths))
-        return paths
-    return set()
-
-
-def save_checkpoint(paths):
-    with open(CHECKPOINT_FILE, "a") as f:
-        for p in paths:
-            f.write(p + "\n")
+WORKERS = int(os.environ.get("LOAD_WORKERS", os.cpu_count() or 1))
+SHARD_DEPTH = int(os.environ.get("SHARD_DEPTH", 2))
+
+
+def path_key(path):
+    """16-byte digest of the path; keeps the index small no matter how long paths get."""
+    return hashlib.blake2b(str(path).encode("utf-8"), digest_size=16).digest()
+
+
+class CheckpointStore:
+    """
+    Processed-file index in SQLite: one row per path hash with the mtime the
+    file had when it was loaded. A NULL mtime (imported from the old text
+    checkpoint) matches any mtime.
+    """
+
+    def __init__(self, path, readonly=False):
+        self.path = Path(path)
+        if readonly:
+            self.conn = sqlite3.connect(f"{self.path.resolve().as_uri()}?mode=ro", uri=True)
+            return
+        self.conn = sqlite3.connect(self.path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS processed ("
+            "path_hash BLOB PRIMARY KEY, mtime_ns INTEGER) WITHOUT ROWID"
+        )
+        self.conn.commit()
+
+    def is_done(self, path, mtime_ns):
+        row = self.conn.execute(
+            "SELECT mtime_ns FROM processed WHERE path_hash = ?", (path_key(path),)
+        ).fetchone()
+        return row is not None and (row[0] is None or row[0] == mtime_ns)
+
+    def mark(self, items):
+        """Record ``(path, mtime_ns)`` pairs as loaded."""
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO processed (path_hash, mtime_ns) VALUES (?, ?)",
+            ((path_key(p), m) for p, m in items),
+        )
+        self.conn.commit()
+
+    def count(self):
+        return self.conn.execute("SELECT COUNT(*) FROM processed").fetchone()[0]
+
+    def import_legacy(self, text_path):
+        """Stream an old one-path-per-line checkpoint into the index; returns rows imported."""
+        imported = 0
+        chunk = []
+        with open(text_path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    chunk.append((line.strip(), None))
+                if len(chunk) >= 50_000:
+                    self.mark(chunk)
+                    imported += len(chunk)
+                    chunk = []
+        self.mark(chunk)
+        return imported + len(chunk)
+
+    def close(self):
+        self.conn.close()
+
+
+def open_checkpoint(db_path=None, legacy_path=None):
+    store = CheckpointStore(db_path or CHECKPOINT_DB)
+    legacy = Path(legacy_path or CHECKPOINT_FILE)
+    if legacy.exists() and store.count() == 0:
+        log.info("Importing legacy checkpoint %s ...", legacy)
+        log.info("Imported %d paths", store.import_legacy(legacy))
+    log.info("Checkpoint %s — %d files already processed", store.path, store.count())
+    return store
 
 
 def map_document(raw):
@@ -170,23 +252,96 @@ def map_document(raw):
     }
 
 
-def iter_documents(data_root, processed):
-    pattern = "**/documents/*.json"
-    log.info("Scanning for JSON files under %s ...", data_root)
+def iter_shards(data_root, depth=SHARD_DEPTH):
+    """
+    Yield the directories ``depth`` levels below ``data_root`` (agency/docket by
+    default). A ``documents`` directory found above that depth is its own shard.
+    """
+    stack = [(Path(data_root), 0)]
+    while stack:
+        directory, level = stack.pop()
+        if level == depth or (level and directory.name == "documents"):
+            yield directory
+            continue
+        try:
+            entries = sorted(os.scandir(directory), key=lambda e: e.name, reverse=True)
+        except OSError as e:
+            log.warning("Skipping %s — %s", directory, e)
+            continue
+        stack.extend(
+            (Path(e.path), level + 1) for e in entries if e.is_dir(follow_symlinks=False)
+        )
+
+
+def walk_documents(shard):
+    """Yield ``(path, mtime_ns)`` for every documents/*.json file under ``shard``."""
+    stack = [Path(shard)]
+    while stack:
+        directory = stack.pop()
+        try:
+            entries = sorted(os.scandir(directory), key=lambda e: e.name)
+        except OSError as e:
+            log.warning("Skipping %s — %s", directory, e)
+            continue
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                stack.append(Path(entry.path))
+            elif directory.name == "documents" and entry.name.endswith(".json") and entry.is_file():
+                yield Path(entry.path), entry.stat().st_mtime_ns
+
+
+@dataclass
+class ShardResult:
+    shard: str
+    docs: list = field(default_factory=list)  # (path, mtime_ns, mapped row)
+    seen: int = 0
+    already_done: int = 0
+    invalid: int = 0
+
 
-    for path in data_root.glob(pattern):
-        if str(path) in processed:
+_worker_store = None
+
+
+def _init_worker(checkpoint_db):
+    global _worker_store
+    _worker_store = CheckpointStore(checkpoint_db, readonly=True) if checkpoint_db else None
+
+
+def load_shard(shard):
+    """Worker: walk one subtree, skip checkpointed files, parse and map the rest."""
+    result = ShardResult(str(shard))
+    for path, mtime_ns in walk_documents(shard):
+        result.seen += 1
+        if _worker_store is not None and _worker_store.is_done(path, mtime_ns):
+            result.already_done += 1
             continue
         try:
             with open(path, "r", encoding="utf-8") as f:
                 raw = json.load(f)
             doc = map_document(raw)
-            if doc:
-                yield doc, str(path)
         except json.JSONDecodeError as e:
             log.warning("Skipping %s — invalid JSON: %s", path, e)
+            doc = None
         except Exception as e:
             log.warning("Skipping %s — unexpected error: %s", path, e)
+            doc = None
+        if doc:
+            result.docs.append((str(path), mtime_ns, doc))
+        else:
+            result.invalid += 1
+    return result
+
+
+def iter_documents(data_root, checkpoint_db=None, workers=WORKERS, depth=SHARD_DEPTH):
+    """Yield ``ShardResult``s as the worker pool finishes each agency/docket subtree."""
+    log.info("Scanning for JSON files under %s with %d worker(s) ...", data_root, workers)
+    shards = iter_shards(data_root, depth)
+    if workers <= 1:
+        _init_worker(checkpoint_db)
+        yield from map(load_shard, shards)
+        return
+    with multiprocessing.Pool(workers, _init_worker, (checkpoint_db,)) as pool:
+        yield from pool.imap_unordered(load_shard, shards)
 
 
 COLUMNS = [
@@ -205,84 +360,100 @@ COLUMNS = [
     "file_formats", "display_properties",
 ]
 
-INSERT_SQL = f"""
-    INSERT INTO documentswithfrdoc ({', '.join(COLUMNS)})
-    VALUES %s
-    ON CONFLICT (document_id) DO UPDATE SET
-        modify_date          = EXCLUDED.modify_date,
-        is_open_for_comment  = EXCLUDED.is_open_for_comment,
-        is_withdrawn         = EXCLUDED.is_withdrawn,
-        frdocnum             = COALESCE(EXCLUDED.frdocnum, documentswithfrdoc.frdocnum),
-        document_title       = EXCLUDED.document_title,
-        topics               = EXCLUDED.topics,
-        comment_end_date     = EXCLUDED.comment_end_date,
-        comment_start_date   = EXCLUDED.comment_start_date,
-        posted_date          = EXCLUDED.posted_date
-"""
+# Rows are COPYed into a temp stage and merged; on conflict only the fields
+# that change between regulations.gov exports are refreshed. The table is
+# partitioned on docket_id, so the conflict key includes it.
+DOCUMENT_TARGET = CopyTarget(
+    "documentswithfrdoc",
+    COLUMNS,
+    conflict=("document_id", "docket_id"),
+    update={
+        "modify_date":         "EXCLUDED.modify_date",
+        "is_open_for_comment": "EXCLUDED.is_open_for_comment",
+        "is_withdrawn":        "EXCLUDED.is_withdrawn",
+        "frdocnum":            "COALESCE(EXCLUDED.frdocnum, documentswithfrdoc.frdocnum)",
+        "document_title":      "EXCLUDED.document_title",
+        "topics":              "EXCLUDED.topics",
+        "comment_end_date":    "EXCLUDED.comment_end_date",
+        "comment_start_date":  "EXCLUDED.comment_start_date",
+        "posted_date":         "EXCLUDED.posted_date",
+    },
+)
 
 
 def insert_batch(cursor, batch):
-    seen = {}
-    for doc in batch:
-        seen[doc["document_id"]] = doc
-    rows = [tuple(doc[col] for col in COLUMNS) for doc in seen.values()]
-    execute_values(cursor, INSERT_SQL, rows)
+    # Duplicate document_ids within a batch collapse to the last one seen.
+    rows = [tuple(doc[col] for col in COLUMNS) for doc in batch]
+    copy_upsert(cursor, DOCUMENT_TARGET, rows)
 
 
-def main():
-    processed = load_checkpoint()
+@dataclass
+class LoadStats:
+    files_seen: int = 0
+    already_done: int = 0
+    invalid: int = 0
+    inserted: int = 0
+    skipped: int = 0
 
-    log.info("Connecting to RDS at %s ...", DB_CONFIG["host"])
-    conn = psycopg2.connect(**DB_CONFIG)
-    conn.autocommit = False
-    cursor = conn.cursor()
 
+def run(conn, store, data_root=None, workers=WORKERS, batch_size=BATCH_SIZE, depth=SHARD_DEPTH):
+    """Feed parsed shards from the worker pool into one batched writer on ``conn``."""
+    stats = LoadStats()
+    cursor = conn.cursor()
     batch = []
-    batch_paths = []
-    total_inserted = 0
-    total_skipped  = 0
-    total_processed = 0
+    batch_marks = []
 
-    try:
-        for doc, path in iter_documents(DATA_ROOT, processed):
-            batch.append(doc)
-            batch_paths.append(path)
-            total_processed += 1
-
-            if total_processed % 10_000 == 0:
-                log.info("Processed %d docs so far (inserted: %d)", total_processed, total_inserted)
-
-            if len(batch) >= BATCH_SIZE:
-                try:
-                    insert_batch(cursor, batch)
-                    conn.commit()
-                    save_checkpoint(batch_paths)
-                    total_inserted += len(batch)
-                    log.info("Inserted %d rows (total: %d)", len(batch), total_inserted)
-                except Exception as e:
-                    conn.rollback()
-                    log.error("Batch insert failed, rolling back: %s", e)
-                    total_skipped += len(batch)
-                finally:
-                    batch.clear()
-                    batch_paths.clear()
+    def flush():
+        try:
+            insert_batch(cursor, batch)
+            conn.commit()
+            store.mark(batch_marks)
+            stats.inserted += len(batch)
+            log.info("Inserted %d rows (total: %d)", len(batch), stats.inserted)
+        except Exception as e:
+            conn.rollback()
+            log.error("Batch insert failed, rolling back: %s", e)
+            stats.skipped += len(batch)
+        finally:
+            batch.clear()
+            batch_marks.clear()
 
+    try:
+        for shard in iter_documents(data_root or DATA_ROOT, store.path, workers, depth):
+            stats.files_seen += shard.seen
+            stats.already_done += shard.already_done
+            stats.invalid += shard.invalid
+            for path, mtime_ns, doc in shard.docs:
+                batch.append(doc)
+                batch_marks.append((path, mtime_ns))
+                if len(batch) >= batch_size:
+                    flush()
+            if stats.files_seen // 10_000 != (stats.files_seen - shard.seen) // 10_000:
+                log.info("Scanned %d files so far (inserted: %d)", stats.files_seen, stats.inserted)
         if batch:
-            try:
-                insert_batch(cursor, batch)
-                conn.commit()
-                save_checkpoint(batch_paths)
-                total_inserted += len(batch)
-            except Exception as e:
-                conn.rollback()
-                log.error("Final batch insert failed: %s", e)
-                total_skipped += len(batch)
-
+            flush()
     finally:
         cursor.close()
+    return stats
+
+
+def main():
+    store = open_checkpoint()
+
+    log.info("Connecting to RDS at %s ...", DB_CONFIG["host"])
+    conn = psycopg2.connect(**DB_CONFIG)
+    conn.autocommit = False
+
+    try:
+        stats = run(conn, store)
+    finally:
         conn.close()
+        store.close()
 
-    log.info("Done. Inserted: %d | Skipped: %d", total_inserted, total_skipped)
+    log.info(
+        "Done. Inserted: %d | Skipped: %d | Already loaded: %d | Invalid: %d",
+        stats.inserted, stats.skipped, stats.already_done, stats.invalid,
+    )
 
 
 if __name__ == "__main__":
@@ -1,7 +1,14 @@
 #!/usr/bin/env python3
-"""Standalone loader for HQ clean jsonl.gz package into dockets/documents."""
+"""Standalone loader for HQ clean jsonl.gz package into dockets/documents.
 
-"""quick copy paste
+Partitions listed in ``partitions.csv`` are loaded in parallel worker
+processes, one connection and one transaction per partition. Each partition
+is streamed (gzip → JSON lines → bounded COPY batches) while its sha256 and
+row count are checked against ``partitions.csv``; a partition that does not
+verify is rolled back. Committed partitions are appended to a checkpoint file
+(keyed by path + sha256), so a re-run skips them and resumes mid-dataset.
+
+quick copy paste
 ## Load into Postgres schema
 
 ```bash
@@ -11,23 +18,63 @@ python3 load_jsonl_gz_to_db.py \
   --db-port 5432 \
   --db-name mirrulations \
   --db-user matt \
-  --db-password ""
+  --db-password "" \
+  --workers 4
 ```
 
-Dry-run only:
+Dry-run only (parses and verifies every partition, no DB writes):
 
 ```bash
 python3 load_jsonl_gz_to_db.py --input-root "hq_clean/by_agency" --dry-run
-``` """
+```
+"""
 
 from __future__ import annotations
 
 import argparse
+import csv
 import gzip
 import hashlib
+import io
 import json
+import os
+import sys
 from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
 from pathlib import Path
+from typing import Any, Iterator
+
+# Shared helpers live one level up in db/.
+_DB_DIR = Path(__file__).resolve().parent.parent
+if str(_DB_DIR) not in sys.path:
+    sys.path.insert(0, str(_DB_DIR))
+
+from bulk_copy import BulkWriter, CopyTarget
+
+DOCKETS_TARGET = CopyTarget(
+    "dockets",
+    ("docket_id", "docket_api_link", "agency_id", "docket_type", "modify_date", "docket_title"),
+    conflict=("docket_id",),
+    update=("agency_id", "docket_type", "modify_date", "docket_title"),
+)
+
+DOCUMENTS_TARGET = CopyTarget(
+    "documents",
+    (
+        "document_id", "docket_id", "document_api_link", "agency_id",
+        "document_type", "modify_date", "posted_date", "document_title",
+    ),
+    conflict=("document_id",),
+    update=(
+        "docket_id", "document_api_link", "agency_id", "document_type",
+        "modify_date", "posted_date", "document_title",
+    ),
+)
+
+DEFAULT_BATCH_SIZE = 5000
+CHECKPOINT_NAME = ".load_checkpoint.jsonl"
+DEADLOCK_RETRIES = 3
 
 
 def parse_args() -> argparse.Namespace:
@@ -35,6 +82,20 @@ def parse_args() -> argparse.Namespace:
         description="Load HQ clean jsonl.gz files into Postgres dockets/documents."
     )
     parser.add_argument("--input-root", default="hq_clean/by_agency")
+    parser.add_argument(
+        "--partitions-csv",
+        help="partitions.csv with row_count/sha256 per file "
+        "(default: searched in --input-root and its parents)",
+    )
+    parser.add_argument("--workers", type=int, default=min(4, os.cpu_count() or 1))
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument(
+        "--checkpoint",
+        help=f"Checkpoint file (default: {CHECKPOINT_NAME} next to partitions.csv)",
+    )
+    parser.add_argument(
+        "--fresh", action="store_true", help="Ignore the checkpoint and reload every partition"
+    )
     parser.add_argument("--dry-run", action="store_true")
     parser.add_argument("--db-host", default="localhost")
     parser.add_argument("--db-port", default="5432")
@@ -104,113 +165,299 @@ def validate_record(record: dict) -> tuple[dict | None, str | None]:
     return row, None
 
 
-def connect_psycopg2(args: argparse.Namespace):
-    import psycopg2  # imported lazily so dry-run works without dependency
-    return psycopg2.connect(
-        host=args.db_host,
-        port=args.db_port,
-        database=args.db_name,
-        user=args.db_user,
-        password=args.db_password,
-    )
+# ---------------------------------------------------------------------------
+# Partitions + verification
+# ---------------------------------------------------------------------------
+
+@dataclass(frozen=True)
+class Partition:
+    """One jsonl.gz file and the row_count / sha256 that partitions.csv promises."""
+
+    path: str
+    relative_path: str
+    row_count: int | None = None
+    sha256: str | None = None
+
+
+def find_partitions_csv(input_root: Path) -> Path | None:
+    for directory in (input_root, *list(input_root.parents)[:3]):
+        candidate = directory / "partitions.csv"
+        if candidate.is_file():
+            return candidate
+    return None
+
+
+def read_partitions(input_root: Path, partitions_csv: Path | None) -> list[Partition]:
+    """Partitions under ``input_root``; verified against ``partitions_csv`` when given."""
+    if partitions_csv is None:
+        return [
+            Partition(str(fp), str(fp.relative_to(input_root)))
+            for fp in sorted(input_root.glob("**/*.jsonl.gz"))
+        ]
+    base = partitions_csv.parent
+    root = input_root.resolve()
+    out = []
+    with open(partitions_csv, newline="", encoding="utf-8") as handle:
+        for rec in csv.DictReader(handle):
+            path = (base / rec["relative_path"]).resolve()
+            if root != path and root not in path.parents:
+                continue
+            out.append(
+                Partition(
+                    str(path),
+                    rec["relative_path"],
+                    int(rec["row_count"]) if rec.get("row_count") else None,
+                    (rec.get("sha256") or "").lower() or None,
+                )
+            )
+    return out
 
 
-def main() -> None:
-    args = parse_args()
-    input_root = Path(args.input_root).expanduser().resolve()
+class _HashingReader(io.RawIOBase):
+    """Raw file wrapper that hashes every byte gzip pulls through it."""
 
-    accepted = []
-    rejects = Counter()
-    for record in iter_records(input_root):
-        row, reason = validate_record(record)
-        if reason:
-            rejects[reason] += 1
-        else:
-            accepted.append(row)
-
-    print(
-        json.dumps(
-            {
-                "mode": "dry_run" if args.dry_run else "apply",
-                "input_root": str(input_root),
-                "accepted_rows": len(accepted),
-                "rejected_rows": sum(rejects.values()),
-                "rejected_by_reason": dict(rejects),
-                "accepted_unique_dockets": len({r["docket_id"] for r in accepted}),
-                "accepted_unique_document_ids": len({r["document_id"] for r in accepted}),
-            },
-            indent=2,
-        )
-    )
+    def __init__(self, raw):
+        super().__init__()
+        self._raw = raw
+        self.digest = hashlib.sha256()
 
-    if args.dry_run:
-        return
+    def readable(self) -> bool:
+        return True
 
-    conn = connect_psycopg2(args)
-    try:
-        with conn.cursor() as cur:
-            from psycopg2.extras import execute_values
-
-            docket_by_id = {}
-            for r in accepted:
-                docket_by_id[r["docket_id"]] = (
-                    r["docket_id"],
-                    r["docket_api_link"],
-                    r["agency_id"],
-                    r["docket_type"],
-                    r["modify_date"],
-                    r["docket_title"],
-                )
-            execute_values(
-                cur,
-                """
-                INSERT INTO dockets (docket_id, docket_api_link, agency_id, docket_type, modify_date, docket_title)
-                VALUES %s
-                ON CONFLICT (docket_id) DO UPDATE
-                SET agency_id = EXCLUDED.agency_id,
-                    docket_type = EXCLUDED.docket_type,
-                    modify_date = EXCLUDED.modify_date,
-                    docket_title = EXCLUDED.docket_title
-                """,
-                list(docket_by_id.values()),
-            )
+    def readinto(self, buffer) -> int:
+        n = self._raw.readinto(buffer)
+        if n:
+            self.digest.update(memoryview(buffer)[:n])
+        return n
 
-            doc_by_id = {}
-            for r in accepted:
-                doc_by_id[r["document_id"]] = (
-                    r["document_id"],
-                    r["docket_id"],
-                    r["document_api_link"],
-                    r["agency_id"],
-                    r["document_type"],
-                    r["modify_date"],
-                    r["posted_date"],
-                    r["document_title"],
-                )
-            execute_values(
-                cur,
-                """
-                INSERT INTO documents (
-                    document_id, docket_id, document_api_link, agency_id,
-                    document_type, modify_date, posted_date, document_title
-                )
-                VALUES %s
-                ON CONFLICT (document_id) DO UPDATE
-                SET docket_id = EXCLUDED.docket_id,
-                    document_api_link = EXCLUDED.document_api_link,
-                    agency_id = EXCLUDED.agency_id,
-                    document_type = EXCLUDED.document_type,
-                    modify_date = EXCLUDED.modify_date,
-                    posted_date = EXCLUDED.posted_date,
-                    document_title = EXCLUDED.document_title
-                """,
-                list(doc_by_id.values()),
-            )
-        conn.commit()
+    def drain(self) -> None:
+        while self._raw.readinto(bytearray(1 << 16)):
+            pass
+
+    def close(self) -> None:
+        self._raw.close()
+        super().close()
+
+
+@dataclass
+class PartitionResult:
+    relative_path: str
+    sha256: str = ""
+    rows: int = 0
+    accepted: int = 0
+    rejects: Counter = field(default_factory=Counter)
+    docket_ids: set = field(default_factory=set)
+    error: str | None = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def iter_partition(partition: Partition, result: PartitionResult) -> Iterator[dict]:
+    """
+    Yield accepted rows of one partition while hashing and counting it.
+
+    Sets ``result.error`` when the sha256 or row count disagree with
+    ``partitions.csv``; callers must check it after the generator is exhausted.
+    """
+    with open(partition.path, "rb") as fh:
+        reader = _HashingReader(fh)
+        with gzip.open(io.BufferedReader(reader), "rt", encoding="utf-8") as handle:
+            for line in handle:
+                if not line.strip():
+                    continue
+                result.rows += 1
+                row, reason = validate_record(json.loads(line))
+                if reason:
+                    result.rejects[reason] += 1
+                    continue
+                result.accepted += 1
+                result.docket_ids.add(row["docket_id"])
+                yield row
+        reader.drain()
+        result.sha256 = reader.digest.hexdigest()
+    if partition.sha256 and result.sha256 != partition.sha256:
+        result.error = f"sha256 mismatch (expected {partition.sha256}, got {result.sha256})"
+    elif partition.row_count is not None and result.rows != partition.row_count:
+        result.error = f"row_count mismatch (expected {partition.row_count}, got {result.rows})"
+
+
+def _copy_partition(cur, partition: Partition, result: PartitionResult, batch_size: int) -> None:
+    # Writers flush only when told, so every batch stages dockets before documents.
+    dockets = BulkWriter(cur, DOCKETS_TARGET, max_rows=10 ** 12, max_bytes=10 ** 15)
+    documents = BulkWriter(cur, DOCUMENTS_TARGET, max_rows=10 ** 12, max_bytes=10 ** 15)
+    for row in iter_partition(partition, result):
+        dockets.add(tuple(row[c] for c in DOCKETS_TARGET.columns))
+        documents.add(tuple(row[c] for c in DOCUMENTS_TARGET.columns))
+        if documents.pending() >= batch_size:
+            dockets.flush()
+            documents.flush()
+    dockets.flush()
+    documents.flush()
+
+
+def load_partition(
+    partition: Partition, db: dict[str, Any] | None, batch_size: int = DEFAULT_BATCH_SIZE
+) -> PartitionResult:
+    """
+    Stream one partition into Postgres in a single transaction (worker entry point).
+
+    ``db`` holds psycopg2 connection kwargs; None means dry run (verify only).
+    The transaction commits only when the partition verifies.
+    """
+    if db is None:
+        result = PartitionResult(partition.relative_path)
+        for _row in iter_partition(partition, result):
+            pass
+        return result
+
+    import psycopg2  # imported lazily so dry-run works without dependency
+    import psycopg2.errors
+
+    conn = psycopg2.connect(**db)
+    try:
+        for attempt in range(1, DEADLOCK_RETRIES + 1):
+            result = PartitionResult(partition.relative_path)
+            try:
+                with conn.cursor() as cur:
+                    _copy_partition(cur, partition, result, batch_size)
+            except psycopg2.errors.DeadlockDetected:
+                # Partitions can share dockets; retry rather than fail the load.
+                conn.rollback()
+                if attempt == DEADLOCK_RETRIES:
+                    raise
+                continue
+            if result.ok:
+                conn.commit()
+            else:
+                conn.rollback()
+            return result
     finally:
         conn.close()
+    return result
+
+
+# ---------------------------------------------------------------------------
+# Checkpoint
+# ---------------------------------------------------------------------------
+
+def load_checkpoint(path: Path) -> set[tuple[str, str]]:
+    """``(relative_path, sha256)`` of partitions committed by earlier runs."""
+    done = set()
+    if path.is_file():
+        for line in path.read_text(encoding="utf-8").splitlines():
+            try:
+                rec = json.loads(line)
+                done.add((rec["relative_path"], rec["sha256"]))
+            except (ValueError, KeyError):
+                continue  # torn last line from a crash
+    return done
+
+
+def append_checkpoint(path: Path, result: PartitionResult) -> None:
+    with open(path, "a", encoding="utf-8") as handle:
+        handle.write(
+            json.dumps(
+                {"relative_path": result.relative_path, "sha256": result.sha256, "rows": result.rows}
+            )
+            + "\n"
+        )
+        handle.flush()
+        os.fsync(handle.fileno())
+
+
+def connect_kwargs(args: argparse.Namespace) -> dict[str, Any]:
+    return {
+        "host": args.db_host,
+        "port": args.db_port,
+        "database": args.db_name,
+        "user": args.db_user,
+        "password": args.db_password,
+    }
+
+
+def run(
+    partitions: list[Partition],
+    db: dict[str, Any] | None,
+    *,
+    workers: int,
+    batch_size: int,
+    checkpoint: Path | None,
+) -> dict[str, Any]:
+    """Load ``partitions`` on a process pool; returns the JSON summary."""
+    done = load_checkpoint(checkpoint) if checkpoint is not None else set()
+    todo = [p for p in partitions if not p.sha256 or (p.relative_path, p.sha256) not in done]
+    skipped = len(partitions) - len(todo)
+
+    rejects: Counter = Counter()
+    dockets: set = set()
+    failed: dict[str, str] = {}
+    rows = accepted = 0
+    with ProcessPoolExecutor(max_workers=max(1, workers)) as pool:
+        futures = {pool.submit(load_partition, p, db, batch_size): p for p in todo}
+        for fut in as_completed(futures):
+            part = futures[fut]
+            try:
+                res = fut.result()
+            except Exception as exc:  # pylint: disable=broad-except
+                failed[part.relative_path] = f"{type(exc).__name__}: {exc}"
+                continue
+            if not res.ok:
+                failed[part.relative_path] = res.error
+                continue
+            rows += res.rows
+            accepted += res.accepted
+            rejects.update(res.rejects)
+            dockets |= res.docket_ids
+            if checkpoint is not None and db is not None:
+                append_checkpoint(checkpoint, res)
+
+    return {
+        "mode": "dry_run" if db is None else "apply",
+        "partitions": len(partitions),
+        "partitions_skipped_checkpoint": skipped,
+        "partitions_loaded": len(todo) - len(failed),
+        "partitions_failed": failed,
+        "rows_read": rows,
+        "accepted_rows": accepted,
+        "rejected_rows": sum(rejects.values()),
+        "rejected_by_reason": dict(rejects),
+        "accepted_unique_dockets": len(dockets),
+    }
+
+
+def main() -> None:
+    args = parse_args()
+    input_root = Path(args.input_root).expanduser().resolve()
+    partitions_csv = (
+        Path(args.partitions_csv).expanduser().resolve()
+        if args.partitions_csv
+        else find_partitions_csv(input_root)
+    )
+    if partitions_csv is None:
+        print("partitions.csv not found; loading without sha256/row_count checks", file=sys.stderr)
+    partitions = read_partitions(input_root, partitions_csv)
+
+    checkpoint = None
+    if not args.dry_run:
+        default_dir = partitions_csv.parent if partitions_csv else input_root
+        checkpoint = Path(args.checkpoint) if args.checkpoint else default_dir / CHECKPOINT_NAME
+        if args.fresh and checkpoint.exists():
+            checkpoint.unlink()
+
+    summary = run(
+        partitions,
+        None if args.dry_run else connect_kwargs(args),
+        workers=args.workers,
+        batch_size=args.batch_size,
+        checkpoint=checkpoint,
+    )
+    summary["input_root"] = str(input_root)
+    print(json.dumps(summary, indent=2))
+    if summary["partitions_failed"]:
+        sys.exit(1)
 
 
 if __name__ == "__main__":
     main()
-
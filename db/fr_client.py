@@ -0,0 +1,315 @@
+"""
+Shared Federal Register API client for the ``db/`` ingest scripts.
+
+``FRClient`` fetches ``/api/v1/documents/<number>.json`` on a bounded thread
+pool, spaces requests with a process-wide rate limiter, retries 429 / 5xx /
+network errors with exponential backoff and jitter, and keeps every response
+(404s included) in an on-disk cache keyed by document number. Cached entries
+younger than ``FR_CACHE_MAX_AGE`` seconds are served without touching the
+network; older ones are revalidated with ``If-None-Match`` /
+``If-Modified-Since``. One SSL context is built per client.
+
+Typical use::
+
+    client = get_fr_client()
+    for frdocnum, doc in client.get_documents(sorted(frdocnums)):
+        ...   # doc is {} when the API has no such document
+
+Environment: ``FR_CACHE_DIR`` (default ``~/.cache/mirrulations/federal_register``),
+``FR_CACHE_MAX_AGE`` (default 7 days), ``FR_MAX_WORKERS`` (default 8),
+``FR_RATE_PER_SEC`` (default 5).
+"""
+from __future__ import annotations
+
+import email.utils
+import json
+import logging
+import os
+import random
+import re
+import ssl
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Tuple
+
+try:
+    import certifi
+except ImportError:
+    certifi = None  # type: ignore[assignment]
+
+log = logging.getLogger(__name__)
+
+FR_API_URL = "https://www.federalregister.gov/api/v1/documents/{}.json"
+USER_AGENT = "mirrulations-search-ingest"
+
+
+def _env_number(name: str, default: float) -> float:
+    raw = os.environ.get(name)
+    if raw is None or not raw.strip():
+        return default
+    try:
+        value = float(raw)
+    except ValueError:
+        return default
+    return value if value > 0 else default
+
+
+DEFAULT_CACHE_DIR = Path(
+    os.environ.get("FR_CACHE_DIR") or Path.home() / ".cache" / "mirrulations" / "federal_register"
+).expanduser()
+DEFAULT_MAX_AGE = _env_number("FR_CACHE_MAX_AGE", 7 * 24 * 3600)
+DEFAULT_MAX_WORKERS = int(_env_number("FR_MAX_WORKERS", 8))
+DEFAULT_RATE = _env_number("FR_RATE_PER_SEC", 5.0)
+MAX_ATTEMPTS = 4
+BACKOFF_BASE = 1.0
+_RETRY_STATUS = frozenset({429, 500, 502, 503, 504})
+
+
+class RateLimiter:
+    """Spaces ``acquire`` calls at least ``1 / rate`` seconds apart across threads."""
+
+    def __init__(
+        self,
+        rate: float,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._next = 0.0
+
+    def acquire(self) -> None:
+        with self._lock:
+            now = self._clock()
+            start = max(now, self._next)
+            self._next = start + self.interval
+        if start > now:
+            self._sleep(start - now)
+
+    def pause(self, seconds: float) -> None:
+        """Push every later request back by ``seconds`` (e.g. after a 429)."""
+        with self._lock:
+            self._next = max(self._next, self._clock() + seconds)
+
+
+@dataclass
+class FRClientStats:
+    network_calls: int = 0
+    cache_hits: int = 0
+    revalidated: int = 0
+    retries: int = 0
+    failures: int = 0
+
+    def summary(self) -> str:
+        return (
+            f"{self.network_calls} API call(s), {self.cache_hits} cache hit(s), "
+            f"{self.revalidated} revalidated, {self.retries} retr(y/ies), "
+            f"{self.failures} failure(s)"
+        )
+
+
+def _default_opener(ssl_context: ssl.SSLContext) -> Callable[..., Any]:
+    def opener(request: urllib.request.Request, timeout: float) -> Any:
+        return urllib.request.urlopen(request, timeout=timeout, context=ssl_context)
+    return opener
+
+
+def _ssl_context() -> ssl.SSLContext:
+    if certifi is not None:
+        return ssl.create_default_context(cafile=certifi.where())
+    return ssl.create_default_context()
+
+
+def _retry_after(headers: Any) -> Optional[float]:
+    value = headers.get("Retry-After") if headers is not None else None
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        parsed = email.utils.parsedate_to_datetime(value)
+        return max(0.0, parsed.timestamp() - time.time()) if parsed else None
+
+
+class FRClient:  # pylint: disable=too-many-instance-attributes
+    """Concurrent, rate-limited, cached Federal Register document fetcher."""
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        cache_dir: Optional[Path] = DEFAULT_CACHE_DIR,
+        *,
+        max_age: float = DEFAULT_MAX_AGE,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        rate: float = DEFAULT_RATE,
+        max_attempts: int = MAX_ATTEMPTS,
+        backoff: float = BACKOFF_BASE,
+        timeout: float = 30,
+        opener: Optional[Callable[..., Any]] = None,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.cache_dir = Path(cache_dir) if cache_dir is not None else None
+        self.max_age = max_age
+        self.max_workers = max(1, max_workers)
+        self.max_attempts = max(1, max_attempts)
+        self.backoff = backoff
+        self.timeout = timeout
+        self.limiter = RateLimiter(rate)
+        self.stats = FRClientStats()
+        self._opener = opener or _default_opener(_ssl_context())
+        self._clock = clock
+        self._memory: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    # -- cache ---------------------------------------------------------------
+
+    def _cache_path(self, frdocnum: str) -> Optional[Path]:
+        if self.cache_dir is None:
+            return None
+        return self.cache_dir / f"{re.sub(r'[^A-Za-z0-9._-]', '_', frdocnum)}.json"
+
+    def _load(self, frdocnum: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            if frdocnum in self._memory:
+                return self._memory[frdocnum]
+        path = self._cache_path(frdocnum)
+        if path is None or not path.is_file():
+            return None
+        try:
+            entry = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        with self._lock:
+            self._memory[frdocnum] = entry
+        return entry
+
+    def _store(self, frdocnum: str, entry: Dict[str, Any]) -> None:
+        with self._lock:
+            self._memory[frdocnum] = entry
+        path = self._cache_path(frdocnum)
+        if path is None:
+            return
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_name(f"{path.name}.{threading.get_ident()}.part")
+            tmp.write_text(json.dumps(entry), encoding="utf-8")
+            os.replace(tmp, path)
+        except OSError as exc:
+            log.warning("Could not cache Federal Register response for %s: %s", frdocnum, exc)
+
+    def _fresh(self, entry: Dict[str, Any]) -> bool:
+        return self._clock() - entry.get("fetched_at", 0) < self.max_age
+
+    # -- network -------------------------------------------------------------
+
+    def _request(self, frdocnum: str, cached: Optional[Dict[str, Any]]) -> Tuple[int, Any, Any]:
+        """GET once; returns ``(status, headers, body_bytes)``. Raises on transport errors."""
+        req = urllib.request.Request(
+            FR_API_URL.format(frdocnum),
+            headers={"Accept": "application/json", "User-Agent": USER_AGENT},
+        )
+        if cached and cached.get("etag"):
+            req.add_header("If-None-Match", cached["etag"])
+        if cached and cached.get("last_modified"):
+            req.add_header("If-Modified-Since", cached["last_modified"])
+        self.limiter.acquire()
+        with self._lock:
+            self.stats.network_calls += 1
+        try:
+            with self._opener(req, self.timeout) as resp:
+                return getattr(resp, "status", 200), resp.headers, resp.read()
+        except urllib.error.HTTPError as e:
+            return e.code, e.headers, None
+
+    def _fetch(self, frdocnum: str, cached: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        for attempt in range(1, self.max_attempts + 1):
+            delay = self.backoff * (2 ** (attempt - 1)) * random.uniform(0.5, 1.5)
+            try:
+                status, headers, body = self._request(frdocnum, cached)
+            except (urllib.error.URLError, OSError) as e:
+                reason = getattr(e, "reason", e)
+                status, headers, body = None, None, None
+                log.debug("Network error fetching %s: %s", frdocnum, reason)
+            if status == 304 and cached:
+                with self._lock:
+                    self.stats.revalidated += 1
+                return dict(cached, fetched_at=self._clock())
+            if status == 200:
+                try:
+                    doc = json.loads(body.decode("utf-8"))
+                except ValueError as e:
+                    log.warning("Invalid JSON from Federal Register API for %s: %s", frdocnum, e)
+                    break
+                return {
+                    "status": 200,
+                    "fetched_at": self._clock(),
+                    "etag": headers.get("ETag") if headers is not None else None,
+                    "last_modified": headers.get("Last-Modified") if headers is not None else None,
+                    "body": doc,
+                }
+            if status == 404:
+                log.warning("Not found in Federal Register API: %s", frdocnum)
+                return {"status": 404, "fetched_at": self._clock(), "body": {}}
+            if status is not None and status not in _RETRY_STATUS:
+                log.warning("HTTP %s fetching %s", status, frdocnum)
+                break
+            if attempt < self.max_attempts:
+                with self._lock:
+                    self.stats.retries += 1
+                wait = _retry_after(headers) if status == 429 else None
+                if wait is not None:
+                    # Honour the server's pause for every thread, not just this one.
+                    self.limiter.pause(wait)
+                else:
+                    time.sleep(delay)
+        with self._lock:
+            self.stats.failures += 1
+        log.warning("Giving up on Federal Register document %s", frdocnum)
+        return None
+
+    # -- public API ----------------------------------------------------------
+
+    def get_document(self, frdocnum: str) -> Dict[str, Any]:
+        """FR API JSON for ``frdocnum``; ``{}`` on 404 or when every attempt failed."""
+        cached = self._load(frdocnum)
+        if cached is not None and self._fresh(cached):
+            with self._lock:
+                self.stats.cache_hits += 1
+            return cached.get("body") or {}
+        entry = self._fetch(frdocnum, cached)
+        if entry is None:
+            # Serve a stale copy rather than nothing when the API is unreachable.
+            return (cached or {}).get("body") or {}
+        self._store(frdocnum, entry)
+        return entry.get("body") or {}
+
+    def get_documents(self, frdocnums: Iterable[str]) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """Fetch several documents concurrently; yields ``(frdocnum, doc)`` in input order."""
+        nums = list(dict.fromkeys(frdocnums))
+        if len(nums) <= 1:
+            for n in nums:
+                yield n, self.get_document(n)
+            return
+        with ThreadPoolExecutor(
+            max_workers=min(self.max_workers, len(nums)), thread_name_prefix="fr-api"
+        ) as pool:
+            yield from zip(nums, pool.map(self.get_document, nums))
+
+
+_default_client: Optional[FRClient] = None
+_default_lock = threading.Lock()
+
+
+def get_fr_client() -> FRClient:
+    """Process-wide ``FRClient`` (one SSL context, one rate limiter, one cache)."""
+    global _default_client  # pylint: disable=global-statement
+    with _default_lock:
+        if _default_client is None:
+            _default_client = FRClient()
+        return _default_client
@@ -7,9 +7,11 @@ ingest_docket module to load data into the database. Optionally ingests full
 Federal Register documents (API → federal_register_documents / cfrparts) using
 ``frDocNum`` values from regulations.gov document JSON. Derived PDF attachment
 text under ``derived-data/.../extracted_txt`` is indexed into OpenSearch
-``comments_extracted_text`` (not the ``documents`` index). Comment JSON under
-``raw-data/comments/*.json`` is indexed into OpenSearch ``comments`` (same shape as
-``ingest_opensearch.py``).
+``comments_extracted_text`` (not the ``documents`` index), together with text
+extracted from any downloaded attachment binaries (``extract_attachments.py``).
+Comment JSON under ``raw-data/comments/*.json`` is parsed once and written to
+Postgres ``comments`` and OpenSearch ``comments`` (same shape as
+``ingest_opensearch.py``) in a single pass.
 
 Usage:
     python db/ingest.py FAA-2025-0618
@@ -19,27 +21,23 @@ See ``db/INGEST.md`` for prerequisites, flags, and outputs.
 """
 from __future__ import annotations
 
+import abc
 import argparse
 import json
 import logging
+import queue
 import re
-import ssl
 import sys
 import subprocess
+import threading
 import time
 import itertools
-import urllib.error
-import urllib.request
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Any
+from typing import Any, Iterable, Iterator
 
 from tqdm import tqdm
 
-try:
-    import certifi
-except ImportError:
-    certifi = None  # type: ignore[assignment]
-
 # Allow `python db/ingest.py` from repo root without PYTHONPATH.
 _ROOT = Path(__file__).resolve().parent.parent
 _src = _ROOT / "src"
@@ -53,21 +51,33 @@ except ImportError:
 
 from mirrsearch.db import get_opensearch_connection
 
+from comment_clusters import FormLetterClusterer
+from docket_source import DocketSource, as_source
+from extract_attachments import DEFAULT_WORKERS as EXTRACT_WORKERS
+from extract_attachments import extract_attachments, iter_attachment_binaries
+from fr_client import get_fr_client
+from passages import (
+    DEFAULT_PASSAGE_CHARS,
+    DEFAULT_PASSAGE_OVERLAP,
+    iter_passages,
+    read_text_chunks,
+)
 from ingest_docket import (
+    BATCH_SIZE,
     ingest_docket_and_documents,
     ingest_comments,
     extract_comment,
     load_raw_json,
+    prepare_comment_row,
+    log_nulled_fks,
+    write_comment_batch,
     _ingest_summary,
     _require_ingest_schema,
-    _ensure_comments_document_fk,
 )
 
 from ingest_federal_registry_document import (
     ensure_jsonb_support,
-    upsert_federal_register_documents,
-    extract_cfrparts,
-    upsert_cfrparts,
+    ingest_fr_documents,
 )
 
 import psycopg2
@@ -89,7 +99,6 @@ def _configure_logging(verbose: bool) -> None:
         logging.getLogger("opensearch").setLevel(logging.WARNING)
         logging.getLogger("urllib3").setLevel(logging.WARNING)
 
-FR_API_URL = "https://www.federalregister.gov/api/v1/documents/{}.json"
 
 _REQUIRED_FR_TABLES = frozenset({"federal_register_documents", "cfrparts"})
 
@@ -131,6 +140,14 @@ COMMENTS_INDEX_BODY: dict[str, Any] = {
                 "type": "text",
                 "fields": {"keyword": {"type": "keyword", "ignore_above": 256}},
             },
+            # Form-letter clusters: every comment carries its representative's
+            # commentId; only representatives carry commentText, and those of
+            # multi-member clusters carry clusterSize (members incl. itself).
+            "clusterId": {
+                "type": "text",
+                "fields": {"keyword": {"type": "keyword", "ignore_above": 256}},
+            },
+            "clusterSize": {"type": "integer"},
         }
     }
 }
@@ -160,6 +177,11 @@ COMMENTS_EXTRACTED_TEXT_INDEX_BODY: dict[str, Any] = {
                 "type": "text",
                 "fields": {"keyword": {"type": "keyword", "ignore_above": 256}},
             },
+            # One document per passage (see passages.py); offsets are characters
+            # into the attachment's full extracted text.
+            "passageIndex": {"type": "integer"},
+            "startOffset": {"type": "integer"},
+            "endOffset": {"type": "integer"},
         }
     }
 }
@@ -198,6 +220,27 @@ def parse_args() -> argparse.Namespace:
         action="store_true",
         help="Dry run — validate data without writing to database",
     )
+    parser.add_argument(
+        "--reindex-unchanged",
+        action="store_true",
+        help="Re-index comments into OpenSearch even when their Postgres row did not change",
+    )
+    parser.add_argument(
+        "--no-comment-clusters",
+        action="store_true",
+        help="Index every comment's full text instead of one representative per form letter",
+    )
+    parser.add_argument(
+        "--skip-extract",
+        action="store_true",
+        help="Do not extract text from downloaded attachment binaries (raw-data/binary-*)",
+    )
+    parser.add_argument(
+        "--extract-workers",
+        type=int,
+        default=EXTRACT_WORKERS,
+        help=f"Processes for attachment text extraction (default: {EXTRACT_WORKERS})",
+    )
     parser.add_argument(
         "--host",
         default="localhost",
@@ -461,6 +504,347 @@ def ingest_comment_json_to_opensearch(docket_dir: Path, client: Any) -> int:
     return indexed
 
 
+COMMENT_SINK_QUEUE_SIZE = 2000
+OPENSEARCH_BULK_SIZE = 500
+
+_SINK_DONE = object()
+
+
+@dataclass
+class SinkStats:
+    """Per-sink counters reported after a comment ingest pass."""
+
+    name: str
+    written: int = 0
+    failed: int = 0
+    unchanged: int = 0
+    batches: int = 0
+    seconds: float = 0.0
+
+    @property
+    def rate(self) -> float:
+        return self.written / self.seconds if self.seconds > 0 else 0.0
+
+    def summary(self) -> str:
+        return (
+            f"{self.name}: {self.written} written ({self.unchanged} unchanged), "
+            f"{self.failed} failed, {self.batches} batch(es), {self.rate:.0f} rows/s"
+        )
+
+
+class _CommentSink(threading.Thread, abc.ABC):
+    """
+    Drain a bounded queue in batches on a worker thread.
+
+    Subclasses implement ``_flush(batch) -> int`` returning the number of rows
+    written; an exception marks the whole batch failed without stopping the sink.
+    """
+
+    def __init__(self, name: str, batch_size: int, maxsize: int = COMMENT_SINK_QUEUE_SIZE):
+        super().__init__(name=f"{name}-sink", daemon=True)
+        self.queue: queue.Queue = queue.Queue(maxsize=maxsize)
+        self.batch_size = batch_size
+        self.stats = SinkStats(name)
+
+    def put(self, item: Any) -> None:
+        self.queue.put(item)
+
+    def close(self) -> SinkStats:
+        self.queue.put(_SINK_DONE)
+        self.join()
+        return self.stats
+
+    def run(self) -> None:
+        batch: list[Any] = []
+        while True:
+            item = self.queue.get()
+            if item is _SINK_DONE:
+                break
+            batch.append(item)
+            if len(batch) >= self.batch_size:
+                self._drain(batch)
+                batch = []
+        self._drain(batch)
+
+    def _drain(self, batch: list[Any]) -> None:
+        if not batch:
+            return
+        t0 = time.monotonic()
+        try:
+            written = self._flush(batch)
+        except Exception as exc:  # pylint: disable=broad-except
+            log.warning("%s sink: batch of %d failed: %s", self.stats.name, len(batch), exc)
+            written = 0
+        self.stats.written += written
+        self.stats.failed += len(batch) - written
+        self.stats.batches += 1
+        self.stats.seconds += time.monotonic() - t0
+
+    @abc.abstractmethod
+    def _flush(self, batch: list[Any]) -> int:
+        """Write ``batch``; returns how many of its items were written."""
+
+
+class PostgresCommentSink(_CommentSink):
+    """
+    Batched ``write_comment_batch`` calls; each batch is its own transaction.
+
+    Items are ``(row, opensearch_body | None)``. After each batch, bodies of
+    comments that were inserted or updated are forwarded to ``downstream``;
+    unchanged comments are not re-indexed unless ``forward_unchanged``, or,
+    with ``cluster_client``, unless their ``clusterId`` differs from the one
+    indexed there. If a batch fails, all of its bodies are forwarded so
+    OpenSearch still gets them.
+    """
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        conn: Any,
+        dry_run: bool = False,
+        batch_size: int = BATCH_SIZE,
+        downstream: _CommentSink | None = None,
+        forward_unchanged: bool = False,
+        cluster_client: Any = None,
+    ):
+        super().__init__("postgres", batch_size)
+        self.conn = conn
+        self.dry_run = dry_run
+        self.downstream = downstream
+        self.forward_unchanged = forward_unchanged
+        self.cluster_client = cluster_client
+        self.nulled: dict[str, int] = {}
+
+    def _moved_clusters(self, batch: list[tuple], changed: set[str]) -> set[str]:
+        """Unchanged comments in ``batch`` whose indexed ``clusterId`` is not their new one."""
+        bodies = {
+            body["commentId"]: body.get("clusterId")
+            for _, body in batch if body and body["commentId"] not in changed
+        }
+        if not bodies or self.cluster_client is None:
+            return set()
+        try:
+            indexed = indexed_comment_fields(self.cluster_client, list(bodies), "clusterId")
+        except Exception as exc:  # pylint: disable=broad-except
+            log.warning("Could not read indexed clusters, re-indexing the batch: %s", exc)
+            return set(bodies)
+        return {
+            cid for cid, cluster_id in bodies.items()
+            if cid not in indexed or indexed[cid] != cluster_id
+        }
+
+    def _forward(self, batch: list[tuple], changed: set[str] | None) -> None:
+        if self.downstream is None:
+            return
+        for _, body in batch:
+            if body and (changed is None or body["commentId"] in changed):
+                self.downstream.put(body)
+
+    def _flush(self, batch: list[tuple]) -> int:
+        try:
+            result = write_comment_batch(
+                self.conn, [row for row, _ in batch], self.dry_run, self.nulled
+            )
+        except Exception:
+            if not self.dry_run:
+                self.conn.rollback()
+            self._forward(batch, None)
+            raise
+        self.stats.unchanged += result.unchanged
+        changed = None if self.forward_unchanged else {k[0] for k in result.changed_keys}
+        if changed is not None:
+            changed |= self._moved_clusters(batch, changed)
+        self._forward(batch, changed)
+        return len(batch)
+
+
+class OpenSearchCommentSink(_CommentSink):
+    """Bulk-index comment bodies into ``comments``; per-item errors count as failures."""
+
+    def __init__(self, client: Any, batch_size: int = OPENSEARCH_BULK_SIZE):
+        super().__init__("opensearch", batch_size)
+        self.client = client
+
+    def _flush(self, batch: list[dict[str, Any]]) -> int:
+        actions: list[dict[str, Any]] = []
+        for body in batch:
+            actions.append({"index": {"_index": OPENSEARCH_COMMENTS_INDEX, "_id": body["commentId"]}})
+            actions.append(body)
+        resp = self.client.bulk(body=actions)
+        if not isinstance(resp, dict) or not resp.get("errors"):
+            return len(batch)
+        errors = sum(
+            1 for item in resp.get("items", []) if (item.get("index") or {}).get("error")
+        )
+        return len(batch) - errors
+
+
+def _clustered_comment_body(
+    body: dict[str, Any], clusterer: FormLetterClusterer
+) -> dict[str, Any]:
+    """Tag ``body`` with its form-letter cluster; members keep no text of their own."""
+    rep = clusterer.assign(body["commentId"], body["commentText"])
+    if rep == body["commentId"]:
+        return {**body, "clusterId": rep}
+    return {"commentId": body["commentId"], "docketId": body["docketId"], "clusterId": rep}
+
+
+def indexed_comment_fields(client: Any, comment_ids: list[str], field: str) -> dict[str, Any]:
+    """commentId → ``field`` (None when unset) of each of ``comment_ids`` in ``comments``."""
+    found: dict[str, Any] = {}
+    for start in range(0, len(comment_ids), OPENSEARCH_BULK_SIZE):
+        resp = client.mget(
+            index=OPENSEARCH_COMMENTS_INDEX,
+            body={"ids": comment_ids[start:start + OPENSEARCH_BULK_SIZE]},
+            _source_includes=[field],
+        )
+        for doc in resp.get("docs", []):
+            if doc.get("found"):
+                found[doc["_id"]] = (doc.get("_source") or {}).get(field)
+    return found
+
+
+def _changed_cluster_sizes(client: Any, sizes: dict[str, int]) -> dict[str, int]:
+    """The entries of ``sizes`` that differ from the ``clusterSize`` indexed now."""
+    try:
+        indexed = indexed_comment_fields(client, sorted(sizes), "clusterSize")
+    except Exception as exc:  # pylint: disable=broad-except
+        log.warning("Could not read indexed cluster sizes, writing them all: %s", exc)
+        return sizes
+    return {rep: size for rep, size in sizes.items() if indexed.get(rep) != size}
+
+
+def write_cluster_sizes(client: Any, sizes: dict[str, int]) -> int:
+    """Set ``clusterSize`` on each representative; returns how many updates succeeded."""
+    updated = 0
+    items = sorted(sizes.items())
+    for start in range(0, len(items), OPENSEARCH_BULK_SIZE):
+        chunk = items[start:start + OPENSEARCH_BULK_SIZE]
+        actions: list[dict[str, Any]] = []
+        for rep, size in chunk:
+            actions.append({"update": {"_index": OPENSEARCH_COMMENTS_INDEX, "_id": rep}})
+            actions.append({"doc": {"clusterSize": size}})
+        try:
+            resp = client.bulk(body=actions)
+        except Exception as exc:  # pylint: disable=broad-except
+            log.warning("Cluster size update of %d representatives failed: %s", len(chunk), exc)
+            continue
+        errors = 0
+        if isinstance(resp, dict) and resp.get("errors"):
+            errors = sum(
+                1 for item in resp.get("items", []) if (item.get("update") or {}).get("error")
+            )
+        updated += len(chunk) - errors
+    return updated
+
+
+def ingest_comments_dual_sink(  # pylint: disable=too-many-locals,too-many-branches
+    docket_dir: Path | DocketSource,
+    conn: Any,
+    client: Any,
+    *,
+    dry_run: bool = False,
+    verbose: bool = False,
+    reindex_unchanged: bool = False,
+    cluster_comments: bool = True,
+) -> tuple[int, int, list[SinkStats]]:
+    """
+    Parse ``raw-data/comments/*.json`` once and fan each record out to Postgres
+    (``comments``) and OpenSearch (``comments``) through bounded queues.
+
+    When both sinks run, OpenSearch only receives comments that Postgres
+    inserted or updated (all of them with ``reindex_unchanged``), plus any
+    that Postgres rejects for missing fields. Either sink is skipped when its
+    connection is None. Returns ``(processed, skipped, [sink stats])`` where
+    ``skipped`` counts files that neither sink could use.
+
+    With ``cluster_comments`` near-duplicate comments (form letters) are
+    grouped per docket: only the first comment of each cluster is indexed with
+    its text, the others are indexed as ``{commentId, docketId, clusterId}``
+    and the representative gets ``clusterSize`` once the pass is done.
+    Clusters are rebuilt from the whole docket on every pass, so an unchanged
+    comment is still re-indexed when its ``clusterId`` differs from the
+    indexed one (otherwise a member indexed in full on an earlier pass would
+    be counted again through its representative's ``clusterSize``), and
+    only sizes that differ from the indexed ones are written. Postgres
+    always receives every comment in full.
+    """
+    source = as_source(docket_dir)
+    names = source.names("comments")
+    if not names:
+        log.info(
+            "No comment JSON under %s/raw-data/comments/ — skipping comments ingest.",
+            source,
+        )
+        return 0, 0, []
+
+    sinks: list[_CommentSink] = []
+    pg_sink = os_sink = None
+    cluster = client is not None and cluster_comments
+    if client is not None:
+        ensure_comments_index(client)
+        os_sink = OpenSearchCommentSink(client)
+    if conn is not None or dry_run:
+        pg_sink = PostgresCommentSink(
+            conn,
+            dry_run=dry_run,
+            downstream=os_sink,
+            forward_unchanged=reindex_unchanged,
+            cluster_client=client if cluster else None,
+        )
+        sinks.append(pg_sink)
+    # Close order matters: Postgres forwards into OpenSearch until it drains.
+    if os_sink is not None:
+        sinks.append(os_sink)
+    for sink in sinks:
+        sink.start()
+
+    clusterer = FormLetterClusterer() if cluster else None
+    processed = skipped = 0
+    try:
+        for name, payload in tqdm(
+            source.iter_json("comments"),
+            total=len(names),
+            desc="Ingesting comments",
+            unit="comment",
+            disable=not verbose or len(names) < 20,
+        ):
+            data = payload.get("data") if isinstance(payload, dict) else None
+            if not isinstance(data, dict):
+                log.warning("Skipping %s — missing data object", name)
+                skipped += 1
+                continue
+            record = extract_comment(data)
+            body = _opensearch_comment_body(record) if os_sink is not None else None
+            if body and clusterer is not None:
+                body = _clustered_comment_body(body, clusterer)
+            row = prepare_comment_row(record, name) if pg_sink is not None else None
+            if row is not None:
+                pg_sink.put((row, body))
+            elif body:
+                os_sink.put(body)
+            else:
+                skipped += 1
+                continue
+            processed += 1
+    finally:
+        stats = [sink.close() for sink in sinks]
+
+    if clusterer is not None:
+        sizes = clusterer.sizes()
+        if sizes:
+            stale = sizes if reindex_unchanged else _changed_cluster_sizes(client, sizes)
+            updated = write_cluster_sizes(client, stale) if stale else 0
+            log.info(
+                "Comments → %d form-letter cluster(s) covering %d comments (%d sizes written)",
+                len(sizes), sum(sizes.values()), updated,
+            )
+    if pg_sink is not None:
+        log_nulled_fks(pg_sink.nulled)
+    for st in stats:
+        log.info("Comments → %s", st.summary())
+    return processed, skipped, stats
+
+
 def ensure_comments_extracted_text_index(client: Any) -> None:
     """Create the OpenSearch ``comments_extracted_text`` index if it does not exist."""
     if client.indices.exists(index=OPENSEARCH_COMMENTS_EXTRACTED_TEXT_INDEX):
@@ -472,9 +856,14 @@ def ensure_comments_extracted_text_index(client: Any) -> None:
 
 
 def _normalized_comments_extracted_text_body(rec: dict[str, Any]) -> dict[str, Any] | None:
-    """Map a record from ``read_derived_extracted_text`` to the index document shape."""
+    """
+    Map a record from ``read_derived_extracted_text`` / ``iter_derived_extracted_text``
+    to the index document shape. Records that point at a file
+    (``extractedTextPath``) keep the path instead of the text.
+    """
+    path = rec.get("extractedTextPath")
     text = rec.get("extractedText") or rec.get("extracted_text")
-    if not isinstance(text, str) or not text.strip():
+    if not path and (not isinstance(text, str) or not text.strip()):
         return None
     docket_id = rec.get("docketId") or rec.get("docket_id")
     comment_id = rec.get("commentId") or rec.get("comment_id")
@@ -484,30 +873,120 @@ def _normalized_comments_extracted_text_body(rec: dict[str, Any]) -> dict[str, A
     if not attachment_id:
         attachment_id = f"{comment_id}_attachment_1"
     method = rec.get("extractedMethod") or rec.get("extracted_method") or ""
-    return {
+    body = {
         "docketId": str(docket_id),
         "commentId": str(comment_id),
         "attachmentId": str(attachment_id),
         "extractedMethod": str(method),
-        "extractedText": text,
     }
+    if path:
+        body["extractedTextPath"] = str(path)
+    else:
+        body["extractedText"] = text
+    return body
+
+
+def _passage_documents(
+    body: dict[str, Any], size: int, overlap: int
+) -> Iterator[tuple[str, dict[str, Any]]]:
+    """``(_id, document)`` per passage of one attachment; ids are ``<attachmentId>#p<n>``."""
+    base = {k: v for k, v in body.items() if k not in ("extractedText", "extractedTextPath")}
+    path = body.get("extractedTextPath")
+    chunks = read_text_chunks(path) if path else [body["extractedText"]]
+    for passage in iter_passages(chunks, size, overlap):
+        yield f"{base['attachmentId']}#p{passage.index}", {
+            **base,
+            "extractedText": passage.text,
+            "passageIndex": passage.index,
+            "startOffset": passage.start,
+            "endOffset": passage.end,
+        }
+
+
+def _bulk_index(client: Any, actions: list[dict[str, Any]]) -> int:
+    """Send one bulk request; returns the number of items that failed."""
+    resp = client.bulk(body=actions)
+    if not isinstance(resp, dict) or not resp.get("errors"):
+        return 0
+    return sum(1 for item in resp.get("items", []) if (item.get("index") or {}).get("error"))
+
+
+def _delete_stale_passages(client: Any, passage_counts: dict[str, int]) -> None:
+    """
+    Drop passages left over from a longer earlier extraction, and any whole-text
+    document indexed under the bare attachmentId before passages existed.
+    """
+    items = sorted(passage_counts.items())
+    for start in range(0, len(items), 200):
+        chunk = items[start:start + 200]
+        should: list[dict[str, Any]] = [
+            {"bool": {"filter": [
+                {"term": {"attachmentId.keyword": attachment_id}},
+                {"range": {"passageIndex": {"gte": count}}},
+            ]}}
+            for attachment_id, count in chunk
+        ]
+        should.append({"bool": {
+            "filter": [{"terms": {"attachmentId.keyword": [a for a, _ in chunk]}}],
+            "must_not": [{"exists": {"field": "passageIndex"}}],
+        }})
+        try:
+            client.delete_by_query(
+                index=OPENSEARCH_COMMENTS_EXTRACTED_TEXT_INDEX,
+                body={"query": {"bool": {"should": should, "minimum_should_match": 1}}},
+            )
+        except Exception as exc:  # pylint: disable=broad-except
+            log.warning("Could not remove stale extracted-text passages: %s", exc)
 
 
 def ingest_extracted_text_to_comments_extracted_text(
-    client: Any, records: list[dict[str, Any]]
+    client: Any,
+    records: Iterable[dict[str, Any]],
+    *,
+    passage_chars: int = DEFAULT_PASSAGE_CHARS,
+    passage_overlap: int = DEFAULT_PASSAGE_OVERLAP,
 ) -> int:
-    """Index derived extracted-text records into OpenSearch ``comments_extracted_text``."""
-    indexed = 0
+    """
+    Index derived extracted-text records into OpenSearch ``comments_extracted_text``.
+
+    Each attachment is split into overlapping passages of at most
+    ``passage_chars`` characters and every passage is its own document carrying
+    ``commentId`` / ``attachmentId`` and its offsets; match counting already
+    dedupes on ``commentId``. Text behind ``extractedTextPath`` is streamed from
+    disk. Returns the number of attachments indexed.
+    """
+    indexed = passages = failed = 0
+    counts: dict[str, int] = {}
+    actions: list[dict[str, Any]] = []
     for rec in tqdm(records, desc="Indexing extracted text to OpenSearch", unit="text"):
         body = _normalized_comments_extracted_text_body(rec)
         if not body:
             continue
-        client.index(
-            index=OPENSEARCH_COMMENTS_EXTRACTED_TEXT_INDEX,
-            id=body["attachmentId"],
-            body=body,
+        n = 0
+        try:
+            for doc_id, doc in _passage_documents(body, passage_chars, passage_overlap):
+                actions.append(
+                    {"index": {"_index": OPENSEARCH_COMMENTS_EXTRACTED_TEXT_INDEX, "_id": doc_id}}
+                )
+                actions.append(doc)
+                n += 1
+                if len(actions) >= 2 * OPENSEARCH_BULK_SIZE:
+                    failed += _bulk_index(client, actions)
+                    actions = []
+        except OSError as exc:
+            log.warning("Could not read %s: %s", body.get("extractedTextPath"), exc)
+        if n:
+            indexed += 1
+            passages += n
+            counts[body["attachmentId"]] = n
+    if actions:
+        failed += _bulk_index(client, actions)
+    if counts:
+        _delete_stale_passages(client, counts)
+        log.info(
+            "Extracted text: %d attachment(s) as %d passage(s), %d failed",
+            indexed, passages, failed,
         )
-        indexed += 1
     return indexed
 
 
@@ -594,14 +1073,10 @@ def iter_extracted_plain_txt_files(docket_dir: Path) -> list[Path]:
     return sorted(p for p in root.rglob("*_extracted.txt") if p.is_file())
 
 
-def read_derived_extracted_plain_text(docket_dir: Path) -> list[dict[str, Any]]:
-    """
-    Load plain-text extractions (PDF attachment text). Filenames must look like
-    ``<commentId>_attachment_<n>_extracted.txt``. ``extractedMethod`` is taken from the
-    parent directory name (e.g. ``pypdf``).
-    """
+def _iter_plain_text_records(
+    docket_dir: Path, with_text: bool = True
+) -> Iterator[dict[str, Any]]:
     docket_id = docket_dir.name
-    out: list[dict[str, Any]] = []
     files = iter_extracted_plain_txt_files(docket_dir)
     for path in tqdm(
         files,
@@ -618,32 +1093,33 @@ def read_derived_extracted_plain_text(docket_dir: Path) -> list[dict[str, Any]]:
             continue
         comment_id = m.group("comment_id")
         attach_n = int(m.group("attach"))
-        method = path.parent.name
-        try:
-            text = path.read_text(encoding="utf-8")
-        except OSError as exc:
-            log.warning("Could not read %s: %s", path, exc)
-            continue
-        out.append(
-            {
-                "docketId": docket_id,
-                "commentId": comment_id,
-                "attachmentId": f"{comment_id}_attachment_{attach_n}",
-                "extractedMethod": method,
-                "extractedText": text,
-            }
-        )
-    return out
+        rec = {
+            "docketId": docket_id,
+            "commentId": comment_id,
+            "attachmentId": f"{comment_id}_attachment_{attach_n}",
+            "extractedMethod": path.parent.name,
+        }
+        if not with_text:
+            rec["extractedTextPath"] = str(path)
+        else:
+            try:
+                rec["extractedText"] = path.read_text(encoding="utf-8")
+            except OSError as exc:
+                log.warning("Could not read %s: %s", path, exc)
+                continue
+        yield rec
 
 
-def read_derived_extracted_text(docket_dir: Path) -> list[dict[str, Any]]:
+def read_derived_extracted_plain_text(docket_dir: Path) -> list[dict[str, Any]]:
     """
-    Load extracted comment-attachment text from ``derived-data/.../extracted_txt``:
-
-    - ``*.json`` — one object or a JSON array per file
-    - ``*_extracted.txt`` — plain text (e.g. under ``comments_extracted_text/pypdf/``)
+    Load plain-text extractions (PDF attachment text). Filenames must look like
+    ``<commentId>_attachment_<n>_extracted.txt``. ``extractedMethod`` is taken from the
+    parent directory name (e.g. ``pypdf``).
     """
-    records: list[dict[str, Any]] = []
+    return list(_iter_plain_text_records(docket_dir))
+
+
+def _iter_extracted_json_records(docket_dir: Path) -> Iterator[dict[str, Any]]:
     json_files = iter_extracted_txt_json_files(docket_dir)
     for path in tqdm(
         json_files,
@@ -657,13 +1133,33 @@ def read_derived_extracted_text(docket_dir: Path) -> list[dict[str, Any]]:
             log.warning("Could not read or parse %s: %s", path, exc)
             continue
         if isinstance(data, dict):
-            records.append(data)
+            yield data
         elif isinstance(data, list):
-            records.extend(x for x in data if isinstance(x, dict))
+            yield from (x for x in data if isinstance(x, dict))
+
+
+def read_derived_extracted_text(docket_dir: Path) -> list[dict[str, Any]]:
+    """
+    Load extracted comment-attachment text from ``derived-data/.../extracted_txt``:
+
+    - ``*.json`` — one object or a JSON array per file
+    - ``*_extracted.txt`` — plain text (e.g. under ``comments_extracted_text/pypdf/``)
+    """
+    records = list(_iter_extracted_json_records(docket_dir))
     records.extend(read_derived_extracted_plain_text(docket_dir))
     return records
 
 
+def iter_derived_extracted_text(docket_dir: Path) -> Iterator[dict[str, Any]]:
+    """
+    Like ``read_derived_extracted_text`` but lazy: plain-text files are not read
+    here; their records carry ``extractedTextPath`` for the passage chunker to
+    stream, so memory does not grow with attachment size.
+    """
+    yield from _iter_extracted_json_records(docket_dir)
+    yield from _iter_plain_text_records(docket_dir, with_text=False)
+
+
 # ─── Federal Register (same pipeline as ingest_fed_reg_docs_for_docket.py) ───
 
 
@@ -704,27 +1200,9 @@ def collect_frdocnums_from_docket(docket_dir: Path) -> set[str]:
     return all_nums
 
 
-def _ssl_context() -> ssl.SSLContext:
-    if certifi is not None:
-        return ssl.create_default_context(cafile=certifi.where())
-    return ssl.create_default_context()
-
-
 def fetch_fr_document(frdocnum: str) -> dict[str, Any]:
-    """GET Federal Register API JSON for ``frdocnum``; return ``{}`` on 404 or error."""
-    url = FR_API_URL.format(frdocnum)
-    try:
-        with urllib.request.urlopen(url, timeout=30, context=_ssl_context()) as resp:
-            return json.loads(resp.read().decode("utf-8"))
-    except urllib.error.HTTPError as e:
-        if e.code == 404:
-            log.warning("Not found in Federal Register API: %s", frdocnum)
-        else:
-            log.warning("HTTP %s fetching %s: %s", e.code, frdocnum, e.reason)
-        return {}
-    except urllib.error.URLError as e:
-        log.warning("Network error fetching %s: %s", frdocnum, e.reason)
-        return {}
+    """GET Federal Register API JSON for ``frdocnum`` (cached); return ``{}`` on 404 or error."""
+    return get_fr_client().get_document(frdocnum)
 
 
 def _require_fr_schema(conn: Any, args: argparse.Namespace) -> None:
@@ -780,32 +1258,36 @@ def ingest_federal_register_for_docket(
     _require_fr_schema(conn, args)
     ensure_jsonb_support()
 
-    ingested = 0
-    skipped = 0
-    for frdocnum in tqdm(
-        sorted(frdocnums),
-        desc="Fetching Federal Register documents",
-        unit="doc",
-        disable=len(frdocnums) < 5,
-    ):
-        doc = fetch_fr_document(frdocnum)
-        if not doc:
-            skipped += 1
-            continue
-        try:
-            with conn.cursor() as cur:
-                upsert_federal_register_documents(cur, doc)
-                cfr_rows = extract_cfrparts(doc)
-                upsert_cfrparts(cur, cfr_rows)
-            conn.commit()
-            ingested += 1
-            if args.verbose:
-                log.info("Federal Register: ingested %s", frdocnum)
-        except Exception as exc:  # pylint: disable=broad-except
-            conn.rollback()
-            log.warning("Federal Register: failed to ingest %s: %s", frdocnum, exc)
-            skipped += 1
+    fr_client = get_fr_client()
+    not_found = 0
+
+    def fetched():
+        nonlocal not_found
+        # Fetches run concurrently on the client's pool; upserts stay on this connection.
+        for frdocnum, doc in tqdm(
+            fr_client.get_documents(sorted(frdocnums)),
+            total=len(frdocnums),
+            desc="Fetching Federal Register documents",
+            unit="doc",
+            disable=len(frdocnums) < 5,
+        ):
+            if doc:
+                yield doc
+            else:
+                not_found += 1
 
+    result = ingest_fr_documents(conn, fetched())
+    for frdocnum, error in result.failed:
+        log.warning("Federal Register: failed to ingest %s: %s", frdocnum, error)
+    if args.verbose:
+        log.info(
+            "Federal Register: %d document(s), %d cfrparts row(s) upserted",
+            result.documents,
+            result.cfrparts,
+        )
+    ingested = result.documents
+    skipped = not_found + len(result.failed)
+    log.info("Federal Register API: %s", fr_client.stats.summary())
     return ingested, skipped
 
 
@@ -847,7 +1329,16 @@ def ingest_into_postgresql_dry_run(docket_dir: Path, args: argparse.Namespace) -
         sys.exit(1)
 
 
-def ingest_into_postgresql(docket_dir: Path, args: argparse.Namespace) -> None:
+def ingest_into_postgresql(
+    docket_dir: Path, args: argparse.Namespace, client: Any = None
+) -> int:
+    """
+    Load docket, documents, comments and FR data into Postgres.
+
+    When ``client`` is given, comments are indexed into OpenSearch in the same
+    pass (see ``ingest_comments_dual_sink``). Returns the number of comments
+    indexed into OpenSearch.
+    """
     log.info("Connecting to PostgreSQL at %s:%d/%s…", args.host, args.port, args.dbname)
     try:
         conn = psycopg2.connect(
@@ -862,15 +1353,27 @@ def ingest_into_postgresql(docket_dir: Path, args: argparse.Namespace) -> None:
         sys.exit(1)
 
     _require_ingest_schema(conn, args)
-    _ensure_comments_document_fk(conn)
 
+    c_indexed = 0
     try:
         ok, n_doc, sk, docket_id = ingest_docket_and_documents(
             docket_dir, conn, dry_run=False, verbose=args.verbose
         )
         pc, cs = (0, 0)
         if ok and not args.skip_comments_ingest:
-            pc, cs = ingest_comments(docket_dir, conn, dry_run=False, verbose=args.verbose)
+            if client is not None:
+                pc, cs, stats = ingest_comments_dual_sink(
+                    docket_dir,
+                    conn,
+                    client,
+                    dry_run=False,
+                    verbose=args.verbose,
+                    reindex_unchanged=getattr(args, "reindex_unchanged", False),
+                    cluster_comments=not getattr(args, "no_comment_clusters", False),
+                )
+                c_indexed = sum(st.written for st in stats if st.name == "opensearch")
+            else:
+                pc, cs = ingest_comments(docket_dir, conn, dry_run=False, verbose=args.verbose)
         fr_ing, fr_skip = (0, 0)
         if ok and not args.skip_federal_register:
             fr_ing, fr_skip = ingest_federal_register_for_docket(
@@ -899,6 +1402,19 @@ def ingest_into_postgresql(docket_dir: Path, args: argparse.Namespace) -> None:
             sys.exit(1)
     finally:
         conn.close()
+    return c_indexed
+
+
+def _reachable_opensearch_client() -> Any:
+    """An OpenSearch client that answers a ping, or None (logged) when it cannot be reached."""
+    try:
+        client = get_opensearch_connection()
+        if client.ping():
+            return client
+        log.warning("OpenSearch did not answer a ping; ingesting Postgres only")
+    except Exception as exc:  # pylint: disable=broad-except
+        log.warning("OpenSearch unavailable (%s); ingesting Postgres only", exc)
+    return None
 
 
 def main():
@@ -930,29 +1446,44 @@ def main():
             ", ".join(sorted(html_by_doc)),
         )
 
-    extracted_records = read_derived_extracted_text(docket_dir)
-    if extracted_records and args.verbose:
-        log.info("Read %d derived extracted-text record(s)", len(extracted_records))
+    has_extracted_text = bool(
+        iter_extracted_txt_json_files(docket_dir)
+        or iter_extracted_plain_txt_files(docket_dir)
+        or (not args.skip_extract and iter_attachment_binaries(docket_dir))
+    )
+
+    client = _reachable_opensearch_client()
 
+    c_count = 0
     if args.dry_run:
         ingest_into_postgresql_dry_run(docket_dir, args)
     else:
-        ingest_into_postgresql(docket_dir, args)
+        # Comments are parsed once and written to Postgres and OpenSearch together
+        # (Postgres only when OpenSearch is down).
+        c_count = ingest_into_postgresql(docket_dir, args, client)
+    if client is None:
+        log.error("OpenSearch ingest skipped: OpenSearch is unreachable")
+        sys.exit(1)
 
     try:
-        client = get_opensearch_connection()
         d_count = ingest_htm_files(docket_dir, client)
-        c_count = 0
-        if not args.skip_comments_ingest:
+        if args.dry_run and not args.skip_comments_ingest:
             c_count = ingest_comment_json_to_opensearch(docket_dir, client)
-        if extracted_records:
+        e_count = 0
+        if has_extracted_text:
             ensure_comments_extracted_text_index(client)
-            ingest_extracted_text_to_comments_extracted_text(client, extracted_records)
+            extracted = iter_derived_extracted_text(docket_dir)
+            if not args.skip_extract:
+                # New extractions are indexed as their workers finish.
+                extracted = itertools.chain(extracted, extract_attachments(
+                    docket_dir, extracted_txt_dir(docket_dir), workers=args.extract_workers
+                ))
+            e_count = ingest_extracted_text_to_comments_extracted_text(client, extracted)
         log.info(
             "OpenSearch ingest complete: %d document(s), %d comment(s), %d extracted text(s)",
             d_count,
             c_count,
-            len(extracted_records),
+            e_count,
         )
     except Exception as exc:
         log.error("OpenSearch ingest failed: %s", exc, exc_info=True)
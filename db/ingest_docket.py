@@ -20,6 +20,7 @@ Examples:
     python db/ingest_docket.py --download-s3 CMS-2025-0240
     python db/ingest_docket.py --docket-dir ./CMS-2025-0240
     python db/ingest_docket.py --download-s3 FAA-2025-0618 --download-only
+    python db/ingest_docket.py --stream-s3 CMS-2025-0240
 """
 from __future__ import annotations
 
@@ -28,37 +29,22 @@ import glob
 import json
 import logging
 import os
-import queue
 import sys
-import threading
-import time
-import warnings
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any
 
-try:
-    import boto3
-    from botocore import UNSIGNED
-    from botocore.config import Config
-except ImportError:
-    boto3 = None
-    UNSIGNED = None
-    Config = None
 import psycopg2
-import psycopg2.errors
-from psycopg2.extras import execute_values
 
 try:
     from dotenv import load_dotenv
 except ImportError:
     load_dotenv = None
 
+from bulk_copy import CopyTarget, MergeResult, copy_upsert
+from docket_cfr import refresh_for_dockets
+from docket_source import DocketSource, S3DocketSource, as_source
 from fed_reg_gov_data.load_documents import COLUMNS as DOC_COLS, map_document
-
-warnings.filterwarnings(
-    "ignore",
-    message=".*Boto3 will no longer support Python 3.9.*",
-)
+from s3_download import _normalize_docket_id, download_docket_from_s3
 
 logging.basicConfig(
     level=logging.INFO,
@@ -68,241 +54,6 @@ log = logging.getLogger(__name__)
 
 BATCH_SIZE = 500
 
-# ---------------------------------------------------------------------------
-# S3 download (mirrulations public bucket, unsigned)
-# ---------------------------------------------------------------------------
-
-S3_BUCKET = "mirrulations"
-RAW_DATA_PREFIX = "raw-data"
-DERIVED_DATA_PREFIX = "derived-data"
-_s3_client = None
-
-
-def _s3():
-    global _s3_client  # pylint: disable=global-statement
-    if _s3_client is None:
-        _s3_client = boto3.client("s3", config=Config(signature_version=UNSIGNED))
-    return _s3_client
-
-
-def _normalize_docket_id(docket_id: str) -> str:
-    s = docket_id.strip()
-    if not s:
-        return s
-    if "-" not in s:
-        return s.upper()
-    head, tail = s.split("-", 1)
-    return f"{head.split('_')[0].upper()}-{tail}"
-
-
-def _s3_agency(docket: str) -> str:
-    return _normalize_docket_id(docket).split("-")[0]
-
-
-def _s3_key_exists(prefix: str) -> bool:
-    resp = _s3().list_objects_v2(Bucket=S3_BUCKET, Prefix=prefix, MaxKeys=1)
-    return "Contents" in resp and len(resp["Contents"]) > 0
-
-
-def _s3_download_file(s3_key: str, local_path: str) -> None:
-    os.makedirs(os.path.dirname(local_path), exist_ok=True)
-    _s3().download_file(S3_BUCKET, s3_key, local_path)
-
-
-def _s3_get_file_list(prefix: str, label: Optional[str] = None) -> Tuple[List[Dict[str, Any]], int]:
-    files: List[Dict[str, Any]] = []
-    paginator = _s3().get_paginator("list_objects_v2")
-    for page in paginator.paginate(Bucket=S3_BUCKET, Prefix=prefix):
-        for obj in page.get("Contents", []):
-            files.append({"Key": obj["Key"], "Size": obj["Size"]})
-        if label:
-            print(f"{label}: {len(files)}", end="\r", flush=True)
-    if label:
-        print(f"{label}: {len(files)}")
-    total_size = sum(f["Size"] for f in files)
-    return files, total_size
-
-
-def _s3_rel_path(s3_key: str, base_prefix: str) -> str:
-    return os.path.relpath(s3_key, base_prefix)
-
-
-def _eta_line(done: int, total: int, elapsed: float) -> str:
-    rate = done / elapsed if elapsed > 0 else 0
-    remain = total - done
-    eta = (remain / rate) if rate > 0 else float("inf")
-    if eta == float("inf"):
-        return "  N/A "
-    return f"{int(eta // 60):2d}m{int(eta % 60):02d}s"
-
-
-def _s3_print_stats(stats: dict, totals: dict, start_times: dict) -> None:
-    text_done = (
-        stats["docket"] + stats["documents"] + stats["comments"] + stats.get("derived", 0)
-    )
-    elapsed = time.time() - start_times["text"]
-    text_eta = _eta_line(text_done, totals["text"], elapsed)
-    output = f"Text: {text_done:6}/{totals['text']:6} ETA:{text_eta:7}"
-    if "binary" in stats:
-        bin_done = stats["binary"]
-        if start_times["binary"] is None and bin_done > 0:
-            start_times["binary"] = time.time()
-        elapsed_bin = (time.time() - start_times["binary"]) if start_times["binary"] else 0
-        bin_eta = _eta_line(bin_done, totals["binary"], elapsed_bin)
-        output += f" | Bin: {bin_done:6}/{totals['binary']:6} ETA:{bin_eta:7}"
-    print(f"\r{output.ljust(80)}", end="", flush=True)
-
-
-def _s3_download_worker(
-    q: queue.Queue,
-    stats: dict,
-    totals: dict,
-    start_times: dict,
-    base_prefix: dict,
-    output_folder: str,
-) -> None:
-    while True:
-        item = q.get()
-        if item is None:
-            break
-        s3_key, file_type, _size = item
-        rel_path = _s3_rel_path(s3_key, base_prefix[file_type])
-        if file_type in ("docket", "documents", "comments", "binary"):
-            local_path = os.path.join(output_folder, "raw-data", rel_path)
-        elif file_type == "derived":
-            local_path = os.path.join(output_folder, "derived-data", rel_path)
-        else:
-            local_path = os.path.join(output_folder, rel_path)
-        try:
-            _s3_download_file(s3_key, local_path)
-            if file_type in stats:
-                stats[file_type] += 1
-        except Exception as e:  # pylint: disable=broad-except
-            print(f"\nError downloading {s3_key}: {e}", file=sys.stderr)
-            sys.exit(1)
-        stats["remaining"][file_type] -= 1
-        _s3_print_stats(stats, totals, start_times)
-        q.task_done()
-
-
-def download_docket_from_s3(
-    docket_id: str,
-    output_folder: str = ".",
-    include_binary: bool = False,
-    no_comments: bool = False,
-) -> Path:
-    """
-    Download mirrulations S3 data into ``{output_folder}/{docket_id}/``.
-    ``no_comments=True``: skip ``comments/`` and derived data.
-    """
-    docket_id = _normalize_docket_id(docket_id)
-    agency = _s3_agency(docket_id)
-    raw_agency = f"{RAW_DATA_PREFIX}/{agency}/{docket_id}/"
-    text_base = f"{raw_agency}text-{docket_id}/"
-    raw_binary_prefix = f"{RAW_DATA_PREFIX}/{agency}/{docket_id}/binary-{docket_id}/"
-    derived_prefix = f"{DERIVED_DATA_PREFIX}/{agency}/{docket_id}/"
-
-    if not _s3_key_exists(raw_agency):
-        log.error("No data at s3://%s/%s — check docket id / casing.", S3_BUCKET, raw_agency)
-        log.error("Expected: raw-data/<AGENCY>/<DOCKET-ID>/ (e.g. FAA-2025-0618).")
-        sys.exit(1)
-    if not _s3_key_exists(text_base):
-        log.error(
-            "No text bundle at s3://%s/%s (need text-%s/ under the docket folder).",
-            S3_BUCKET,
-            text_base,
-            docket_id,
-        )
-        sys.exit(1)
-
-    docket_root = Path(output_folder).resolve() / docket_id
-    docket_root_str = str(docket_root)
-
-    print("Preparing download lists...")
-    file_lists: Dict[str, List] = {}
-    total_sizes: Dict[str, int] = {}
-
-    file_lists["docket"], total_sizes["docket"] = _s3_get_file_list(f"{text_base}docket/", "docket")
-    print(f"Docket total size:   {total_sizes['docket']/1e6:.2f} MB")
-
-    file_lists["documents"], total_sizes["documents"] = _s3_get_file_list(
-        f"{text_base}documents/", "documents"
-    )
-    print(f"Document total size: {total_sizes['documents']/1e6:.2f} MB")
-
-    if no_comments:
-        file_lists["comments"], total_sizes["comments"] = [], 0
-        print("Comments: skipped (--skip-comments-download)")
-    else:
-        file_lists["comments"], total_sizes["comments"] = _s3_get_file_list(
-            f"{text_base}comments/", "comments"
-        )
-        print(f"Comment total size:  {total_sizes['comments']/1e6:.2f} MB")
-
-    if no_comments:
-        print("Derived data: skipped (no comments download)")
-    elif _s3_key_exists(derived_prefix):
-        file_lists["derived"], total_sizes["derived"] = _s3_get_file_list(derived_prefix, "derived")
-        print(f"Derived total size:  {total_sizes['derived']/1e6:.2f} MB")
-    else:
-        print("Derived data not found - skipping")
-
-    if include_binary and _s3_key_exists(raw_binary_prefix):
-        file_lists["binary"], total_sizes["binary"] = _s3_get_file_list(raw_binary_prefix, "binary")
-        print(f"Binary total size:   {total_sizes['binary']/1e6:.2f} MB")
-
-    totals: Dict[str, int] = {
-        "text": len(file_lists["docket"]) + len(file_lists["documents"]) + len(file_lists["comments"])
-    }
-    if "derived" in file_lists:
-        totals["text"] += len(file_lists["derived"])
-
-    stats = {
-        "docket": 0,
-        "documents": 0,
-        "comments": 0,
-        "remaining": {k: len(v) for k, v in file_lists.items()},
-    }
-    if "derived" in file_lists:
-        stats["derived"] = 0
-    start_times: Dict[str, Any] = {"text": time.time(), "binary": None}
-    if "binary" in file_lists:
-        totals["binary"] = len(file_lists["binary"])
-        stats["binary"] = 0
-
-    base_prefix = {
-        "docket": text_base,
-        "documents": text_base,
-        "comments": text_base,
-        "binary": f"{RAW_DATA_PREFIX}/{agency}/{docket_id}/",
-        "derived": derived_prefix,
-    }
-
-    q: queue.Queue = queue.Queue()
-    for file_type, files in file_lists.items():
-        for f in files:
-            q.put((f["Key"], file_type, f["Size"]))
-
-    n_threads = min(8, max(1, q.qsize() or 1))
-    threads = [
-        threading.Thread(
-            target=_s3_download_worker,
-            args=(q, stats, totals, start_times, base_prefix, docket_root_str),
-        )
-        for _ in range(n_threads)
-    ]
-    for t in threads:
-        t.start()
-    q.join()
-    for _ in threads:
-        q.put(None)
-    for t in threads:
-        t.join()
-    print("\nS3 download finished.")
-    print(f"Files for {docket_id} → {docket_root}")
-    return docket_root
-
-
 # ---------------------------------------------------------------------------
 # SQL + mapping
 # ---------------------------------------------------------------------------
@@ -342,17 +93,42 @@ COMMENT_COLS = [
 ]
 
 
-def _upsert_sql(table: str, columns: list[str], pk: str) -> str:
-    cols = ", ".join(columns)
-    updates = ", ".join(f"{c} = EXCLUDED.{c}" for c in columns if c != pk)
-    return (
-        f"INSERT INTO {table} ({cols})\nVALUES %s\nON CONFLICT ({pk}) DO UPDATE SET\n{updates}"
-    )
+def _upsert_target(table: str, columns: list[str], key: tuple[str, ...]) -> CopyTarget:
+    return CopyTarget(table, columns, conflict=key, update=[c for c in columns if c not in key])
+
+
+DOCKET_TARGET = _upsert_target("dockets", DOCKET_COLS, ("docket_id",))
+# documentsWithFRdoc and comments are hash-partitioned on docket_id
+# (partition_tables.py), so their unique keys include it. The id comes first
+# so merge results carry it as ``key[0]``.
+DOCUMENT_TARGET = _upsert_target("documentsWithFRdoc", DOC_COLS, ("document_id", "docket_id"))
+# Comment batches are staged in ``comments_stage`` so dangling document ids can
+# be resolved with one join per batch instead of loading every id into Python.
+COMMENT_TARGET = _upsert_target("comments", COMMENT_COLS, ("comment_id", "docket_id"))
+
+
+def _null_dangling_documents_sql() -> str:
+    stage = COMMENT_TARGET.stage
+    return f"""
+        WITH dangling AS (
+            SELECT DISTINCT st.docket_id, st.document_id AS missing
+            FROM {stage} st
+            WHERE st.document_id IS NOT NULL
+              AND NOT EXISTS (
+                  SELECT 1 FROM documentsWithFRdoc p
+                  WHERE p.docket_id = st.docket_id AND p.document_id = st.document_id
+              )
+        )
+        UPDATE {stage} s SET document_id = NULL
+        FROM dangling d
+        WHERE s.docket_id = d.docket_id AND s.document_id = d.missing
+        RETURNING s.comment_id, d.missing
+    """
 
 
-DOCKET_UPSERT_SQL = _upsert_sql("dockets", DOCKET_COLS, "docket_id")
-DOCUMENT_UPSERT_SQL = _upsert_sql("documentsWithFRdoc", DOC_COLS, "document_id")
-COMMENT_UPSERT_SQL = _upsert_sql("comments", COMMENT_COLS, "comment_id")
+def docket_id_from_object_id(object_id: str) -> str:
+    """regulations.gov document / comment ids are ``<docket id>-<sequence>``."""
+    return object_id.rsplit("-", 1)[0]
 
 
 def extract_self_link(data: dict) -> str | None:
@@ -468,7 +244,10 @@ _REQUIRED_PUBLIC_TABLES = frozenset({"dockets", "documentswithfrdoc", "comments"
 
 
 def _require_ingest_schema(conn, args: argparse.Namespace) -> None:
-    """Fail fast if ``schema-postgres.sql`` was not applied (common cause of UndefinedTable)."""
+    """
+    Fail fast if ``schema-postgres.sql`` was not applied (common cause of UndefinedTable)
+    or the migrations that add the upsert keys have not run.
+    """
     with conn.cursor() as cur:
         cur.execute(
             """
@@ -491,92 +270,70 @@ def _require_ingest_schema(conn, args: argparse.Namespace) -> None:
             args.dbname,
         )
         sys.exit(1)
-
-
-def _ensure_comments_document_fk(conn) -> None:
-    """
-    Legacy DBs may have ``comments.document_id`` referencing ``documents`` while ingest writes to
-    ``documentsWithFRdoc``. Drop the wrong FK and attach to ``documentsWithFRdoc`` (matches
-    ``schema-postgres.sql``). Idempotent.
-    """
-    with conn.cursor() as cur:
-        cur.execute(
-            """
-            SELECT c.conname, pg_get_constraintdef(c.oid, true)
-            FROM pg_constraint c
-            JOIN pg_class t ON t.oid = c.conrelid
-            JOIN pg_namespace n ON n.oid = t.relnamespace
-            WHERE n.nspname = 'public' AND t.relname = 'comments' AND c.contype = 'f'
-            """
+    missing_keys = _missing_conflict_keys(conn)
+    if missing_keys:
+        log.error(
+            "Database %r has no unique index for ingest's ON CONFLICT key(s): %s.\n"
+            "Apply the pending migrations first:\n  python db/migrate.py",
+            args.dbname,
+            ", ".join(missing_keys),
         )
-        rows = cur.fetchall()
-
-    has_fr = False
-    drop_names: list[str] = []
-    for conname, defn in rows:
-        compact = defn.lower().replace(" ", "")
-        if "foreignkey(document_id)" not in compact:
-            continue
-        if "documentswithfrdoc" in defn.lower():
-            has_fr = True
-            continue
-        drop_names.append(conname)
+        sys.exit(1)
 
-    if not drop_names and has_fr:
-        return
 
-    with conn.cursor() as cur:
-        for conname in drop_names:
-            log.info(
-                "Updating comments FK: dropping %s (referenced legacy table ``documents``).",
-                conname,
-            )
-            cur.execute(f'ALTER TABLE comments DROP CONSTRAINT "{conname}"')
-        if not has_fr:
-            try:
-                cur.execute(
-                    """
-                    ALTER TABLE comments
-                    ADD CONSTRAINT comments_document_id_fkey
-                    FOREIGN KEY (document_id) REFERENCES documentsWithFRdoc (document_id)
-                    """
-                )
-                log.info(
-                    "Added FK comments.document_id → documentsWithFRdoc.document_id."
-                )
-            except psycopg2.errors.DuplicateObject:
-                pass
-    conn.commit()
+# Unique, non-partial column indexes of the ingest tables, columns sorted.
+_UNIQUE_KEYS_SQL = """
+    SELECT lower(t.relname),
+           ARRAY(
+               SELECT lower(a.attname) FROM pg_attribute a
+               WHERE a.attrelid = t.oid AND a.attnum = ANY(i.indkey)
+               ORDER BY 1
+           )
+    FROM pg_index i
+    JOIN pg_class t ON t.oid = i.indrelid
+    JOIN pg_namespace n ON n.oid = t.relnamespace
+    WHERE n.nspname = 'public' AND i.indisunique
+      AND i.indpred IS NULL AND i.indexprs IS NULL
+      AND lower(t.relname) = ANY(%s)
+"""
 
 
-def _fk_id_sets(conn) -> tuple[set[str], set[str]]:
+def _missing_conflict_keys(conn) -> list[str]:
+    """
+    ``table (columns)`` for each upsert target whose conflict key has no
+    unique index (document and comment keys come from migration 0004).
+    """
+    targets = (DOCKET_TARGET, DOCUMENT_TARGET, COMMENT_TARGET)
     with conn.cursor() as cur:
-        cur.execute("SELECT document_id FROM documentsWithFRdoc;")
-        docs = {r[0] for r in cur.fetchall()}
-        cur.execute("SELECT docket_id FROM dockets;")
-        dockets = {r[0] for r in cur.fetchall()}
-    return docs, dockets
+        cur.execute(_UNIQUE_KEYS_SQL, ([t.table.lower() for t in targets],))
+        have = {(table, tuple(cols)) for table, cols in cur.fetchall()}
+    return [
+        f"{t.table} ({', '.join(t.conflict)})"
+        for t in targets
+        if (t.table.lower(), tuple(sorted(c.lower() for c in t.conflict))) not in have
+    ]
 
 
 def _batch_write(
     conn: Any,
-    sql: str,
+    target: CopyTarget,
     batch: list[tuple],
     dry_run: bool,
     label: str,
     log_each: bool = True,
-) -> int:
+) -> MergeResult:
+    """Merge ``batch`` and commit. A dry run reports every row as inserted."""
     if not batch:
-        return 0
+        return MergeResult()
     if dry_run:
         log.info("[DRY RUN] Would upsert %d %s row(s).", len(batch), label)
-        return len(batch)
+        return MergeResult(inserted=len(batch))
     with conn.cursor() as cur:
-        execute_values(cur, sql, batch)
+        result = copy_upsert(cur, target, batch)
     conn.commit()
     if log_each:
-        log.info("Upserted %d %s row(s).", len(batch), label)
-    return len(batch)
+        log.info("%s rows: %s.", label.capitalize(), result.summary())
+    return result
 
 
 def load_raw_json(path: Path) -> dict | None:
@@ -593,67 +350,71 @@ def _paths(docket_dir: Path, sub: str) -> list[Path]:
     return sorted(Path(p) for p in glob.glob(pattern))
 
 
+def _first_docket_row(source: DocketSource) -> dict[str, Any] | None:
+    for _name, raw in source.iter_json("docket"):
+        row = map_docket(raw) if raw else None
+        if row:
+            return row
+    return None
+
+
 def ingest_docket_and_documents(
-    docket_dir: Path,
+    docket_dir: Path | DocketSource,
     conn,
     dry_run: bool = False,
     verbose: bool = False,
 ) -> tuple[bool, int, int, str | None]:
-    docket_paths = _paths(docket_dir, "docket")
-    doc_paths = _paths(docket_dir, "documents")
-
-    docket_row: dict[str, Any] | None = None
-    for path in docket_paths:
-        raw = load_raw_json(path)
-        if not raw:
-            continue
-        row = map_docket(raw)
-        if row:
-            docket_row = row
-            break
+    source = as_source(docket_dir)
+    docket_row = _first_docket_row(source)
 
     if not docket_row:
         log.error(
             "No valid docket JSON under %s/raw-data/docket/ (need regulations.gov v4 export).",
-            docket_dir,
+            source,
         )
-        return False, 0, len(doc_paths), None
+        return False, 0, len(source.names("documents")), None
 
     if dry_run:
         log.info("[DRY RUN] Would upsert docket %s", docket_row["docket_id"])
     else:
-        tup = tuple(docket_row[c] for c in DOCKET_COLS)
-        with conn.cursor() as cur:
-            execute_values(cur, DOCKET_UPSERT_SQL, [tup])
-        conn.commit()
+        res = _batch_write(
+            conn, DOCKET_TARGET, [_row_tuple(docket_row, DOCKET_COLS)], False, "docket",
+            log_each=False,
+        )
         if verbose:
-            log.info("Upserted docket %s", docket_row["docket_id"])
+            state = "inserted" if res.inserted else "updated" if res.updated else "unchanged"
+            log.info("Docket %s %s", docket_row["docket_id"], state)
 
     batch: list[tuple] = []
     skipped = 0
-    upserted = 0
+    result = MergeResult()
 
-    for path in doc_paths:
-        raw = load_raw_json(path)
+    for name, raw in source.iter_json("documents"):
         if raw is None:
             skipped += 1
             continue
         doc = map_document_safe(raw)
         if not doc:
-            log.warning("Skipping %s — could not map document.", path.name)
+            log.warning("Skipping %s — could not map document.", name)
             skipped += 1
             continue
         batch.append(_row_tuple(doc, DOC_COLS))
         if len(batch) >= BATCH_SIZE:
-            upserted += _batch_write(conn, DOCUMENT_UPSERT_SQL, batch, dry_run, "document", log_each=False)
+            result.add(_batch_write(conn, DOCUMENT_TARGET, batch, dry_run, "document", log_each=False))
             batch.clear()
 
-    upserted += _batch_write(conn, DOCUMENT_UPSERT_SQL, batch, dry_run, "document", log_each=False)
+    result.add(_batch_write(conn, DOCUMENT_TARGET, batch, dry_run, "document", log_each=False))
+
+    if not dry_run and result.total:
+        # New documents can point the docket at FR documents (and CFR parts) already loaded.
+        with conn.cursor() as cur:
+            refresh_for_dockets(cur, [docket_row["docket_id"]])
+        conn.commit()
 
-    if verbose and upserted:
-        log.info("Upserted %d document(s).", upserted)
+    if verbose and result.total:
+        log.info("Documents: %s.", result.summary())
 
-    return True, upserted, skipped, docket_row["docket_id"]
+    return True, result.total, skipped, docket_row["docket_id"]
 
 
 def _fetch_db_summary(conn, docket_id: str) -> tuple[str | None, int, int, list[str]]:
@@ -690,7 +451,7 @@ def _fetch_db_summary(conn, docket_id: str) -> tuple[str | None, int, int, list[
 
 
 def _ingest_summary(
-    docket_dir: Path,
+    docket_dir: Path | DocketSource,
     docket_id: str | None,
     conn: Any,
     *,
@@ -701,16 +462,11 @@ def _ingest_summary(
     if not docket_id:
         return
     if dry_run:
-        title = None
-        for path in _paths(docket_dir, "docket"):
-            raw = load_raw_json(path)
-            if raw:
-                row = map_docket(raw)
-                if row:
-                    title = row.get("docket_title")
-                    break
-        n_df = len(_paths(docket_dir, "documents"))
-        n_cf = len(_paths(docket_dir, "comments"))
+        source = as_source(docket_dir)
+        row = _first_docket_row(source)
+        title = row.get("docket_title") if row else None
+        n_df = len(source.names("documents"))
+        n_cf = len(source.names("comments"))
         log.info("Docket: %s", docket_id)
         log.info("Title: %s", title or "—")
         log.info(
@@ -745,40 +501,91 @@ _COMMENT_REQUIRED = (
 )
 
 
+def prepare_comment_row(record: dict[str, Any], name: str) -> tuple | None:
+    """
+    Validate an ``extract_comment`` record and return its ``COMMENT_COLS`` tuple.
+
+    Returns None when required fields are missing. A missing ``docket_id``
+    (the partition key) is taken from the comment id. Dangling document ids
+    are resolved later, per batch, by ``write_comment_batch``.
+    """
+    missing = [c for c in _COMMENT_REQUIRED if not record.get(c)]
+    if missing:
+        log.warning("Skipping %s — missing required fields: %s", name, missing)
+        return None
+    if not record.get("docket_id"):
+        record["docket_id"] = docket_id_from_object_id(record["comment_id"])
+    return _row_tuple(record, COMMENT_COLS)
+
+
+def write_comment_batch(
+    conn: Any,
+    batch: list[tuple],
+    dry_run: bool,
+    nulled: dict[str, int] | None = None,
+) -> MergeResult:
+    """
+    Upsert comment rows through ``comments_stage``.
+
+    The batch is COPYed into the temp table, ``document_id`` values with no
+    document row in the same docket are set to NULL in one statement, and the
+    staged rows are merged into ``comments``. Null-outs are tallied in
+    ``nulled["document"]``. The result carries the ``(comment_id, docket_id)``
+    keys of inserted or updated rows; a dry run reports every row as inserted.
+    """
+    if not batch:
+        return MergeResult()
+    if dry_run:
+        log.info("[DRY RUN] Would upsert %d comment row(s).", len(batch))
+        return MergeResult(inserted=len(batch), changed_keys=[(row[0],) for row in batch])
+
+    def resolve_fks(cur, _target) -> None:
+        cur.execute(_null_dangling_documents_sql())
+        fixed = cur.fetchall()
+        for comment_id, missing in fixed:
+            log.warning(
+                "%s: document_id %r not in documentsWithFRdoc — setting NULL.", comment_id, missing
+            )
+        if nulled is not None and fixed:
+            nulled["document"] = nulled.get("document", 0) + len(fixed)
+
+    with conn.cursor() as cur:
+        result = copy_upsert(cur, COMMENT_TARGET, batch, before_merge=resolve_fks, keep_keys=True)
+    conn.commit()
+    return result
+
+
+def log_nulled_fks(nulled: dict[str, int]) -> None:
+    if nulled.get("document"):
+        log.info(
+            "%d comment(s) had document_id set to NULL (missing documentsWithFRdoc row).",
+            nulled["document"],
+        )
+
+
 def ingest_comments(
-    docket_dir: Path,
+    docket_dir: Path | DocketSource,
     conn,
     dry_run: bool = False,
     verbose: bool = False,
 ) -> tuple[int, int]:
-    files = _paths(docket_dir, "comments")
+    source = as_source(docket_dir)
+    files = source.names("comments")
     if not files:
         log.info(
             "No comment JSON under %s/raw-data/comments/ — skipping comments ingest.",
-            docket_dir,
+            source,
         )
         return 0, 0
     if verbose:
         log.info("Found %d comment JSON file(s).", len(files))
-    valid_doc_ids: set[str] = set()
-    valid_docket_ids: set[str] = set()
-    if not dry_run and conn is not None:
-        valid_doc_ids, valid_docket_ids = _fk_id_sets(conn)
-        if verbose:
-            log.info(
-                "FK check: %d document_id(s), %d docket_id(s) in DB.",
-                len(valid_doc_ids),
-                len(valid_docket_ids),
-            )
 
     batch: list[tuple] = []
     skipped = 0
-    nulled_doc = 0
-    nulled_docket = 0
-    upserted = 0
+    nulled: dict[str, int] = {}
+    result = MergeResult()
 
-    for path in files:
-        payload = load_raw_json(path)
+    for name, payload in source.iter_json("comments"):
         if not isinstance(payload, dict):
             skipped += 1
             continue
@@ -787,43 +594,21 @@ def ingest_comments(
             skipped += 1
             continue
 
-        record = extract_comment(data)
-        missing = [c for c in _COMMENT_REQUIRED if not record.get(c)]
-        if missing:
-            log.warning("Skipping %s — missing required fields: %s", path.name, missing)
+        row = prepare_comment_row(extract_comment(data), name)
+        if row is None:
             skipped += 1
             continue
 
-        doc_id = record.get("document_id")
-        if doc_id and not dry_run and doc_id not in valid_doc_ids:
-            log.warning(
-                "%s: document_id %r not in documentsWithFRdoc — setting NULL.",
-                path.name,
-                doc_id,
-            )
-            record["document_id"] = None
-            nulled_doc += 1
-
-        dk = record.get("docket_id")
-        if dk and not dry_run and dk not in valid_docket_ids:
-            log.warning("%s: docket_id %r not in dockets — setting NULL.", path.name, dk)
-            record["docket_id"] = None
-            nulled_docket += 1
-
-        batch.append(_row_tuple(record, COMMENT_COLS))
+        batch.append(row)
         if len(batch) >= BATCH_SIZE:
-            upserted += _batch_write(conn, COMMENT_UPSERT_SQL, batch, dry_run, "comment", log_each=False)
+            result.add(write_comment_batch(conn, batch, dry_run, nulled))
             batch.clear()
 
-    upserted += _batch_write(conn, COMMENT_UPSERT_SQL, batch, dry_run, "comment", log_each=False)
-
-    if nulled_doc:
-        log.info(
-            "%d comment(s) had document_id set to NULL (missing documentsWithFRdoc row).",
-            nulled_doc,
-        )
-    if nulled_docket:
-        log.info("%d comment(s) had docket_id set to NULL (missing dockets row).", nulled_docket)
+    result.add(write_comment_batch(conn, batch, dry_run, nulled))
+    result.changed_keys.clear()
+    log_nulled_fks(nulled)
+    if verbose and result.total:
+        log.info("Comments: %s.", result.summary())
 
     return len(files) - skipped, skipped
 
@@ -849,8 +634,16 @@ def _ddir_from_docket_id(did: str, args: argparse.Namespace) -> Path:
     return ddir
 
 
-def _resolve_docket_directory(args: argparse.Namespace) -> Path:
-    """Return path to ``.../DOCKET-ID/`` after optional S3 download."""
+def _resolve_docket_directory(args: argparse.Namespace) -> Path | DocketSource:
+    """Return path to ``.../DOCKET-ID/`` after optional S3 download, or an S3 source."""
+    if getattr(args, "stream_s3", None):
+        if args.download_only:
+            log.error("--stream-s3 reads S3 without downloading; omit --download-only.")
+            sys.exit(1)
+        source = S3DocketSource(args.stream_s3)
+        log.info("Streaming docket JSON from %s (no local copy).", source)
+        return source
+
     if args.download_s3:
         did = _normalize_docket_id(args.download_s3)
         if did != args.download_s3.strip():
@@ -912,6 +705,12 @@ def parse_args():
         metavar="DOCKET_ID",
         help="Download docket bundle from mirrulations S3 into --output-folder/DOCKET_ID/",
     )
+    p.add_argument(
+        "--stream-s3",
+        metavar="DOCKET_ID",
+        help="Read docket/document/comment JSON straight from mirrulations S3 "
+        "without writing files to disk",
+    )
     p.add_argument(
         "--output-folder",
         default="dockets",
@@ -1000,7 +799,6 @@ def main():
         log.error("Could not connect to database: %s", exc)
         sys.exit(1)
     _require_ingest_schema(conn, args)
-    _ensure_comments_document_fk(conn)
     try:
         ok, n_doc, sk, docket_id = ingest_docket_and_documents(docket_dir, conn, dry_run=False, verbose=args.verbose)
         pc, cs = (0, 0)
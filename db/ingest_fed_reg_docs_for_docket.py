@@ -3,8 +3,8 @@
 Pipeline:
 - Download docket from S3 via mirrulations-fetch
 - Extract FR doc numbers from documents/*.json
-- Fetch each FR document from the Federal Register API
-- Ingest each into Postgres via ingest_federal_registry_document.py
+- Fetch the FR documents from the Federal Register API (concurrent, cached; see fr_client.py)
+- Upsert them into Postgres in batches over one connection (ingest_fr_documents)
 
 Usage:
   python db/ingest_fed_reg_docs_for_docket.py --docket-id OSHA-2025-0005
@@ -16,17 +16,16 @@ Requires mirrulations-fetch to be installed:
 import argparse
 import json
 import shutil
-import ssl
 import subprocess
-import tempfile
-import urllib.error
-import urllib.request
 from pathlib import Path
 from typing import Set
 
-import certifi
-
-FR_API_URL = "https://www.federalregister.gov/api/v1/documents/{}.json"
+from fr_client import get_fr_client
+from ingest_federal_registry_document import (
+    ensure_jsonb_support,
+    get_connection,
+    ingest_fr_documents,
+)
 
 
 # ─── Download docket from S3 ─────────────────────────────────────────────────
@@ -102,49 +101,40 @@ def collect_frdocnums(docket_dir: Path) -> Set[str]:
 # ─── Fetch from Federal Register API ─────────────────────────────────────────
 
 def fetch_fr_document(frdocnum: str) -> dict:
-    url = FR_API_URL.format(frdocnum)
-    ssl_ctx = ssl.create_default_context(cafile=certifi.where())
-    try:
-        with urllib.request.urlopen(url, timeout=30, context=ssl_ctx) as resp:
-            return json.loads(resp.read().decode("utf-8"))
-    except urllib.error.HTTPError as e:
-        if e.code == 404:
-            print(f"Not found in Federal Register API: {frdocnum}")
-        else:
-            print(f"HTTP {e.code} fetching {frdocnum}: {e.reason}")
-        return {}
-    except urllib.error.URLError as e:
-        print(f"Network error fetching {frdocnum}: {e.reason}")
-        return {}
-
-
-# ─── Run ingest script ────────────────────────────────────────────────────────
-
-def run_ingest(frdocnum: str):
-    doc = fetch_fr_document(frdocnum)
-    if not doc:
-        return
-
-    with tempfile.NamedTemporaryFile(
-        mode="w", suffix=".json", delete=False, encoding="utf-8"
-    ) as tmp:
-        json.dump(doc, tmp)
-        tmp_path = tmp.name
+    return get_fr_client().get_document(frdocnum)
 
-    cmd = [
-        "python3",
-        "db/ingest_federal_registry_document.py",
-        "--json",
-        tmp_path,
-    ]
 
+# ─── Ingest in-process ───────────────────────────────────────────────────────
+
+def ingest_documents(frdocnums: Set[str]) -> int:
+    """
+    Fetch every FR document and upsert them over one connection in batches
+    (see ``ingest_fr_documents``). Returns the number of documents ingested.
+    """
+    fr_client = get_fr_client()
+    missing = []
+
+    def fetched():
+        for frdocnum, doc in fr_client.get_documents(sorted(frdocnums)):
+            if doc:
+                yield doc
+            else:
+                missing.append(frdocnum)
+
+    ensure_jsonb_support()
+    conn = get_connection()
     try:
-        subprocess.run(cmd, check=True)
-        print(f"Ingested {frdocnum}")
-    except subprocess.CalledProcessError:
-        print(f"Failed ingest: {frdocnum}")
+        result = ingest_fr_documents(conn, fetched())
     finally:
-        Path(tmp_path).unlink(missing_ok=True)
+        conn.close()
+
+    print(f"Federal Register API: {fr_client.stats.summary()}")
+    print(f"Ingested {result.documents} document(s), {result.cfrparts} cfrparts row(s)")
+    if missing:
+        print(f"Not found / unreachable: {', '.join(missing)}")
+    for frdocnum, error in result.failed:
+        print(f"Failed ingest: {frdocnum}: {error}")
+    return result.documents
 
 
 # ─── Main ─────────────────────────────────────────────────────────────────────
@@ -166,8 +156,7 @@ def main():
 
     print(f"Found {len(frdocnums)} unique FR documents")
 
-    for frdocnum in sorted(frdocnums):
-        run_ingest(frdocnum)
+    ingest_documents(frdocnums)
 
 
 if __name__ == "__main__":
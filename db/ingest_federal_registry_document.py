@@ -5,6 +5,7 @@ Ingest a single Federal Register document JSON file into Postgres.
 Populates:
 - federal_register_documents (one row per FR document_number)
 - cfrparts (one row per (frdocnum, title, cfrpart) from cfr_references)
+- docket_cfr (docket -> CFR part map, for dockets whose documents cite the FR doc)
 
 Usage:
   python ingest_fr_document.py --json data/runs/CMS_2026/federal_register/2025-21121.json
@@ -18,12 +19,52 @@ import argparse
 import json
 import os
 import sys
+from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Any, Dict, Iterable, List, Optional, Tuple
 
 import psycopg2
 from psycopg2.extras import register_default_jsonb
 
+from bulk_copy import CopyTarget, copy_upsert
+from docket_cfr import refresh_for_frdocnums
+
+CFRPARTS_TARGET = CopyTarget(
+    "cfrparts",
+    ("frdocnum", "title", "cfrpart"),
+    conflict=("frdocnum", "title", "cfrpart"),
+)
+
+FR_DOCUMENT_COLUMNS = (
+    "document_number",
+    "document_id",
+    "document_title",
+    "document_type",
+    "abstract",
+    "publication_date",
+    "effective_on",
+    "docket_ids",
+    "agency_id",
+    "agency_names",
+    "topics",
+    "significant",
+    "regulation_id_numbers",
+    "html_url",
+    "pdf_url",
+    "json_url",
+    "start_page",
+    "end_page",
+)
+
+FR_DOCUMENTS_TARGET = CopyTarget(
+    "federal_register_documents",
+    FR_DOCUMENT_COLUMNS,
+    conflict=("document_number",),
+    update=FR_DOCUMENT_COLUMNS[1:],
+)
+
+FR_BATCH_SIZE = int(os.getenv("FR_INGEST_BATCH_SIZE", "200"))
+
 
 def load_env() -> None:
     """Load .env from repo root (or nearest parent) if present."""
@@ -155,7 +196,8 @@ def ensure_jsonb_support() -> None:
     register_default_jsonb(loads=json.loads, globally=True)
 
 
-def upsert_federal_register_documents(cur, doc: Dict[str, Any]) -> None:
+def federal_register_row(doc: Dict[str, Any]) -> Dict[str, Any]:
+    """Map FR API JSON to a ``federal_register_documents`` row; ValueError without a number."""
     agency_id, agency_names = extract_agency_fields(doc)
     topics = doc.get("topics") or []
     reg_ids = doc.get("regulation_id_numbers") or []
@@ -180,7 +222,15 @@ def upsert_federal_register_documents(cur, doc: Dict[str, Any]) -> None:
         "end_page": doc.get("end_page"),
     }
     if not row["document_number"]:
-        raise SystemExit("FR JSON is missing document_number; cannot ingest.")
+        raise ValueError("FR JSON is missing document_number; cannot ingest.")
+    return row
+
+
+def upsert_federal_register_documents(cur, doc: Dict[str, Any]) -> None:
+    try:
+        row = federal_register_row(doc)
+    except ValueError as e:
+        raise SystemExit(str(e)) from e
 
     sql = """
     INSERT INTO federal_register_documents (
@@ -249,20 +299,97 @@ def upsert_federal_register_documents(cur, doc: Dict[str, Any]) -> None:
 def upsert_cfrparts(cur, rows: Iterable[Tuple[str, str, str]]) -> int:
     """
     Insert CFR parts derived from FR cfr_references into cfrparts.
-    Uses ON CONFLICT DO NOTHING to avoid duplicates.
+    Rows are COPYed into a staging table and merged with ON CONFLICT DO NOTHING.
     """
     rows = list(rows)
     if not rows:
         return 0
-    sql = """
-    INSERT INTO cfrparts (frdocnum, title, cfrpart)
-    VALUES (%s, %s, %s)
-    ON CONFLICT (frdocnum, title, cfrpart) DO NOTHING;
-    """
-    cur.executemany(sql, rows)
+    copy_upsert(cur, CFRPARTS_TARGET, rows)
+    refresh_for_frdocnums(cur, (r[0] for r in rows))
     return len(rows)
 
 
+@dataclass
+class FRIngestResult:
+    """Outcome of ``ingest_fr_documents``; ``failed`` holds ``(document_number, error)``."""
+
+    documents: int = 0
+    cfrparts: int = 0
+    failed: List[Tuple[str, str]] = field(default_factory=list)
+
+
+def _write_fr_items(cur, items: List[Tuple[Dict[str, Any], List[Tuple[str, str, str]]]]) -> int:
+    copy_upsert(cur, FR_DOCUMENTS_TARGET, [tuple(row[c] for c in FR_DOCUMENT_COLUMNS) for row, _ in items])
+    cfr_rows = [r for _, cfr in items for r in cfr]
+    if cfr_rows:
+        copy_upsert(cur, CFRPARTS_TARGET, cfr_rows)
+        refresh_for_frdocnums(cur, (r[0] for r in cfr_rows))
+    return len(cfr_rows)
+
+
+def _flush_fr_batch(conn, items, result: FRIngestResult) -> None:
+    """
+    Write one batch in one transaction. The batch is merged in bulk under a
+    savepoint; if that fails, it is replayed one document per savepoint so a
+    single bad document cannot sink the rest.
+    """
+    if not items:
+        return
+    with conn.cursor() as cur:
+        cur.execute("SAVEPOINT fr_batch")
+        try:
+            result.cfrparts += _write_fr_items(cur, items)
+            cur.execute("RELEASE SAVEPOINT fr_batch")
+            result.documents += len(items)
+        except psycopg2.Error:
+            cur.execute("ROLLBACK TO SAVEPOINT fr_batch")
+            for item in items:
+                cur.execute("SAVEPOINT fr_doc")
+                try:
+                    result.cfrparts += _write_fr_items(cur, [item])
+                    cur.execute("RELEASE SAVEPOINT fr_doc")
+                    result.documents += 1
+                except psycopg2.Error as e:
+                    cur.execute("ROLLBACK TO SAVEPOINT fr_doc")
+                    result.failed.append((item[0]["document_number"], str(e).strip()))
+    conn.commit()
+
+
+def ingest_fr_documents(
+    conn, docs: Iterable[Dict[str, Any]], batch_size: int = FR_BATCH_SIZE
+) -> FRIngestResult:
+    """
+    Upsert many FR API documents (and their cfrparts) over one connection.
+
+    Rows are accumulated and flushed every ``batch_size`` documents with
+    COPY + merge (see ``bulk_copy``), one transaction per batch. Documents
+    without a ``document_number`` and documents the database rejects are
+    reported in ``failed`` instead of raising.
+    """
+    result = FRIngestResult()
+    items: List[Tuple[Dict[str, Any], List[Tuple[str, str, str]]]] = []
+    seen: Dict[str, int] = {}
+    for doc in docs:
+        try:
+            row = federal_register_row(doc)
+        except ValueError as e:
+            result.failed.append((str(doc.get("document_number") or ""), str(e)))
+            continue
+        number = row["document_number"]
+        if number in seen:
+            # Same document twice in a batch: the later copy wins.
+            items[seen[number]] = (row, extract_cfrparts(doc))
+            continue
+        seen[number] = len(items)
+        items.append((row, extract_cfrparts(doc)))
+        if len(items) >= batch_size:
+            _flush_fr_batch(conn, items, result)
+            items = []
+            seen = {}
+    _flush_fr_batch(conn, items, result)
+    return result
+
+
 def main() -> int:
     ap = argparse.ArgumentParser(description="Ingest a Federal Register JSON document into Postgres.")
     ap.add_argument(
@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+"""
+Apply versioned schema migrations from ``db/migrations/``.
+
+``schema-postgres.sql`` creates the tables; everything after that (indexes,
+new columns, backfills) is a numbered step in ``db/migrations/``:
+
+- ``NNNN_name.sql`` runs as one transaction. A file whose first line is
+  ``-- migrate: no-transaction`` runs statement by statement in autocommit
+  instead, which ``CREATE INDEX CONCURRENTLY`` requires. Before each
+  ``CREATE INDEX CONCURRENTLY`` an INVALID index of the same name, left behind
+  by an interrupted build, is dropped so the build is retried.
+- ``NNNN_name.py`` defines ``up(conn)``; set ``TRANSACTIONAL = False`` in the
+  module to run it in autocommit.
+
+Applied versions are recorded in ``schema_migrations`` with a checksum of the
+file; editing an applied migration is reported. A session advisory lock keeps
+two runners (e.g. two deploys) from applying the same step at once.
+
+Usage:
+    python db/migrate.py              # apply everything pending
+    python db/migrate.py --list       # show applied / pending
+    python db/migrate.py --target 1   # apply up to and including version 1
+    python db/migrate.py --dry-run
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import importlib.util
+import logging
+import os
+import re
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+try:
+    from dotenv import load_dotenv
+except ImportError:
+    load_dotenv = None
+
+log = logging.getLogger(__name__)
+
+MIGRATIONS_DIR = Path(__file__).resolve().parent / "migrations"
+NO_TRANSACTION = "-- migrate: no-transaction"
+# Arbitrary constant shared by every runner for pg_advisory_lock.
+LOCK_KEY = 0x6D6967726174
+
+_FILE_NAME = re.compile(r"^(?P<version>\d+)_(?P<name>\w+)\.(?P<kind>sql|py)$")
+_CONCURRENT_INDEX = re.compile(
+    r"CREATE\s+(?:UNIQUE\s+)?INDEX\s+CONCURRENTLY\s+(?:IF\s+NOT\s+EXISTS\s+)?(?P<name>\w+)",
+    re.IGNORECASE,
+)
+
+CREATE_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS schema_migrations (
+    version INTEGER NOT NULL PRIMARY KEY,
+    name VARCHAR(200) NOT NULL,
+    checksum CHAR(64) NOT NULL,
+    applied_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW()
+)
+"""
+
+
+class MigrationError(Exception):
+    """A migration file is malformed or failed to apply."""
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    name: str
+    path: Path
+    checksum: str
+
+    @property
+    def kind(self) -> str:
+        return self.path.suffix.lstrip(".")
+
+    def __str__(self) -> str:
+        return f"{self.version:04d}_{self.name}"
+
+
+def discover(directory: Path = MIGRATIONS_DIR) -> list[Migration]:
+    """Migrations in ``directory`` ordered by version; duplicate versions are an error."""
+    found: dict[int, Migration] = {}
+    for path in sorted(directory.iterdir()) if directory.is_dir() else []:
+        m = _FILE_NAME.match(path.name)
+        if not m or not path.is_file():
+            continue
+        version = int(m.group("version"))
+        if version in found:
+            raise MigrationError(
+                f"Duplicate migration version {version}: {found[version].path.name}, {path.name}"
+            )
+        found[version] = Migration(
+            version, m.group("name"), path, hashlib.sha256(path.read_bytes()).hexdigest()
+        )
+    return [found[v] for v in sorted(found)]
+
+
+def split_statements(sql: str) -> list[str]:
+    """
+    Split a no-transaction SQL file on ``;`` at line ends, dropping ``--``
+    comment lines. Good enough for DDL; keep such files free of function
+    bodies and string literals containing ``;``.
+    """
+    lines = [line for line in sql.splitlines() if not line.lstrip().startswith("--")]
+    statements, current = [], []
+    for line in lines:
+        current.append(line)
+        if line.rstrip().endswith(";"):
+            statement = "\n".join(current).strip().rstrip(";").strip()
+            if statement:
+                statements.append(statement)
+            current = []
+    tail = "\n".join(current).strip()
+    if tail:
+        statements.append(tail)
+    return statements
+
+
+def applied_versions(conn) -> dict[int, str]:
+    """``version -> checksum`` from ``schema_migrations`` (created if missing)."""
+    with conn.cursor() as cur:
+        cur.execute(CREATE_TABLE_SQL)
+        cur.execute("SELECT version, checksum FROM schema_migrations")
+        rows = cur.fetchall()
+    conn.commit()
+    return {int(version): checksum.strip() for version, checksum in rows}
+
+
+def _drop_invalid_index(cur, statement: str) -> None:
+    m = _CONCURRENT_INDEX.match(statement)
+    if not m:
+        return
+    cur.execute(
+        "SELECT 1 FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+        "WHERE c.relname = %s AND NOT i.indisvalid",
+        (m.group("name").lower(),),
+    )
+    if cur.fetchone():
+        log.warning("Dropping invalid index %s left by an interrupted build", m.group("name"))
+        cur.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {m.group('name')}")
+
+
+def _load_module(migration: Migration):
+    spec = importlib.util.spec_from_file_location(f"migration_{migration}", migration.path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    if not callable(getattr(module, "up", None)):
+        raise MigrationError(f"{migration.path.name} does not define up(conn)")
+    return module
+
+
+def _record(conn, migration: Migration) -> None:
+    with conn.cursor() as cur:
+        cur.execute(
+            "INSERT INTO schema_migrations (version, name, checksum) VALUES (%s, %s, %s)",
+            (migration.version, migration.name, migration.checksum),
+        )
+
+
+def apply_migration(conn, migration: Migration) -> None:
+    """Apply one migration and record it; a transactional step is all-or-nothing."""
+    if migration.kind == "py":
+        module = _load_module(migration)
+        transactional = getattr(module, "TRANSACTIONAL", True)
+    else:
+        sql = migration.path.read_text(encoding="utf-8")
+        transactional = not sql.lstrip().startswith(NO_TRANSACTION)
+
+    if transactional:
+        try:
+            if migration.kind == "py":
+                module.up(conn)
+            else:
+                with conn.cursor() as cur:
+                    cur.execute(sql)
+            _record(conn, migration)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        return
+
+    conn.commit()
+    conn.autocommit = True
+    try:
+        if migration.kind == "py":
+            module.up(conn)
+        else:
+            with conn.cursor() as cur:
+                for statement in split_statements(sql):
+                    _drop_invalid_index(cur, statement)
+                    cur.execute(statement)
+        # Nothing is rolled back here: no-transaction steps must be idempotent
+        # (IF NOT EXISTS) so that one failing part-way is simply run again.
+        _record(conn, migration)
+    finally:
+        conn.autocommit = False
+
+
+def run(
+    conn,
+    migrations: list[Migration],
+    target: int | None = None,
+    dry_run: bool = False,
+) -> list[Migration]:
+    """Apply pending migrations (up to ``target``) in order; returns those applied."""
+    done = applied_versions(conn)
+    for migration in migrations:
+        recorded = done.get(migration.version)
+        if recorded and recorded != migration.checksum:
+            log.warning("%s was edited after it was applied (checksum differs)", migration)
+    pending = [
+        m for m in migrations
+        if m.version not in done and (target is None or m.version <= target)
+    ]
+    if dry_run or not pending:
+        return pending
+
+    with conn.cursor() as cur:
+        cur.execute("SELECT pg_advisory_lock(%s)", (LOCK_KEY,))
+    conn.commit()
+    applied: list[Migration] = []
+    try:
+        # Another runner may have applied some steps while we waited for the lock.
+        done = applied_versions(conn)
+        for migration in pending:
+            if migration.version in done:
+                continue
+            log.info("Applying %s", migration)
+            try:
+                apply_migration(conn, migration)
+            except Exception as exc:
+                raise MigrationError(f"{migration} failed: {exc}") from exc
+            applied.append(migration)
+    finally:
+        with conn.cursor() as cur:
+            cur.execute("SELECT pg_advisory_unlock(%s)", (LOCK_KEY,))
+        conn.commit()
+    return applied
+
+
+def get_connection(dbname: str | None = None) -> Any:
+    import psycopg2  # pylint: disable=import-outside-toplevel
+
+    if load_dotenv:
+        load_dotenv(Path(__file__).resolve().parent.parent / ".env")
+    dsn = os.getenv("DATABASE_URL")
+    if dsn and not dbname:
+        return psycopg2.connect(dsn)
+    return psycopg2.connect(
+        host=os.getenv("DB_HOST", os.getenv("PGHOST", "localhost")),
+        port=int(os.getenv("DB_PORT", os.getenv("PGPORT", "5432"))),
+        dbname=dbname or os.getenv("DB_NAME", os.getenv("PGDATABASE", "mirrulations")),
+        user=os.getenv("DB_USER", os.getenv("PGUSER", "postgres")),
+        password=os.getenv("DB_PASSWORD", os.getenv("PGPASSWORD", "")),
+    )
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Apply pending Postgres schema migrations.")
+    parser.add_argument("--dbname", help="Database name (default: DATABASE_URL / DB_NAME)")
+    parser.add_argument("--target", type=int, help="Apply up to and including this version")
+    parser.add_argument("--list", action="store_true", help="Show applied and pending migrations")
+    parser.add_argument("--dry-run", action="store_true", help="Show what would be applied")
+    parser.add_argument("--dir", type=Path, default=MIGRATIONS_DIR, help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> None:
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
+    args = parse_args(argv)
+    migrations = discover(args.dir)
+    conn = get_connection(args.dbname)
+    try:
+        if args.list:
+            done = applied_versions(conn)
+            for migration in migrations:
+                print(f"{'applied' if migration.version in done else 'pending'}  {migration}")
+            return
+        applied = run(conn, migrations, target=args.target, dry_run=args.dry_run)
+        if args.dry_run:
+            for migration in applied:
+                print(f"would apply  {migration}")
+        else:
+            log.info("Applied %d migration(s)", len(applied))
+    except MigrationError as exc:
+        log.error("%s", exc)
+        sys.exit(1)
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
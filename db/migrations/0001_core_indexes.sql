@@ -0,0 +1,32 @@
+-- migrate: no-transaction
+--
+-- Secondary indexes for the hot paths in DBLayer. Built CONCURRENTLY so a
+-- populated production database keeps serving reads and ingest writes.
+
+-- search(): documents joined to their docket, and to cfrparts by frdocnum.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS documentswithfrdoc_docket_id_idx
+    ON documentsWithFRdoc (docket_id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS documentswithfrdoc_frdocnum_idx
+    ON documentsWithFRdoc (frdocnum);
+
+-- cfr_part filters (cp.title = %s AND cp.cfrPart = %s) and the links join.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS cfrparts_title_cfrpart_idx
+    ON cfrparts (title, cfrpart);
+
+-- Per-docket comment lookups and ingest re-runs.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS comments_docket_id_idx
+    ON comments (docket_id);
+
+-- get_collections() and the ownership checks on every collection route.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS collections_user_email_idx
+    ON collections (user_email);
+
+-- A user's download jobs, and prune_expired_download_jobs (expires_at < NOW()).
+CREATE INDEX CONCURRENTLY IF NOT EXISTS download_jobs_user_email_expires_at_idx
+    ON download_jobs (user_email, expires_at);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS download_jobs_expires_at_idx
+    ON download_jobs (expires_at);
+
+-- Docket membership tests on the FR array column (docket_ids @> ARRAY[...]).
+CREATE INDEX CONCURRENTLY IF NOT EXISTS federal_register_documents_docket_ids_idx
+    ON federal_register_documents USING GIN (docket_ids);
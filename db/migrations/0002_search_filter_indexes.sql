@@ -0,0 +1,11 @@
+-- migrate: no-transaction
+--
+-- Indexes for the predicates produced by mirrsearch/search_filters.py.
+
+-- Half-open modify_date ranges, and ORDER BY d.modify_date DESC.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS dockets_modify_date_idx
+    ON dockets (modify_date DESC, docket_id);
+
+-- d.agency_id = ANY(%s) with the resolved agency ids.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS dockets_agency_id_idx
+    ON dockets (agency_id);
@@ -0,0 +1,22 @@
+-- Denormalised docket -> CFR part map read by search, hydration and CFR
+-- filters (see db/docket_cfr.py for how the loaders keep it current).
+
+CREATE TABLE IF NOT EXISTS docket_cfr (
+    docket_id VARCHAR(50) NOT NULL REFERENCES dockets(docket_id) ON DELETE CASCADE,
+    title VARCHAR(50) NOT NULL,
+    cfrpart VARCHAR(50) NOT NULL,
+    link VARCHAR(2000),
+    PRIMARY KEY (docket_id, title, cfrpart)
+);
+
+-- The primary key serves docket -> parts; this serves part -> dockets.
+CREATE INDEX IF NOT EXISTS docket_cfr_title_cfrpart_idx
+    ON docket_cfr (title, cfrpart, docket_id);
+
+INSERT INTO docket_cfr (docket_id, title, cfrpart, link)
+SELECT DISTINCT doc.docket_id, cp.title, cp.cfrpart, l.link
+FROM cfrparts cp
+JOIN documentsWithFRdoc doc ON doc.frdocnum = cp.frdocnum
+JOIN dockets d ON d.docket_id = doc.docket_id
+LEFT JOIN links l ON l.title = cp.title AND l.cfrpart = cp.cfrpart
+ON CONFLICT (docket_id, title, cfrpart) DO NOTHING;
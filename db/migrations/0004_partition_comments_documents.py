@@ -0,0 +1,42 @@
+"""
+Hash-partition ``documentsWithFRdoc`` and ``comments`` on ``docket_id``.
+
+On a new database (both tables empty) this runs ``db/partition_tables.py``
+(prepare, batched backfill, swap) at once. Moving populated tables copies
+every row and swaps under a lock, so a deploy does not start it: the
+migration only adds the ``(docket_id, <id>)`` unique indexes ingest upserts
+on, and an operator runs ``python db/partition_tables.py`` (resumable), or
+sets ``PARTITION_TABLES=1`` for this migration.
+"""
+import logging
+import os
+import sys
+from pathlib import Path
+
+_DB_DIR = Path(__file__).resolve().parent.parent
+if str(_DB_DIR) not in sys.path:
+    sys.path.insert(0, str(_DB_DIR))
+
+# pylint: disable=wrong-import-position,import-error
+from partition_tables import SPECS, add_key_index, partition_all, populated, relkind
+# pylint: enable=wrong-import-position,import-error
+
+log = logging.getLogger(__name__)
+
+# CREATE INDEX CONCURRENTLY and the per-batch commits need autocommit.
+TRANSACTIONAL = False
+
+
+def up(conn):
+    tables = populated(conn)
+    if not tables or os.environ.get("PARTITION_TABLES") == "1":
+        partition_all(conn)
+        return
+    with conn.cursor() as cur:
+        plain = [spec for spec in SPECS if relkind(cur, spec.table) == "r"]
+    for spec in plain:
+        add_key_index(conn, spec)
+    log.warning(
+        "%s hold rows and stay unpartitioned; run python db/partition_tables.py to move them",
+        ", ".join(tables),
+    )
@@ -0,0 +1,443 @@
+#!/usr/bin/env python3
+"""
+Move ``documentsWithFRdoc`` and ``comments`` onto hash partitions of ``docket_id``.
+
+Per-docket reads (document counts, comment pages, ``_fetch_db_summary``) and
+re-ingests of one docket touch a single partition, and vacuum / index builds
+work on partitions of ``1 / PARTITION_COUNT`` the size of the table.
+
+The move is online; each step is resumable and safe to re-run:
+
+1. **prepare** — create ``<table>_partitioned`` with the same columns,
+   ``PARTITION BY HASH (docket_id)`` and ``PARTITION_COUNT`` partitions
+   ``<table>_pNN``, primary key ``(docket_id, <id>)``; add a matching unique
+   index to the live table (so ingest's ``ON CONFLICT (<id>, docket_id)``
+   works on both layouts) and an AFTER trigger on it that mirrors every
+   insert / update / delete into the new table.
+2. **backfill** — copy existing rows in keyset batches of
+   ``PARTITION_BATCH_ROWS``, one statement (and commit) per batch. Source rows
+   are read ``FOR SHARE`` so a concurrent update or delete waits for the batch
+   and is then mirrored by the trigger; rows already mirrored are skipped.
+3. **swap** — in one short transaction bounded by ``PARTITION_LOCK_TIMEOUT``,
+   drop the trigger and rename: the live table becomes
+   ``<table>_unpartitioned`` and the partitioned one takes its name. The old
+   table is kept for rollback (dropped at once when it is empty) until
+   ``--drop-old``.
+
+A partitioned table can only enforce uniqueness on keys that contain
+``docket_id``, so ``document_id`` / ``comment_id`` are unique per docket (the
+ids embed their docket id). ``comments`` keeps its foreign key to ``dockets``;
+the one to ``documentsWithFRdoc(document_id)`` becomes
+``(docket_id, document_id)``, the same pair
+``ingest_docket.write_comment_batch`` resolves dangling documents by.
+``comments.docket_id`` becomes NOT NULL: rows that had lost it get the docket
+prefix of their comment id back. **prepare** first counts rows that would
+break a foreign key on the new table and stops, before any change, if there
+are some.
+
+Migration ``0004_partition_comments_documents`` only runs the three steps on
+empty tables (a new database) or with ``PARTITION_TABLES=1``. On populated
+tables it adds the ``(docket_id, <id>)`` unique indexes ingest needs and
+leaves the move to an operator running this script.
+
+Usage:
+    python db/bench_docket_queries.py --out before.json
+    python db/partition_tables.py                 # prepare, backfill and swap both tables
+    python db/bench_docket_queries.py --compare before.json
+    python db/partition_tables.py --status
+    python db/partition_tables.py --drop-old      # after checking the partitioned tables
+"""
+from __future__ import annotations
+
+import argparse
+import logging
+import os
+import sys
+from dataclasses import dataclass
+
+from migrate import get_connection
+
+log = logging.getLogger(__name__)
+
+
+def _positive_int_env(name: str, default: int) -> int:
+    try:
+        value = int(os.environ.get(name, default))
+    except ValueError:
+        return default
+    return value if value > 0 else default
+
+
+DEFAULT_PARTITIONS = _positive_int_env("PARTITION_COUNT", 16)
+DEFAULT_BATCH_ROWS = _positive_int_env("PARTITION_BATCH_ROWS", 10_000)
+LOCK_TIMEOUT = os.environ.get("PARTITION_LOCK_TIMEOUT", "5s")
+PARTITION_KEY = "docket_id"
+
+
+@dataclass(frozen=True)
+class ForeignKey:
+    name: str
+    columns: tuple[str, ...]
+    ref_table: str
+    ref_columns: tuple[str, ...]
+
+    @property
+    def references(self) -> str:
+        return f"{self.ref_table} ({', '.join(self.ref_columns)})"
+
+
+@dataclass(frozen=True)
+class PartitionSpec:
+    table: str
+    id_column: str
+    unique_columns: tuple[str, ...] = ()  # unique per docket on the new table
+    indexes: tuple[str, ...] = ()  # single-column secondary indexes
+    key_fill: str | None = None  # SQL for a NULL partition key, ``{row}`` = row prefix
+    foreign_keys: tuple[ForeignKey, ...] = ()  # on the new table
+
+    @property
+    def new(self) -> str:
+        return f"{self.table}_partitioned"
+
+    @property
+    def old(self) -> str:
+        return f"{self.table}_unpartitioned"
+
+    @property
+    def trigger(self) -> str:
+        return f"{self.table}_mirror_partitions"
+
+    @property
+    def legacy_key_index(self) -> str:
+        return f"{self.table}_docket_key_idx"
+
+
+SPECS = (
+    PartitionSpec(
+        "documentswithfrdoc", "document_id",
+        unique_columns=("document_api_link",),
+        indexes=("document_id", "frdocnum"),
+    ),
+    PartitionSpec(
+        "comments", "comment_id",
+        unique_columns=("api_link",),
+        indexes=("comment_id", "document_id"),
+        key_fill="regexp_replace({row}comment_id, '-[^-]*$', '')",
+        foreign_keys=(
+            ForeignKey("comments_docket_id_fkey", ("docket_id",), "dockets", ("docket_id",)),
+            ForeignKey(
+                "comments_document_fkey", ("docket_id", "document_id"),
+                "documentswithfrdoc", ("docket_id", "document_id"),
+            ),
+        ),
+    ),
+)
+
+
+def relkind(cur, table: str) -> str | None:
+    """``'p'`` for a partitioned table, ``'r'`` for a plain one, None if missing."""
+    cur.execute("SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)", (table,))
+    row = cur.fetchone()
+    return row[0] if row else None
+
+
+def columns(cur, table: str) -> list[str]:
+    cur.execute(
+        "SELECT attname FROM pg_attribute WHERE attrelid = to_regclass(%s) "
+        "AND attnum > 0 AND NOT attisdropped ORDER BY attnum",
+        (table,),
+    )
+    return [name for (name,) in cur.fetchall()]
+
+
+def _value_expr(spec: PartitionSpec, col: str, row: str = "") -> str:
+    expr = f"{row}{col}"
+    if col == PARTITION_KEY and spec.key_fill:
+        expr = f"COALESCE({expr}, {spec.key_fill.format(row=row)})"
+    return expr
+
+
+def _value_exprs(spec: PartitionSpec, cols: list[str], row: str = "") -> str:
+    return ", ".join(_value_expr(spec, col, row) for col in cols)
+
+
+def create_partitioned_sql(spec: PartitionSpec, partitions: int) -> list[str]:
+    """DDL for the (empty) partitioned copy of ``spec.table``."""
+    t, new = spec.table, spec.new
+    statements = [
+        f"CREATE TABLE {new} (LIKE {t} INCLUDING DEFAULTS) PARTITION BY HASH ({PARTITION_KEY})",
+        f"ALTER TABLE {new} ADD CONSTRAINT {t}_docket_pkey "
+        f"PRIMARY KEY ({PARTITION_KEY}, {spec.id_column})",
+    ]
+    statements += [
+        f"CREATE TABLE {t}_p{i:02d} PARTITION OF {new} "
+        f"FOR VALUES WITH (MODULUS {partitions}, REMAINDER {i})"
+        for i in range(partitions)
+    ]
+    statements += [
+        f"CREATE UNIQUE INDEX {t}_{col}_part_key ON {new} ({PARTITION_KEY}, {col})"
+        for col in spec.unique_columns
+    ]
+    statements += [f"CREATE INDEX {t}_{col}_part_idx ON {new} ({col})" for col in spec.indexes]
+    statements += [
+        f"ALTER TABLE {new} ADD CONSTRAINT {fk.name} "
+        f"FOREIGN KEY ({', '.join(fk.columns)}) REFERENCES {fk.references}"
+        for fk in spec.foreign_keys
+    ]
+    return statements
+
+
+def violations_sql(spec: PartitionSpec, fk: ForeignKey) -> str:
+    """Count of live rows that ``fk`` would reject once copied (NULLs are not checked)."""
+    values = ", ".join(f"{_value_expr(spec, col)} AS {col}" for col in fk.columns)
+    present = " AND ".join(f"r.{col} IS NOT NULL" for col in fk.columns)
+    match = " AND ".join(
+        f"f.{ref} = r.{col}" for col, ref in zip(fk.columns, fk.ref_columns)
+    )
+    return (
+        f"SELECT count(*) FROM (SELECT {values} FROM {spec.table}) r "
+        f"WHERE {present} AND NOT EXISTS (SELECT 1 FROM {fk.ref_table} f WHERE {match})"
+    )
+
+
+def mirror_trigger_sql(spec: PartitionSpec, cols: list[str]) -> list[str]:
+    """Trigger function + trigger copying every change on the live table to ``spec.new``."""
+    function = f"{spec.trigger}_fn"
+    body = f"""
+        CREATE OR REPLACE FUNCTION {function}() RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                DELETE FROM {spec.new} WHERE {spec.id_column} = OLD.{spec.id_column};
+            END IF;
+            IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                INSERT INTO {spec.new} ({', '.join(cols)})
+                VALUES ({_value_exprs(spec, cols, row='NEW.')})
+                ON CONFLICT DO NOTHING;
+            END IF;
+            RETURN NULL;
+        END
+        $$
+    """
+    return [
+        body,
+        f"DROP TRIGGER IF EXISTS {spec.trigger} ON {spec.table}",
+        f"CREATE TRIGGER {spec.trigger} AFTER INSERT OR UPDATE OR DELETE ON {spec.table} "
+        f"FOR EACH ROW EXECUTE FUNCTION {function}()",
+    ]
+
+
+def backfill_sql(spec: PartitionSpec, cols: list[str]) -> str:
+    """One keyset batch: rows with ``id > %s``, at most ``%s``; returns (last id, rows read)."""
+    col_list = ", ".join(cols)
+    return f"""
+        WITH batch AS (
+            SELECT {col_list} FROM {spec.table}
+            WHERE {spec.id_column} > %s
+            ORDER BY {spec.id_column}
+            LIMIT %s
+            FOR SHARE
+        ), moved AS (
+            INSERT INTO {spec.new} ({col_list})
+            SELECT {_value_exprs(spec, cols)} FROM batch
+            ON CONFLICT DO NOTHING
+        )
+        SELECT max({spec.id_column}), count(*) FROM batch
+    """
+
+
+def _in_transaction(cur, statements: list[str]) -> None:
+    # The connection is in autocommit (CREATE INDEX CONCURRENTLY needs it), so
+    # multi-statement steps open their own transaction.
+    cur.execute("BEGIN")
+    try:
+        for statement in statements:
+            cur.execute(statement)
+    except Exception:
+        cur.execute("ROLLBACK")
+        raise
+    cur.execute("COMMIT")
+
+
+def _foreign_keys_to(cur, table: str) -> list[tuple[str, str]]:
+    """(table, constraint) of FKs pointing at ``table``."""
+    cur.execute(
+        "SELECT conrelid::regclass::text, conname FROM pg_constraint "
+        "WHERE contype = 'f' AND conparentid = 0 AND confrelid = to_regclass(%s)",
+        (table,),
+    )
+    return list(cur.fetchall())
+
+
+def has_rows(cur, table: str) -> bool:
+    cur.execute(f"SELECT EXISTS (SELECT 1 FROM {table})")
+    return bool(cur.fetchone()[0])
+
+
+def add_key_index(conn, spec: PartitionSpec) -> None:
+    """Unique ``(docket_id, <id>)`` on the plain table, for ingest's ON CONFLICT target."""
+    with conn.cursor() as cur:
+        cur.execute(
+            f"CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS {spec.legacy_key_index} "
+            f"ON {spec.table} ({PARTITION_KEY}, {spec.id_column})"
+        )
+
+
+def check_foreign_keys(conn, spec: PartitionSpec) -> None:
+    """Raise before anything changes if live rows would break the new table's FKs."""
+    with conn.cursor() as cur:
+        for fk in spec.foreign_keys:
+            cur.execute(violations_sql(spec, fk))
+            count = cur.fetchone()[0]
+            if count:
+                raise RuntimeError(
+                    f"{spec.table}: {count} row(s) have no match in {fk.references} "
+                    f"and would break {fk.name}; fix them and re-run"
+                )
+
+
+def prepare(conn, spec: PartitionSpec, partitions: int = DEFAULT_PARTITIONS) -> None:
+    with conn.cursor() as cur:
+        create = relkind(cur, spec.new) is None
+    if create:
+        check_foreign_keys(conn, spec)
+    add_key_index(conn, spec)
+    with conn.cursor() as cur:
+        statements = create_partitioned_sql(spec, partitions) if create else []
+        statements += mirror_trigger_sql(spec, columns(cur, spec.table))
+        _in_transaction(cur, statements)
+    log.info("%s: partitioned copy ready, changes are mirrored", spec.table)
+
+
+def backfill(conn, spec: PartitionSpec, batch_rows: int = DEFAULT_BATCH_ROWS) -> int:
+    """Copy every existing row into ``spec.new``; returns the number of rows read."""
+    total = 0
+    last = ""
+    with conn.cursor() as cur:
+        sql = backfill_sql(spec, columns(cur, spec.table))
+        while True:
+            cur.execute(sql, (last, batch_rows))
+            batch_last, count = cur.fetchone()
+            total += count
+            if count:
+                log.info("%s: %d row(s) copied (up to %s)", spec.table, total, batch_last)
+            if count < batch_rows:
+                return total
+            last = batch_last
+
+
+def swap(conn, spec: PartitionSpec) -> bool:
+    """Put the partitioned table in place; returns whether the old table was kept."""
+    with conn.cursor() as cur:
+        statements = [
+            f"SET LOCAL lock_timeout = '{LOCK_TIMEOUT}'",
+            f"LOCK TABLE {spec.table} IN ACCESS EXCLUSIVE MODE",
+            f"DROP TRIGGER IF EXISTS {spec.trigger} ON {spec.table}",
+            f"DROP FUNCTION IF EXISTS {spec.trigger}_fn()",
+        ]
+        statements += [
+            f"ALTER TABLE {table} DROP CONSTRAINT {name}"
+            for table, name in _foreign_keys_to(cur, spec.table)
+        ]
+        statements += [
+            f"ALTER TABLE {spec.table} RENAME TO {spec.old}",
+            f"ALTER TABLE {spec.new} RENAME TO {spec.table}",
+        ]
+        _in_transaction(cur, statements)
+        keep = has_rows(cur, spec.old)
+        if not keep:
+            cur.execute(f"DROP TABLE {spec.old}")
+    log.info("%s: now partitioned%s", spec.table, f" ({spec.old} kept)" if keep else "")
+    return keep
+
+
+def partition_table(
+    conn,
+    spec: PartitionSpec,
+    partitions: int = DEFAULT_PARTITIONS,
+    batch_rows: int = DEFAULT_BATCH_ROWS,
+) -> bool:
+    """Run the remaining steps for ``spec``; False if it was already partitioned."""
+    with conn.cursor() as cur:
+        if relkind(cur, spec.table) == "p":
+            return False
+    prepare(conn, spec, partitions)
+    backfill(conn, spec, batch_rows)
+    swap(conn, spec)
+    return True
+
+
+def partition_all(conn, **kwargs) -> list[str]:
+    """Partition every table in ``SPECS``; needs an autocommit connection."""
+    conn.autocommit = True
+    return [spec.table for spec in SPECS if partition_table(conn, spec, **kwargs)]
+
+
+def populated(conn) -> list[str]:
+    """Tables in ``SPECS`` still to partition that already hold rows."""
+    with conn.cursor() as cur:
+        return [
+            spec.table for spec in SPECS
+            if relkind(cur, spec.table) == "r" and has_rows(cur, spec.table)
+        ]
+
+
+def drop_old(conn) -> list[str]:
+    dropped = []
+    with conn.cursor() as cur:
+        for spec in SPECS:
+            if relkind(cur, spec.old) is not None:
+                cur.execute(f"DROP TABLE {spec.old}")
+                dropped.append(spec.old)
+    return dropped
+
+
+def status(conn) -> list[str]:
+    lines = []
+    with conn.cursor() as cur:
+        for spec in SPECS:
+            state = {"p": "partitioned", "r": "plain"}.get(relkind(cur, spec.table), "missing")
+            if relkind(cur, spec.new) is not None:
+                state += f", {spec.new} in progress"
+            if relkind(cur, spec.old) is not None:
+                state += f", {spec.old} kept"
+            lines.append(f"{spec.table}: {state}")
+    return lines
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Hash-partition documentsWithFRdoc and comments on docket_id, online."
+    )
+    parser.add_argument("--dbname", help="Database name (default: DATABASE_URL / DB_NAME)")
+    parser.add_argument("--partitions", type=int, default=DEFAULT_PARTITIONS)
+    parser.add_argument("--batch-rows", type=int, default=DEFAULT_BATCH_ROWS)
+    action = parser.add_mutually_exclusive_group()
+    action.add_argument("--status", action="store_true", help="Show the layout of each table")
+    action.add_argument(
+        "--drop-old", action="store_true", help="Drop the *_unpartitioned tables kept by a swap"
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> None:
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
+    args = parse_args(argv)
+    conn = get_connection(args.dbname)
+    conn.autocommit = True
+    try:
+        if args.status:
+            print("\n".join(status(conn)))
+        elif args.drop_old:
+            log.info("Dropped: %s", ", ".join(drop_old(conn)) or "nothing")
+        else:
+            done = partition_all(conn, partitions=args.partitions, batch_rows=args.batch_rows)
+            log.info("Partitioned: %s", ", ".join(done) or "nothing to do")
+    except Exception as exc:  # pylint: disable=broad-except
+        log.error("%s", exc)
+        sys.exit(1)
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Split long extracted text into overlapping passages.
+
+PDF extractions can run to megabytes. Indexing them as one OpenSearch
+document makes highlighting and scoring slow and lets a single attachment
+dominate term statistics, so ingest indexes fixed-size passages instead:
+
+- a passage is at most ``size`` characters and ends on whitespace when one
+  falls in its last ``BOUNDARY_SLACK`` characters;
+- consecutive passages overlap by about ``overlap`` characters (the next one
+  starts on a word boundary inside the overlap), so a phrase that straddles a
+  cut is still whole in one passage;
+- every passage carries its ``[start, end)`` character offsets in the full
+  text.
+
+Text arrives as an iterable of string chunks (see ``read_text_chunks``), so
+memory stays bounded by ``size`` plus one read block however large the file.
+Passage sizes default to ``EXTRACTED_PASSAGE_CHARS`` / ``EXTRACTED_PASSAGE_OVERLAP``.
+"""
+from __future__ import annotations
+
+import os
+from pathlib import Path
+from typing import Iterable, Iterator, NamedTuple
+
+
+def _int_env(name: str, default: int) -> int:
+    try:
+        value = int(os.environ.get(name, default))
+    except ValueError:
+        return default
+    return value if value >= 0 else default
+
+
+DEFAULT_PASSAGE_CHARS = max(_int_env("EXTRACTED_PASSAGE_CHARS", 2000), 1)
+DEFAULT_PASSAGE_OVERLAP = _int_env("EXTRACTED_PASSAGE_OVERLAP", 200)
+BOUNDARY_SLACK = 200
+READ_BLOCK = 64 * 1024
+
+
+class Passage(NamedTuple):
+    index: int
+    start: int
+    end: int
+    text: str
+
+
+def read_text_chunks(path: Path | str, block: int = READ_BLOCK) -> Iterator[str]:
+    """Yield a UTF-8 text file in ``block``-character pieces."""
+    with open(path, "r", encoding="utf-8", errors="replace") as fh:
+        while True:
+            piece = fh.read(block)
+            if not piece:
+                return
+            yield piece
+
+
+def _cut(buf: str, size: int) -> int:
+    """Length of the passage taken from the front of ``buf`` (``len(buf) > size``)."""
+    lo = max(size - BOUNDARY_SLACK, 1)
+    for i in range(size, lo - 1, -1):
+        if buf[i].isspace():
+            return i
+    return size
+
+
+def _next_start(buf: str, end: int, overlap: int) -> int:
+    """Where the following passage begins: ``overlap`` back from ``end``, on a word start."""
+    step = max(end - overlap, 1)
+    for i in range(step, end):
+        if buf[i - 1].isspace() and not buf[i].isspace():
+            return i
+    return end
+
+
+def iter_passages(
+    chunks: Iterable[str],
+    size: int = DEFAULT_PASSAGE_CHARS,
+    overlap: int = DEFAULT_PASSAGE_OVERLAP,
+) -> Iterator[Passage]:
+    """Yield ``Passage`` tuples covering the concatenated ``chunks``."""
+    if size < 1 or not 0 <= overlap < size:
+        raise ValueError("need size >= 1 and 0 <= overlap < size")
+    buf, base, index, covered = "", 0, 0, 0
+    for chunk in chunks:
+        buf += chunk
+        while len(buf) > size:
+            end = _cut(buf, size)
+            if buf[:end].strip():
+                yield Passage(index, base, base + end, buf[:end])
+                index += 1
+                covered = base + end
+            step = _next_start(buf, end, overlap)
+            buf, base = buf[step:], base + step
+    # The tail is emitted unless it only repeats the previous passage's overlap.
+    if buf[max(covered - base, 0):].strip():
+        yield Passage(index, base, base + len(buf), buf)
@@ -6,10 +6,18 @@ Fetches the full structure for each title from the eCFR versioner API, walks
 the tree to find every part node (recording its full ancestor path), builds
 the canonical ecfr.gov URL, and inserts into the links table.
 
+Titles are fetched concurrently by a small thread pool. Each structure is
+cached on disk as title-<N>-<date>.json, where <date> is the title's
+latest_amended_on, so a re-run only downloads titles that were amended since.
+Each title's rows are written with a single INSERT, and the title's links are
+copied onto the docket_cfr mappings in the same transaction.
+
 Usage:
     python populate_links.py              # populate all titles
     python populate_links.py --dry-run    # print rows without writing to DB
     python populate_links.py --title 42   # process a single title (good for testing)
+    python populate_links.py --workers 8  # fetch up to 8 titles at once
+    python populate_links.py --refresh    # ignore the structure cache
 
 Environment variables:
     DB_HOST       database host          (default: localhost)
@@ -20,18 +28,26 @@ Environment variables:
     DB_PASSWORD   database password      (default: empty)
     DB_SSL        enable SSL, set to 1   (default: 0 — off for local dev)
     DB_SSLCERT    path to RDS CA bundle  (default: /certs/global-bundle.pem)
+    ECFR_CACHE_DIR  structure cache      (default: ~/.cache/mirrulations/ecfr)
+    ECFR_WORKERS    concurrent fetches   (default: 4)
 """
 
 import argparse
 import datetime
+import json
 import logging
 import os
 import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
 
 import psycopg2
 import requests
 from dotenv import load_dotenv
 
+from docket_cfr import refresh_links
+
 load_dotenv()
 
 logging.basicConfig(
@@ -50,6 +66,21 @@ CURRENT_URL   = f"{ECFR_BASE}/current"
 SESSION = requests.Session()
 SESSION.headers.update({"Accept": "application/json"})
 
+CACHE_DIR = Path(os.environ.get("ECFR_CACHE_DIR", "~/.cache/mirrulations/ecfr")).expanduser()
+WORKERS   = int(os.environ.get("ECFR_WORKERS", 4))
+
+# requests.Session is not documented as thread-safe; pool threads get their own.
+_local = threading.local()
+
+
+def _session() -> requests.Session:
+    if threading.current_thread() is threading.main_thread():
+        return SESSION
+    if not hasattr(_local, "session"):
+        _local.session = requests.Session()
+        _local.session.headers.update(SESSION.headers)
+    return _local.session
+
 # ── DB config ─────────────────────────────────────────────────────────────────
 
 _use_ssl  = os.environ.get("DB_SSL", "0").lower() in ("1", "true", "yes", "on")
@@ -84,50 +115,83 @@ def fetch_titles() -> list:
 def fetch_structure(title_number, date: str) -> dict:
     """Return the full structure JSON for one title on the given date."""
     url = STRUCTURE_URL.format(date=date, title=title_number)
-    resp = SESSION.get(url, timeout=60)
+    resp = _session().get(url, timeout=60)
     resp.raise_for_status()
     return resp.json()
 
 
+def cached_structure(title_number, date: str, cache_dir=None, refresh=False) -> dict:
+    """
+    fetch_structure() behind an on-disk cache keyed by (title, date). Writing a
+    new date for a title removes that title's older entries.
+    """
+    cache_dir = Path(cache_dir or CACHE_DIR)
+    path = cache_dir / f"title-{title_number}-{date}.json"
+    if not refresh and path.exists():
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError) as exc:
+            log.warning("  Ignoring unreadable cache %s: %s", path, exc)
+
+    structure = fetch_structure(title_number, date)
+    try:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + f".{threading.get_ident()}.part")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(structure, f)
+        os.replace(tmp, path)
+        for old in cache_dir.glob(f"title-{title_number}-*.json"):
+            if old != path:
+                old.unlink(missing_ok=True)
+    except OSError as exc:
+        log.warning("  Could not cache title %s: %s", title_number, exc)
+    return structure
+
+
 # Node types we include as path segments when building the URL.
 # "part" is where we stop and record the row — it is not added to the path
 # because it becomes the leaf in the URL itself.
 SEGMENT_TYPES = {"title", "chapter", "subchapter"}
 
 
-def extract_parts(node: dict, ancestor_segments: list) -> list:
-    """
-    Recursively walk a structure tree node.
+TYPE_PREFIXES = {
+    "title":      "title",
+    "chapter":    "chapter",
+    "subchapter": "subchapter",
+}
+
 
-    Returns a list of (part_number, full_url) tuples — one per part node.
-    ancestor_segments carries the URL path built so far (e.g.
-    ["title-42", "chapter-IV", "subchapter-B"]).
+def iter_parts(root: dict, ancestor_segments=()):
     """
-    node_type  = node.get("type", "")
-    identifier = node.get("identifier", "")
-    reserved   = node.get("reserved", False)
+    Walk a structure tree depth-first without recursion, yielding
+    (part_number, full_url) for every part node in document order.
+    ancestor_segments is the URL path above ``root`` (e.g.
+    ("title-42", "chapter-IV", "subchapter-B")).
+    """
+    stack = [(root, tuple(ancestor_segments))]
+    while stack:
+        node, segments = stack.pop()
+        node_type  = node.get("type", "")
+        identifier = node.get("identifier", "")
 
-    # Build the URL segment for this node (if it contributes to the path)
-    type_prefixes = {
-        "title":      "title",
-        "chapter":    "chapter",
-        "subchapter": "subchapter",
-    }
-    prefix = type_prefixes.get(node_type)
-    current_segments = ancestor_segments + ([f"{prefix}-{identifier}"] if prefix and identifier else [])
+        # Build the URL segment for this node (if it contributes to the path)
+        prefix = TYPE_PREFIXES.get(node_type)
+        if prefix and identifier:
+            segments = segments + (f"{prefix}-{identifier}",)
 
-    results = []
+        if node_type == "part" and identifier and not node.get("reserved", False):
+            # Build the full URL: current ancestor path + this part slug
+            url = f"{CURRENT_URL}/{'/'.join(segments)}/part-{identifier}?toc=1"
+            yield str(identifier), url
 
-    if node_type == "part" and identifier and not reserved:
-        # Build the full URL: current ancestor path + this part slug
-        part_slug = f"part-{identifier}"
-        url = f"{CURRENT_URL}/{'/'.join(current_segments)}/{part_slug}?toc=1"
-        results.append((str(identifier), url))
+        children = node.get("children") or []
+        stack.extend((child, segments) for child in reversed(children))
 
-    for child in node.get("children", []):
-        results.extend(extract_parts(child, current_segments))
 
-    return results
+def extract_parts(node: dict, ancestor_segments: list) -> list:
+    """List form of iter_parts(): one (part_number, full_url) tuple per part node."""
+    return list(iter_parts(node, ancestor_segments))
 
 
 # ── DB helpers ────────────────────────────────────────────────────────────────
@@ -138,36 +202,36 @@ def get_connection():
 
 def upsert_links(conn, rows: list) -> tuple:
     """
-    Insert (title, cfrpart, link) rows into the links table.
+    Insert (title, cfrpart, link) rows into the links table with one statement.
     Skips rows that conflict on any unique constraint (primary key OR link column).
     Returns (inserted, skipped) counts.
     """
+    if not rows:
+        return 0, 0
     # ON CONFLICT DO NOTHING (no constraint specified) handles ALL unique violations —
     # both the PRIMARY KEY (title, cfrpart) and the UNIQUE constraint on link.
     # Specifying only ON CONFLICT (title, cfrpart) would leave the link UNIQUE
     # constraint unhandled, causing psycopg2 to raise an IntegrityError that aborts
-    # the entire transaction.
+    # the entire transaction. The three columns travel as arrays and are
+    # unnest()ed server-side, so a title is one round trip however many parts it has.
     sql = """
         INSERT INTO links (title, cfrpart, link)
-        VALUES (%s, %s, %s)
+        SELECT * FROM unnest(%s::varchar[], %s::varchar[], %s::varchar[])
         ON CONFLICT DO NOTHING;
     """
-    inserted = 0
-    skipped  = 0
+    titles, cfrparts, links = (list(col) for col in zip(*rows))
     with conn.cursor() as cur:
-        for row in rows:
-            try:
-                cur.execute(sql, row)
-                if cur.rowcount:
-                    inserted += 1
-                else:
-                    skipped += 1
-            except psycopg2.IntegrityError as exc:
-                # Shouldn't happen with ON CONFLICT DO NOTHING, but log and recover.
-                log.warning("  Skipping row %s — integrity error: %s", row, exc)
-                conn.rollback()
+        try:
+            cur.execute(sql, (titles, cfrparts, links))
+            inserted = max(cur.rowcount, 0)
+            refresh_links(cur, titles)
+        except psycopg2.IntegrityError as exc:
+            # Shouldn't happen with ON CONFLICT DO NOTHING, but log and recover.
+            log.warning("  Skipping %d rows — integrity error: %s", len(rows), exc)
+            conn.rollback()
+            return 0, len(rows)
     conn.commit()
-    return inserted, skipped
+    return inserted, len(rows) - inserted
 
 
 # ── Main ──────────────────────────────────────────────────────────────────────
@@ -178,9 +242,33 @@ def parse_args():
                    help="Print rows without writing to the database")
     p.add_argument("--title", type=int, metavar="N",
                    help="Process a single title number (useful for testing)")
+    p.add_argument("--workers", type=int, default=WORKERS,
+                   help="Titles fetched concurrently (default: %(default)s)")
+    p.add_argument("--refresh", action="store_true",
+                   help="Refetch every structure instead of using the on-disk cache")
     return p.parse_args()
 
 
+def load_title(title_obj: dict, today: str, refresh=False):
+    """Fetch (or read from cache) one title and return (title_number, rows or None)."""
+    title_number = title_obj.get("number")
+    # Use the title's latest amendment date so the structure is current
+    date = title_obj.get("latest_amended_on") or today
+    try:
+        structure = cached_structure(title_number, date, refresh=refresh)
+    except requests.HTTPError as exc:
+        log.warning("  Skipping title %s — HTTP %s",
+                    title_number, exc.response.status_code)
+        return title_number, None
+    except requests.RequestException as exc:
+        log.warning("  Skipping title %s — %s", title_number, exc)
+        return title_number, None
+    return title_number, [
+        (str(title_number), part_number, url)
+        for part_number, url in iter_parts(structure)
+    ]
+
+
 def main():
     args  = parse_args()
     today = datetime.date.today().isoformat()
@@ -209,40 +297,29 @@ def main():
     total_inserted = 0
     total_skipped  = 0
 
-    for title_obj in titles:
-        title_number = title_obj.get("number")
-        if not title_number:
-            continue
-
-        # Use the title's latest amendment date so the structure is current
-        date = title_obj.get("latest_amended_on") or today
-
-        log.info("Processing Title %s (date: %s)...", title_number, date)
-
-        try:
-            structure = fetch_structure(title_number, date)
-        except requests.HTTPError as exc:
-            log.warning("  Skipping title %s — HTTP %s",
-                        title_number, exc.response.status_code)
-            continue
-
-        parts = extract_parts(structure, [])
-        log.info("  %d parts found", len(parts))
-
-        if not parts:
-            continue
-
-        rows = [(str(title_number), part_number, url) for part_number, url in parts]
-
-        if args.dry_run:
-            for title_val, cfrpart_val, link_val in rows:
-                print(f"  title={title_val:<4} cfrpart={cfrpart_val:<6} {link_val}")
-            total_inserted += len(rows)
-        else:
-            inserted, skipped = upsert_links(conn, rows)
-            total_inserted += inserted
-            total_skipped  += skipped
-            log.info("  Inserted %d, skipped %d (already exist)", inserted, skipped)
+    titles = [t for t in titles if t.get("number")]
+
+    # Fetches run in the pool; rows are written here, in title order, on the
+    # one connection.
+    with ThreadPoolExecutor(max_workers=max(1, args.workers)) as pool:
+        results = pool.map(lambda t: load_title(t, today, args.refresh), titles)
+        for title_number, rows in results:
+            if rows is None:
+                continue
+            log.info("Title %s: %d parts found", title_number, len(rows))
+
+            if not rows:
+                continue
+
+            if args.dry_run:
+                for title_val, cfrpart_val, link_val in rows:
+                    print(f"  title={title_val:<4} cfrpart={cfrpart_val:<6} {link_val}")
+                total_inserted += len(rows)
+            else:
+                inserted, skipped = upsert_links(conn, rows)
+                total_inserted += inserted
+                total_skipped  += skipped
+                log.info("  Inserted %d, skipped %d (already exist)", inserted, skipped)
 
     if conn:
         conn.close()
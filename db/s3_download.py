@@ -0,0 +1,527 @@
+"""
+Resumable downloader for mirrulations docket bundles in the public S3 bucket.
+
+Objects are listed page by page on a producer thread and handed to a pool of
+download workers through a bounded queue, so the first files land on disk
+while the listing is still running. A file is skipped when it already exists
+locally with the listed size and the ETag recorded in
+``<docket>/.s3_manifest.json`` (when one was recorded). Each download goes to
+``<path>.part`` and is renamed into place, so an interrupted run never leaves
+a truncated file that looks complete.
+
+Failed keys are retried with exponential backoff and jitter; keys that still
+fail are reported at the end instead of aborting the run. The number of active
+workers adapts to observed throughput (additive increase while bytes/s keeps
+improving, halved on errors) between ``S3_MIN_WORKERS`` and
+``S3_MAX_WORKERS``.
+
+Set ``S3_ENDPOINT_URL`` to point the client at a local S3 stand-in (MinIO,
+moto server, ...), or pass ``client=`` directly.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import queue
+import random
+import sys
+import threading
+import time
+import warnings
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+try:
+    import boto3
+    from botocore import UNSIGNED
+    from botocore.config import Config
+except ImportError:
+    boto3 = None
+    UNSIGNED = None
+    Config = None
+
+warnings.filterwarnings(
+    "ignore",
+    message=".*Boto3 will no longer support Python 3.9.*",
+)
+
+log = logging.getLogger(__name__)
+
+S3_BUCKET = "mirrulations"
+RAW_DATA_PREFIX = "raw-data"
+DERIVED_DATA_PREFIX = "derived-data"
+MANIFEST_NAME = ".s3_manifest.json"
+
+
+def _positive_int_env(name: str, default: int) -> int:
+    raw = os.environ.get(name)
+    if raw is None or not raw.strip():
+        return default
+    try:
+        value = int(raw)
+    except ValueError:
+        return default
+    return value if value > 0 else default
+
+
+DEFAULT_MIN_WORKERS = _positive_int_env("S3_MIN_WORKERS", 4)
+DEFAULT_MAX_WORKERS = _positive_int_env("S3_MAX_WORKERS", 32)
+MAX_ATTEMPTS = 5
+BACKOFF_BASE = 0.5
+LIST_QUEUE_SIZE = 2000
+
+_s3_client = None
+
+
+def _s3():
+    global _s3_client  # pylint: disable=global-statement
+    if _s3_client is None:
+        _s3_client = boto3.client(
+            "s3",
+            endpoint_url=os.environ.get("S3_ENDPOINT_URL") or None,
+            config=Config(signature_version=UNSIGNED, max_pool_connections=DEFAULT_MAX_WORKERS),
+        )
+    return _s3_client
+
+
+def _normalize_docket_id(docket_id: str) -> str:
+    s = docket_id.strip()
+    if not s:
+        return s
+    if "-" not in s:
+        return s.upper()
+    head, tail = s.split("-", 1)
+    return f"{head.split('_')[0].upper()}-{tail}"
+
+
+def _s3_agency(docket: str) -> str:
+    return _normalize_docket_id(docket).split("-")[0]
+
+
+def _s3_key_exists(prefix: str, client: Any = None) -> bool:
+    resp = (client or _s3()).list_objects_v2(Bucket=S3_BUCKET, Prefix=prefix, MaxKeys=1)
+    return "Contents" in resp and len(resp["Contents"]) > 0
+
+
+def iter_s3_objects(client: Any, prefix: str) -> Iterator[Dict[str, Any]]:
+    """Yield ``{"Key", "Size", "ETag"}`` for every object under ``prefix``, one page at a time."""
+    paginator = client.get_paginator("list_objects_v2")
+    for page in paginator.paginate(Bucket=S3_BUCKET, Prefix=prefix):
+        for obj in page.get("Contents", []):
+            yield {
+                "Key": obj["Key"],
+                "Size": obj["Size"],
+                "ETag": (obj.get("ETag") or "").strip('"') or None,
+            }
+
+
+# ---------------------------------------------------------------------------
+# Local layout + manifest
+# ---------------------------------------------------------------------------
+
+@dataclass(frozen=True)
+class ListingJob:
+    """One S3 prefix to mirror; keys are written relative to ``base`` under ``local_dir``."""
+
+    file_type: str
+    prefix: str
+    base: str
+    local_dir: str
+
+
+def docket_jobs(
+    docket_id: str,
+    include_binary: bool = False,
+    no_comments: bool = False,
+) -> List[ListingJob]:
+    """
+    Prefixes for one docket and where they land under ``<output>/<DOCKET-ID>/``:
+    text files under ``raw-data/{docket,documents,comments}/``, binaries under
+    ``raw-data/binary-<DOCKET-ID>/`` and derived data under ``derived-data/``.
+    """
+    agency = _s3_agency(docket_id)
+    raw_agency = f"{RAW_DATA_PREFIX}/{agency}/{docket_id}/"
+    text_base = f"{raw_agency}text-{docket_id}/"
+    jobs = [
+        ListingJob("docket", f"{text_base}docket/", text_base, RAW_DATA_PREFIX),
+        ListingJob("documents", f"{text_base}documents/", text_base, RAW_DATA_PREFIX),
+    ]
+    if not no_comments:
+        jobs.append(ListingJob("comments", f"{text_base}comments/", text_base, RAW_DATA_PREFIX))
+        derived = f"{DERIVED_DATA_PREFIX}/{agency}/{docket_id}/"
+        jobs.append(ListingJob("derived", derived, derived, DERIVED_DATA_PREFIX))
+    if include_binary:
+        jobs.append(
+            ListingJob("binary", f"{raw_agency}binary-{docket_id}/", raw_agency, RAW_DATA_PREFIX)
+        )
+    return jobs
+
+
+def _local_path(root: str, job: ListingJob, key: str) -> str:
+    return os.path.join(root, job.local_dir, os.path.relpath(key, job.base))
+
+
+class Manifest:
+    """Thread-safe ``key -> ETag`` map persisted as JSON in the docket folder."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._etags: Dict[str, str] = {}
+        if path.is_file():
+            try:
+                self._etags = json.loads(path.read_text(encoding="utf-8"))
+            except (OSError, ValueError) as e:
+                log.warning("Ignoring unreadable manifest %s: %s", path, e)
+
+    def etag(self, key: str) -> Optional[str]:
+        with self._lock:
+            return self._etags.get(key)
+
+    def record(self, key: str, etag: Optional[str]) -> None:
+        if etag:
+            with self._lock:
+                self._etags[key] = etag
+
+    def save(self) -> None:
+        with self._lock:
+            data = json.dumps(self._etags, sort_keys=True)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(self.path.name + ".part")
+        tmp.write_text(data, encoding="utf-8")
+        os.replace(tmp, self.path)
+
+
+def is_up_to_date(local_path: str, obj: Dict[str, Any], manifest: Manifest) -> bool:
+    """True when ``local_path`` has the listed size and no conflicting recorded ETag."""
+    try:
+        if os.path.getsize(local_path) != obj["Size"]:
+            return False
+    except OSError:
+        return False
+    recorded = manifest.etag(obj["Key"])
+    return recorded is None or obj.get("ETag") is None or recorded == obj["ETag"]
+
+
+# ---------------------------------------------------------------------------
+# Stats + adaptive concurrency
+# ---------------------------------------------------------------------------
+
+@dataclass
+class DownloadStats:
+    """Counters shared by the lister and the workers; every update holds ``lock``."""
+
+    listed: Dict[str, int] = field(default_factory=dict)
+    downloaded: Dict[str, int] = field(default_factory=dict)
+    skipped: Dict[str, int] = field(default_factory=dict)
+    bytes_downloaded: int = 0
+    retries: int = 0
+    failed: List[Tuple[str, str]] = field(default_factory=list)
+    listing_done: bool = False
+    started: float = field(default_factory=time.monotonic)
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def add_listed(self, file_type: str) -> None:
+        with self.lock:
+            self.listed[file_type] = self.listed.get(file_type, 0) + 1
+
+    def add_done(self, file_type: str, nbytes: int, skipped: bool = False) -> None:
+        with self.lock:
+            bucket = self.skipped if skipped else self.downloaded
+            bucket[file_type] = bucket.get(file_type, 0) + 1
+            if not skipped:
+                self.bytes_downloaded += nbytes
+
+    def add_retry(self) -> None:
+        with self.lock:
+            self.retries += 1
+
+    def add_failed(self, key: str, error: str) -> None:
+        with self.lock:
+            self.failed.append((key, error))
+
+    def line(self, workers: int) -> str:
+        with self.lock:
+            listed = sum(self.listed.values())
+            done = sum(self.downloaded.values()) + sum(self.skipped.values()) + len(self.failed)
+            skipped = sum(self.skipped.values())
+            mb = self.bytes_downloaded / 1e6
+            failed = len(self.failed)
+            more = "" if self.listing_done else "+"
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        return (
+            f"Files: {done:6}/{listed}{more} (skipped {skipped}, failed {failed}) "
+            f"{mb:8.1f} MB {mb / elapsed:6.2f} MB/s workers: {workers}"
+        )
+
+
+class ConcurrencyController:
+    """
+    AIMD controller for the number of active download workers.
+
+    Every ``interval`` seconds the bytes/s of the last window is compared with
+    the previous one: one more worker while throughput improves, one fewer
+    when it drops sharply, half as many after any error in the window.
+    Workers whose index is at or above ``target`` wait in ``wait_turn``.
+    """
+
+    def __init__(
+        self,
+        min_workers: int,
+        max_workers: int,
+        interval: float = 2.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.min_workers = max(1, min_workers)
+        self.max_workers = max(self.min_workers, max_workers)
+        self.target = self.min_workers
+        self.interval = interval
+        self._clock = clock
+        self._cond = threading.Condition()
+        self._closed = False
+        self._window_start = clock()
+        self._window_bytes = 0
+        self._window_errors = 0
+        self._last_rate: Optional[float] = None
+
+    def record(self, nbytes: int = 0, error: bool = False) -> None:
+        with self._cond:
+            self._window_bytes += nbytes
+            self._window_errors += int(error)
+            now = self._clock()
+            elapsed = now - self._window_start
+            if elapsed < self.interval:
+                return
+            rate = self._window_bytes / elapsed
+            if self._window_errors:
+                self.target = max(self.min_workers, self.target // 2)
+            elif self._last_rate is None or rate > self._last_rate * 1.05:
+                self.target = min(self.max_workers, self.target + 1)
+            elif rate < self._last_rate * 0.8:
+                self.target = max(self.min_workers, self.target - 1)
+            self._last_rate = rate
+            self._window_start = now
+            self._window_bytes = 0
+            self._window_errors = 0
+            self._cond.notify_all()
+
+    def wait_turn(self, index: int, timeout: float = 0.5) -> bool:
+        """Block while worker ``index`` is parked; False once the controller is closed."""
+        with self._cond:
+            while index >= self.target and not self._closed:
+                self._cond.wait(timeout)
+            return not self._closed
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+
+# ---------------------------------------------------------------------------
+# Workers
+# ---------------------------------------------------------------------------
+
+def _download_one(
+    client: Any,
+    key: str,
+    local_path: str,
+    max_attempts: int,
+    backoff: float,
+    stats: DownloadStats,
+    controller: ConcurrencyController,
+) -> Optional[str]:
+    """Download ``key`` atomically with retries; returns the last error or None."""
+    os.makedirs(os.path.dirname(local_path), exist_ok=True)
+    part = local_path + ".part"
+    error = None
+    for attempt in range(1, max_attempts + 1):
+        try:
+            client.download_file(S3_BUCKET, key, part)
+            os.replace(part, local_path)
+            return None
+        except Exception as e:  # pylint: disable=broad-except
+            error = f"{type(e).__name__}: {e}"
+            controller.record(error=True)
+            if attempt < max_attempts:
+                stats.add_retry()
+                time.sleep(backoff * (2 ** (attempt - 1)) * random.uniform(0.5, 1.5))
+    try:
+        os.remove(part)
+    except OSError:
+        pass
+    return error
+
+
+def _lister(
+    client: Any,
+    jobs: Sequence[ListingJob],
+    q: queue.Queue,
+    stats: DownloadStats,
+    stop: threading.Event,
+) -> None:
+    try:
+        for job in jobs:
+            for obj in iter_s3_objects(client, job.prefix):
+                if stop.is_set():
+                    return
+                stats.add_listed(job.file_type)
+                q.put((job, obj))
+    except Exception as e:  # pylint: disable=broad-except
+        stats.add_failed(f"(listing {job.prefix})", f"{type(e).__name__}: {e}")
+    finally:
+        with stats.lock:
+            stats.listing_done = True
+
+
+def _worker(
+    index: int,
+    client: Any,
+    q: queue.Queue,
+    root: str,
+    manifest: Manifest,
+    stats: DownloadStats,
+    controller: ConcurrencyController,
+    opts: Dict[str, Any],
+) -> None:
+    while controller.wait_turn(index):
+        try:
+            job, obj = q.get(timeout=0.1)
+        except queue.Empty:
+            continue
+        try:
+            local_path = _local_path(root, job, obj["Key"])
+            if is_up_to_date(local_path, obj, manifest):
+                manifest.record(obj["Key"], obj.get("ETag"))
+                stats.add_done(job.file_type, obj["Size"], skipped=True)
+                continue
+            error = _download_one(
+                client, obj["Key"], local_path,
+                opts["max_attempts"], opts["backoff"], stats, controller,
+            )
+            if error is None:
+                manifest.record(obj["Key"], obj.get("ETag"))
+                stats.add_done(job.file_type, obj["Size"])
+                controller.record(obj["Size"])
+            else:
+                stats.add_failed(obj["Key"], error)
+        finally:
+            q.task_done()
+            if opts["progress"]:
+                print(f"\r{stats.line(controller.target).ljust(90)}", end="", flush=True)
+
+
+def download_prefixes(
+    jobs: Sequence[ListingJob],
+    root: Path,
+    *,
+    client: Any = None,
+    min_workers: int = DEFAULT_MIN_WORKERS,
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    max_attempts: int = MAX_ATTEMPTS,
+    backoff: float = BACKOFF_BASE,
+    progress: bool = True,
+) -> DownloadStats:
+    """Mirror every job's prefix under ``root``; returns the run's ``DownloadStats``."""
+    client = client or _s3()
+    manifest = Manifest(root / MANIFEST_NAME)
+    stats = DownloadStats()
+    controller = ConcurrencyController(min_workers, max_workers)
+    q: queue.Queue = queue.Queue(maxsize=LIST_QUEUE_SIZE)
+    stop = threading.Event()
+    opts = {"max_attempts": max_attempts, "backoff": backoff, "progress": progress}
+
+    lister = threading.Thread(
+        target=_lister, args=(client, jobs, q, stats, stop), name="s3-lister", daemon=True
+    )
+    workers = [
+        threading.Thread(
+            target=_worker,
+            args=(i, client, q, str(root), manifest, stats, controller, opts),
+            name=f"s3-download-{i}",
+            daemon=True,
+        )
+        for i in range(controller.max_workers)
+    ]
+    lister.start()
+    for t in workers:
+        t.start()
+    try:
+        lister.join()
+        q.join()
+    finally:
+        stop.set()
+        controller.close()
+        for t in workers:
+            t.join()
+        manifest.save()
+    if progress:
+        print()
+    return stats
+
+
+def download_docket_from_s3(
+    docket_id: str,
+    output_folder: str = ".",
+    include_binary: bool = False,
+    no_comments: bool = False,
+    *,
+    client: Any = None,
+    min_workers: int = DEFAULT_MIN_WORKERS,
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    max_attempts: int = MAX_ATTEMPTS,
+    backoff: float = BACKOFF_BASE,
+) -> Path:
+    """
+    Download mirrulations S3 data into ``{output_folder}/{docket_id}/``.
+    ``no_comments=True``: skip ``comments/`` and derived data.
+    Re-running resumes: files already on disk with a matching size/ETag are skipped.
+    """
+    client = client or _s3()
+    docket_id = _normalize_docket_id(docket_id)
+    agency = _s3_agency(docket_id)
+    raw_agency = f"{RAW_DATA_PREFIX}/{agency}/{docket_id}/"
+    text_base = f"{raw_agency}text-{docket_id}/"
+
+    if not _s3_key_exists(raw_agency, client):
+        log.error("No data at s3://%s/%s — check docket id / casing.", S3_BUCKET, raw_agency)
+        log.error("Expected: raw-data/<AGENCY>/<DOCKET-ID>/ (e.g. FAA-2025-0618).")
+        sys.exit(1)
+    if not _s3_key_exists(text_base, client):
+        log.error(
+            "No text bundle at s3://%s/%s (need text-%s/ under the docket folder).",
+            S3_BUCKET,
+            text_base,
+            docket_id,
+        )
+        sys.exit(1)
+    if no_comments:
+        print("Comments and derived data: skipped (--skip-comments-download)")
+
+    docket_root = Path(output_folder).resolve() / docket_id
+    stats = download_prefixes(
+        docket_jobs(docket_id, include_binary=include_binary, no_comments=no_comments),
+        docket_root,
+        client=client,
+        min_workers=min_workers,
+        max_workers=max_workers,
+        max_attempts=max_attempts,
+        backoff=backoff,
+    )
+    for file_type in sorted(stats.listed):
+        log.info(
+            "%s: %d listed, %d downloaded, %d already up to date",
+            file_type,
+            stats.listed[file_type],
+            stats.downloaded.get(file_type, 0),
+            stats.skipped.get(file_type, 0),
+        )
+    if stats.failed:
+        log.error("%d S3 object(s) failed after retries; re-run to resume:", len(stats.failed))
+        for key, error in stats.failed:
+            log.error("  %s — %s", key, error)
+    print("S3 download finished.")
+    print(f"Files for {docket_id} → {docket_root}")
+    return docket_root
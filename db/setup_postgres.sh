@@ -22,6 +22,9 @@ createdb $DB_NAME
 echo "Creating schema..."
 psql -d $DB_NAME -f "$SCRIPT_DIR/schema-postgres.sql"
 
+echo "Applying migrations..."
+python3 "$SCRIPT_DIR/migrate.py" --dbname "$DB_NAME"
+
 echo "Inserting seed data..."
 psql -d $DB_NAME -f "$SCRIPT_DIR/sample-data.sql"
 
@@ -34,6 +37,9 @@ if [ -n "${EXTRA_SEED_SQL_FILE:-}" ]; then
   fi
 fi
 
+echo "Building docket_cfr..."
+python3 "$SCRIPT_DIR/docket_cfr.py" --dbname "$DB_NAME"
+
 echo ""
 echo "Database '$DB_NAME' is fully initialized."
 echo "Connect with:"
@@ -121,6 +121,12 @@ fi
 ./.venv/bin/pip install -e .
 ./.venv/bin/pip install -r requirements.txt
 
+# Apply pending schema migrations before the new code starts serving.
+# Populated tables are not partitioned here; see db/partition_tables.py.
+./.venv/bin/python db/migrate.py
+# Search reads docket_cfr directly; rebuild it in case rows were loaded with plain SQL.
+./.venv/bin/python db/docket_cfr.py
+
 (cd frontend && npm install && npm run build)
 
 sudo systemctl stop mirrsearch 2>/dev/null || true
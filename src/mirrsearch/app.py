@@ -6,6 +6,7 @@ from mirrsearch.internal_logic import InternalLogic, _transform_cfr_refs
 from mirrsearch.oauth_handler import OAuthHandler, OAuthCodeError, OAuthVerificationError
 from mirrsearch.oauth_handler import TokenExpiredError, TokenInvalidError
 from mirrsearch.db import get_db
+from mirrsearch.search_filters import parse_filter_date
 
 
 def _get_search_params():
@@ -34,6 +35,16 @@ def _get_search_params():
     }
 
 
+def _invalid_date_param(params):
+    """The name of the first of ``start_date`` / ``end_date`` that is not a date, or None."""
+    for name in ('start_date', 'end_date'):
+        try:
+            parse_filter_date(params[name])
+        except ValueError:
+            return name
+    return None
+
+
 def _get_pagination_params():
     """Extract and validate pagination parameters from the request."""
     page = max(request.args.get('page', default=1, type=int), 1)
@@ -252,6 +263,9 @@ def create_app(dist_dir=None, db_layer=None, oauth_handler=None):  # pylint: dis
             return jsonify({"error": "Unauthorized"}), 401
 
         params = _get_search_params()
+        bad_date = _invalid_date_param(params)
+        if bad_date:
+            return jsonify({"error": f"{bad_date} must be a date (YYYY-MM-DD)"}), 400
         page, page_size = _get_pagination_params()
 
         logic = InternalLogic("sample_database", db_layer=db_layer)
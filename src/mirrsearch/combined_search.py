@@ -0,0 +1,165 @@
+"""
+One SQL statement for the Postgres side of a ``/search/`` request.
+
+The statement returns, in a single result set:
+
+- **title hits:** dockets whose title matches, newest first, at most
+  ``TITLE_LIMIT`` dockets;
+- **full-text hits:** the dockets OpenSearch matched that are not title hits,
+  in OpenSearch's order;
+- each with its document count and its CFR references already folded into
+  JSON (``[{"title", "cfrParts": {part: link}}]``).
+
+Both kinds of hit pass the same compiled facet filters (``search_filters``),
+and, as elsewhere, only dockets with at least one document are returned.
+"""
+from typing import Any, List, Sequence, Tuple
+
+from mirrsearch.docket_result import DocketResult
+from mirrsearch.search_filters import CompiledFilters
+
+TITLE_LIMIT = 50
+
+_HAS_DOCUMENTS = (
+    "EXISTS (SELECT 1 FROM documentsWithFRdoc doc WHERE doc.docket_id = d.docket_id)"
+)
+
+
+def _document_count(docket_id_column: str) -> str:
+    return (
+        "(SELECT count(*) FROM documentsWithFRdoc doc "
+        f"WHERE doc.docket_id = {docket_id_column})"
+    )
+
+
+# The CFR references of docket ``d`` as ``[{"title", "cfrParts": {part: link}}]``.
+CFR_REFS_SQL = """COALESCE((
+                SELECT json_agg(
+                    json_build_object('title', r.title, 'cfrParts', r.parts) ORDER BY r.title
+                )
+                FROM (
+                    SELECT dc.title, json_object_agg(dc.cfrpart, dc.link ORDER BY dc.cfrpart)
+                        AS parts
+                    FROM docket_cfr dc
+                    WHERE dc.docket_id = d.docket_id
+                      AND dc.title IS NOT NULL AND dc.cfrpart IS NOT NULL
+                    GROUP BY dc.title
+                ) r
+            ), '[]'::json)"""
+
+
+def combined_search_sql(filters: CompiledFilters) -> str:
+    where = filters.where_sql()
+    return f"""
+        WITH title_hits AS (
+            SELECT d.docket_id
+            FROM dockets d
+            WHERE d.docket_title ILIKE %s
+              AND {_HAS_DOCUMENTS}{where}
+            ORDER BY d.modify_date DESC, d.docket_id
+            LIMIT {TITLE_LIMIT}
+        ),
+        full_text_hits AS (
+            SELECT d.docket_id, ids.ord
+            FROM unnest(%s::text[]) WITH ORDINALITY AS ids(docket_id, ord)
+            JOIN dockets d ON d.docket_id = ids.docket_id
+            WHERE NOT EXISTS (SELECT 1 FROM title_hits t WHERE t.docket_id = d.docket_id)
+              AND {_HAS_DOCUMENTS}{where}
+        ),
+        hits AS (
+            SELECT docket_id, NULL::bigint AS ord FROM title_hits
+            UNION ALL
+            SELECT docket_id, ord FROM full_text_hits
+        )
+        SELECT
+            d.docket_id, d.docket_title, d.agency_id, d.docket_type, d.modify_date,
+            {CFR_REFS_SQL} AS cfr_refs,
+            {_document_count("d.docket_id")} AS document_total_count,
+            h.ord IS NULL AS title_hit
+        FROM hits h
+        JOIN dockets d ON d.docket_id = h.docket_id
+        ORDER BY h.ord NULLS FIRST, d.modify_date DESC, d.docket_id
+    """
+
+
+def catalog_search_sql(filters: CompiledFilters) -> str:
+    """
+    The same title hits, but only ``(docket_id, document_total_count,
+    title_hit)`` for them and for the full-text hits. Hits flagged as
+    already filtered by the ``docket_catalog`` are taken as they are; the
+    others (ids the catalog could not vouch for) pass the filters here.
+    """
+    where = filters.where_sql()
+    return f"""
+        WITH title_hits AS (
+            SELECT d.docket_id,
+                   row_number() OVER (ORDER BY d.modify_date DESC, d.docket_id) AS rank
+            FROM dockets d
+            WHERE d.docket_title ILIKE %s
+              AND {_HAS_DOCUMENTS}{where}
+            ORDER BY d.modify_date DESC, d.docket_id
+            LIMIT {TITLE_LIMIT}
+        ),
+        hits AS (
+            SELECT docket_id, rank, NULL::bigint AS ord FROM title_hits
+            UNION ALL
+            SELECT ids.docket_id, NULL, ids.ord
+            FROM unnest(%s::text[], %s::boolean[])
+                WITH ORDINALITY AS ids(docket_id, filtered, ord)
+            WHERE NOT EXISTS (SELECT 1 FROM title_hits t WHERE t.docket_id = ids.docket_id)
+              AND (ids.filtered OR EXISTS (
+                  SELECT 1 FROM dockets d
+                  WHERE d.docket_id = ids.docket_id AND {_HAS_DOCUMENTS}{where}
+              ))
+        )
+        SELECT h.docket_id,
+               {_document_count("h.docket_id")} AS document_total_count,
+               h.ord IS NULL AS title_hit
+        FROM hits h
+        ORDER BY h.rank, h.ord
+    """
+
+
+def title_pattern(query: str) -> str:
+    return f"%{(query or '').strip().lower()}%"
+
+
+def combined_search_params(
+        query: str, docket_ids: Sequence[str], filters: CompiledFilters) -> List[Any]:
+    """Parameters for ``combined_search_sql``, in placeholder order."""
+    return [
+        title_pattern(query), *filters.params,
+        list(dict.fromkeys(str(d) for d in docket_ids)), *filters.params,
+    ]
+
+
+def catalog_search_params(
+        query: str, filtered_ids: Sequence[str], unverified_ids: Sequence[str],
+        docket_ids: Sequence[str], filters: CompiledFilters) -> List[Any]:
+    """
+    Parameters for ``catalog_search_sql``: the full-text hits are the
+    ``docket_ids`` in ``filtered_ids`` or ``unverified_ids``, in hit order.
+    """
+    filtered = set(filtered_ids)
+    unverified = set(unverified_ids)
+    ids = [d for d in dict.fromkeys(str(d) for d in docket_ids) if d in filtered or d in unverified]
+    return [
+        title_pattern(query), *filters.params,
+        ids, [d in filtered for d in ids], *filters.params,
+    ]
+
+
+def split_hits(rows) -> Tuple[List[DocketResult], List[DocketResult]]:
+    """Result rows → (title hits, full-text hits)."""
+    title_rows: List[DocketResult] = []
+    full_text_rows: List[DocketResult] = []
+    for row in rows:
+        title_hit = row[7]
+        # Positional: docket metadata, match_source, the two match counts, documents.
+        hit = DocketResult(
+            *row[:6], "title" if title_hit else "full_text", 0, 0, row[6],
+        )
+        if not isinstance(hit.cfr_refs, list):
+            hit.cfr_refs = []
+        (title_rows if title_hit else full_text_rows).append(hit)
+    return title_rows, full_text_rows
@@ -1,9 +1,25 @@
+# pylint: disable=too-many-lines
+import dataclasses
 import json
 from dataclasses import dataclass
-from typing import List, Dict, Any, Set
+from typing import List, Dict, Any, Optional, Set, Tuple
 import os
+import threading
+import time
+import weakref
+from contextlib import contextmanager, nullcontext
 import psycopg2
 from opensearchpy import OpenSearch
+from mirrsearch.combined_search import (
+    catalog_search_params, catalog_search_sql, combined_search_params, combined_search_sql,
+    split_hits,
+)
+from mirrsearch.db_routing import (
+    ConnectionRouter, replica_connect_kwargs, router_from_env
+)
+from mirrsearch.docket_catalog import DocketCatalog
+from mirrsearch.docket_result import DocketResult
+from mirrsearch.search_filters import CompiledFilters, compile_search_filters
 try:
     import requests
     from requests_aws4auth import AWS4Auth
@@ -16,6 +32,11 @@ try:
 except ImportError:
     boto3 = None
 
+try:
+    import psycopg
+except ImportError:
+    psycopg = None
+
 try:
     from dotenv import load_dotenv
 except ImportError:
@@ -42,41 +63,6 @@ def _env_flag_true(var_name: str) -> bool:
     return (os.getenv(var_name) or "").strip().lower() in {"1", "true", "yes", "on"}
 
 
-def _cfr_part_item_pattern(item: Any) -> str:
-    """Single CFR filter value → lowercase substring, or '' if absent."""
-    if isinstance(item, dict):
-        return (item.get("part") or "").strip().lower()
-    if item is None:
-        return ""
-    return str(item).strip().lower()
-
-
-def cfr_part_filter_patterns(cfr_part_param) -> List[str]:
-    """
-    Build lowercase substring patterns for CFR part filtering.
-
-    Accepts plain strings or dicts with a ``part`` key from the UI.
-    """
-    if not cfr_part_param:
-        return []
-    return [p for p in (_cfr_part_item_pattern(i) for i in cfr_part_param) if p]
-
-
-def _cfr_exact_title_part_pairs(cfr_part_param) -> List[tuple]:
-    """Extract exact CFR (title, part) pairs from dict-style filter payloads."""
-    if not cfr_part_param:
-        return []
-    pairs: List[tuple] = []
-    for item in cfr_part_param:
-        if not isinstance(item, dict):
-            continue
-        title = str(item.get("title") or "").strip()
-        part = str(item.get("part") or "").strip()
-        if title and part:
-            pairs.append((title, part))
-    return pairs
-
-
 def _parse_positive_int_env(var_name: str, default: int) -> int:
     """Parse env var as positive int, falling back to default."""
     raw = (os.getenv(var_name) or "").strip()
@@ -99,11 +85,74 @@ def _opensearch_comment_id_terms_size() -> int:
     return _parse_positive_int_env("OPENSEARCH_COMMENT_ID_TERMS_SIZE", 65535)
 
 
+def _agency_cache_seconds() -> int:
+    """How long the agency list used to resolve agency filters is reused."""
+    return _parse_positive_int_env("AGENCY_CACHE_SECONDS", 300)
+
+
+# connection -> (monotonic time fetched, agency ids)
+_AGENCY_CACHE: "weakref.WeakKeyDictionary[Any, tuple]" = weakref.WeakKeyDictionary()
+
+
 @dataclass(frozen=True)
 class DBLayer:  # pylint: disable=too-many-public-methods
+    """
+    Postgres access for the app. Either one ``conn`` shared by every method,
+    or a ``router`` (``db_routing.ConnectionRouter``) that sends reads to a
+    replica pool and writes to a primary pool. An optional ``catalog``
+    (``docket_catalog.DocketCatalog``) serves docket metadata from memory.
+    """
     conn: Any = None
+    router: Optional[ConnectionRouter] = None
+    catalog: Optional[DocketCatalog] = None
+
+    @property
+    def connected(self) -> bool:
+        return self.conn is not None or self.router is not None
+
+    @contextmanager
+    def _connection(self, write: bool = False, user: Optional[str] = None,
+                    fresh: bool = False):
+        """
+        Connection for one method: ``write`` for anything that modifies rows,
+        ``user`` whose own writes must be visible, ``fresh`` to skip the replica.
+        """
+        if self.router is None:
+            yield self.conn
+        else:
+            with self.router.connection(write=write, user=user, fresh=fresh) as conn:
+                yield conn
 
-    def search( # pylint: disable=too-many-arguments,too-many-positional-arguments,too-many-locals,too-many-branches,too-many-statements
+    def _ready_catalog(self) -> Optional[DocketCatalog]:
+        """
+        The docket catalog, or None when there is none loaded. A refresh that
+        is due runs on a background thread; this request reads the current copy.
+        """
+        catalog = self.catalog
+        if catalog is None:
+            return None
+        if catalog.claim_refresh():
+            threading.Thread(
+                target=self.refresh_catalog, name="docket-catalog-refresh", daemon=True
+            ).start()
+        return catalog if catalog.loaded else None
+
+    def refresh_catalog(self) -> None:
+        """Refresh (or load) the docket catalog now on a connection of its own."""
+        try:
+            with self._connection() as conn:
+                self.catalog.refresh(conn)
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            print(f"Docket catalog refresh failed: {e}")
+
+    def _batch(self, conn):  # pylint: disable=unused-argument
+        """
+        Context for statements whose results do not feed each other; a
+        pipelining backend (``db_psycopg``) sends them in one round trip.
+        """
+        return nullcontext()
+
+    def search( # pylint: disable=too-many-arguments,too-many-positional-arguments
             self,
             query: str,
             docket_type_param: str = None,
@@ -112,35 +161,11 @@ class DBLayer:  # pylint: disable=too-many-public-methods
             start_date: str = None,
             end_date: str = None) \
             -> List[Dict[str, Any]]:
-        if self.conn is None:
+        if not self.connected:
             return []
-        results = self._search_dockets_postgres(
+        return self._search_dockets_postgres(
             query, docket_type_param, agency, cfr_part_param, start_date, end_date
         )
-        exact_pairs = _cfr_exact_title_part_pairs(cfr_part_param)
-        if not exact_pairs:
-            return results
-        allowed = self._get_cfr_docket_ids(exact_pairs)
-        return [row for row in results if row["docket_id"] in allowed]
-
-    def _get_cfr_docket_ids(self, cfr_pairs: List[tuple]) -> Set[str]:
-        """Return docket IDs matching exact CFR title+part pairs."""
-        if self.conn is None or not cfr_pairs:
-            return set()
-        clauses = " OR ".join("(cp.title = %s AND cp.cfrPart = %s)" for _ in cfr_pairs)
-        sql = f"""
-            SELECT DISTINCT d.docket_id
-            FROM documentsWithFRdoc d
-            JOIN cfrparts cp ON cp.frdocnum = d.frdocnum
-            WHERE ({clauses})
-        """
-        params: List[str] = []
-        for title, part in cfr_pairs:
-            params.append(title)
-            params.append(part)
-        with self.conn.cursor() as cur:
-            cur.execute(sql, params)
-            return {row[0] for row in cur.fetchall()}
 
     def _search_dockets_postgres(  # pylint: disable=too-many-arguments,too-many-positional-arguments,too-many-locals,too-many-branches,too-many-statements
             self, query: str, docket_type_param: str = None,
@@ -149,117 +174,174 @@ class DBLayer:  # pylint: disable=too-many-public-methods
             start_date: str = None,
             end_date: str = None) -> List[Dict[str, Any]]:
         sql = """
-            SELECT DISTINCT
+            SELECT
                 d.docket_id,
                 d.docket_title,
                 d.agency_id,
                 d.docket_type,
                 d.modify_date,
-                cp.title,
-                cp.cfrPart,
-                l.link
+                dc.title,
+                dc.cfrpart,
+                dc.link
             FROM dockets d
-            JOIN documentsWithFRdoc doc ON doc.docket_id = d.docket_id
-            LEFT JOIN cfrparts cp ON cp.frdocnum = doc.frdocnum
-            LEFT JOIN links l ON l.title = cp.title AND l.cfrPart = cp.cfrPart
+            LEFT JOIN docket_cfr dc ON dc.docket_id = d.docket_id
             WHERE d.docket_title ILIKE %s
+              AND EXISTS (SELECT 1 FROM documentsWithFRdoc doc WHERE doc.docket_id = d.docket_id)
         """
-        params = [f"%{(query or '').strip().lower()}%"]
-
-        if docket_type_param:
-            sql += " AND d.docket_type = %s"
-            params.append(docket_type_param)
-
-        if agency:
-            clauses = " OR ".join("d.agency_id ILIKE %s" for _ in agency)
-            sql += f" AND ({clauses})"
-            params.extend(f"%{a}%" for a in agency)
-
-        if start_date:
-            sql += " AND d.modify_date::date >= %s::date"
-            params.append(start_date)
-
-        if end_date:
-            sql += " AND d.modify_date::date <= %s::date"
-            params.append(end_date)
-
-        cfr_patterns = cfr_part_filter_patterns(cfr_part_param)
-        if cfr_patterns:
-            clauses = " OR ".join("cp3.cfrPart = %s" for _ in cfr_patterns)
-            sql += (
-                " AND EXISTS ("
-                "SELECT 1 FROM documentsWithFRdoc d3 "
-                "JOIN cfrparts cp3 ON cp3.frdocnum = d3.frdocnum "
-                "WHERE d3.docket_id = d.docket_id "
-                f"AND ({clauses})"
-                ")"
-            )
-            params.extend(cfr_patterns)
+        params: List[Any] = [f"%{(query or '').strip().lower()}%"]
 
-        exact_pairs = _cfr_exact_title_part_pairs(cfr_part_param)
-        if exact_pairs:
-            exact_clauses = " OR ".join(
-                "(cp2.title = %s AND cp2.cfrPart = %s)" for _ in exact_pairs
-            )
-            sql += (
-                " AND EXISTS ("
-                "SELECT 1 FROM documentsWithFRdoc d2 "
-                "JOIN cfrparts cp2 ON cp2.frdocnum = d2.frdocnum "
-                "WHERE d2.docket_id = d.docket_id "
-                f"AND ({exact_clauses})"
-                ")"
-            )
-            for title, part in exact_pairs:
-                params.extend([title, part])
-
-        sql += " ORDER BY d.modify_date DESC, d.docket_id, cp.title, cp.cfrPart LIMIT 50"
+        filters = self._compile_filters(
+            docket_type_param, agency, cfr_part_param, start_date, end_date
+        )
+        sql += filters.where_sql()
+        params.extend(filters.params)
+
+        sql += " ORDER BY d.modify_date DESC, d.docket_id, dc.title, dc.cfrpart LIMIT 50"
+
+        with self._connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(sql, params)
+                dockets = {}
+                for row in cur.fetchall():
+                    self._process_docket_row(dockets, row)
+                return [
+                    {**d, "cfr_refs": list(d["cfr_refs"].values())}
+                    for d in dockets.values()
+                ]
+
+    def _compile_filters(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+            self, docket_type_param, agency, cfr_part_param, start_date, end_date):
+        return compile_search_filters(
+            docket_type_param, agency, cfr_part_param, start_date, end_date,
+            known_agencies=self._known_agencies() if agency else (),
+        )
 
-        with self.conn.cursor() as cur:
+    def search_with_hits(  # pylint: disable=too-many-arguments,too-many-positional-arguments,too-many-locals
+            self,
+            query: str,
+            docket_ids: List[str],
+            docket_type_param: str = None,
+            agency: List[str] = None,
+            cfr_part_param: List[str] = None,
+            start_date: str = None,
+            end_date: str = None) -> Tuple[List[DocketResult], List[DocketResult]]:
+        """
+        Title hits and the OpenSearch hits in ``docket_ids`` that pass the
+        filters, with document totals, from one statement
+        (``combined_search``). Returns ``(title_rows, full_text_rows)``
+        as ``DocketResult`` rows with ``match_source`` set.
+        """
+        if not self.connected:
+            return [], []
+        filters = self._compile_filters(
+            docket_type_param, agency, cfr_part_param, start_date, end_date
+        )
+        catalog = self._ready_catalog()
+        if catalog is not None:
+            params = catalog_search_params(
+                query,
+                catalog.filter_ids(
+                    docket_ids, docket_type_param, agency, cfr_part_param, start_date, end_date
+                ),
+                catalog.unverified_ids(docket_ids), docket_ids, filters,
+            )
+            return self._search_hits_from_catalog(catalog, params, filters)
+        sql = combined_search_sql(filters)
+        params = combined_search_params(query, docket_ids, filters)
+        with self._connection() as conn, conn.cursor() as cur:
             cur.execute(sql, params)
-            dockets = {}
-            for row in cur.fetchall():
-                self._process_docket_row(dockets, row)
-            return [
-                {**d, "cfr_refs": list(d["cfr_refs"].values())}
-                for d in dockets.values()
-            ]
+            return split_hits(cur.fetchall())
+
+    def _search_hits_from_catalog(  # pylint: disable=too-many-locals
+            self, catalog: DocketCatalog, params: List[Any],
+            filters: CompiledFilters) -> Tuple[List[DocketResult], List[DocketResult]]:
+        """
+        ``search_with_hits`` with the full-text hits the catalog knows already
+        filtered by it: Postgres matches titles, filters the hits the catalog
+        does not know and counts documents; rows are hydrated from the
+        catalog where it has them.
+        """
+        with self._connection() as conn, conn.cursor() as cur:
+            cur.execute(catalog_search_sql(filters), params)
+            hits = cur.fetchall()
+        rows = catalog.lookup(docket_id for docket_id, _count, _title in hits)
+        missing = [docket_id for docket_id, _count, _title in hits if docket_id not in rows]
+        if missing:
+            # Dockets the catalog has not (yet) read, or read before their documents.
+            rows.update(
+                (r["docket_id"], DocketResult.from_mapping(r))
+                for r in self._get_dockets_by_ids_sql(missing)
+            )
+        title_rows: List[DocketResult] = []
+        full_text_rows: List[DocketResult] = []
+        for docket_id, count, title_hit in hits:
+            row = rows.get(docket_id)
+            if row is not None:
+                row.document_total_count = count
+                row.match_source = "title" if title_hit else "full_text"
+                (title_rows if title_hit else full_text_rows).append(row)
+        return title_rows, full_text_rows
 
     def get_dockets_by_ids(self, docket_ids: List[str]) -> List[Dict[str, Any]]:
-        if self.conn is None or not docket_ids:
+        if not self.connected or not docket_ids:
             return []
+        catalog = self._ready_catalog()
+        if catalog is not None and not catalog.unverified_ids(docket_ids):
+            return catalog.get_rows(docket_ids)
+        return self._get_dockets_by_ids_sql(docket_ids)
+
+    def _get_dockets_by_ids_sql(self, docket_ids: List[str]) -> List[Dict[str, Any]]:
         sql = """
-            SELECT DISTINCT
+            SELECT
                 d.docket_id,
                 d.docket_title,
                 d.agency_id,
                 d.docket_type,
                 d.modify_date,
-                cp.title,
-                cp.cfrPart,
-                l.link
+                dc.title,
+                dc.cfrpart,
+                dc.link
             FROM dockets d
-            JOIN documentsWithFRdoc doc ON doc.docket_id = d.docket_id
-            LEFT JOIN cfrparts cp ON cp.frdocnum = doc.frdocnum
-            LEFT JOIN links l ON l.title = cp.title AND l.cfrPart = cp.cfrPart
+            LEFT JOIN docket_cfr dc ON dc.docket_id = d.docket_id
             WHERE d.docket_id = ANY(%s)
-            ORDER BY d.modify_date DESC, d.docket_id, cp.title, cp.cfrPart
-        """
-        with self.conn.cursor() as cur:
-            cur.execute(sql, (list(docket_ids),))
-            dockets = {}
-            for row in cur.fetchall():
-                self._process_docket_row(dockets, row)
-            return [
-                {**d, "cfr_refs": list(d["cfr_refs"].values())}
-                for d in dockets.values()
-            ]
+              AND EXISTS (SELECT 1 FROM documentsWithFRdoc doc WHERE doc.docket_id = d.docket_id)
+            ORDER BY d.modify_date DESC, d.docket_id, dc.title, dc.cfrpart
+        """
+        with self._connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(sql, (list(docket_ids),))
+                dockets = {}
+                for row in cur.fetchall():
+                    self._process_docket_row(dockets, row)
+                return [
+                    {**d, "cfr_refs": list(d["cfr_refs"].values())}
+                    for d in dockets.values()
+                ]
+
+    def _known_agencies(self) -> List[str]:
+        """``get_agencies()`` cached per connection for ``AGENCY_CACHE_SECONDS``."""
+        now = time.monotonic()
+        key = self.router if self.router is not None else self.conn
+        try:
+            cached = _AGENCY_CACHE.get(key)
+        except TypeError:  # connection type without weakref support
+            return self.get_agencies()
+        if cached and now - cached[0] < _agency_cache_seconds():
+            return cached[1]
+        agencies = self.get_agencies()
+        _AGENCY_CACHE[key] = (now, agencies)
+        return agencies
 
     def get_agencies(self) -> List[str]:
-        if self.conn is None:
+        if not self.connected:
             return []
-        with self.conn.cursor() as cur:
-            cur.execute("SELECT DISTINCT agency_id FROM dockets ORDER BY agency_id")
-            return [row[0] for row in cur.fetchall()]
+        catalog = self._ready_catalog()
+        if catalog is not None:
+            return catalog.agencies()
+        with self._connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("SELECT DISTINCT agency_id FROM dockets ORDER BY agency_id")
+                return [row[0] for row in cur.fetchall()]
 
     @staticmethod
     def _process_docket_row(dockets, row):
@@ -309,8 +391,21 @@ class DBLayer:  # pylint: disable=too-many-public-methods
 
     @staticmethod
     def _build_docket_agg_query_unique_comments(
-            agg_name: str, match_clauses: List[Dict]) -> Dict:
-        """Like _build_docket_agg_query but counts unique commentId per docket."""
+            agg_name: str, match_clauses: List[Dict], size_field: Optional[str] = None) -> Dict:
+        """
+        Like _build_docket_agg_query but counts unique commentId per docket.
+
+        With ``size_field`` each commentId bucket also reports the max of that
+        field (the form-letter ``clusterSize`` on comment representatives).
+        """
+        by_comment: Dict[str, Any] = {
+            "terms": {
+                "field": "commentId.keyword",
+                "size": _opensearch_comment_id_terms_size(),
+            }
+        }
+        if size_field:
+            by_comment["aggs"] = {"cluster_size": {"max": {"field": size_field}}}
         return {
             "size": 0,
             "aggs": {
@@ -327,14 +422,7 @@ class DBLayer:  # pylint: disable=too-many-public-methods
                                     "minimum_should_match": 1
                                 }
                             },
-                            "aggs": {
-                                "by_comment": {
-                                    "terms": {
-                                        "field": "commentId.keyword",
-                                        "size": _opensearch_comment_id_terms_size(),
-                                    }
-                                }
-                            },
+                            "aggs": {"by_comment": by_comment},
                         }
                     },
                 }
@@ -355,6 +443,37 @@ class DBLayer:  # pylint: disable=too-many-public-methods
                 out.setdefault(did, set()).update(keys)
         return out
 
+    @staticmethod
+    def _cluster_sizes_from_agg(resp: Dict, agg_name: str) -> Dict[str, Dict[str, int]]:
+        """docket -> {representative commentId: clusterSize} for clusters of two or more."""
+        out: Dict[str, Dict[str, int]] = {}
+        for bucket in resp.get("aggregations", {}).get("by_docket", {}).get("buckets", []):
+            inner = bucket.get(agg_name, {}).get("by_comment", {})
+            for comment in inner.get("buckets", []):
+                size = (comment.get("cluster_size") or {}).get("value") or 0
+                if size > 1:
+                    out.setdefault(str(bucket["key"]), {})[str(comment["key"])] = int(size)
+        return out
+
+    @staticmethod
+    def _clustered_member_overlap_query(
+            member_ids: List[str], rep_ids: List[str], docket_count: int) -> Dict:
+        """Per docket, how many of ``member_ids`` belong to one of the ``rep_ids`` clusters."""
+        return {
+            "size": 0,
+            "query": {
+                "bool": {
+                    "filter": [
+                        {"terms": {"commentId.keyword": member_ids}},
+                        {"terms": {"clusterId.keyword": rep_ids}},
+                    ]
+                }
+            },
+            "aggs": {
+                "by_docket": {"terms": {"field": "docketId.keyword", "size": docket_count}}
+            },
+        }
+
     @staticmethod
     def _merge_unique_comment_matches(
             comments_resp: Dict, extracted_resp: Dict) -> Dict[str, int]:
@@ -453,8 +572,8 @@ class DBLayer:  # pylint: disable=too-many-public-methods
             self, opensearch_client, docket_ids: List[str]) -> Dict[str, Dict[str, int]]:
         """Document totals from RDS, comment totals from OpenSearch."""
         totals: Dict[str, Dict[str, int]] = {}
-        if self.conn is not None:
-            with self.conn.cursor() as cur:
+        if self.connected:
+            with self._connection() as conn, conn.cursor() as cur:
                 cur.execute(
                     "SELECT docket_id, COUNT(*) FROM documentsWithFRdoc "
                     "WHERE docket_id = ANY(%s) GROUP BY docket_id",
@@ -462,6 +581,22 @@ class DBLayer:  # pylint: disable=too-many-public-methods
                 )
                 for docket_id, count in cur.fetchall():
                     totals[docket_id] = {"document_total_count": count, "comment_total_count": 0}
+        for docket_id, count in self._fetch_comment_totals(opensearch_client, docket_ids).items():
+            totals.setdefault(docket_id, {"document_total_count": 0, "comment_total_count": 0})
+            totals[docket_id]["comment_total_count"] = count
+        return totals
+
+    def get_comment_totals(
+            self, docket_ids: List[str], opensearch_client=None) -> Dict[str, int]:
+        """Per-docket comment totals (for rows whose document totals are known)."""
+        if not docket_ids:
+            return {}
+        if opensearch_client is None:
+            opensearch_client = get_opensearch_connection()
+        return self._fetch_comment_totals(opensearch_client, docket_ids)
+
+    @staticmethod
+    def _fetch_comment_totals(opensearch_client, docket_ids: List[str]) -> Dict[str, int]:
         comment_query = {
             "size": 0,
             "query": {"bool": {"filter": [{"terms": {"docketId.keyword": docket_ids}}]}},
@@ -469,13 +604,13 @@ class DBLayer:  # pylint: disable=too-many-public-methods
         }
         try:
             resp = opensearch_client.search(index="comments", body=comment_query)
-            for bucket in resp["aggregations"]["by_docket"]["buckets"]:
-                docket_id = str(bucket["key"])
-                totals.setdefault(docket_id, {"document_total_count": 0, "comment_total_count": 0})
-                totals[docket_id]["comment_total_count"] = bucket["doc_count"]
+            return {
+                str(bucket["key"]): bucket["doc_count"]
+                for bucket in resp["aggregations"]["by_docket"]["buckets"]
+            }
         except Exception as e:  # pylint: disable=broad-exception-caught
             print(f"Comment totals query failed: {e}")
-        return totals
+            return {}
 
     def _run_text_match_queries(  # pylint: disable=too-many-locals
             self, opensearch_client, terms: List[str]) -> List[Dict[str, Any]]:
@@ -504,6 +639,7 @@ class DBLayer:  # pylint: disable=too-many-public-methods
             self._build_docket_agg_query_unique_comments(
                 "matching_comments",
                 [{"match": {"commentText": t}} for t in terms],
+                size_field="clusterSize",
             ),
         )
         extracted_resp = safe_search(
@@ -522,19 +658,55 @@ class DBLayer:  # pylint: disable=too-many-public-methods
         extracted_ids_by_docket = self._comment_ids_per_docket_from_agg(
             extracted_resp, "matching_extracted"
         )
+        # Form letters: only a cluster's representative is indexed with text, so a
+        # matching representative stands for clusterSize comments.
+        cluster_sizes = self._cluster_sizes_from_agg(comment_resp, "matching_comments")
+        overlap = self._clustered_extracted_overlap(
+            safe_search, cluster_sizes, comment_ids_by_docket, extracted_ids_by_docket
+        )
         all_dockets = set(comment_ids_by_docket) | set(extracted_ids_by_docket)
         for did in all_dockets:
             merged = (set(comment_ids_by_docket.get(did, set()))
                       | set(extracted_ids_by_docket.get(did, set())))
+            expanded = sum(size - 1 for size in cluster_sizes.get(did, {}).values())
             docket_counts.setdefault(
                 did, {"document_match_count": 0, "comment_match_count": 0}
             )
-            docket_counts[did]["comment_match_count"] = len(merged)
+            docket_counts[did]["comment_match_count"] = (
+                len(merged) + expanded - overlap.get(did, 0)
+            )
         return [{"docket_id": did, **counts} for did, counts in docket_counts.items()]
 
+    def _clustered_extracted_overlap(  # pylint: disable=too-many-locals
+            self, search, cluster_sizes: Dict[str, Dict[str, int]],
+            comment_ids_by_docket: Dict[str, Set[str]],
+            extracted_ids_by_docket: Dict[str, Set[str]]) -> Dict[str, int]:
+        """
+        Per docket, extracted-text matches that are members of an already
+        expanded cluster (so they are not counted twice). One extra query, only
+        when both expanded clusters and extracted-only matches exist.
+        """
+        member_ids: Set[str] = set()
+        for did in cluster_sizes:
+            member_ids |= (extracted_ids_by_docket.get(did, set())
+                           - comment_ids_by_docket.get(did, set()))
+        if not member_ids:
+            return {}
+        rep_ids = sorted(rep for reps in cluster_sizes.values() for rep in reps)
+        resp = search(
+            "comments",
+            self._clustered_member_overlap_query(
+                sorted(member_ids), rep_ids, len(cluster_sizes)
+            ),
+        )
+        return {
+            str(b["key"]): b["doc_count"]
+            for b in resp.get("aggregations", {}).get("by_docket", {}).get("buckets", [])
+        }
+
     def get_collections(self, user_email: str) -> List[Dict[str, Any]]:
         """Return all collections belonging to the given user."""
-        if self.conn is None:
+        if not self.connected:
             return []
         sql = """
             SELECT c.collection_id, c.collection_name, c.user_email,
@@ -548,97 +720,102 @@ class DBLayer:  # pylint: disable=too-many-public-methods
             GROUP BY c.collection_id, c.collection_name, c.user_email
             ORDER BY c.collection_id
         """
-        with self.conn.cursor() as cur:
-            cur.execute(sql, (user_email,))
-            return [
-                {
-                    "collection_id": row[0],
-                    "name": row[1],
-                    "user_email": row[2],
-                    "docket_ids": row[3] if isinstance(row[3], list) else []
-                }
-                for row in cur.fetchall()
-            ]
+        with self._connection(user=user_email) as conn:
+            with conn.cursor() as cur:
+                cur.execute(sql, (user_email,))
+                return [
+                    {
+                        "collection_id": row[0],
+                        "name": row[1],
+                        "user_email": row[2],
+                        "docket_ids": row[3] if isinstance(row[3], list) else []
+                    }
+                    for row in cur.fetchall()
+                ]
 
     def create_collection(self, user_email: str, name: str) -> int:
         """Create a new collection for the user and return its id."""
-        if self.conn is None:
+        if not self.connected:
             return -1
         upsert_user_sql = """
             INSERT INTO users (email, name) VALUES (%s, %s)
             ON CONFLICT (email) DO NOTHING
         """
-        with self.conn.cursor() as cur:
-            cur.execute(upsert_user_sql, (user_email, user_email))
         insert_sql = """
             INSERT INTO collections (user_email, collection_name)
             VALUES (%s, %s)
             RETURNING collection_id
         """
-        with self.conn.cursor() as cur:
-            cur.execute(insert_sql, (user_email, name))
-            collection_id = cur.fetchone()[0]
-        self.conn.commit()
-        return collection_id
+        with self._connection(write=True, user=user_email) as conn, self._batch(conn):
+            with conn.cursor() as cur:
+                cur.execute(upsert_user_sql, (user_email, user_email))
+            with conn.cursor() as cur:
+                cur.execute(insert_sql, (user_email, name))
+                collection_id = cur.fetchone()[0]
+            conn.commit()
+            return collection_id
 
     def delete_collection(self, collection_id: int, user_email: str) -> bool:
         """Delete a collection owned by the user. Returns True if deleted."""
-        if self.conn is None:
+        if not self.connected:
             return False
         sql = """
             DELETE FROM collections
             WHERE collection_id = %s AND user_email = %s
         """
-        with self.conn.cursor() as cur:
-            cur.execute(sql, (collection_id, user_email))
-            deleted = cur.rowcount > 0
-        self.conn.commit()
-        return deleted
+        with self._connection(write=True, user=user_email) as conn:
+            with conn.cursor() as cur:
+                cur.execute(sql, (collection_id, user_email))
+                deleted = cur.rowcount > 0
+            conn.commit()
+            return deleted
 
     def add_docket_to_collection(
             self, collection_id: int, docket_id: str, user_email: str) -> bool:
         """Add a docket to a collection the user owns. Returns True if successful."""
-        if self.conn is None:
+        if not self.connected:
             return False
         check_sql = """
             SELECT 1 FROM collections
             WHERE collection_id = %s AND user_email = %s
         """
-        with self.conn.cursor() as cur:
-            cur.execute(check_sql, (collection_id, user_email))
-            if cur.fetchone() is None:
-                return False
         insert_sql = """
             INSERT INTO collection_dockets (collection_id, docket_id)
             VALUES (%s, %s)
             ON CONFLICT DO NOTHING
         """
-        with self.conn.cursor() as cur:
-            cur.execute(insert_sql, (collection_id, docket_id))
-        self.conn.commit()
-        return True
+        with self._connection(write=True, user=user_email) as conn:
+            with conn.cursor() as cur:
+                cur.execute(check_sql, (collection_id, user_email))
+                if cur.fetchone() is None:
+                    return False
+            with conn.cursor() as cur:
+                cur.execute(insert_sql, (collection_id, docket_id))
+            conn.commit()
+            return True
 
     def remove_docket_from_collection(
             self, collection_id: int, docket_id: str, user_email: str) -> bool:
         """Remove a docket from a collection the user owns. Returns True if successful."""
-        if self.conn is None:
+        if not self.connected:
             return False
         check_sql = """
             SELECT 1 FROM collections
             WHERE collection_id = %s AND user_email = %s
         """
-        with self.conn.cursor() as cur:
-            cur.execute(check_sql, (collection_id, user_email))
-            if cur.fetchone() is None:
-                return False
         delete_sql = """
             DELETE FROM collection_dockets
             WHERE collection_id = %s AND docket_id = %s
         """
-        with self.conn.cursor() as cur:
-            cur.execute(delete_sql, (collection_id, docket_id))
-        self.conn.commit()
-        return True
+        with self._connection(write=True, user=user_email) as conn:
+            with conn.cursor() as cur:
+                cur.execute(check_sql, (collection_id, user_email))
+                if cur.fetchone() is None:
+                    return False
+            with conn.cursor() as cur:
+                cur.execute(delete_sql, (collection_id, docket_id))
+            conn.commit()
+            return True
 
     def create_download_job(  # pylint: disable=too-many-locals
             self,
@@ -648,29 +825,30 @@ class DBLayer:  # pylint: disable=too-many-public-methods
             include_binaries: bool = False,
     ) -> str:
         """Create a download job and return the new job_id (UUID string)."""
-        if self.conn is None:
+        if not self.connected:
             return ""
         upsert_user_sql = """
             INSERT INTO users (email, name) VALUES (%s, %s)
             ON CONFLICT (email) DO NOTHING
         """
-        with self.conn.cursor() as cur:
-            cur.execute(upsert_user_sql, (user_email, user_email))
         insert_sql = """
             INSERT INTO download_jobs
                 (user_email, docket_ids, format, include_binaries)
             VALUES (%s, %s, %s, %s)
             RETURNING job_id
         """
-        with self.conn.cursor() as cur:
-            cur.execute(insert_sql, (user_email, docket_ids, format, include_binaries))
-            job_id = str(cur.fetchone()[0])
-        self.conn.commit()
-        return job_id
+        with self._connection(write=True, user=user_email) as conn, self._batch(conn):
+            with conn.cursor() as cur:
+                cur.execute(upsert_user_sql, (user_email, user_email))
+            with conn.cursor() as cur:
+                cur.execute(insert_sql, (user_email, docket_ids, format, include_binaries))
+                job_id = str(cur.fetchone()[0])
+            conn.commit()
+            return job_id
 
     def get_download_job(self, job_id: str, user_email: str) -> Dict[str, Any]:
         """Return job details for the given job_id owned by user_email, or {}."""
-        if self.conn is None:
+        if not self.connected:
             return {}
         sql = """
             SELECT job_id, user_email, docket_ids, format, include_binaries,
@@ -678,7 +856,7 @@ class DBLayer:  # pylint: disable=too-many-public-methods
             FROM download_jobs
             WHERE job_id = %s AND user_email = %s
         """
-        with self.conn.cursor() as cur:
+        with self._connection(user=user_email) as conn, conn.cursor() as cur:
             cur.execute(sql, (job_id, user_email))
             row = cur.fetchone()
         if row is None:
@@ -702,92 +880,99 @@ class DBLayer:  # pylint: disable=too-many-public-methods
 
         Returns True if a row was updated.
         """
-        if self.conn is None:
+        if not self.connected:
             return False
         sql = """
             UPDATE download_jobs
             SET status = %s, s3_path = %s, updated_at = NOW()
             WHERE job_id = %s
         """
-        with self.conn.cursor() as cur:
-            cur.execute(sql, (status, s3_path, job_id))
-            updated = cur.rowcount > 0
-        self.conn.commit()
-        return updated
+        with self._connection(write=True) as conn:
+            with conn.cursor() as cur:
+                cur.execute(sql, (status, s3_path, job_id))
+                updated = cur.rowcount > 0
+            conn.commit()
+            return updated
 
     def prune_expired_download_jobs(self) -> int:
         """Delete download_jobs past their expires_at. Returns the number of rows deleted."""
-        if self.conn is None:
+        if not self.connected:
             return 0
         sql = "DELETE FROM download_jobs WHERE expires_at < NOW()"
-        with self.conn.cursor() as cur:
-            cur.execute(sql)
-            deleted = cur.rowcount
-        self.conn.commit()
-        return deleted
+        with self._connection(write=True) as conn:
+            with conn.cursor() as cur:
+                cur.execute(sql)
+                deleted = cur.rowcount
+            conn.commit()
+            return deleted
 
     def is_admin(self, email: str) -> bool:
         """Return True if the given email belongs to an admin."""
-        if self.conn is None:
+        if not self.connected:
             return False
         sql = "SELECT 1 FROM admins WHERE email = %s"
-        with self.conn.cursor() as cur:
-            cur.execute(sql, (email,))
-            return cur.fetchone() is not None
+        with self._connection(fresh=True) as conn:
+            with conn.cursor() as cur:
+                cur.execute(sql, (email,))
+                return cur.fetchone() is not None
 
     def is_authorized_user(self, email: str) -> bool:
         """Return True if the given email is in the authorized users list."""
-        if self.conn is None:
+        if not self.connected:
             return False
         sql = "SELECT 1 FROM authorized_users WHERE email = %s"
-        with self.conn.cursor() as cur:
-            cur.execute(sql, (email,))
-            return cur.fetchone() is not None
+        with self._connection(fresh=True) as conn:
+            with conn.cursor() as cur:
+                cur.execute(sql, (email,))
+                return cur.fetchone() is not None
 
     def add_authorized_user(self, email: str, name: str) -> bool:
         """Add a user to the authorized users list. Returns True if successful."""
-        if self.conn is None:
+        if not self.connected:
             return False
         sql = """
             INSERT INTO authorized_users (email, name)
             VALUES (%s, %s)
             ON CONFLICT DO NOTHING
         """
-        with self.conn.cursor() as cur:
-            cur.execute(sql, (email, name))
-        self.conn.commit()
-        return True
+        with self._connection(write=True) as conn:
+            with conn.cursor() as cur:
+                cur.execute(sql, (email, name))
+            conn.commit()
+            return True
 
     def remove_authorized_user(self, email: str) -> bool:
         """Remove a user from the authorized users list. Returns True if deleted."""
-        if self.conn is None:
+        if not self.connected:
             return False
         sql = "DELETE FROM authorized_users WHERE email = %s"
-        with self.conn.cursor() as cur:
-            cur.execute(sql, (email,))
-            deleted = cur.rowcount > 0
-        self.conn.commit()
-        return deleted
+        with self._connection(write=True) as conn:
+            with conn.cursor() as cur:
+                cur.execute(sql, (email,))
+                deleted = cur.rowcount > 0
+            conn.commit()
+            return deleted
 
     def get_authorized_users(self) -> List[Dict[str, Any]]:
         """Return all authorized users."""
-        if self.conn is None:
+        if not self.connected:
             return []
         sql = """
             SELECT email, name, authorized_at
             FROM authorized_users
             ORDER BY authorized_at DESC
         """
-        with self.conn.cursor() as cur:
-            cur.execute(sql)
-            return [
-                {
-                    "email": row[0],
-                    "name": row[1],
-                    "authorized_at": row[2]
-                }
-                for row in cur.fetchall()
-            ]
+        with self._connection(fresh=True) as conn:
+            with conn.cursor() as cur:
+                cur.execute(sql)
+                return [
+                    {
+                        "email": row[0],
+                        "name": row[1],
+                        "authorized_at": row[2]
+                    }
+                    for row in cur.fetchall()
+                ]
 
 def _get_secrets_from_aws() -> Dict[str, str]:
     if boto3 is None:
@@ -797,37 +982,72 @@ def _get_secrets_from_aws() -> Dict[str, str]:
     return json.loads(response["SecretString"])
 
 
-def get_postgres_connection() -> DBLayer:
+def _primary_connect_kwargs() -> Dict[str, Any]:
     use_aws_secrets = os.getenv("USE_AWS_SECRETS", "").lower() in {"1", "true", "yes", "on"}
     if use_aws_secrets:
         creds = _get_secrets_from_aws()
-        conn = psycopg2.connect(
-            host=creds["host"],
-            port=creds["port"],
-            database=creds["db"],
-            user=creds["username"],
-            password=creds["password"]
-        )
-    else:
-        if LOAD_DOTENV is not None:
-            LOAD_DOTENV()
-        conn = psycopg2.connect(
-            host=os.getenv("DB_HOST", "localhost"),
-            port=os.getenv("DB_PORT", "5432"),
-            database=os.getenv("DB_NAME", "your_db"),
-            user=os.getenv("DB_USER", "your_user"),
-            password=os.getenv("DB_PASSWORD", "your_password")
-        )
-    return DBLayer(conn)
+        return {
+            "host": creds["host"],
+            "port": creds["port"],
+            "database": creds["db"],
+            "user": creds["username"],
+            "password": creds["password"],
+        }
+    if LOAD_DOTENV is not None:
+        LOAD_DOTENV()
+    return {
+        "host": os.getenv("DB_HOST", "localhost"),
+        "port": os.getenv("DB_PORT", "5432"),
+        "database": os.getenv("DB_NAME", "your_db"),
+        "user": os.getenv("DB_USER", "your_user"),
+        "password": os.getenv("DB_PASSWORD", "your_password"),
+    }
+
+
+def get_postgres_connection() -> DBLayer:
+    """
+    One connection to the primary (psycopg 3 when ``DB_DRIVER=psycopg``), or,
+    when ``DB_REPLICA_*`` is configured, a router over a primary pool and a
+    replica pool.
+    """
+    primary = _primary_connect_kwargs()
+    replica = replica_connect_kwargs(primary)
+    use_psycopg3 = os.getenv("DB_DRIVER", "").strip().lower() in {"psycopg", "psycopg3"}
+    if replica is None and use_psycopg3:
+        # Imported here: psycopg 3 is only needed when it is selected.
+        from mirrsearch import db_psycopg  # pylint: disable=import-outside-toplevel
+        return db_psycopg.PsycopgDBLayer(db_psycopg.connect(**primary))
+    if replica is None:
+        return DBLayer(psycopg2.connect(**primary))
+    if use_psycopg3:
+        print("DB_DRIVER=psycopg is not supported with a read replica; using psycopg2 pools")
+    return DBLayer(router=router_from_env(
+        primary, replica, _parse_positive_int_env("DB_POOL_MAX", 10)
+    ))
+
+
+# Raised by either driver when Postgres cannot be reached.
+_CONNECT_ERRORS = (psycopg2.OperationalError,) + (
+    (psycopg.OperationalError,) if psycopg is not None else ()
+)
 
 
 def get_db() -> DBLayer:
     if LOAD_DOTENV is not None:
         LOAD_DOTENV()
     try:
-        return get_postgres_connection()
-    except psycopg2.OperationalError:
+        db = get_postgres_connection()
+    except _CONNECT_ERRORS:
         return DBLayer()
+    if _env_flag_true("DOCKET_CATALOG"):
+        # Loaded here, once per worker as it imports the app; later refreshes
+        # run in the background (``_ready_catalog``).
+        db = dataclasses.replace(db, catalog=DocketCatalog(
+            refresh_seconds=_parse_positive_int_env("DOCKET_CATALOG_REFRESH_SECONDS", 60),
+            reload_seconds=_parse_positive_int_env("DOCKET_CATALOG_RELOAD_SECONDS", 3600),
+        ))
+        db.refresh_catalog()
+    return db
 
 
 def _opensearch_use_ssl_from_env(user: str, password: str) -> bool:
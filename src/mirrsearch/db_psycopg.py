@@ -0,0 +1,69 @@
+"""
+psycopg 3 backend for ``DBLayer``, selected with ``DB_DRIVER=psycopg``.
+
+The connection differs from psycopg2's in three ways; the query methods are
+inherited unchanged, so callers see the same ``DBLayer`` API:
+
+- **Prepared statements:** psycopg prepares a statement server-side once it
+  has run ``DB_PREPARE_THRESHOLD`` times on the connection (default 5), so
+  the hot search / hydration / totals queries stop being re-parsed and
+  re-planned. ``DB_PREPARE_THRESHOLD=none`` turns this off (PgBouncer in
+  transaction mode).
+- **Binary results:** every cursor asks for binary rows, which skips text
+  parsing of timestamps, counts and arrays on the client.
+- **Pipeline mode:** ``DBLayer._batch`` sends the statements of one method
+  that do not depend on each other's results in one round trip. Only the
+  collection and download-job writes have such statements; a search is
+  already one statement (``combined_search``) per method.
+"""
+import os
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+import psycopg
+from psycopg import pq
+
+from mirrsearch.db import DBLayer
+
+
+class BinaryCursor(psycopg.Cursor):
+    """Cursor whose results come back in binary format."""
+
+    def __init__(self, connection, *, row_factory=None):
+        super().__init__(connection, row_factory=row_factory)
+        self.format = pq.Format.BINARY
+
+
+def prepare_threshold_from_env(default: int = 5) -> Optional[int]:
+    """``DB_PREPARE_THRESHOLD`` as an int, or None ("none") to never prepare."""
+    raw = (os.getenv("DB_PREPARE_THRESHOLD") or "").strip().lower()
+    if raw == "none":
+        return None
+    try:
+        value = int(raw)
+    except ValueError:
+        return default
+    return value if value >= 0 else default
+
+
+def connect(**connect_kwargs: Any):
+    """
+    psycopg 3 connection from the psycopg2-style kwargs
+    ``get_postgres_connection`` builds (``database`` is ``dbname`` in libpq).
+    """
+    kwargs: Dict[str, Any] = dict(connect_kwargs)
+    if "database" in kwargs:
+        kwargs["dbname"] = kwargs.pop("database")
+    return psycopg.connect(
+        prepare_threshold=prepare_threshold_from_env(),
+        cursor_factory=BinaryCursor,
+        **kwargs,
+    )
+
+
+@dataclass(frozen=True)
+class PsycopgDBLayer(DBLayer):
+    """``DBLayer`` over one psycopg 3 connection."""
+
+    def _batch(self, conn):
+        return conn.pipeline()
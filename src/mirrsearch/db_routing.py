@@ -0,0 +1,198 @@
+"""
+Read/write routing for ``DBLayer`` connections.
+
+With a replica configured, read-only methods borrow a connection from the
+replica pool and everything that writes borrows from the primary pool, so
+heavy searches stop competing with ingest and user writes on the primary.
+
+- **Read-your-writes:** after a user's write (a collection change, a new
+  download job) that user's reads go to the primary for
+  ``DB_READ_YOUR_WRITES_SECONDS``, so they never see the replica from before
+  their own change.
+- **Lag fallback:** replica lag is measured at most every
+  ``DB_REPLICA_LAG_CHECK_SECONDS``; while it exceeds
+  ``DB_REPLICA_MAX_LAG_SECONDS`` (or the replica cannot be reached) reads go to
+  the primary.
+- ``fresh=True`` reads always use the primary (authorization checks, where a
+  revoked user must lose access at once).
+"""
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional
+
+import psycopg2
+import psycopg2.pool
+
+# Seconds the replica is behind; 0 when it has replayed everything it received
+# (an idle primary leaves pg_last_xact_replay_timestamp() old) or is not a
+# standby at all (a second database used as a stand-in).
+REPLICA_LAG_SQL = """
+    SELECT CASE
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+"""
+
+
+def make_pool(min_connections: int, max_connections: int, **connect_kwargs):
+    """Thread-safe psycopg2 pool; Flask serves requests from several threads."""
+    return psycopg2.pool.ThreadedConnectionPool(
+        min_connections, max_connections, **connect_kwargs
+    )
+
+
+# DB_REPLICA_* env var -> connect kwarg; unset ones inherit the primary's value.
+_REPLICA_ENV = {
+    "DB_REPLICA_HOST": "host",
+    "DB_REPLICA_PORT": "port",
+    "DB_REPLICA_NAME": "database",
+    "DB_REPLICA_USER": "user",
+    "DB_REPLICA_PASSWORD": "password",
+}
+
+
+def replica_connect_kwargs(primary: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Replica settings, or None when no ``DB_REPLICA_*`` variable is set."""
+    overrides = {
+        key: os.getenv(var).strip()
+        for var, key in _REPLICA_ENV.items()
+        if (os.getenv(var) or "").strip()
+    }
+    return {**primary, **overrides} if overrides else None
+
+
+def _float_env(var_name: str, default: float) -> float:
+    try:
+        return float((os.getenv(var_name) or "").strip() or default)
+    except ValueError:
+        return default
+
+
+def router_from_env(
+        primary: Dict[str, Any], replica: Dict[str, Any],
+        max_connections: int) -> "ConnectionRouter":
+    """Pools for both servers, tuned by the ``DB_REPLICA_*`` / ``DB_READ_*`` env vars."""
+    try:
+        replica_pool = make_pool(1, max_connections, **replica)
+    except psycopg2.OperationalError as e:
+        # Serve everything from the primary rather than failing to start.
+        print(f"Read replica unavailable, using the primary only: {e}")
+        replica_pool = None
+    return ConnectionRouter(
+        make_pool(1, max_connections, **primary),
+        replica_pool,
+        max_lag_seconds=_float_env("DB_REPLICA_MAX_LAG_SECONDS", 5.0),
+        lag_check_seconds=_float_env("DB_REPLICA_LAG_CHECK_SECONDS", 5.0),
+        sticky_seconds=_float_env("DB_READ_YOUR_WRITES_SECONDS", 30.0),
+    )
+
+
+class ConnectionRouter:  # pylint: disable=too-many-instance-attributes
+    """Hands out pooled connections to the primary or the replica."""
+
+    def __init__(  # pylint: disable=too-many-arguments
+            self,
+            primary,
+            replica=None,
+            *,
+            max_lag_seconds: float = 5.0,
+            lag_check_seconds: float = 5.0,
+            sticky_seconds: float = 30.0,
+            clock: Callable[[], float] = time.monotonic):
+        self.primary = primary
+        self.replica = replica
+        self.max_lag_seconds = max_lag_seconds
+        self.lag_check_seconds = lag_check_seconds
+        self.sticky_seconds = sticky_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._sticky_until: Dict[str, float] = {}
+        self._lag_checked_at: Optional[float] = None
+        self._replica_ok = replica is not None
+
+    def mark_written(self, user: Optional[str]) -> None:
+        if user:
+            with self._lock:
+                self._sticky_until[user] = self._clock() + self.sticky_seconds
+
+    def is_sticky(self, user: Optional[str]) -> bool:
+        if not user:
+            return False
+        with self._lock:
+            until = self._sticky_until.get(user)
+            if until is None:
+                return False
+            if until <= self._clock():
+                del self._sticky_until[user]
+                return False
+            return True
+
+    def replica_lag(self) -> Optional[float]:
+        """Replica lag in seconds, or None when the replica cannot be queried."""
+        try:
+            conn = self.replica.getconn()
+        except psycopg2.Error:
+            return None
+        try:
+            with conn.cursor() as cur:
+                cur.execute(REPLICA_LAG_SQL)
+                lag = cur.fetchone()[0]
+            conn.rollback()
+            return float(lag or 0)
+        except psycopg2.Error:
+            return None
+        finally:
+            self.replica.putconn(conn, close=bool(conn.closed))
+
+    def replica_usable(self) -> bool:
+        if self.replica is None:
+            return False
+        now = self._clock()
+        with self._lock:
+            due = (self._lag_checked_at is None
+                   or now - self._lag_checked_at >= self.lag_check_seconds)
+            if due:
+                # Claimed under the lock so one thread measures for everyone.
+                self._lag_checked_at = now
+        if due:
+            lag = self.replica_lag()
+            self._replica_ok = lag is not None and lag <= self.max_lag_seconds
+        return self._replica_ok
+
+    def _read_pool(self, user: Optional[str], fresh: bool):
+        if fresh or self.is_sticky(user) or not self.replica_usable():
+            return self.primary
+        return self.replica
+
+    @contextmanager
+    def connection(  # pylint: disable=too-many-branches,too-many-statements
+            self, write: bool = False, user: Optional[str] = None,
+            fresh: bool = False) -> Iterator[Any]:
+        """
+        Borrow a connection. Whatever the caller left uncommitted (a read's
+        transaction, an ownership check that returned early) is rolled back
+        before the connection goes back to its pool; a write marks ``user``
+        sticky to the primary once it succeeds.
+        """
+        pool = self.primary if write else self._read_pool(user, fresh)
+        try:
+            conn = pool.getconn()
+        except psycopg2.Error:
+            if pool is self.primary:
+                raise
+            self._replica_ok = False
+            pool = self.primary
+            conn = pool.getconn()
+        try:
+            yield conn
+            conn.rollback()
+            if write:
+                self.mark_written(user)
+        except Exception:
+            if not conn.closed:
+                conn.rollback()
+            raise
+        finally:
+            pool.putconn(conn, close=bool(conn.closed))
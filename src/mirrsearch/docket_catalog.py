@@ -0,0 +1,390 @@
+"""
+In-process, columnar copy of the docket metadata search filters and
+hydrates (``DOCKET_CATALOG=1``).
+
+Each worker loads every docket's id, title, agency, type, modify_date, CFR
+references and whether it has documents into one column per field: agency
+and type are dictionary-encoded into ``uint32`` NumPy codes, modify_date is
+a ``float64`` column of UTC epoch seconds, and ``index`` maps docket_id →
+row. The CFR parts of every docket are one pair of columns (row number,
+dictionary-encoded ``(title, part)``). Filters are boolean masks over the
+row numbers of a selection (``np.isin`` and comparisons), with the same
+semantics as ``search_filters.compile_search_filters``.
+
+- **Incremental refresh:** at most every ``DOCKET_CATALOG_REFRESH_SECONDS``
+  (default 60), dockets with ``modify_date`` at or after the newest one
+  loaded are re-read (``dockets_modify_date_idx``) and upserted.
+- **Misses:** ids a search asks about that the catalog does not have, or
+  has without documents, are ``unverified_ids``; ``DBLayer`` filters and
+  hydrates those in SQL, and the next refresh re-reads them by id (once per
+  full load), so a docket ingested with an old modify_date is not missed
+  until the reload.
+- **Full reload:** every ``DOCKET_CATALOG_RELOAD_SECONDS`` (default 3600), to
+  pick up what does not move a docket's modify_date (its first documents,
+  ``docket_cfr`` changes, deletions).
+
+``DBLayer`` runs both on a background thread; requests keep reading the
+current columns meanwhile. Each load logs the catalog's size and the
+worker's pid.
+"""
+import logging
+import math
+import os
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from mirrsearch.combined_search import CFR_REFS_SQL
+from mirrsearch.docket_result import DocketResult
+from mirrsearch.search_filters import (
+    agency_filter_ids,
+    cfr_exact_title_part_pairs,
+    cfr_part_filter_patterns,
+    parse_filter_date,
+)
+
+log = logging.getLogger(__name__)
+
+LOAD_SQL = f"""
+    SELECT d.docket_id, d.docket_title, d.agency_id, d.docket_type, d.modify_date,
+           EXISTS (SELECT 1 FROM documentsWithFRdoc doc WHERE doc.docket_id = d.docket_id),
+           {CFR_REFS_SQL}
+    FROM dockets d
+"""
+REFRESH_SQL = LOAD_SQL + "    WHERE d.modify_date >= %s\n"
+MISSES_SQL = LOAD_SQL + "    WHERE d.docket_id = ANY(%s)\n"
+
+
+def _epoch(value: Any) -> float:
+    """timestamp / date / ISO string → UTC epoch seconds (naive = UTC); NaN for None."""
+    if value is None:
+        return math.nan
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if not isinstance(value, datetime):
+        value = datetime(value.year, value.month, value.day)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+def _date_epoch(day: Optional[date]) -> Optional[float]:
+    return None if day is None else _epoch(day)
+
+
+@dataclass
+class _Dictionary:
+    """Dictionary encoding for a low-cardinality column."""
+    values: List[Any] = field(default_factory=list)
+    codes: Dict[Any, int] = field(default_factory=dict)
+
+    def encode(self, value: Any) -> int:
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+
+def _grown(column: np.ndarray, size: int) -> np.ndarray:
+    """``column`` zero-padded to ``size`` rows."""
+    if len(column) >= size:
+        return column
+    return np.concatenate([column, np.zeros(size - len(column), dtype=column.dtype)])
+
+
+# NumPy columns written by ``_Columns.upsert``, in ``_Columns._stage`` order.
+_CODE_COLUMNS = ("agency_codes", "type_codes", "modified", "has_documents")
+
+# Mask over a selection of row numbers.
+_Step = Callable[[np.ndarray], np.ndarray]
+
+
+@dataclass
+class _Columns:  # pylint: disable=too-many-instance-attributes
+    ids: List[str] = field(default_factory=list)
+    titles: List[Any] = field(default_factory=list)
+    agency_codes: np.ndarray = field(default_factory=lambda: np.zeros(0, dtype=np.uint32))
+    type_codes: np.ndarray = field(default_factory=lambda: np.zeros(0, dtype=np.uint32))
+    modified: np.ndarray = field(default_factory=lambda: np.zeros(0, dtype=np.float64))
+    modify_dates: List[Any] = field(default_factory=list)
+    has_documents: np.ndarray = field(default_factory=lambda: np.zeros(0, dtype=bool))
+    cfr_refs: List[List[Dict[str, Any]]] = field(default_factory=list)
+    # One entry per (docket, CFR part): the docket's row and the pair's code.
+    cfr_rows: np.ndarray = field(default_factory=lambda: np.zeros(0, dtype=np.int64))
+    cfr_codes: np.ndarray = field(default_factory=lambda: np.zeros(0, dtype=np.uint32))
+    index: Dict[str, int] = field(default_factory=dict)
+    agencies: _Dictionary = field(default_factory=_Dictionary)
+    types: _Dictionary = field(default_factory=_Dictionary)
+    cfr_pairs: _Dictionary = field(default_factory=_Dictionary)
+
+    def upsert(self, rows: Sequence[tuple]) -> None:  # pylint: disable=too-many-locals
+        """Add or replace ``rows`` (``LOAD_SQL`` columns), one column write per field."""
+        staged = [self._stage(row) for row in rows]
+        if not staged:
+            return
+        positions, codes, pairs = zip(*staged)
+        at = np.array(positions, dtype=np.int64)
+        for name, values in zip(_CODE_COLUMNS, zip(*codes)):
+            column = _grown(getattr(self, name), len(self.ids))
+            column[at] = values
+            setattr(self, name, column)
+        pair_codes = [code for row_pairs in pairs for code in row_pairs]
+        keep = ~np.isin(self.cfr_rows, at)
+        self.cfr_rows = np.concatenate([
+            self.cfr_rows[keep],
+            np.repeat(at, [len(row_pairs) for row_pairs in pairs]),
+        ])
+        self.cfr_codes = np.concatenate(
+            [self.cfr_codes[keep], np.array(pair_codes, dtype=np.uint32)]
+        )
+
+    def _stage(self, row) -> Tuple[int, tuple, List[int]]:  # pylint: disable=too-many-locals
+        """Store ``row``'s list columns; return its row, ``_CODE_COLUMNS`` values, CFR codes."""
+        docket_id, title, agency_id, docket_type, modify_date, has_documents, refs = row
+        refs = refs if isinstance(refs, list) else []
+        i = self.index.setdefault(docket_id, len(self.ids))
+        if i == len(self.ids):
+            self.ids.append(docket_id)
+            for column in (self.titles, self.modify_dates, self.cfr_refs):
+                column.append(None)
+        self.titles[i], self.modify_dates[i], self.cfr_refs[i] = title, modify_date, refs
+        codes = (
+            self.agencies.encode(agency_id), self.types.encode(docket_type),
+            _epoch(modify_date), bool(has_documents),
+        )
+        pairs = [
+            self.cfr_pairs.encode((str(ref.get("title")), str(part)))
+            for ref in refs for part in (ref.get("cfrParts") or {})
+        ]
+        return i, codes, pairs
+
+    def row(self, i: int) -> Dict[str, Any]:
+        return {
+            "docket_id": self.ids[i],
+            "docket_title": self.titles[i],
+            "agency_id": self.agencies.values[self.agency_codes[i]],
+            "docket_type": self.types.values[self.type_codes[i]],
+            "modify_date": self.modify_dates[i],
+            "cfr_refs": self.cfr_refs[i],
+        }
+
+    def result(self, i: int) -> DocketResult:
+        return DocketResult(
+            self.ids[i], self.titles[i], self.agencies.values[self.agency_codes[i]],
+            self.types.values[self.type_codes[i]], self.modify_dates[i], self.cfr_refs[i],
+        )
+
+    def nbytes(self) -> int:
+        """Approximate memory held by the columns and the values they own."""
+        total = sum(c.nbytes for c in (
+            self.agency_codes, self.type_codes, self.modified, self.has_documents,
+            self.cfr_rows, self.cfr_codes,
+        ))
+        total += sum(sys.getsizeof(c) for c in (
+            self.ids, self.titles, self.modify_dates, self.cfr_refs, self.index,
+        ))
+        total += sum(sys.getsizeof(v) for v in self.ids)
+        total += sum(sys.getsizeof(v) for v in self.titles if v is not None)
+        total += sum(sys.getsizeof(v) for v in self.modify_dates)
+        total += sum(sys.getsizeof(v) + sum(map(sys.getsizeof, v)) for v in self.cfr_pairs.values)
+        return total
+
+
+def _cfr_codes(cols: _Columns, cfr_part_param) -> Optional[List[int]]:
+    """Codes of the ``(title, part)`` pairs the CFR filter accepts, or None without one."""
+    exact_pairs = cfr_exact_title_part_pairs(cfr_part_param)
+    if exact_pairs:
+        return [cols.cfr_pairs.codes[p] for p in exact_pairs if p in cols.cfr_pairs.codes]
+    parts = set(cfr_part_filter_patterns(cfr_part_param))
+    if parts:
+        return [
+            code for code, (_title, part) in enumerate(cols.cfr_pairs.values)
+            if part.lower() in parts
+        ]
+    return None
+
+
+class DocketCatalog:  # pylint: disable=too-many-instance-attributes
+    """Per-worker columnar docket catalog; see the module docstring."""
+
+    def __init__(self, refresh_seconds: float = 60, reload_seconds: float = 3600,
+                 clock: Callable[[], float] = time.monotonic):
+        self.refresh_seconds = refresh_seconds
+        self.reload_seconds = reload_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._cols = _Columns()
+        self._agency_list: List[str] = []
+        self._watermark: Any = None
+        self._refreshed_at: Optional[float] = None
+        self._loaded_at: Optional[float] = None
+        self._refreshing = False
+        # Missed ids waiting for a refresh, and those re-read since the last load.
+        self._misses: set = set()
+        self._checked: set = set()
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded_at is not None
+
+    def __len__(self) -> int:
+        return len(self._cols.ids)
+
+    def claim_refresh(self) -> bool:
+        """
+        True (for one caller) when a refresh or reload is due and none is
+        running; the caller must then call ``refresh``.
+        """
+        now = self._clock()
+        with self._lock:
+            if self._refreshing or (
+                    self._refreshed_at is not None
+                    and now - self._refreshed_at < self.refresh_seconds):
+                return False
+            self._refreshed_at = now
+            self._refreshing = True
+            return True
+
+    def refresh(self, conn) -> None:
+        """Incremental refresh, or a full load when none is loaded or one is due."""
+        try:
+            now = self._clock()
+            if self._loaded_at is None or now - self._loaded_at >= self.reload_seconds:
+                self.load(conn)
+                return
+            with self._lock:
+                misses, self._misses = sorted(self._misses), set()
+            with conn.cursor() as cur:
+                cur.execute(REFRESH_SQL, (self._watermark,))
+                rows = cur.fetchall()
+                if misses:
+                    cur.execute(MISSES_SQL, (misses,))
+                    rows += cur.fetchall()
+            with self._lock:
+                self._checked.update(misses)
+                self._cols.upsert(rows)
+                self._after_change(rows)
+        finally:
+            self._refreshing = False
+
+    def load(self, conn) -> None:
+        with conn.cursor() as cur:
+            cur.execute(LOAD_SQL)
+            rows = cur.fetchall()
+        cols = _Columns()
+        cols.upsert(rows)
+        with self._lock:
+            self._cols = cols
+            self._watermark = None
+            self._misses, self._checked = set(), set()
+            self._after_change(rows)
+            self._loaded_at = self._refreshed_at = self._clock()
+        log.info(
+            "Docket catalog loaded %d dockets, %.1f MiB in worker %d",
+            len(cols.ids), cols.nbytes() / 2 ** 20, os.getpid(),
+        )
+
+    def _after_change(self, rows) -> None:
+        cols = self._cols
+        in_use = np.unique(cols.agency_codes).tolist()
+        self._agency_list = sorted(cols.agencies.values[c] for c in in_use)
+        newest = [r[4] for r in rows if r[4] is not None]
+        if newest:
+            candidates = newest + ([self._watermark] if self._watermark is not None else [])
+            self._watermark = max(candidates, key=_epoch)
+
+    def memory_bytes(self) -> int:
+        with self._lock:
+            return self._cols.nbytes()
+
+    def agencies(self) -> List[str]:
+        """Distinct agency ids of every docket, sorted (``get_agencies``)."""
+        return list(self._agency_list)
+
+    def _selection(self, docket_ids: Iterable[str]) -> np.ndarray:
+        """Row numbers of the known ``docket_ids`` that have documents, first occurrence only."""
+        cols = self._cols
+        rows = (cols.index.get(str(d)) for d in dict.fromkeys(docket_ids))
+        selected = np.fromiter((i for i in rows if i is not None), dtype=np.int64)
+        return selected[cols.has_documents[selected]]
+
+    def unverified_ids(self, docket_ids: Iterable[str]) -> List[str]:
+        """
+        The ``docket_ids`` (deduplicated, order kept) the catalog does not
+        have, or has without documents; the next refresh re-reads them.
+        """
+        with self._lock:
+            cols = self._cols
+            unverified = [
+                d for d in dict.fromkeys(str(d) for d in docket_ids)
+                if d not in cols.index or not cols.has_documents[cols.index[d]]
+            ]
+            self._misses.update(d for d in unverified if d not in self._checked)
+            return unverified
+
+    def get_rows(self, docket_ids: Iterable[str]) -> List[Dict[str, Any]]:
+        """Hydrated dockets, newest first, like ``DBLayer.get_dockets_by_ids``."""
+        with self._lock:
+            cols = self._cols
+            selected = self._selection(docket_ids).tolist()
+            selected.sort(key=lambda i: (-cols.modified[i], cols.ids[i]))
+            return [cols.row(i) for i in selected]
+
+    def lookup(self, docket_ids: Iterable[str]) -> Dict[str, DocketResult]:
+        """docket_id → new search result, for the ids the catalog has (with documents)."""
+        with self._lock:
+            cols = self._cols
+            return {cols.ids[i]: cols.result(i) for i in self._selection(docket_ids).tolist()}
+
+    def filter_ids(  # pylint: disable=too-many-arguments,too-many-positional-arguments,too-many-locals
+            self, docket_ids: Iterable[str], docket_type_param: Optional[str] = None,
+            agency: Optional[List[str]] = None, cfr_part_param=None,
+            start_date: Optional[str] = None, end_date: Optional[str] = None) -> List[str]:
+        """
+        The ``docket_ids`` (deduplicated, order kept) that have documents and
+        pass the search filters.
+        """
+        with self._lock:
+            cols = self._cols
+            selected = self._selection(docket_ids)
+            for step in self._filter_steps(
+                    cols, docket_type_param, agency, cfr_part_param, start_date, end_date):
+                selected = selected[step(selected)]
+            return [cols.ids[i] for i in selected.tolist()]
+
+    def _filter_steps(  # pylint: disable=too-many-arguments,too-many-positional-arguments,too-many-locals
+            self, cols: _Columns, docket_type_param, agency, cfr_part_param,
+            start_date, end_date) -> List[_Step]:
+        """One mask per active filter, cheapest columns first."""
+        steps: List[_Step] = []
+        if docket_type_param:
+            code = cols.types.codes.get(docket_type_param)
+            wanted_types = [] if code is None else [code]
+            steps.append(lambda rows: np.isin(cols.type_codes[rows], wanted_types))
+        if agency and any((a or "").strip() for a in agency):
+            # Same resolution as the SQL filter; an id no docket here has matches nothing.
+            wanted = [
+                cols.agencies.codes[a]
+                for a in agency_filter_ids(agency, self._agency_list)
+                if a in cols.agencies.codes
+            ]
+            steps.append(lambda rows: np.isin(cols.agency_codes[rows], wanted))
+        start = _date_epoch(parse_filter_date(start_date))
+        end = parse_filter_date(end_date)
+        end = _date_epoch(end + timedelta(days=1)) if end else None
+        if start is not None or end is not None:
+            low = -math.inf if start is None else start
+            high = math.inf if end is None else end
+            # NaN (no modify_date) fails both comparisons, like NULL in SQL.
+            steps.append(lambda rows: (cols.modified[rows] >= low) & (cols.modified[rows] < high))
+        codes = _cfr_codes(cols, cfr_part_param)
+        if codes is not None:
+            matching = cols.cfr_rows[np.isin(cols.cfr_codes, codes)]
+            steps.append(lambda rows: np.isin(rows, matching))
+        return steps
@@ -0,0 +1,104 @@
+"""
+One docket in a ``/search/`` result, from ``DBLayer`` through ranking to
+the response.
+
+``DocketResult`` is a slotted dataclass: the docket's metadata, where the
+hit came from, its match counts and totals, and its score are plain
+attributes, set in place as the search pipeline fills them in. A row is
+turned into the API's dict shape once, by ``to_response``, and only for the
+page being returned.
+"""
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Any, Dict, List, Mapping, Optional
+
+_METADATA = (
+    "docket_id", "docket_title", "agency_id", "docket_type", "modify_date", "cfr_refs",
+)
+_COUNTS = (
+    "document_match_count", "comment_match_count",
+    "document_total_count", "comment_total_count",
+)
+_FIELDS = frozenset(_METADATA + _COUNTS + ("match_source", "correlation_score"))
+
+# Count attribute → response key.
+RESPONSE_KEYS = {
+    "document_match_count": "documentNumerator",
+    "comment_match_count": "commentNumerator",
+    "document_total_count": "documentDenominator",
+    "comment_total_count": "commentDenominator",
+}
+
+
+@dataclass(slots=True)
+class DocketResult:  # pylint: disable=too-many-instance-attributes
+    docket_id: Any = None
+    docket_title: Any = None
+    agency_id: Any = None
+    docket_type: Any = None
+    modify_date: Any = None
+    cfr_refs: Optional[List[Dict[str, Any]]] = None
+    match_source: Optional[str] = None
+    document_match_count: int = 0
+    comment_match_count: int = 0
+    document_total_count: int = 0
+    comment_total_count: int = 0
+    correlation_score: float = 0.0
+    # Columns this type does not know (e.g. from test doubles), passed through.
+    extra: Optional[Dict[str, Any]] = None
+
+    @classmethod
+    def from_mapping(cls, row: Mapping[str, Any], **values) -> "DocketResult":
+        """A result from a docket dict, with ``values`` set on top."""
+        extra = {k: v for k, v in row.items() if k not in _FIELDS}
+        result = cls(
+            **{k: row[k] for k in row.keys() & _FIELDS}, extra=extra or None,
+        )
+        for name, value in values.items():
+            setattr(result, name, value)
+        return result
+
+    @property
+    def key(self) -> str:
+        """Stable id for de-duping SQL vs OpenSearch (some test doubles only have ``id``)."""
+        if self.docket_id is None and self.extra and "id" in self.extra:
+            return str(self.extra["id"])
+        return self.docket_id if isinstance(self.docket_id, str) else str(self.docket_id)
+
+    def to_response(self) -> Dict[str, Any]:
+        """The row as the search API returns it."""
+        modify_date = self.modify_date
+        if isinstance(modify_date, (datetime, date)):
+            modify_date = modify_date.isoformat()
+        response = {
+            "docket_id": self.docket_id,
+            "docket_title": self.docket_title,
+            "agency_id": self.agency_id,
+            "docket_type": self.docket_type,
+            "modify_date": modify_date,
+            "match_source": self.match_source,
+            "correlation_score": self.correlation_score,
+        }
+        if self.extra:
+            response.update(self.extra)
+        for name, key in RESPONSE_KEYS.items():
+            response[key] = getattr(self, name)
+        if self.cfr_refs is not None:
+            response["cfrPart"] = [
+                {"title": ref.get("title"), "part": part, "link": link}
+                for ref in self.cfr_refs
+                for part, link in ref.get("cfrParts", {}).items()
+            ]
+        return response
+
+
+def as_results(rows, match_source: str) -> List[DocketResult]:
+    """``rows`` (``DocketResult`` or docket dicts) as results from ``match_source``."""
+    results = []
+    for row in rows:
+        if isinstance(row, DocketResult):
+            row.match_source = match_source
+        else:
+            row = DocketResult.from_mapping(row, match_source=match_source)
+        results.append(row)
+    return results
@@ -1,103 +1,10 @@
 """Internal logic module for search operations with pagination"""
-from datetime import date, datetime, timezone
+from datetime import date, datetime
 from typing import List
 
-from mirrsearch.db import cfr_part_filter_patterns, _cfr_exact_title_part_pairs, get_db
-
-
-def _correlation_score(row, support_k=10):
-    """Compute ratio score with support bias toward larger denominator."""
-    match_total = int(row.get("document_match_count", 0)) + int(row.get("comment_match_count", 0))
-    total = int(row.get("document_total_count", 0)) + int(row.get("comment_total_count", 0))
-    if total <= 0:
-        return 0.0
-    ratio = match_total / total
-    support = total / (total + support_k)
-    return ratio * support
-
-
-def _row_docket_key(row):
-    """Stable id for de-duping SQL vs OpenSearch (Postgres uses docket_id; some mocks use id)."""
-    if "docket_id" in row:
-        return str(row["docket_id"])
-    return str(row["id"])
-
-
-def _cfr_part_patterns_match_row(row, patterns):
-    """True if any pattern matches any cfrPart value (Postgres: cp.cfrPart ILIKE %pattern%)."""
-    if not patterns:
-        return True
-    cfr_refs = row.get("cfr_refs") or []
-    for ref in cfr_refs:
-        for part_key in (ref.get("cfrParts") or {}).keys():
-            pk_l = str(part_key).lower()
-            if any(pat in pk_l for pat in patterns):
-                return True
-    return False
-
-
-def _docket_type_matches_filter(row, docket_type_param):
-    """Postgres: d.docket_type = %s when filter set."""
-    return not docket_type_param or row.get("docket_type") == docket_type_param
-
-
-def _agency_matches_filter(row, agency):
-    """Postgres: OR of d.agency_id ILIKE %s when agency list set."""
-    if not agency:
-        return True
-    aid = (row.get("agency_id") or "").lower()
-    return any((a or "").strip().lower() in aid for a in agency)
-
-def _modify_date_matches_filter(row, start_date=None, end_date=None): #pylint: disable=too-many-branches
-    """Return True if row's modify_date is within the optional start_date and end_date range."""
-    modify_date = row.get("modify_date")
-    if modify_date is None:
-        return True
-
-    # convert string -> datetime
-    if isinstance(modify_date, str):
-        modify_date = datetime.fromisoformat(modify_date)
-
-    # normalize to naive UTC for comparison
-    if modify_date.tzinfo is not None:
-        modify_date = modify_date.astimezone(timezone.utc).replace(tzinfo=None)
-
-    if start_date:
-        start = datetime.fromisoformat(start_date)
-        if modify_date < start:
-            return False
-    if end_date:
-        end = datetime.fromisoformat(end_date)
-        if modify_date > end:
-            return False
-    return True
-
-def _ref_has_exact_part(ref, title, part):
-    """True if ref matches the given title and part exactly."""
-    if str(ref.get("title") or "").strip() != title:
-        return False
-    return any(str(pk).strip() == part for pk in (ref.get("cfrParts") or {}).keys())
-
-
-def _cfr_exact_pairs_match_row(row, exact_pairs):
-    """True if any (title, part) pair matches any cfr_ref in the row."""
-    cfr_refs = row.get("cfr_refs") or []
-    return any(
-        _ref_has_exact_part(ref, title, part)
-        for title, part in exact_pairs
-        for ref in cfr_refs
-    )
-
-
-def _cfr_matches_filter(row, cfr_part_param):
-    """Postgres: OR of cp.cfrPart ILIKE when CFR filter set."""
-    if not cfr_part_param:
-        return True
-    exact_pairs = _cfr_exact_title_part_pairs(cfr_part_param)
-    if exact_pairs:
-        return _cfr_exact_pairs_match_row(row, exact_pairs)
-    patterns = cfr_part_filter_patterns(cfr_part_param)
-    return not patterns or _cfr_part_patterns_match_row(row, patterns)
+from mirrsearch import ranking
+from mirrsearch.db import get_db
+from mirrsearch.docket_result import as_results
 
 
 def _json_safe_scalar(value):
@@ -113,19 +20,6 @@ def _sanitize_search_row_for_json(row):
         row["modify_date"] = _json_safe_scalar(row["modify_date"])
 
 
-def _row_matches_advanced_filters(row, docket_type_param, agency, cfr_part_param, #pylint: disable=too-many-arguments, too-many-positional-arguments
-                                  start_date=None, end_date=None):
-    """
-    Same constraints as _search_dockets_postgres for full-text rows loaded via get_dockets_by_ids.
-    Drops OpenSearch-only hits that fail advanced filters.
-    """
-    return (
-        _docket_type_matches_filter(row, docket_type_param)
-        and _agency_matches_filter(row, agency)
-        and _cfr_matches_filter(row, cfr_part_param)
-        and _modify_date_matches_filter(row, start_date, end_date)
-    )
-
 def _transform_cfr_refs(result):
     """Convert raw cfr_refs into the cfrPart list format for API responses."""
     cfr_refs = result.pop("cfr_refs", None)
@@ -163,148 +57,56 @@ class InternalLogic:  # pylint: disable=too-few-public-methods
         Returns:
             dict: Paginated response with metadata
         """
-        sql_results = self.db_layer.search(
-            query,
-            docket_type_param,
-            agency,
-            cfr_part_param,
-            start_date=start_date,
-            end_date=end_date
-        )
-        title_rows = [{**r, "match_source": "title"} for r in sql_results]
-        title_ids = {_row_docket_key(r) for r in sql_results}
-
         os_hits = self.db_layer.text_match_terms([(query or "").strip()])
         os_counts_by_id = {str(hit["docket_id"]): hit for hit in os_hits}
 
-        # Get new IDs from OpenSearch not in SQL results
-        new_ids_ordered = self._get_new_docket_ids(os_hits, title_ids)
-
-        # Enhance title rows with OpenSearch counts
-        self._enhance_rows_with_os_counts(title_rows, os_counts_by_id)
-
-        # Get full text rows for new IDs
-        full_text_rows = self._get_full_text_rows(
-            new_ids_ordered, os_counts_by_id, docket_type_param, agency, cfr_part_param,
-            start_date, end_date
+        # One statement: title hits, filtered full-text hits and document totals.
+        title_rows, full_text_rows = self.db_layer.search_with_hits(
+            query, [str(hit["docket_id"]) for hit in os_hits],
+            docket_type_param, agency, cfr_part_param, start_date, end_date
         )
+        all_results = as_results(title_rows, "title") + as_results(full_text_rows, "full_text")
+        self._enhance_rows_with_os_counts(all_results, os_counts_by_id)
 
-        all_results = title_rows + full_text_rows
+        # Add totals
+        self._add_comment_totals(all_results)
 
-        # Add totals and scores
-        self._add_totals_and_scores(all_results)
-
-        # Sort results
-        self._sort_results(all_results, sort_by=sort_by)
+        # Score and sort (only as far as the requested page)
+        all_results = self._rank_results(all_results, sort_by, limit=page * page_size)
 
         # Paginate
         return self._paginate_results(all_results, page, page_size)
 
-    def _get_new_docket_ids(self, os_hits, title_ids):
-        """Extract docket IDs from OpenSearch hits not already in title results."""
-        new_ids_ordered = []
-        seen_new = set()
-        for hit in os_hits:
-            did = str(hit["docket_id"])
-            if did in title_ids or did in seen_new:
-                continue
-            seen_new.add(did)
-            new_ids_ordered.append(did)
-        return new_ids_ordered
-
     def _enhance_rows_with_os_counts(self, rows, os_counts_by_id):
         """Add OpenSearch match counts to rows."""
         for row in rows:
-            did = _row_docket_key(row)
-            hit = os_counts_by_id.get(did)
-            row["document_match_count"] = hit["document_match_count"] if hit else 0
-            row["comment_match_count"] = hit["comment_match_count"] if hit else 0
-
-    def _get_full_text_rows(  # pylint: disable=too-many-arguments,too-many-positional-arguments,too-many-locals
-            self, docket_ids, os_counts_by_id,
-                            docket_type_param, agency, cfr_part_param,
-                            start_date=None, end_date=None):
-        """Fetch and filter full text rows for docket IDs not in SQL results."""
-        if not docket_ids:
-            return []
-
-        fetched = self.db_layer.get_dockets_by_ids(docket_ids)
-        by_id = {str(r["docket_id"]): r for r in fetched}
-
-        full_text_rows = []
-        for did in docket_ids:
-            row = by_id.get(did)
-            if row is None:
-                continue
-            if not _row_matches_advanced_filters(row, docket_type_param, agency, cfr_part_param,
-                                                 start_date, end_date):
-                continue
-            h = os_counts_by_id.get(did, {})
-            full_text_rows.append({
-                **row,
-                "match_source": "full_text",
-                "document_match_count": h.get("document_match_count", 0),
-                "comment_match_count": h.get("comment_match_count", 0),
-            })
-        return full_text_rows
-
-    def _add_totals_and_scores(self, rows):
-        """Add document/comment totals and correlation scores to rows."""
-        docket_ids = [_row_docket_key(r) for r in rows]
-        totals_map = self.db_layer.get_docket_document_comment_totals(docket_ids)
-
-        for row in rows:
-            did = _row_docket_key(row)
-            totals = totals_map.get(did, {})
-            row["document_total_count"] = totals.get("document_total_count", 0)
-            row["comment_total_count"] = totals.get("comment_total_count", 0)
-            row["correlation_score"] = _correlation_score(row)
-
-    def _sort_results(self, rows, sort_by=None):
-        """Sort results by the requested field, defaulting to relevance."""
-        if sort_by == "modify_date":
-            rows.sort(key=lambda r: r.get("modify_date") or "", reverse=True)
-        elif sort_by == "comment_count":
-            rows.sort(key=lambda r: int(r.get("comment_total_count", 0)), reverse=True)
-        elif sort_by == "document_count":
-            rows.sort(key=lambda r: int(r.get("document_total_count", 0)), reverse=True)
-        else:
-            rows.sort(
-                key=lambda r: (
-                    r.get("correlation_score", 0.0),
-                    int(r.get("document_match_count", 0)) + int(r.get("comment_match_count", 0)),
-                    int(r.get("document_total_count", 0)) + int(r.get("comment_total_count", 0)),
-                    r.get("docket_id", ""),
-                ),
-                reverse=True
-            )
+            hit = os_counts_by_id.get(row.key)
+            row.document_match_count = hit["document_match_count"] if hit else 0
+            row.comment_match_count = hit["comment_match_count"] if hit else 0
+
+    def _add_comment_totals(self, rows):
+        """Add comment totals to rows (document totals come with ``search_with_hits``)."""
+        docket_ids = [r.key for r in rows]
+        comment_totals = self.db_layer.get_comment_totals(docket_ids)
+        for row, did in zip(rows, docket_ids):
+            row.comment_total_count = comment_totals.get(did, 0)
+
+    def _rank_results(self, rows, sort_by=None, limit=None):
+        """
+        Rows scored and in result order; only the first ``limit`` are
+        guaranteed to be ordered (see ``ranking.rank``).
+        """
+        return ranking.rank(rows, sort_by=sort_by, limit=limit)
 
     def _paginate_results(self, all_results, page, page_size): # pylint: disable=too-many-locals
-        """Apply pagination and transform results for API response."""
+        """Apply pagination and serialise the page's rows for the API response."""
         total_results = len(all_results)
         total_pages = (total_results + page_size - 1) // page_size
 
         start_idx = (page - 1) * page_size
         end_idx = start_idx + page_size
 
-        page_results = all_results[start_idx:end_idx]
-
-        # Sanitize and transform results
-        for result in page_results:
-            _sanitize_search_row_for_json(result)
-            _transform_cfr_refs(result)
-
-        # Rename keys for API
-        key_map = {
-            "document_match_count": "documentNumerator",
-            "comment_match_count": "commentNumerator",
-            "document_total_count": "documentDenominator",
-            "comment_total_count": "commentDenominator",
-        }
-        for result in page_results:
-            for old, new in key_map.items():
-                if old in result:
-                    result[new] = result.pop(old)
+        page_results = [r.to_response() for r in all_results[start_idx:end_idx]]
 
         return {
             "results": page_results,
@@ -0,0 +1,103 @@
+"""
+Vectorised scoring and ordering of merged search candidates.
+
+``rank`` packs each candidate's match counts and totals into int64 arrays
+once, computes every correlation score in one pass, and orders the rows
+with ``lexsort`` on keys that sort larger-first. When only the first
+``limit`` rows are needed (the page being served), ``argpartition`` finds the
+primary-key threshold and only the candidates at or above it are sorted.
+
+The correlation score is ``match_total / total × total / (total +
+SUPPORT_K)`` (0 when the total is 0). Relevance orders by score, then match
+total, then total, then docket id; the other sort modes by their one field.
+All keys sort larger-first, and rows with equal keys keep their input order.
+"""
+from operator import attrgetter
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from mirrsearch.docket_result import DocketResult
+
+SUPPORT_K = 10
+
+def _ints(rows: List[DocketResult], name: str):
+    return np.fromiter(map(attrgetter(name), rows), dtype=np.int64, count=len(rows))
+
+
+def _dense_rank(values: List[Any]):
+    """Rank of each value among the distinct values, so that larger sorts larger."""
+    rank_of = {value: i for i, value in enumerate(sorted(set(values)))}
+    return np.fromiter((rank_of[v] for v in values), dtype=np.int64, count=len(values))
+
+
+def _pack(rows: List[DocketResult]) -> Dict[str, Any]:
+    """The per-row totals ``rank`` scores and sorts on, as int64 arrays."""
+    documents = _ints(rows, "document_total_count")
+    comments = _ints(rows, "comment_total_count")
+    return {
+        "document_total_count": documents,
+        "comment_total_count": comments,
+        "match_total": _ints(rows, "document_match_count") + _ints(rows, "comment_match_count"),
+        "total": documents + comments,
+    }
+
+
+def correlation_scores(match_totals, totals, support_k: int = SUPPORT_K):
+    """Correlation scores over arrays: ratio × support, 0 where the total is 0."""
+    matches = match_totals.astype(np.float64)
+    total = totals.astype(np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        scores = (matches / total) * (total / (total + support_k))
+    return np.where(totals > 0, scores, 0.0)
+
+
+def _sort_keys(rows: List[DocketResult], sort_by: Optional[str], scores, packed) -> list:
+    """Sort keys for ``sort_by``, most significant first; larger values rank first."""
+    if sort_by == "modify_date":
+        return [_dense_rank([r.modify_date or "" for r in rows])]
+    if sort_by == "comment_count":
+        return [packed["comment_total_count"]]
+    if sort_by == "document_count":
+        return [packed["document_total_count"]]
+    return [
+        scores,
+        packed["match_total"],
+        packed["total"],
+        _dense_rank([r.docket_id or "" for r in rows]),
+    ]
+
+
+def _order(keys: list, limit: Optional[int]):
+    """Row indices, best first; with ``limit``, only the first ``limit`` are ordered."""
+    count = len(keys[0])
+    candidates = np.arange(count)
+    if limit is not None and 0 < limit < count:
+        primary = keys[0]
+        part = np.argpartition(-primary, limit - 1)
+        # Every row tied with the limit-th one stays a candidate.
+        candidates = np.flatnonzero(primary >= primary[part[limit - 1]])
+    # lexsort is stable and treats its last key as the most significant.
+    head = candidates[np.lexsort([-key[candidates] for key in reversed(keys)])]
+    if limit is None or len(head) == count:
+        return head
+    head = head[:limit]
+    return np.concatenate([head, np.setdiff1d(np.arange(count), head, assume_unique=True)])
+
+
+def rank(rows: List[DocketResult], sort_by: Optional[str] = None,
+         limit: Optional[int] = None) -> List[DocketResult]:
+    """
+    ``rows`` scored and in result order. With ``limit`` only the first
+    ``limit`` rows are ordered and have ``correlation_score`` set; the rest
+    follow in no particular order.
+    """
+    if not rows:
+        return rows
+    packed = _pack(rows)
+    scores = correlation_scores(packed["match_total"], packed["total"])
+    order = _order(_sort_keys(rows, sort_by, scores, packed), limit)
+    scored = len(order) if limit is None else min(limit, len(order))
+    for i in order[:scored].tolist():
+        rows[i].correlation_score = float(scores[i])
+    return [rows[i] for i in order.tolist()]
@@ -0,0 +1,144 @@
+"""
+Compile ``/search/`` filter parameters into index-friendly SQL predicates.
+
+Every predicate compares a bare column of ``dockets d`` with constants, so
+Postgres can use the indexes from ``db/migrations/``:
+
+- dates are a half-open range ``start <= d.modify_date < end + 1 day`` (the
+  same days as ``d.modify_date::date BETWEEN start AND end``, without the cast
+  on the column);
+- agencies are resolved against the known agency list (the id itself or any
+  id it is a prefix of, case-insensitively) and matched with
+  ``d.agency_id = ANY(%s)``; a value that matches no known agency is matched
+  as an id of its own, since the known list is cached and may predate a
+  newly ingested agency;
+- CFR filters become one semi-join on ``docket_cfr`` (the docket → CFR part
+  map kept by the FR/CFR loaders): exact (title, part) pairs when the UI sent
+  them, otherwise part numbers.
+"""
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from typing import Any, Iterable, List, Optional, Sequence, Tuple
+
+
+def _cfr_part_item_pattern(item: Any) -> str:
+    """Single CFR filter value → lowercase part, or '' if absent."""
+    if isinstance(item, dict):
+        return (item.get("part") or "").strip().lower()
+    if item is None:
+        return ""
+    return str(item).strip().lower()
+
+
+def cfr_part_filter_patterns(cfr_part_param) -> List[str]:
+    """
+    Build lowercase part values for CFR part filtering.
+
+    Accepts plain strings or dicts with a ``part`` key from the UI.
+    """
+    if not cfr_part_param:
+        return []
+    return [p for p in (_cfr_part_item_pattern(i) for i in cfr_part_param) if p]
+
+
+def cfr_exact_title_part_pairs(cfr_part_param) -> List[Tuple[str, str]]:
+    """Extract exact CFR (title, part) pairs from dict-style filter payloads."""
+    if not cfr_part_param:
+        return []
+    pairs: List[Tuple[str, str]] = []
+    for item in cfr_part_param:
+        if not isinstance(item, dict):
+            continue
+        title = str(item.get("title") or "").strip()
+        part = str(item.get("part") or "").strip()
+        if title and part:
+            pairs.append((title, part))
+    return pairs
+
+
+def resolve_agencies(agency: Optional[Iterable[str]], known: Iterable[str]) -> List[str]:
+    """
+    Known agency ids selected by the ``agency`` filter values: each value
+    matches an id exactly or as its prefix, case-insensitively.
+    """
+    needles = {(value or "").strip().upper() for value in agency or []} - {""}
+    return sorted({k for k in known if k and any(k.upper().startswith(n) for n in needles)})
+
+
+def agency_filter_ids(agency: Optional[Iterable[str]], known: Iterable[str]) -> List[str]:
+    """
+    ``resolve_agencies``, plus each value that matches no known id as an
+    upper-cased id of its own.
+    """
+    known = list(known)
+    resolved = resolve_agencies(agency, known)
+    needles = {(value or "").strip().upper() for value in agency or []} - {""}
+    unmatched = {n for n in needles if not resolve_agencies([n], known)}
+    return sorted(set(resolved) | unmatched)
+
+
+def parse_filter_date(value: Optional[str]) -> Optional[date]:
+    """
+    ``YYYY-MM-DD`` (a longer ISO timestamp is truncated to its date) → date;
+    raises ``ValueError`` for anything else.
+    """
+    if not value:
+        return None
+    return date.fromisoformat(str(value).strip()[:10])
+
+
+@dataclass(frozen=True)
+class CompiledFilters:
+    """SQL predicates (ANDed) over ``dockets d`` and their parameters, in order."""
+
+    predicates: List[str] = field(default_factory=list)
+    params: List[Any] = field(default_factory=list)
+
+    def where_sql(self) -> str:
+        return "".join(f" AND {p}" for p in self.predicates)
+
+
+def compile_search_filters(  # pylint: disable=too-many-arguments,too-many-positional-arguments,too-many-locals,too-many-branches,too-many-statements
+        docket_type_param: Optional[str] = None,
+        agency: Optional[Sequence[str]] = None,
+        cfr_part_param=None,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        known_agencies: Iterable[str] = ()) -> CompiledFilters:
+    predicates: List[str] = []
+    params: List[Any] = []
+
+    if docket_type_param:
+        predicates.append("d.docket_type = %s")
+        params.append(docket_type_param)
+
+    if agency and any((a or "").strip() for a in agency):
+        predicates.append("d.agency_id = ANY(%s)")
+        params.append(agency_filter_ids(agency, known_agencies))
+
+    start = parse_filter_date(start_date)
+    if start:
+        predicates.append("d.modify_date >= %s")
+        params.append(start)
+
+    end = parse_filter_date(end_date)
+    if end:
+        predicates.append("d.modify_date < %s")
+        params.append(end + timedelta(days=1))
+
+    exact_pairs = cfr_exact_title_part_pairs(cfr_part_param)
+    parts = cfr_part_filter_patterns(cfr_part_param)
+    if exact_pairs or parts:
+        if exact_pairs:
+            # A matching (title, part) pair also satisfies its part, so the pairs alone decide.
+            condition = " OR ".join("(dcf.title = %s AND dcf.cfrpart = %s)" for _ in exact_pairs)
+            for title, part in exact_pairs:
+                params.extend([title, part])
+        else:
+            condition = "dcf.cfrpart = ANY(%s)"
+            params.append(parts)
+        predicates.append(
+            f"d.docket_id IN (SELECT dcf.docket_id FROM docket_cfr dcf WHERE {condition})"
+        )
+
+    return CompiledFilters(predicates, params)
@@ -1,5 +1,7 @@
 import re
-from typing import List, Dict, Any, Set
+from typing import List, Dict, Any, Set, Tuple
+
+from mirrsearch.docket_result import DocketResult, as_results
 
 
 class MockDBLayer:  # pylint: disable=too-many-public-methods
@@ -72,7 +74,7 @@ class MockDBLayer:  # pylint: disable=too-many-public-methods
         if agency:
             results = [
                 item for item in results
-                if any(a.lower() in item["agency_id"].lower() for a in agency)
+                if any(item["agency_id"].lower().startswith(a.strip().lower()) for a in agency)
             ]
         if cfr_part_param:
             results = [
@@ -85,6 +87,39 @@ class MockDBLayer:  # pylint: disable=too-many-public-methods
             ]
         return results
 
+    def search_with_hits(  # pylint: disable=too-many-arguments,too-many-positional-arguments,too-many-locals
+            self,
+            query: str,
+            docket_ids: List[str],
+            document_type_param: str = None,
+            agency: List[str] = None,
+            cfr_part_param: List[str] = None,
+            start_date: str = None,
+            end_date: str = None) -> Tuple[List[DocketResult], List[DocketResult]]:
+        """
+        Title hits from ``search`` and the other ``docket_ids`` from
+        ``get_dockets_by_ids``, with document totals, like ``DBLayer``.
+        """
+        title_rows = as_results(
+            self.search(query, document_type_param, agency, cfr_part_param, start_date, end_date),
+            "title",
+        )
+        title_ids = {row.key for row in title_rows}
+        new_ids = [did for did in dict.fromkeys(docket_ids) if did not in title_ids]
+        full_text_rows = as_results(
+            self.get_dockets_by_ids(new_ids) if new_ids else [], "full_text"
+        )
+        rows = title_rows + full_text_rows
+        totals = self.get_docket_document_comment_totals([row.key for row in rows])
+        for row in rows:
+            row.document_total_count = totals.get(row.key, {}).get("document_total_count", 0)
+        return title_rows, full_text_rows
+
+    def get_comment_totals(
+            self, docket_ids: List[str], opensearch_client=None) -> Dict[str, int]:
+        totals = self.get_docket_document_comment_totals(docket_ids, opensearch_client)
+        return {did: counts["comment_total_count"] for did, counts in totals.items()}
+
     def get_agencies(self) -> List[str]:
         return sorted({item["agency_id"] for item in self._items()})
 
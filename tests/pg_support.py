@@ -0,0 +1,90 @@
+"""
+Postgres helpers shared by the tests: fake cursors and connections, and
+throwaway schemas on a real database for the ``integration`` tests.
+"""
+import os
+import sys
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import psycopg2
+import pytest
+
+DB_DIR = Path(__file__).resolve().parent.parent / "db"
+
+
+class FakeCursorBase:
+    """Context-manager cursor over a fake connection; subclasses implement ``execute``."""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self._rows = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def fetchall(self):
+        return self._rows
+
+    def fetchone(self):
+        return self._rows[0] if self._rows else None
+
+
+def copy_conn(monkeypatch, fail_first=None):
+    """
+    ``(conn, cur)`` mocks returned by ``psycopg2.connect``; ``fail_first`` is
+    raised by the first ``copy_expert``.
+    """
+    cur = MagicMock()
+    cur.fetchall.return_value = []
+    if fail_first is not None:
+        calls = {"n": 0}
+
+        def copy_expert(_sql, _buf):
+            calls["n"] += 1
+            if calls["n"] == 1:
+                raise fail_first
+
+        cur.copy_expert.side_effect = copy_expert
+    conn = MagicMock()
+    conn.cursor.return_value.__enter__.return_value = cur
+    monkeypatch.setattr(psycopg2, "connect", lambda **_kw: conn)
+    return conn, cur
+
+
+def pg_schema(schema, setup_sql=(), after_migrations=()):  # pylint: disable=too-many-statements
+    """
+    Generator for a module fixture: a connection to ``TEST_DATABASE_URL``
+    with ``schema`` created from ``schema-postgres.sql``, ``setup_sql`` run,
+    every migration applied and then ``after_migrations`` run. The schema
+    is dropped afterwards; the test is skipped without a database.
+    """
+    dsn = os.getenv("TEST_DATABASE_URL")
+    if not dsn:
+        pytest.skip("TEST_DATABASE_URL not set")
+    sys.path.insert(0, str(DB_DIR))
+    import migrate  # pylint: disable=import-outside-toplevel,import-error
+
+    conn = psycopg2.connect(dsn)
+    with conn.cursor() as cur:
+        cur.execute(f"DROP SCHEMA IF EXISTS {schema} CASCADE")
+        cur.execute(f"CREATE SCHEMA {schema}")
+        cur.execute(f"SET search_path TO {schema}")
+        cur.execute((DB_DIR / "schema-postgres.sql").read_text(encoding="utf-8"))
+        for sql in setup_sql:
+            cur.execute(sql)
+    conn.commit()
+    migrate.run(conn, migrate.discover())
+    with conn.cursor() as cur:
+        for sql in after_migrations:
+            cur.execute(sql)
+    conn.commit()
+    yield conn
+    conn.rollback()
+    with conn.cursor() as cur:
+        cur.execute(f"DROP SCHEMA IF EXISTS {schema} CASCADE")
+    conn.commit()
+    conn.close()
@@ -697,6 +697,16 @@ def test_search_with_date_filters(client): # pylint: disable=redefined-outer-nam
     assert isinstance(data, list)
 
 
+def test_search_with_malformed_date_is_bad_request(client): # pylint: disable=redefined-outer-name
+    """Test that a start_date or end_date that is not a date is rejected"""
+    response = client.get('/search/?str=renal&start_date=March%204')
+    assert response.status_code == 400
+    assert response.get_json() == {"error": "start_date must be a date (YYYY-MM-DD)"}
+    response = client.get('/search/?str=renal&start_date=2024-01-01&end_date=2024-13-01')
+    assert response.status_code == 400
+    assert response.get_json() == {"error": "end_date must be a date (YYYY-MM-DD)"}
+
+
 def test_search_with_invalid_page_size_defaults_to_10(client): # pylint: disable=redefined-outer-name
     """Test that invalid page_size defaults to 10"""
     response = client.get('/search/?page_size=200')  # > 100 should default to 10
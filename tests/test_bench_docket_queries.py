@@ -0,0 +1,35 @@
+"""
+Tests for ``db/bench_docket_queries.py`` (per-docket query latency benchmark).
+"""
+import sys
+from pathlib import Path
+from unittest.mock import MagicMock
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "db"))
+
+# pylint: disable=wrong-import-position,import-error
+import bench_docket_queries as bench
+# pylint: enable=wrong-import-position,import-error
+
+
+def test_percentile():
+    values = [5.0, 1.0, 3.0, 2.0, 4.0]
+    assert (bench.percentile(values, 0.5), bench.percentile(values, 0.95)) == (3.0, 5.0)
+
+
+def test_run_times_every_query_per_docket():
+    conn = MagicMock()
+    cur = conn.cursor.return_value.__enter__.return_value
+    results = bench.run(conn, ["D-1", "D-2"], repeat=3)
+    assert set(results) == set(bench.QUERIES)
+    # One warm-up plus three timed runs per (query, docket).
+    assert cur.execute.call_count == len(bench.QUERIES) * 2 * 4
+    assert cur.execute.call_args.args[1] == ("D-2",)
+    conn.rollback.assert_called_once()
+
+
+def test_format_results_with_baseline():
+    after = {"comment_count": {"p50": 2.0, "p95": 3.0, "mean": 2.5}}
+    before = {"comment_count": {"p50": 10.0, "p95": 12.0, "mean": 11.0}}
+    line = bench.format_results(after, before).splitlines()[1]
+    assert line.split() == ["comment_count", "2.00", "3.00", "2.50", "10.00", "5.0x"]
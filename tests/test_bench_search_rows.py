@@ -0,0 +1,32 @@
+"""
+Tests for ``db/bench_search_rows.py`` (search result pipeline benchmark).
+"""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "db"))
+
+# pylint: disable=wrong-import-position,import-error
+import bench_search_rows as bench
+# pylint: enable=wrong-import-position,import-error
+
+
+def test_run_measures_every_sort_mode():
+    results = bench.run(candidates=200, repeat=2, sort_modes=bench.SORT_MODES)
+    assert set(results) == set(bench.SORT_MODES)
+    for row in results.values():
+        assert set(row) == {"p50", "mean", "alloc_kib", "peak_kib"}
+        assert row["p50"] > 0 and row["peak_kib"] > 0
+
+
+def test_canned_db_serves_every_candidate():
+    db = bench.CannedDb(100)
+    title_rows, full_text_rows = db.search_with_hits("q", [h["docket_id"] for h in db.hits])
+    assert (len(title_rows), len(full_text_rows)) == (50, 50)
+
+
+def test_format_results_with_baseline():
+    after = {"relevance": {"p50": 20.0, "mean": 21.0, "peak_kib": 1000.0}}
+    before = {"relevance": {"p50": 40.0, "mean": 41.0, "peak_kib": 3000.0}}
+    line = bench.format_results(after, before).splitlines()[1]
+    assert line.split() == ["relevance", "20.00", "21.00", "1000", "40.00", "2.0x", "3000"]
@@ -0,0 +1,163 @@
+"""
+Tests for ``db/bulk_copy.py`` (COPY staging + set-based merge).
+"""
+import csv
+import datetime
+import io
+import sys
+from pathlib import Path
+from unittest.mock import MagicMock
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "db"))
+
+# pylint: disable=wrong-import-position,import-error
+from bulk_copy import (
+    BulkWriter,
+    CopyTarget,
+    MergeResult,
+    copy_sql,
+    copy_upsert,
+    csv_field,
+    csv_line,
+    merge_sql,
+    stage_ddl,
+)
+# pylint: enable=wrong-import-position,import-error
+
+CFR = CopyTarget(
+    "cfrparts", ("frdocnum", "title", "cfrpart"), conflict=("frdocnum", "title", "cfrpart")
+)
+DOCS = CopyTarget(
+    "documents", ("document_id", "title"), conflict=("document_id",), update=("title",)
+)
+
+
+def _cursor(returning=()):
+    """Fake cursor recording COPY payloads; ``fetchall`` yields merge RETURNING rows."""
+    cur = MagicMock()
+    copied = []
+    cur.copy_expert.side_effect = lambda _sql, buf: copied.append(buf.read())
+    cur.fetchall.return_value = list(returning)
+    return cur, copied
+
+
+class TestSqlBuilders:
+    def test_stage_and_copy_sql(self):
+        assert stage_ddl(CFR) == (
+            "CREATE TEMP TABLE IF NOT EXISTS cfrparts_stage "
+            "(LIKE cfrparts INCLUDING DEFAULTS) ON COMMIT DELETE ROWS"
+        )
+        assert copy_sql(CFR).startswith("COPY cfrparts_stage (frdocnum, title, cfrpart) FROM STDIN")
+
+    def test_merge_do_nothing(self):
+        sql = merge_sql(CFR)
+        assert "SELECT frdocnum, title, cfrpart FROM cfrparts_stage" in sql
+        assert "ON CONFLICT (frdocnum, title, cfrpart) DO NOTHING\n" in sql
+        assert sql.endswith("RETURNING frdocnum, title, cfrpart, (xmax = 0) AS inserted")
+
+    def test_merge_update_columns_and_expressions(self):
+        sql = merge_sql(DOCS)
+        assert "title = EXCLUDED.title" in sql
+        assert "WHERE (documents.title) IS DISTINCT FROM (EXCLUDED.title)" in sql
+        target = CopyTarget(
+            "t", ("id", "v", "w"), conflict=("id",),
+            update={"v": "COALESCE(EXCLUDED.v, t.v)", "w": "EXCLUDED.w"},
+        )
+        sql = merge_sql(target)
+        assert "DO UPDATE SET\nv = COALESCE(EXCLUDED.v, t.v),\nw = EXCLUDED.w" in sql
+        assert "WHERE (t.v, t.w) IS DISTINCT FROM (COALESCE(EXCLUDED.v, t.v), EXCLUDED.w)" in sql
+
+    def test_merge_plain_insert_without_conflict(self):
+        sql = merge_sql(CopyTarget("t", ("a",)))
+        assert "ON CONFLICT" not in sql and "RETURNING" not in sql
+
+
+class TestCsvEncoding:
+    def test_null_bool_number_date(self):
+        assert csv_field(None) == "\\N"
+        assert csv_field(True) == "t"
+        assert csv_field(7) == "7"
+        assert csv_field(datetime.date(2025, 1, 2)) == "2025-01-02"
+
+    def test_text_is_always_quoted(self):
+        assert csv_field("") == '""'
+        assert csv_field("\\N") == '"\\N"'
+        assert csv_field('say "hi", ok') == '"say ""hi"", ok"'
+
+    def test_arrays_and_json(self):
+        assert csv_field(["a", 'b"c', None]) == '"{""a"",""b\\""c"",NULL}"'
+        assert csv_field({"k": 1}) == '"{""k"": 1}"'
+
+    def test_line_round_trips_through_csv_reader(self):
+        line = csv_line(("x,y", "multi\nline", None))
+        assert next(csv.reader(io.StringIO(line))) == ["x,y", "multi\nline", "\\N"]
+
+
+class TestBulkWriter:
+    def test_copy_upsert_stages_copies_and_merges(self):
+        cur, copied = _cursor(returning=[("2025-1", "40", "52", True)])
+        result = copy_upsert(cur, CFR, [("2025-1", "40", "52"), ("2025-1", "40", "60")])
+        assert (result.inserted, result.updated, result.unchanged) == (1, 0, 1)
+        sqls = [c.args[0] for c in cur.execute.call_args_list]
+        assert sqls == [stage_ddl(CFR), "TRUNCATE cfrparts_stage", merge_sql(CFR)]
+        assert copied == ['"2025-1","40","52"\n"2025-1","40","60"\n']
+
+    def test_duplicate_keys_keep_last_row(self):
+        cur, copied = _cursor()
+        copy_upsert(cur, DOCS, [("d1", "old"), ("d2", "x"), ("d1", "new")])
+        assert copied == ['"d2","x"\n"d1","new"\n']
+
+    def test_flushes_on_row_and_byte_limits(self):
+        cur, copied = _cursor()
+        flushed = []
+        writer = BulkWriter(cur, CopyTarget("t", ("v",)), max_rows=2,
+                            on_flush=lambda n, _a: flushed.append(n))
+        writer.extend([("a",), ("b",), ("c",)])
+        assert flushed == [2] and writer.pending() == 1
+        writer.flush()
+        assert writer.result.total == 3 and len(copied) == 2
+
+        cur, copied = _cursor()
+        writer = BulkWriter(cur, CopyTarget("t", ("v",)), max_bytes=10)
+        writer.extend([("abcdefgh",), ("ijkl",)])
+        assert len(copied) == 1 and writer.pending() == 1
+
+    def test_before_merge_hook_runs_between_copy_and_merge(self):
+        cur, _ = _cursor()
+        order = []
+        cur.copy_expert.side_effect = lambda *_a: order.append("copy")
+        copy_upsert(cur, CFR, [("1", "2", "3")],
+                    before_merge=lambda _c, target: order.append(target.stage))
+        assert order == ["copy", "cfrparts_stage"]
+
+    def test_empty_input_does_nothing(self):
+        cur, _ = _cursor()
+        assert copy_upsert(cur, CFR, []) == MergeResult()
+        cur.execute.assert_not_called()
+
+
+class TestChangeAwareMerge:
+    def test_counts_inserted_updated_unchanged_and_keys(self):
+        cur, _ = _cursor(returning=[("d1", True), ("d2", False)])
+        result = copy_upsert(
+            cur, DOCS, [("d1", "a"), ("d2", "b"), ("d3", "c")], keep_keys=True
+        )
+        assert result.summary() == "1 inserted, 1 updated, 1 unchanged"
+        assert result.changed == 2
+        assert result.changed_keys == [("d1",), ("d2",)]
+
+    def test_keys_not_kept_by_default(self):
+        cur, _ = _cursor(returning=[("d1", True)])
+        assert copy_upsert(cur, DOCS, [("d1", "a")]).changed_keys == []
+
+    def test_plain_insert_counts_every_row(self):
+        cur, _ = _cursor()
+        result = copy_upsert(cur, CopyTarget("t", ("v",)), [("a",), ("b",)])
+        assert result.inserted == 2
+        cur.fetchall.assert_not_called()
+
+    def test_results_accumulate_across_flushes(self):
+        cur, _ = _cursor(returning=[("d1", False)])
+        writer = BulkWriter(cur, DOCS, max_rows=1, keep_keys=True)
+        writer.extend([("d1", "a"), ("d1", "b")])
+        assert (writer.result.updated, len(writer.result.changed_keys)) == (2, 2)
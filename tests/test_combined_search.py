@@ -0,0 +1,173 @@
+"""
+Tests for the single-statement search (``combined_search.py``,
+``DBLayer.search_with_hits``) and the ``InternalLogic.search`` path that uses it.
+
+The ``integration`` test compares it with the separate title search and
+hydration queries on a real Postgres when ``TEST_DATABASE_URL`` is set.
+"""
+# pylint: disable=redefined-outer-name,too-few-public-methods,unused-argument
+from datetime import datetime
+from unittest.mock import MagicMock
+
+import pytest
+from pg_support import pg_schema
+
+from mirrsearch.combined_search import (
+    combined_search_params,
+    combined_search_sql,
+    split_hits,
+)
+from mirrsearch.db import DBLayer
+from mirrsearch.docket_result import DocketResult
+from mirrsearch.internal_logic import InternalLogic
+from mirrsearch.search_filters import compile_search_filters
+
+MODIFIED = datetime(2025, 5, 1)
+
+
+def _row(docket_id, title_hit, refs=None, documents=3):
+    return (docket_id, f"title {docket_id}", "EPA", "Rulemaking", MODIFIED,
+            refs if refs is not None else [], documents, title_hit)
+
+
+def test_filters_apply_to_title_and_full_text_hits():
+    filters = compile_search_filters("Rulemaking", None, ["80"], None, None)
+    sql = combined_search_sql(filters)
+    assert sql.count("AND d.docket_type = %s") == 2
+    assert sql.count("SELECT dcf.docket_id FROM docket_cfr dcf") == 2
+    assert "LIMIT 50" in sql and "WITH ORDINALITY" in sql
+    assert sql.rstrip().endswith("ORDER BY h.ord NULLS FIRST, d.modify_date DESC, d.docket_id")
+    params = combined_search_params(" Water ", ["B", "A", "B"], filters)
+    assert params == ["%water%", "Rulemaking", ["80"], ["B", "A"], "Rulemaking", ["80"]]
+    assert sql.count("%s") == len(params)
+
+
+def test_split_hits_builds_rows():
+    refs = [{"title": "40", "cfrParts": {"80": "https://ecfr/80"}}]
+    title_rows, full_text_rows = split_hits([_row("A", True, refs), _row("B", False, None)])
+    assert title_rows == [DocketResult(
+        docket_id="A", docket_title="title A", agency_id="EPA",
+        docket_type="Rulemaking", modify_date=MODIFIED, cfr_refs=refs,
+        match_source="title", document_total_count=3,
+    )]
+    assert [(r.docket_id, r.match_source) for r in full_text_rows] == [("B", "full_text")]
+    assert full_text_rows[0].cfr_refs == []
+
+
+def test_search_with_hits_is_one_statement():
+    conn = MagicMock()
+    cur = conn.cursor.return_value.__enter__.return_value
+    cur.fetchall.return_value = [_row("A", True), _row("B", False)]
+    title_rows, full_text_rows = DBLayer(conn).search_with_hits("water", ["B"])
+    assert [r.docket_id for r in title_rows + full_text_rows] == ["A", "B"]
+    (sql, params), = [c.args for c in cur.execute.call_args_list]
+    assert sql.lstrip().startswith("WITH title_hits AS")
+    assert params == ["%water%", ["B"]]
+
+
+def test_search_with_hits_without_matches_or_connection():
+    assert DBLayer().search_with_hits("water", ["A"]) == ([], [])
+    conn = MagicMock()
+    cur = conn.cursor.return_value.__enter__.return_value
+    cur.fetchall.return_value = []
+    db = DBLayer(conn)
+    # An agency missing from the (cached) agency list is still searched for.
+    assert db.search_with_hits("water", [], agency=["ZZZ"]) == ([], [])
+    sql, params = cur.execute.call_args_list[-1].args
+    assert "WITH title_hits" in sql and ["ZZZ"] in params
+
+
+def test_get_comment_totals():
+    class Client:
+        def search(self, index, body):
+            assert body["query"]["bool"]["filter"][0]["terms"]["docketId.keyword"] == ["A"]
+            return {"aggregations": {"by_docket": {"buckets": [{"key": "A", "doc_count": 4}]}}}
+
+    assert not DBLayer().get_comment_totals([])
+    assert DBLayer().get_comment_totals(["A"], opensearch_client=Client()) == {"A": 4}
+
+
+class _FakeCombinedDb:
+    def __init__(self):
+        self.calls = []
+
+    def text_match_terms(self, terms, opensearch_client=None):
+        return [
+            {"docket_id": "B", "document_match_count": 2, "comment_match_count": 1},
+            {"docket_id": "A", "document_match_count": 1, "comment_match_count": 0},
+        ]
+
+    def search_with_hits(self, query, docket_ids, *filters):
+        self.calls.append(("search_with_hits", query, docket_ids, filters))
+        title_rows, full_text_rows = split_hits([
+            _row("A", True, documents=10), _row("B", False, documents=4),
+        ])
+        return title_rows, full_text_rows
+
+    def get_comment_totals(self, docket_ids, opensearch_client=None):
+        self.calls.append(("get_comment_totals", docket_ids))
+        return {"B": 5}
+
+
+def test_internal_logic_uses_combined_statement():
+    db = _FakeCombinedDb()
+    out = InternalLogic("x", db_layer=db).search("water", agency=["EPA"])
+    assert db.calls == [
+        ("search_with_hits", "water", ["B", "A"], (None, ["EPA"], None, None, None)),
+        ("get_comment_totals", ["A", "B"]),
+    ]
+    by_id = {r["docket_id"]: r for r in out["results"]}
+    assert by_id["A"]["match_source"] == "title"
+    assert by_id["B"]["match_source"] == "full_text"
+    assert (by_id["B"]["documentNumerator"], by_id["B"]["documentDenominator"]) == (2, 4)
+    assert (by_id["A"]["commentDenominator"], by_id["B"]["commentDenominator"]) == (0, 5)
+    assert by_id["A"]["modify_date"] == MODIFIED.isoformat()
+
+
+# --- against Postgres ---
+
+SCHEMA = "combined_search_test"
+
+
+@pytest.fixture(scope="module")
+def pg():
+    yield from pg_schema(SCHEMA, after_migrations=[
+        "INSERT INTO dockets (docket_id, docket_api_link, agency_id, docket_type, "
+        "modify_date, docket_title) "
+        "SELECT 'D-' || g, 'https://x/' || g, (ARRAY['CMS','EPA'])[1 + g % 2], "
+        "'Rulemaking', TIMESTAMPTZ '2020-01-01' + g * INTERVAL '1 day', "
+        "CASE WHEN g % 3 = 0 THEN 'clean water ' ELSE 'air ' END || g "
+        "FROM generate_series(1, 120) g",
+        "INSERT INTO documentsWithFRdoc (document_id, docket_id, document_api_link, "
+        "agency_id, document_type, modify_date) "
+        "SELECT d.docket_id || '-' || n, d.docket_id, 'https://d/' || d.docket_id || n, "
+        "d.agency_id, 'Rule', d.modify_date "
+        "FROM dockets d, generate_series(1, 2) n WHERE d.docket_id <> 'D-7'",
+        "INSERT INTO docket_cfr (docket_id, title, cfrpart, link) "
+        "SELECT docket_id, '40', p, 'https://ecfr/' || p FROM dockets, "
+        "unnest(ARRAY['80', '81']) p WHERE docket_id LIKE 'D-1%'",
+    ])
+
+
+@pytest.mark.integration
+@pytest.mark.parametrize("agency", [None, ["EPA"]])
+def test_matches_separate_queries(pg, agency):  # pylint: disable=too-many-locals
+    db = DBLayer(pg)
+    os_ids = ["D-10", "D-7", "D-11", "D-3", "D-13", "D-10"]
+    title_rows, full_text_rows = db.search_with_hits("water", os_ids, agency=agency)
+
+    separate_titles = db.search("water", agency=agency)
+    title_ids = {r["docket_id"] for r in separate_titles}
+    new_ids = [d for d in dict.fromkeys(os_ids) if d not in title_ids]
+    hydrated = {r["docket_id"]: r for r in db.get_dockets_by_ids(new_ids)}
+    assert [r.docket_id for r in title_rows] == [r["docket_id"] for r in separate_titles]
+    assert [r.docket_id for r in full_text_rows] == [
+        d for d in new_ids
+        if d in hydrated and (agency is None or hydrated[d]["agency_id"] == "EPA")
+    ]
+    assert "D-7" not in hydrated
+    for row in title_rows + full_text_rows:
+        assert row.document_total_count == 2
+        if row.docket_id in hydrated:
+            assert row.cfr_refs == hydrated[row.docket_id]["cfr_refs"]
+    pg.rollback()
@@ -0,0 +1,54 @@
+"""
+Tests for ``db/comment_clusters.py`` (form-letter MinHash/LSH clustering).
+"""
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "db"))
+
+# pylint: disable=wrong-import-position,import-error
+from comment_clusters import FormLetterClusterer, shingles, signature, similarity, tokens
+# pylint: enable=wrong-import-position,import-error
+
+LETTER = (
+    "I am writing to urge the agency to withdraw this proposed rule. The rule would "
+    "impose significant costs on small businesses and family farms across the country, "
+    "and the analysis underestimates the burden of the new reporting requirements. "
+    "Please extend the comment period and hold public hearings before moving forward. "
+    "Thank you for considering my views on this important matter."
+)
+
+
+def test_signature_similarity_tracks_overlap():
+    a = signature(shingles(tokens(LETTER)))
+    b = signature(shingles(tokens(LETTER + " Signed, Jane Doe of Ohio.")))
+    c = signature(shingles(tokens("Completely unrelated remarks about aviation noise at night.")))
+    assert similarity(a, a) == 1.0
+    assert similarity(a, b) > 0.8
+    assert similarity(a, c) < 0.2
+    assert shingles([]) == set() and shingles(["hi"]) == {"hi"}
+
+
+class TestClusterer:
+    def test_groups_form_letters_and_variants(self):
+        clusterer = FormLetterClusterer()
+        assert clusterer.assign("c1", LETTER) == "c1"
+        assert clusterer.assign("c2", LETTER.upper()) == "c1"
+        assert clusterer.assign("c3", LETTER.replace("Thank you", "Thanks")) == "c1"
+        assert clusterer.assign("c4", "A short, original comment about drones.") == "c4"
+        assert clusterer.assign("c5", "") == "c5"
+        assert clusterer.assign("c6", None) == "c6"
+        assert clusterer.sizes() == {"c1": 3}
+
+    def test_threshold_keeps_distinct_letters_apart(self):
+        clusterer = FormLetterClusterer(threshold=0.95)
+        half = " ".join(tokens(LETTER)[:30])
+        assert clusterer.assign("a", LETTER) == "a"
+        assert clusterer.assign("b", half + " but my own ending is entirely different here") == "b"
+        assert not clusterer.sizes()
+
+    def test_bands_must_divide_permutations(self):
+        with pytest.raises(ValueError):
+            FormLetterClusterer(num_perm=64, bands=10)
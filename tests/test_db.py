@@ -4,10 +4,11 @@ Tests for the database layer (db.py)
 Only tests DBLayer wiring, the postgres branch, and module-level
 factory functions. Dummy-data behavior tests live in test_mock.py.
 """
-# pylint: disable=redefined-outer-name,protected-access
+# pylint: disable=redefined-outer-name,protected-access,too-many-lines
 import pytest
 import mirrsearch.db as db_module
-from mirrsearch.db import DBLayer, cfr_part_filter_patterns, get_db
+from mirrsearch.db import DBLayer, get_db
+from mirrsearch.search_filters import cfr_part_filter_patterns
 
 
 # --- DBLayer instantiation ---
@@ -72,14 +73,12 @@ def test_merge_unique_comment_matches_unions_distinct_comment_ids():
     assert DBLayer._merge_unique_comment_matches(comments, extracted) == {"D1": 2}
 
 
-def test_search_with_cfr_dict_applies_exact_docket_filter(monkeypatch):
-    """Dict-style CFR filter keeps only dockets returned by exact title+part map."""
+def test_search_with_cfr_dict_runs_single_query():
+    """Dict-style CFR filter is applied in the search query itself; no second lookup."""
     rows = [
-        ("DOC-001", "First", "CMS", "Rulemaking", "2024-01-01", "Title 42", "413", "http://a"),
         ("DOC-002", "Second", "EPA", "Rulemaking", "2024-01-01", "Title 40", "40", "http://b"),
     ]
     db = DBLayer(conn=_FakeConn(rows))
-    monkeypatch.setattr(DBLayer, "_get_cfr_docket_ids", lambda self, _pairs: {"DOC-002"})
 
     results = db.search(
         "docket",
@@ -87,17 +86,7 @@ def test_search_with_cfr_dict_applies_exact_docket_filter(monkeypatch):
     )
 
     assert [r["docket_id"] for r in results] == ["DOC-002"]
-
-
-def test_search_with_plain_cfr_string_skips_exact_cfr_lookup(monkeypatch):
-    """String-style CFR filters should not invoke exact title+part lookup."""
-    db = DBLayer(conn=_FakeConn([]))
-
-    def should_not_call(self, _pairs):
-        raise AssertionError("_get_cfr_docket_ids should not run for plain string filters")
-
-    monkeypatch.setattr(DBLayer, "_get_cfr_docket_ids", should_not_call)
-    db.search("x", cfr_part_param=["413"])
+    assert len(db.conn.cursor_obj.executed) == 1
 
 
 def test_get_db_returns_dblayer():
@@ -155,23 +144,62 @@ def test_get_agencies_with_conn():
 
 # --- _search_dockets_postgres filter tests ---
 
+class _AgencyConn(_FakeConn):
+    """First query answers get_agencies(); later ones return no rows."""
+
+    def __init__(self, agencies):
+        super().__init__([])
+        self.cursor_obj = _AgencyCursor(agencies)
+
+
+class _AgencyCursor(_FakeCursor):
+    def __init__(self, agencies):
+        super().__init__([])
+        self._agencies = [(a,) for a in agencies]
+
+    def fetchall(self):
+        sql = self.executed[-1][0]
+        return self._agencies if "DISTINCT agency_id" in sql else []
+
+
+def _search_sql(db):
+    return [e for e in db.conn.cursor_obj.executed if "docket_title ILIKE" in e[0]][0]
+
+
 def test_search_dockets_postgres_agency_filter():
-    """Agency filter adds ILIKE clause and wraps value with wildcards"""
-    db = DBLayer(conn=_FakeConn([]))
-    db._search_dockets_postgres("", agency=["CMS"])
-    sql, params = db.conn.cursor_obj.executed[0]
-    assert "agency_id ILIKE %s" in sql
-    assert params == ["%%", "%CMS%"]
+    """Agency filter resolves against known agencies and matches with = ANY"""
+    db = DBLayer(conn=_AgencyConn(["CMS", "EPA"]))
+    db._search_dockets_postgres("", agency=["cms"])
+    sql, params = _search_sql(db)
+    assert "d.agency_id = ANY(%s)" in sql
+    assert "ILIKE %s)" not in sql
+    assert params == ["%%", ["CMS"]]
 
 
 def test_search_dockets_postgres_agency_multi_filter():
-    """Multiple agencies produce OR'd ILIKE clauses"""
-    db = DBLayer(conn=_FakeConn([]))
-    db._search_dockets_postgres("", agency=["CMS", "EPA"])
-    sql, params = db.conn.cursor_obj.executed[0]
-    assert sql.count("agency_id ILIKE %s") == 2
-    assert "%CMS%" in params
-    assert "%EPA%" in params
+    """Multiple agencies and prefixes collapse into one = ANY list"""
+    db = DBLayer(conn=_AgencyConn(["CMS", "EPA", "EPA-HQ", "FAA"]))
+    db._search_dockets_postgres("", agency=["CMS", "EP"])
+    sql, params = _search_sql(db)
+    assert sql.count("d.agency_id = ANY(%s)") == 1
+    assert params[-1] == ["CMS", "EPA", "EPA-HQ"]
+
+
+def test_search_dockets_postgres_unknown_agency_matches_literally():
+    # A newly ingested agency may not be in the cached agency list yet.
+    db = DBLayer(conn=_AgencyConn(["CMS"]))
+    db._search_dockets_postgres("", agency=["xyz"])
+    sql, params = db.conn.cursor_obj.executed[-1]
+    assert "d.agency_id = ANY(%s)" in sql
+    assert params[-1] == ["XYZ"]
+
+
+def test_search_dockets_postgres_agency_list_is_cached():
+    db = DBLayer(conn=_AgencyConn(["CMS"]))
+    db._search_dockets_postgres("", agency=["CMS"])
+    db._search_dockets_postgres("", agency=["CMS"])
+    agency_queries = [e for e in db.conn.cursor_obj.executed if "DISTINCT agency_id" in e[0]]
+    assert len(agency_queries) == 1
 
 
 def test_search_dockets_postgres_docket_type_filter():
@@ -185,12 +213,12 @@ def test_search_dockets_postgres_docket_type_filter():
 
 def test_search_dockets_postgres_agency_and_docket_type_filter():
     """Both filters add their clauses and params in order"""
-    db = DBLayer(conn=_FakeConn([]))
+    db = DBLayer(conn=_AgencyConn(["CMS"]))
     db._search_dockets_postgres("renal", docket_type_param="Rulemaking", agency=["CMS"])
-    sql, params = db.conn.cursor_obj.executed[0]
+    sql, params = _search_sql(db)
     assert "d.docket_type = %s" in sql
-    assert "agency_id ILIKE %s" in sql
-    assert params == ["%renal%", "Rulemaking", "%CMS%"]
+    assert "d.agency_id = ANY(%s)" in sql
+    assert params == ["%renal%", "Rulemaking", ["CMS"]]
 
 
 def test_search_dockets_postgres_no_filter_no_extra_clauses():
@@ -199,24 +227,22 @@ def test_search_dockets_postgres_no_filter_no_extra_clauses():
     db._search_dockets_postgres("abc")
     sql, params = db.conn.cursor_obj.executed[0]
     assert "d.docket_type = %s" not in sql
-    assert "agency_id ILIKE %s" not in sql
+    assert "agency_id" not in sql.split("WHERE", 1)[1]
     assert params == ["%abc%"]
 
 
 def test_search_dockets_postgres_cfr_filter_from_api_dict():
-    """Dict CFR filter applies exact cfrPart = via EXISTS and exact FRD title+part EXISTS."""
+    """Dict CFR filter becomes one semi-join on exact title+part pairs."""
     db = DBLayer(conn=_FakeConn([]))
     db._search_dockets_postgres(
         "renal",
         cfr_part_param=[{"title": "42 CFR Parts 413 and 512", "part": "413"}],
     )
     sql, params = db.conn.cursor_obj.executed[0]
-    assert "cp3.cfrPart = %s" in sql
-    assert "JOIN cfrparts cp3 ON cp3.frdocnum = d3.frdocnum" in sql
-    assert "JOIN cfrparts cp2 ON cp2.frdocnum = d2.frdocnum" in sql
-    assert "cp2.title = %s" in sql
-    assert "cp2.cfrPart = %s" in sql
-    assert params == ["%renal%", "413", "42 CFR Parts 413 and 512", "413"]
+    assert sql.count("SELECT dcf.docket_id FROM docket_cfr dcf") == 1
+    assert "(dcf.title = %s AND dcf.cfrpart = %s)" in sql
+    assert "cfrparts" not in sql
+    assert params == ["%renal%", "42 CFR Parts 413 and 512", "413"]
 
 
 def test_search_dockets_postgres_cfr_empty_dict_skips_cfr_clause():
@@ -262,9 +288,9 @@ def test_search_dockets_postgres_cfr_filter_plain_string():
     db = DBLayer(conn=_FakeConn([]))
     db._search_dockets_postgres("z", cfr_part_param=["413"])
     sql, params = db.conn.cursor_obj.executed[0]
-    assert "cp3.cfrPart = %s" in sql
-    assert "JOIN cfrparts cp3 ON cp3.frdocnum = d3.frdocnum" in sql
-    assert params == ["%z%", "413"]
+    assert "dcf.cfrpart = ANY(%s)" in sql
+    assert "FROM docket_cfr dcf" in sql
+    assert params == ["%z%", ["413"]]
 
 
 # --- _search_dockets_postgres tests ---
@@ -862,6 +888,51 @@ def test_text_match_terms_malformed_response_returns_empty():
     db = DBLayer()
     assert db.text_match_terms(["x"], opensearch_client=BadClient()) == []
 
+
+class _ClusteredOpenSearch(_FakeOpenSearch):  # pylint: disable=too-few-public-methods
+    """Comments query returns cluster sizes; the follow-up overlap query returns ``overlap``."""
+    def __init__(self, comment_buckets, extracted_buckets, overlap):
+        super().__init__([], comment_buckets, extracted_buckets)
+        self.overlap = overlap
+
+    def search(self, index, body):
+        if index == "comments" and "query" in body:
+            self.searches.append((index, body))
+            return {"aggregations": {"by_docket": {"buckets": self.overlap}}}
+        return super().search(index, body)
+
+
+def test_text_match_terms_expands_form_letter_clusters():
+    """A matching representative counts for every member of its cluster."""
+    comment_bucket = _fake_os_comment_agg_bucket("D1", "matching_comments", "REP", "SOLO")
+    comment_bucket["matching_comments"]["by_comment"]["buckets"][0]["cluster_size"] = {"value": 500}
+    extracted = [_fake_os_comment_agg_bucket("D1", "matching_extracted", "MEMBER", "OTHER")]
+    fake_client = _ClusteredOpenSearch(
+        [comment_bucket], extracted, overlap=[{"key": "D1", "doc_count": 1}]
+    )
+
+    results = DBLayer().text_match_terms(["x"], opensearch_client=fake_client)
+
+    # REP (500) + SOLO + OTHER; MEMBER's attachment is already inside REP's cluster.
+    assert results == [{"docket_id": "D1", "document_match_count": 0, "comment_match_count": 502}]
+    by_comment = fake_client.searches[1][1]["aggs"]["by_docket"]["aggs"][
+        "matching_comments"]["aggs"]["by_comment"]
+    assert by_comment["aggs"] == {"cluster_size": {"max": {"field": "clusterSize"}}}
+    overlap_filter = fake_client.searches[3][1]["query"]["bool"]["filter"]
+    assert overlap_filter == [
+        {"terms": {"commentId.keyword": ["MEMBER", "OTHER"]}},
+        {"terms": {"clusterId.keyword": ["REP"]}},
+    ]
+
+
+def test_text_match_terms_clusters_without_extracted_matches_skip_overlap_query():
+    comment_bucket = _fake_os_comment_agg_bucket("D1", "matching_comments", "REP")
+    comment_bucket["matching_comments"]["by_comment"]["buckets"][0]["cluster_size"] = {"value": 3}
+    fake_client = _ClusteredOpenSearch([comment_bucket], [], overlap=[])
+    results = DBLayer().text_match_terms(["x"], opensearch_client=fake_client)
+    assert results[0]["comment_match_count"] == 3
+    assert len(fake_client.searches) == 3
+
 # --- is_admin tests ---
 
 def test_is_admin_no_conn_returns_false():
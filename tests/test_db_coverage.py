@@ -1,6 +1,6 @@
 # pylint: disable=redefined-outer-name,protected-access
 import uuid
-from datetime import datetime, timezone
+from datetime import date, datetime, timezone
 import pytest
 import mirrsearch.db as db_module
 from mirrsearch.db import DBLayer, _env_flag_true, _parse_positive_int_env
@@ -158,43 +158,6 @@ def test_parse_positive_int_env_negative_clamps_to_1(monkeypatch):
     assert _parse_positive_int_env("MY_INT", 10) == 1
 
 
-# --- _get_cfr_docket_ids ---
-
-def test_get_cfr_docket_ids_returns_empty_when_no_conn():
-    assert DBLayer()._get_cfr_docket_ids([("Title 42", "413")]) == set()
-
-
-def test_get_cfr_docket_ids_returns_empty_for_empty_pairs():
-    db = DBLayer(conn=_FakeConn([]))
-    assert db._get_cfr_docket_ids([]) == set()
-
-
-def test_get_cfr_docket_ids_queries_correct_table():
-    conn = _TrackingConn(rows_per_call={1: [("DOC-001",), ("DOC-002",)]})
-    db = DBLayer(conn=conn)
-    result = db._get_cfr_docket_ids([("Title 42", "413")])
-    sql, params = conn.calls[0]
-    assert "documentsWithFRdoc" in sql
-    assert "cfrparts" in sql
-    assert "cp.title = %s" in sql
-    assert "cp.cfrPart = %s" in sql
-    assert "Title 42" in params
-    assert "413" in params
-    assert result == {"DOC-001", "DOC-002"}
-
-
-def test_get_cfr_docket_ids_multiple_pairs():
-    conn = _TrackingConn(rows_per_call={1: [("DOC-001",)]})
-    db = DBLayer(conn=conn)
-    db._get_cfr_docket_ids([("Title 42", "413"), ("Title 40", "80")])
-    sql, params = conn.calls[0]
-    assert sql.count("cp.title = %s") == 2
-    assert "Title 42" in params
-    assert "413" in params
-    assert "Title 40" in params
-    assert "80" in params
-
-
 # --- date filters in _search_dockets_postgres ---
 
 def test_search_dockets_postgres_start_date_filter():
@@ -202,8 +165,9 @@ def test_search_dockets_postgres_start_date_filter():
     db._search_dockets_postgres("test", start_date="2025-01-01")
     assert len(db.conn.cursor_obj.executed) > 0, "No SQL was executed"
     sql, params = db.conn.cursor_obj.executed[0]
-    assert "d.modify_date::date >= %s::date" in sql
-    assert "2025-01-01" in params
+    assert "d.modify_date >= %s" in sql
+    assert "::date" not in sql
+    assert date(2025, 1, 1) in params
 
 
 def test_search_dockets_postgres_end_date_filter():
@@ -211,8 +175,8 @@ def test_search_dockets_postgres_end_date_filter():
     db._search_dockets_postgres("test", end_date="2026-01-01")
     assert len(db.conn.cursor_obj.executed) > 0, "No SQL was executed"
     sql, params = db.conn.cursor_obj.executed[0]
-    assert "d.modify_date::date <= %s::date" in sql
-    assert "2026-01-01" in params
+    assert "d.modify_date < %s" in sql
+    assert date(2026, 1, 2) in params
 
 
 def test_search_dockets_postgres_both_dates():
@@ -220,10 +184,9 @@ def test_search_dockets_postgres_both_dates():
     db._search_dockets_postgres("test", start_date="2025-01-01", end_date="2026-01-01")
     assert len(db.conn.cursor_obj.executed) > 0, "No SQL was executed"
     sql, params = db.conn.cursor_obj.executed[0]
-    assert "d.modify_date::date >= %s::date" in sql
-    assert "d.modify_date::date <= %s::date" in sql
-    assert "2025-01-01" in params
-    assert "2026-01-01" in params
+    assert "d.modify_date >= %s" in sql
+    assert "d.modify_date < %s" in sql
+    assert params[1:] == [date(2025, 1, 1), date(2026, 1, 2)]
 
 
 # --- collection methods ---
@@ -0,0 +1,95 @@
+"""
+Tests for the psycopg 3 ``DBLayer`` backend (``mirrsearch.db_psycopg``).
+"""
+import os
+from unittest.mock import MagicMock
+
+import pytest
+
+psycopg = pytest.importorskip("psycopg")
+
+# pylint: disable=wrong-import-position
+import mirrsearch.db as db_module
+from mirrsearch import db_psycopg
+from mirrsearch.db import DBLayer
+from mirrsearch.db_psycopg import PsycopgDBLayer
+# pylint: enable=wrong-import-position
+
+
+@pytest.mark.parametrize("raw, expected", [
+    (None, 5), ("0", 0), ("12", 12), ("none", None), (" None ", None), ("-1", 5), ("x", 5),
+])
+def test_prepare_threshold_from_env(monkeypatch, raw, expected):
+    if raw is None:
+        monkeypatch.delenv("DB_PREPARE_THRESHOLD", raising=False)
+    else:
+        monkeypatch.setenv("DB_PREPARE_THRESHOLD", raw)
+    assert db_psycopg.prepare_threshold_from_env() == expected
+
+
+def test_connect_maps_psycopg2_kwargs(monkeypatch):
+    captured = {}
+    monkeypatch.setattr(db_psycopg.psycopg, "connect", lambda **kw: captured.update(kw) or "c")
+    monkeypatch.setenv("DB_PREPARE_THRESHOLD", "2")
+    assert db_psycopg.connect(host="h", database="mirrulations", user="u") == "c"
+    assert captured == {
+        "host": "h", "dbname": "mirrulations", "user": "u",
+        "prepare_threshold": 2, "cursor_factory": db_psycopg.BinaryCursor,
+    }
+
+
+def test_independent_statements_share_a_pipeline():
+    conn = MagicMock()
+    conn.cursor.return_value.__enter__.return_value.fetchone.return_value = (7,)
+    assert PsycopgDBLayer(conn).create_collection("a@x.org", "mine") == 7
+    conn.pipeline.return_value.__enter__.assert_called_once()
+    conn.pipeline.return_value.__exit__.assert_called_once()
+    DBLayer(conn).create_download_job("a@x.org", ["D-1"])
+    conn.pipeline.assert_called_once()
+
+
+def test_get_postgres_connection_selects_psycopg3(monkeypatch):
+    monkeypatch.setenv("USE_AWS_SECRETS", "false")
+    monkeypatch.setenv("DB_DRIVER", "psycopg")
+    monkeypatch.setenv("DB_NAME", "mirrulations")
+    for var in ("DB_REPLICA_HOST", "DB_REPLICA_PORT", "DB_REPLICA_NAME"):
+        monkeypatch.delenv(var, raising=False)
+    monkeypatch.setattr(db_module, "LOAD_DOTENV", None)
+    monkeypatch.setattr(db_psycopg, "connect", lambda **kw: kw)
+    db = db_module.get_postgres_connection()
+    assert isinstance(db, PsycopgDBLayer)
+    assert db.conn["database"] == "mirrulations"
+
+
+def test_get_db_falls_back_when_psycopg3_cannot_connect(monkeypatch):
+    monkeypatch.setattr(db_module, "LOAD_DOTENV", None)
+
+    def refuse():
+        raise psycopg.OperationalError("connection refused")
+
+    monkeypatch.setattr(db_module, "get_postgres_connection", refuse)
+    db = db_module.get_db()
+    assert isinstance(db, DBLayer) and not db.connected
+
+
+# --- against Postgres ---
+
+@pytest.fixture(name="pg_db")
+def fixture_pg_db():
+    dsn = os.getenv("TEST_DATABASE_URL")
+    if not dsn:
+        pytest.skip("TEST_DATABASE_URL not set")
+    conn = psycopg.connect(dsn, cursor_factory=db_psycopg.BinaryCursor, prepare_threshold=0)
+    yield PsycopgDBLayer(conn)
+    conn.close()
+
+
+@pytest.mark.integration
+def test_binary_prepared_queries(pg_db):
+    with pg_db.conn.cursor() as cur:
+        assert cur.format == psycopg.pq.Format.BINARY
+        cur.execute("SELECT %s::int + 1, now()", (41,))
+        assert cur.fetchone()[0] == 42
+        assert cur.pgresult.fformat(0) == psycopg.pq.Format.BINARY
+    pg_db.conn.rollback()
+    assert isinstance(pg_db.get_agencies(), list)
@@ -0,0 +1,175 @@
+"""
+Tests for read-replica routing (``mirrsearch.db_routing``) and how ``DBLayer``
+and ``get_postgres_connection`` use it.
+"""
+from unittest.mock import MagicMock
+
+import psycopg2
+import pytest
+
+import mirrsearch.db as db_module
+from mirrsearch import db_routing
+from mirrsearch.db import DBLayer
+from mirrsearch.db_routing import ConnectionRouter
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+class FakePool:
+    def __init__(self, name, lag=0.0, fail=False):
+        self.name = name
+        self.lag = lag
+        self.fail = fail
+        self.borrowed = []
+        self.returned = []
+
+    def getconn(self):
+        if self.fail:
+            raise psycopg2.OperationalError(f"{self.name} down")
+        conn = MagicMock(name=self.name, closed=0)
+        cur = conn.cursor.return_value.__enter__.return_value
+        cur.fetchone.return_value = (self.lag,)
+        cur.fetchall.return_value = []
+        conn.pool_name = self.name
+        self.borrowed.append(conn)
+        return conn
+
+    def putconn(self, conn, close=False):
+        self.returned.append((conn, close))
+
+
+def _router(replica=None, **kwargs):
+    clock = FakeClock()
+    router = ConnectionRouter(
+        FakePool("primary"), replica if replica is not None else FakePool("replica"),
+        clock=clock, **kwargs
+    )
+    return router, clock
+
+
+def _pool_used(router, **kwargs):
+    with router.connection(**kwargs) as conn:
+        return conn.pool_name
+
+
+def test_reads_use_replica_and_writes_use_primary():
+    router, _clock = _router()
+    assert _pool_used(router) == "replica"
+    assert _pool_used(router, write=True) == "primary"
+    assert _pool_used(router, fresh=True) == "primary"
+
+
+def test_connections_are_rolled_back_and_returned():
+    router, _clock = _router()
+    with router.connection() as conn:
+        pass
+    conn.rollback.assert_called()
+    assert router.replica.returned[-1] == (conn, False)
+    with pytest.raises(ValueError):
+        with router.connection(write=True, user="a@x.org") as conn:
+            raise ValueError("boom")
+    conn.rollback.assert_called_once()
+    assert router.primary.returned == [(conn, False)]
+    assert not router.is_sticky("a@x.org")
+
+
+def test_writer_reads_primary_until_sticky_window_expires():
+    router, clock = _router(sticky_seconds=30)
+    with router.connection(write=True, user="a@x.org"):
+        pass
+    assert _pool_used(router, user="a@x.org") == "primary"
+    assert _pool_used(router, user="b@x.org") == "replica"
+    clock.advance(31)
+    assert _pool_used(router, user="a@x.org") == "replica"
+
+
+def test_lagging_replica_falls_back_until_next_check():
+    router, clock = _router(FakePool("replica", lag=12.0), max_lag_seconds=5,
+                            lag_check_seconds=10)
+    assert _pool_used(router) == "primary"
+    router.replica.lag = 1.0
+    clock.advance(5)
+    assert _pool_used(router) == "primary"
+    clock.advance(5)
+    assert _pool_used(router) == "replica"
+
+
+def test_unreachable_replica_falls_back_to_primary():
+    router, _clock = _router(FakePool("replica", fail=True))
+    assert router.replica_lag() is None
+    assert _pool_used(router) == "primary"
+
+
+def test_replica_failing_after_lag_check_falls_back():
+    router, _clock = _router()
+    router.replica_usable()
+    router.replica.fail = True
+    assert _pool_used(router) == "primary"
+    assert router.replica_usable() is False
+
+
+def test_no_replica_always_uses_primary():
+    router = ConnectionRouter(FakePool("primary"))
+    assert _pool_used(router) == "primary"
+
+
+def test_dblayer_reads_own_collection_write_from_primary():
+    router, _clock = _router()
+    db = DBLayer(router=router)
+    assert db.connected
+    db.get_agencies()
+    assert router.replica.borrowed and not router.primary.borrowed
+    db.create_collection("a@x.org", "mine")
+    db.get_collections("a@x.org")
+    db.is_admin("b@x.org")
+    assert len(router.primary.borrowed) == 3
+    assert len(router.replica.returned) == len(router.replica.borrowed)
+
+
+def test_get_postgres_connection_builds_router_with_replica(monkeypatch):
+    for var, value in {
+        "USE_AWS_SECRETS": "false", "DB_HOST": "primary.local", "DB_PASSWORD": "pw",
+        "DB_REPLICA_HOST": "replica.local", "DB_REPLICA_MAX_LAG_SECONDS": "2.5",
+        "DB_POOL_MAX": "4",
+    }.items():
+        monkeypatch.setenv(var, value)
+    monkeypatch.setattr(db_module, "LOAD_DOTENV", None)
+    pools = []
+
+    def fake_make_pool(minconn, maxconn, **kwargs):
+        pools.append((minconn, maxconn, kwargs))
+        return FakePool(kwargs["host"])
+
+    monkeypatch.setattr(db_routing, "make_pool", fake_make_pool)
+    db = db_module.get_postgres_connection()
+    assert db.conn is None and db.router.max_lag_seconds == 2.5
+    replica_kwargs, primary_kwargs = pools[0][2], pools[1][2]
+    assert replica_kwargs["host"] == "replica.local"
+    assert replica_kwargs["password"] == primary_kwargs["password"] == "pw"
+    assert primary_kwargs["host"] == "primary.local"
+    assert pools[0][:2] == (1, 4)
+
+
+def test_get_postgres_connection_survives_replica_outage(monkeypatch, capsys):
+    monkeypatch.setenv("USE_AWS_SECRETS", "false")
+    monkeypatch.setenv("DB_REPLICA_HOST", "replica.local")
+    monkeypatch.setattr(db_module, "LOAD_DOTENV", None)
+
+    def fake_make_pool(_minconn, _maxconn, **kwargs):
+        if kwargs["host"] == "replica.local":
+            raise psycopg2.OperationalError("no route")
+        return FakePool("primary")
+
+    monkeypatch.setattr(db_routing, "make_pool", fake_make_pool)
+    db = db_module.get_postgres_connection()
+    assert db.router.replica is None
+    assert "Read replica unavailable" in capsys.readouterr().out
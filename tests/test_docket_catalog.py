@@ -0,0 +1,291 @@
+"""
+Tests for the in-process docket catalog (``docket_catalog.py``) and the
+``DBLayer`` methods it serves.
+
+The ``integration`` test checks it filters OpenSearch hits exactly like the
+SQL filters on a real Postgres when ``TEST_DATABASE_URL`` is set.
+"""
+# pylint: disable=redefined-outer-name,unused-import,too-few-public-methods
+from datetime import datetime, timezone
+from unittest.mock import MagicMock
+
+import pytest
+from test_combined_search import pg  # integration fixture
+
+import mirrsearch.db as db_module
+from mirrsearch.db import DBLayer
+from mirrsearch.docket_catalog import LOAD_SQL, MISSES_SQL, REFRESH_SQL, DocketCatalog
+from mirrsearch.docket_result import DocketResult
+
+
+def _ts(day, hour=0):
+    return datetime(2025, 3, day, hour, tzinfo=timezone.utc)
+
+
+def _refs(*pairs):
+    by_title = {}
+    for title, part in pairs:
+        by_title.setdefault(title, {})[part] = f"https://ecfr/{title}/{part}"
+    return [{"title": t, "cfrParts": parts} for t, parts in by_title.items()]
+
+
+ROWS = [
+    ("EPA-1", "Clean water", "EPA", "Rulemaking", _ts(1), True, _refs(("40", "80"))),
+    ("EPA-HQ-2", "Air", "EPA-HQ", "Nonrulemaking", _ts(3, 23), True,
+     _refs(("40", "81"), ("40", "82"))),
+    ("CMS-3", "Medicare", "CMS", "Rulemaking", _ts(5), True, _refs(("42", "80"))),
+    ("FAA-4", "No documents", "FAA", "Rulemaking", _ts(6), False, []),
+]
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+class FakeConn:
+    def __init__(self, rows=None):
+        self.rows = list(ROWS if rows is None else rows)
+        self.executed = []
+        self.cursor_obj = MagicMock()
+        self.cursor_obj.__enter__.return_value = self.cursor_obj
+        self.cursor_obj.execute.side_effect = lambda sql, params=None: self.executed.append(
+            (sql, params))
+        self.cursor_obj.fetchall.side_effect = lambda: list(self.rows)
+
+    def cursor(self):
+        return self.cursor_obj
+
+
+@pytest.fixture
+def catalog():
+    cat = DocketCatalog(refresh_seconds=60, reload_seconds=3600, clock=FakeClock())
+    cat.load(FakeConn())
+    return cat
+
+
+class InlineThread:
+    """``threading.Thread`` stand-in that runs its target when started."""
+    started = []
+
+    def __init__(self, target, **_kw):
+        self.target = target
+
+    def start(self):
+        InlineThread.started.append(self)
+        self.target()
+
+
+@pytest.fixture
+def inline_threads(monkeypatch):
+    InlineThread.started = []
+    monkeypatch.setattr(db_module.threading, "Thread", InlineThread)
+    return InlineThread.started
+
+
+def test_load_builds_columns_and_reports_memory(caplog):
+    cat = DocketCatalog()
+    assert not cat.loaded
+    with caplog.at_level("INFO", logger="mirrsearch.docket_catalog"):
+        cat.load(FakeConn())
+    assert cat.loaded and len(cat) == 4
+    assert cat.memory_bytes() > 0
+    assert "Docket catalog loaded 4 dockets" in caplog.text
+    assert cat.agencies() == ["CMS", "EPA", "EPA-HQ", "FAA"]
+
+
+def test_filter_ids_keeps_hit_order_and_drops_unknown(catalog):
+    hits = ["CMS-3", "NOPE", "EPA-1", "FAA-4", "CMS-3", "EPA-HQ-2"]
+    assert catalog.filter_ids(hits) == ["CMS-3", "EPA-1", "EPA-HQ-2"]
+    assert catalog.filter_ids(hits, docket_type_param="Rulemaking") == ["CMS-3", "EPA-1"]
+    assert catalog.filter_ids(hits, docket_type_param="Unknown") == []
+    assert catalog.filter_ids(hits, agency=["epa"]) == ["EPA-1", "EPA-HQ-2"]
+    assert catalog.filter_ids(hits, agency=["epa-hq", "cms"]) == ["CMS-3", "EPA-HQ-2"]
+    assert catalog.filter_ids(hits, agency=["MS"]) == []
+    assert catalog.filter_ids(hits, agency=["cms", "zzz"]) == ["CMS-3"]
+    assert catalog.filter_ids(hits, agency=["", None]) == ["CMS-3", "EPA-1", "EPA-HQ-2"]
+
+
+def test_filter_ids_dates_are_whole_days(catalog):
+    hits = ["EPA-1", "EPA-HQ-2", "CMS-3"]
+    assert catalog.filter_ids(hits, start_date="2025-03-02", end_date="2025-03-03") == [
+        "EPA-HQ-2"
+    ]
+    assert catalog.filter_ids(hits, end_date="2025-03-01") == ["EPA-1"]
+    assert catalog.filter_ids(hits, start_date="2025-03-04T10:00:00") == ["CMS-3"]
+
+
+def test_filter_ids_cfr(catalog):
+    hits = ["EPA-1", "EPA-HQ-2", "CMS-3"]
+    assert catalog.filter_ids(hits, cfr_part_param=["80"]) == ["EPA-1", "CMS-3"]
+    assert catalog.filter_ids(hits, cfr_part_param=[{"title": "42", "part": "80"}]) == ["CMS-3"]
+    assert catalog.filter_ids(hits, cfr_part_param=[{"part": "82"}, " "]) == ["EPA-HQ-2"]
+
+
+def test_get_rows_newest_first(catalog):
+    rows = catalog.get_rows(["EPA-1", "CMS-3", "FAA-4"])
+    assert [r["docket_id"] for r in rows] == ["CMS-3", "EPA-1"]
+    assert rows[1] == {
+        "docket_id": "EPA-1", "docket_title": "Clean water", "agency_id": "EPA",
+        "docket_type": "Rulemaking", "modify_date": _ts(1), "cfr_refs": ROWS[0][6],
+    }
+    found = catalog.lookup(["EPA-1", "FAA-4"])
+    assert set(found) == {"EPA-1"}
+    assert found["EPA-1"] == DocketResult(
+        "EPA-1", "Clean water", "EPA", "Rulemaking", _ts(1), ROWS[0][6])
+
+
+def test_incremental_refresh_upserts_from_watermark(catalog):
+    conn = FakeConn([
+        ("CMS-3", "Medicare renamed", "CMS", "Rulemaking", _ts(7), True, []),
+        ("FDA-5", "Food", "FDA", "Rulemaking", _ts(8), True, []),
+    ])
+    catalog.refresh(conn)
+    assert conn.executed == [(REFRESH_SQL, (_ts(6),))]
+    assert len(catalog) == 5
+    assert catalog.get_rows(["CMS-3"])[0]["docket_title"] == "Medicare renamed"
+    assert catalog.filter_ids(["CMS-3"], cfr_part_param=["80"]) == []
+    assert catalog.agencies() == ["CMS", "EPA", "EPA-HQ", "FAA", "FDA"]
+    catalog.refresh(FakeConn([]))
+    assert catalog.get_rows(["FDA-5"])[0]["modify_date"] == _ts(8)
+
+
+def test_misses_are_read_by_id_on_the_next_refresh(catalog):
+    assert catalog.unverified_ids(["EPA-1", "OLD-7", "FAA-4", "OLD-7"]) == ["OLD-7", "FAA-4"]
+    old = ("OLD-7", "Ingested late", "EPA", "Rulemaking", _ts(1), True, [])
+    conn = FakeConn([old])
+    catalog.refresh(conn)
+    assert conn.executed == [(REFRESH_SQL, (_ts(6),)), (MISSES_SQL, (["FAA-4", "OLD-7"],))]
+    assert catalog.filter_ids(["OLD-7"], agency=["epa"]) == ["OLD-7"]
+    # Checked once per full load.
+    assert catalog.unverified_ids(["FAA-4"]) == ["FAA-4"]
+    conn = FakeConn([])
+    catalog.refresh(conn)
+    assert conn.executed == [(REFRESH_SQL, (_ts(6),))]
+
+
+def test_get_dockets_by_ids_falls_back_to_sql_on_a_miss(catalog):
+    conn = MagicMock()
+    cur = conn.cursor.return_value.__enter__.return_value
+    cur.fetchall.return_value = [
+        ("OLD-7", "Ingested late", "EPA", "Rulemaking", _ts(1), None, None, None)
+    ]
+    rows = DBLayer(conn, catalog=catalog).get_dockets_by_ids(["OLD-7"])
+    assert [r["docket_id"] for r in rows] == ["OLD-7"]
+
+
+def test_refresh_reloads_when_due():
+    clock = FakeClock()
+    cat = DocketCatalog(refresh_seconds=60, reload_seconds=3600, clock=clock)
+    assert cat.claim_refresh()
+    assert not cat.claim_refresh()
+    conn = FakeConn()
+    cat.refresh(conn)
+    assert conn.executed == [(LOAD_SQL, None)]
+    clock.advance(61)
+    assert cat.claim_refresh()
+    clock.advance(3600)
+    reload_conn = FakeConn(ROWS[:1])
+    cat.refresh(reload_conn)
+    assert reload_conn.executed == [(LOAD_SQL, None)]
+    assert len(cat) == 1
+
+
+def test_dblayer_serves_metadata_from_catalog(catalog):
+    conn = MagicMock()
+    db = DBLayer(conn, catalog=catalog)
+    assert db.get_agencies() == ["CMS", "EPA", "EPA-HQ", "FAA"]
+    assert [r["docket_id"] for r in db.get_dockets_by_ids(["EPA-1", "CMS-3"])] == [
+        "CMS-3", "EPA-1"
+    ]
+    conn.cursor.assert_not_called()
+
+
+def test_search_with_hits_hydrates_from_catalog(catalog):  # pylint: disable=too-many-locals
+    conn = MagicMock()
+    cur = conn.cursor.return_value.__enter__.return_value
+    new_docket = ("NEW-9", "Brand new", "EPA", "Rulemaking", _ts(9), None, None, None)
+    cur.fetchall.side_effect = [
+        [("NEW-9", 1, True), ("EPA-1", 5, True), ("EPA-HQ-2", 2, False)],
+        [new_docket],
+    ]
+    db = DBLayer(conn, catalog=catalog)
+    title_rows, full_text_rows = db.search_with_hits(
+        "water", ["EPA-HQ-2", "CMS-3", "FAA-4"], agency=["epa"]
+    )
+    search, hydrate = [c.args for c in cur.execute.call_args_list]
+    assert "row_number() OVER" in search[0] and "docket_cfr dc" not in search[0]
+    assert "ids.filtered OR EXISTS" in search[0]
+    # FAA-4 has no documents in the catalog, so Postgres filters it again.
+    assert search[1] == [
+        "%water%", ["EPA", "EPA-HQ"], ["EPA-HQ-2", "FAA-4"], [True, False], ["EPA", "EPA-HQ"],
+    ]
+    assert "WHERE d.docket_id = ANY(%s)" in hydrate[0] and hydrate[1] == (["NEW-9"],)
+    assert [(r.docket_id, r.document_total_count, r.match_source) for r in title_rows] == [
+        ("NEW-9", 1, "title"), ("EPA-1", 5, "title")
+    ]
+    assert (full_text_rows[0].docket_title, full_text_rows[0].match_source) == ("Air", "full_text")
+
+
+def test_due_refresh_runs_off_the_request(catalog, monkeypatch):
+    started = []
+    monkeypatch.setattr(
+        db_module.threading, "Thread",
+        lambda target, **kw: MagicMock(start=lambda: started.append((target, kw))),
+    )
+    conn = FakeConn([("FDA-5", "Food", "FDA", "Rulemaking", _ts(8), True, [])])
+    db = DBLayer(conn, catalog=catalog)
+    catalog._clock.advance(61)  # pylint: disable=protected-access
+    assert db.get_agencies() == ["CMS", "EPA", "EPA-HQ", "FAA"]
+    assert not conn.executed and len(started) == 1
+    assert not catalog.claim_refresh()
+    started[0][0]()
+    assert conn.executed == [(REFRESH_SQL, (_ts(6),))]
+    assert db.get_agencies()[-1] == "FDA" and len(started) == 1
+
+
+def test_failed_catalog_load_falls_back_to_sql(capsys, inline_threads):
+    conn = MagicMock()
+    cur = conn.cursor.return_value.__enter__.return_value
+    cur.execute.side_effect = [RuntimeError("db down"), None]
+    cur.fetchall.return_value = [("EPA",)]
+    db = DBLayer(conn, catalog=DocketCatalog())
+    assert db.get_agencies() == ["EPA"]
+    assert "Docket catalog refresh failed: db down" in capsys.readouterr().out
+    assert len(inline_threads) == 1
+
+
+def test_get_db_loads_catalog_when_enabled(monkeypatch):
+    conn = FakeConn()
+    monkeypatch.setenv("DOCKET_CATALOG", "1")
+    monkeypatch.setattr(db_module, "LOAD_DOTENV", None)
+    monkeypatch.setattr(db_module, "get_postgres_connection", lambda: DBLayer(conn))
+    db = db_module.get_db()
+    assert db.catalog.loaded and len(db.catalog) == 4
+    monkeypatch.delenv("DOCKET_CATALOG")
+    assert db_module.get_db().catalog is None
+
+
+@pytest.mark.integration
+@pytest.mark.parametrize("filters", [
+    {}, {"agency": ["epa"]}, {"agency": ["cms", "zzz"]}, {"cfr_part_param": ["80"]},
+    {"start_date": "2020-01-10", "end_date": "2020-02-20"},
+    {"docket_type_param": "Rulemaking", "cfr_part_param": [{"title": "40", "part": "81"}]},
+])
+def test_catalog_filters_like_sql(pg, filters):
+    os_ids = [f"D-{g}" for g in range(1, 121, 2)] + ["D-7", "missing"]
+    sql_rows = DBLayer(pg).search_with_hits("no title matches this", os_ids, **filters)[1]
+    cat = DocketCatalog()
+    cat.load(pg)
+    pg.rollback()
+    assert cat.filter_ids(os_ids, **filters) == [r.docket_id for r in sql_rows]
+    with_catalog = DBLayer(pg, catalog=cat).search_with_hits(
+        "no title matches this", os_ids, **filters)[1]
+    assert with_catalog == sql_rows
+    pg.rollback()
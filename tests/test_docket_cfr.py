@@ -0,0 +1,72 @@
+"""
+Tests for ``db/docket_cfr.py`` (docket → CFR part map refreshes) and the
+loaders that call them.
+"""
+import sys
+from pathlib import Path
+from unittest.mock import MagicMock
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "db"))
+
+# pylint: disable=wrong-import-position,import-error
+import docket_cfr
+import ingest_docket
+from bulk_copy import MergeResult
+from docket_source import S3DocketSource
+from test_docket_source import DOCKET, FakeS3, _bundle
+# pylint: enable=wrong-import-position,import-error
+
+
+def _statements(cur):
+    return [c.args for c in cur.execute.call_args_list]
+
+
+def test_refresh_for_frdocnums_dedupes_keys():
+    cur = MagicMock()
+    docket_cfr.refresh_for_frdocnums(cur, ["2025-2", "2025-1", "2025-2", None])
+    ((sql, params),) = _statements(cur)
+    assert sql == docket_cfr.REFRESH_FRDOCNUMS_SQL
+    assert "cp.frdocnum = ANY(%s)" in sql
+    assert "ON CONFLICT (docket_id, title, cfrpart) DO UPDATE" in sql
+    assert params == (["2025-1", "2025-2"],)
+
+
+def test_refresh_for_dockets_replaces_rows():
+    cur = MagicMock()
+    docket_cfr.refresh_for_dockets(cur, ["CMS-1"])
+    (delete, insert) = _statements(cur)
+    assert delete == ("DELETE FROM docket_cfr WHERE docket_id = ANY(%s)", (["CMS-1"],))
+    assert insert == (docket_cfr.REFRESH_DOCKETS_SQL, (["CMS-1"],))
+
+
+def test_refresh_links_and_empty_input():
+    cur = MagicMock()
+    docket_cfr.refresh_links(cur, [])
+    docket_cfr.refresh_for_frdocnums(cur, [])
+    docket_cfr.refresh_for_dockets(cur, [""])
+    cur.execute.assert_not_called()
+    docket_cfr.refresh_links(cur, ["42", "40", "42"])
+    ((sql, params),) = _statements(cur)
+    assert sql.lstrip().startswith("UPDATE docket_cfr") and params == (["40", "42"],)
+
+
+def test_ingest_docket_refreshes_mappings(monkeypatch):
+    monkeypatch.setattr(
+        ingest_docket, "copy_upsert", lambda _cur, _target, rows: MergeResult(inserted=len(rows))
+    )
+    conn = MagicMock()
+    cur = conn.cursor.return_value.__enter__.return_value
+    src = S3DocketSource(DOCKET, client=FakeS3(_bundle()))
+    ok, n_docs, _skipped, _docket_id = ingest_docket.ingest_docket_and_documents(src, conn)
+    assert (ok, n_docs) == (True, 1)
+    assert _statements(cur)[-1] == (docket_cfr.REFRESH_DOCKETS_SQL, ([DOCKET],))
+    assert conn.commit.call_count == 3
+
+
+def test_rebuild_all_replaces_table():
+    conn = MagicMock()
+    cur = conn.cursor.return_value.__enter__.return_value
+    cur.rowcount = 3
+    docket_cfr.rebuild_all(conn)
+    assert _statements(cur) == [("DELETE FROM docket_cfr",), (docket_cfr.REBUILD_SQL,)]
+    conn.commit.assert_called_once()
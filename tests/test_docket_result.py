@@ -0,0 +1,58 @@
+"""
+Tests for the slotted search result row (``docket_result.py``).
+"""
+from datetime import date, datetime
+
+import pytest
+
+from mirrsearch.docket_result import DocketResult, as_results
+
+
+def test_rows_are_slotted():
+    row = DocketResult("A")
+    assert not hasattr(row, "__dict__")
+    with pytest.raises(AttributeError):
+        row.document_count = 3  # pylint: disable=assigning-non-slot
+
+
+def test_from_mapping_keeps_unknown_columns():
+    row = DocketResult.from_mapping(
+        {"docket_id": "A", "agency_id": "EPA", "title": "t"}, match_source="title"
+    )
+    assert (row.docket_id, row.agency_id, row.match_source) == ("A", "EPA", "title")
+    assert row.extra == {"title": "t"}
+    assert DocketResult.from_mapping({"docket_id": "A"}).extra is None
+
+
+def test_key_falls_back_to_id():
+    assert DocketResult(docket_id="A").key == "A"
+    assert DocketResult.from_mapping({"id": 7}).key == "7"
+    assert DocketResult(docket_id=12).key == "12"
+
+
+def test_to_response_shape():
+    row = DocketResult(
+        "A", "Clean water", "EPA", "Rulemaking", datetime(2025, 3, 1, 12),
+        [{"title": "40", "cfrParts": {"80": "https://ecfr/80", "81": None}}],
+        "full_text", 2, 3, 10, 20, 0.25, {"note": "x"},
+    )
+    assert row.to_response() == {
+        "docket_id": "A", "docket_title": "Clean water", "agency_id": "EPA",
+        "docket_type": "Rulemaking", "modify_date": "2025-03-01T12:00:00",
+        "match_source": "full_text", "correlation_score": 0.25, "note": "x",
+        "documentNumerator": 2, "commentNumerator": 3,
+        "documentDenominator": 10, "commentDenominator": 20,
+        "cfrPart": [
+            {"title": "40", "part": "80", "link": "https://ecfr/80"},
+            {"title": "40", "part": "81", "link": None},
+        ],
+    }
+    bare = DocketResult("B", modify_date=date(2024, 6, 15)).to_response()
+    assert bare["modify_date"] == "2024-06-15" and "cfrPart" not in bare
+
+
+def test_as_results_reuses_results():
+    existing = DocketResult("A")
+    rows = as_results([existing, {"docket_id": "B"}], "title")
+    assert rows[0] is existing
+    assert [(r.docket_id, r.match_source) for r in rows] == [("A", "title"), ("B", "title")]
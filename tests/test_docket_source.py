@@ -0,0 +1,169 @@
+"""
+Tests for ``db/docket_source.py`` (local and streamed S3 docket sources).
+"""
+import io
+import json
+import sys
+import threading
+from pathlib import Path
+from unittest.mock import MagicMock
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "db"))
+
+# pylint: disable=wrong-import-position,import-error
+from docket_source import LocalDocketSource, S3DocketSource, as_source, read_ahead
+from ingest import ingest_comments_dual_sink
+from ingest_docket import ingest_comments, ingest_docket_and_documents
+# pylint: enable=wrong-import-position,import-error
+
+DOCKET = "FAA-2025-0618"
+TEXT = f"raw-data/FAA/{DOCKET}/text-{DOCKET}/"
+
+
+class FakeS3:
+    """In-memory stand-in for the listing and ``get_object`` calls the source makes."""
+
+    def __init__(self, objects, fail=()):
+        self.objects = objects
+        self.fail = set(fail)
+        self.gets = []
+
+    def get_paginator(self, _name):
+        outer = self
+
+        class Paginator:  # pylint: disable=too-few-public-methods
+            def paginate(self, Bucket, Prefix):  # pylint: disable=invalid-name,unused-argument
+                keys = sorted(k for k in outer.objects if k.startswith(Prefix))
+                for i in range(0, len(keys), 2):
+                    yield {"Contents": [
+                        {"Key": k, "Size": len(outer.objects[k])} for k in keys[i:i + 2]
+                    ]}
+
+        return Paginator()
+
+    def get_object(self, Bucket, Key):  # pylint: disable=invalid-name,unused-argument
+        self.gets.append(Key)
+        if Key in self.fail:
+            raise ConnectionError("reset")
+        return {"Body": io.BytesIO(self.objects[Key])}
+
+
+def _payload(kind, obj_id, **attrs):
+    return {"data": {"id": obj_id, "type": kind, "attributes": attrs,
+                     "links": {"self": f"https://api.regulations.gov/v4/{kind}/{obj_id}"}}}
+
+
+def _comment(comment_id):
+    return _payload(
+        "comments", comment_id, comment="Text", docketId=DOCKET, agencyId="FAA",
+        documentType="Public Submission", postedDate="2025-01-01T00:00:00Z",
+    )
+
+
+def _bundle():
+    objs = {
+        f"{TEXT}docket/{DOCKET}.json": _payload(
+            "dockets", DOCKET, agencyId="FAA", docketType="Rulemaking",
+            modifyDate="2025-01-01T00:00:00Z", title="Drone rules",
+        ),
+        f"{TEXT}documents/{DOCKET}-0001.json": _payload(
+            "documents", f"{DOCKET}-0001", docketId=DOCKET, agencyId="FAA",
+            documentType="Rule", modifyDate="2025-01-01T00:00:00Z",
+        ),
+    }
+    for i in range(2, 7):
+        objs[f"{TEXT}comments/{DOCKET}-{i:04d}.json"] = _comment(f"{DOCKET}-{i:04d}")
+    data = {k: json.dumps(v).encode() for k, v in objs.items()}
+    data[f"{TEXT}comments/nested/ignored.json"] = b"{}"
+    data[f"{TEXT}comments/readme.txt"] = b"not json"
+    return data
+
+
+class TestReadAhead:
+    def test_preserves_order_and_bounds_in_flight(self):
+        lock = threading.Lock()
+        state = {"now": 0, "peak": 0}
+
+        def fetch(i):
+            with lock:
+                state["now"] += 1
+                state["peak"] = max(state["peak"], state["now"])
+            with lock:
+                state["now"] -= 1
+            return i * i
+
+        out = list(read_ahead(range(20), fetch, depth=3))
+        assert out == [(i, i * i) for i in range(20)]
+        assert state["peak"] <= 3
+
+    def test_depth_floor_and_empty(self):
+        assert not list(read_ahead([], str, depth=0))
+        assert list(read_ahead([1], str, depth=0)) == [(1, "1")]
+
+
+class TestS3Source:
+    def test_lists_only_top_level_json(self):
+        src = S3DocketSource(DOCKET.lower(), client=FakeS3(_bundle()))
+        assert src.docket_id == DOCKET
+        assert src.names("comments") == [f"{DOCKET}-{i:04d}.json" for i in range(2, 7)]
+        assert str(src) == f"s3://mirrulations/{TEXT}"
+
+    def test_streams_without_touching_disk(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        s3 = FakeS3(_bundle())
+        src = S3DocketSource(DOCKET, client=s3, read_ahead_depth=2)
+        payloads = list(src.iter_json("comments"))
+        assert [p["data"]["id"] for _, p in payloads] == [f"{DOCKET}-{i:04d}" for i in range(2, 7)]
+        assert not list(tmp_path.iterdir())
+
+    def test_unreadable_objects_yield_none(self, monkeypatch):
+        monkeypatch.setattr("docket_source.time.sleep", lambda _s: None)
+        bad = f"{TEXT}comments/{DOCKET}-0002.json"
+        data = _bundle()
+        data[f"{TEXT}comments/{DOCKET}-0003.json"] = b"{broken"
+        s3 = FakeS3(data, fail={bad})
+        got = dict(S3DocketSource(DOCKET, client=s3).iter_json("comments"))
+        assert got[f"{DOCKET}-0002.json"] is None
+        assert got[f"{DOCKET}-0003.json"] is None
+        assert s3.gets.count(bad) == 3
+
+
+class TestLocalSource:  # pylint: disable=too-few-public-methods
+    def test_matches_s3_source(self, tmp_path):
+        for key, body in _bundle().items():
+            path = tmp_path / DOCKET / "raw-data" / key[len(TEXT):]
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(body)
+        (tmp_path / DOCKET / "raw-data" / "comments" / "bad.json").write_text("{")
+        local = as_source(tmp_path / DOCKET)
+        assert isinstance(local, LocalDocketSource)
+        assert as_source(local) is local
+        assert local.docket_id == DOCKET
+        remote = S3DocketSource(DOCKET, client=FakeS3(_bundle()))
+        assert local.names("documents") == remote.names("documents")
+        assert dict(local.iter_json("comments"))["bad.json"] is None
+
+
+class TestIngestFromS3:
+    def test_docket_documents_and_comments_dry_run(self):
+        src = S3DocketSource(DOCKET, client=FakeS3(_bundle()))
+        ok, n_docs, skipped, docket_id = ingest_docket_and_documents(src, None, dry_run=True)
+        assert (ok, n_docs, skipped, docket_id) == (True, 1, 0, DOCKET)
+        assert ingest_comments(src, None, dry_run=True) == (5, 0)
+
+    def test_dual_sink_reads_stream(self):
+        src = S3DocketSource(DOCKET, client=FakeS3(_bundle()))
+        client = MagicMock()
+        client.indices.exists.return_value = True
+        client.bulk.return_value = {"errors": False, "items": []}
+        processed, skipped, _stats = ingest_comments_dual_sink(src, None, client)
+        assert (processed, skipped) == (5, 0)
+        indexed = client.bulk.call_args_list[0].kwargs["body"]
+        assert len(indexed) == 10
+        # All five bodies are the same form letter: one representative keeps the text.
+        assert sum("commentText" in body for body in indexed[1::2]) == 1
+        assert client.bulk.call_args.kwargs["body"][1] == {"doc": {"clusterSize": 5}}
+
+    def test_missing_docket_json(self):
+        src = S3DocketSource(DOCKET, client=FakeS3({}))
+        assert ingest_docket_and_documents(src, None, dry_run=True) == (False, 0, 0, None)
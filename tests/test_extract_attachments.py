@@ -0,0 +1,127 @@
+"""
+Tests for ``db/extract_attachments.py`` (attachment binary → extracted text stage).
+"""
+import os
+import sys
+import time
+import zipfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "db"))
+
+# pylint: disable=wrong-import-position,import-error
+import extract_attachments as ea
+# pylint: enable=wrong-import-position,import-error
+
+DOCKET = "FAA-2025-0618"
+DOCX_XML = (
+    '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+    "<w:body><w:p><w:r><w:t>Drones are</w:t></w:r><w:r><w:t> loud.</w:t></w:r></w:p>"
+    "<w:p><w:r><w:tab/><w:t>Second paragraph.</w:t></w:r></w:p></w:body></w:document>"
+)
+
+
+def _docx(path):
+    with zipfile.ZipFile(path, "w") as zf:
+        zf.writestr("word/document.xml", DOCX_XML)
+
+
+def _docket(root, name=DOCKET):
+    binary = root / name / "raw-data" / f"binary-{name}" / "comments_attachments"
+    binary.mkdir(parents=True)
+    _docx(binary / f"{name}-0002_attachment_1.docx")
+    (binary / f"{name}-0003_attachment_2.txt").write_text("plain attachment", encoding="utf-8")
+    (binary / f"{name}-0004_attachment_1.pdf").write_bytes(b"not really a pdf")
+    (binary / f"{name}-0005_attachment_1.txt").write_text("   ", encoding="utf-8")
+    (binary / f"{name}-0006_attachment_1.txt").write_text("upstream wins", encoding="utf-8")
+    (binary / f"{name}-0001_content.pdf").write_bytes(b"%PDF")
+    upstream = root / name / "derived-data" / "mirrulations" / "extracted_txt" / "pypdf"
+    upstream.mkdir(parents=True)
+    (upstream / f"{name}-0006_attachment_1_extracted.txt").write_text("x", encoding="utf-8")
+    return root / name
+
+
+def _slow(_path):
+    time.sleep(5)
+    return "never"
+
+
+def test_iter_attachment_binaries(tmp_path):
+    found = ea.iter_attachment_binaries(_docket(tmp_path))
+    assert [(a.attachment_id, a.ext) for a in found] == [
+        (f"{DOCKET}-0002_attachment_1", "docx"),
+        (f"{DOCKET}-0003_attachment_2", "txt"),
+        (f"{DOCKET}-0004_attachment_1", "pdf"),
+        (f"{DOCKET}-0005_attachment_1", "txt"),
+        (f"{DOCKET}-0006_attachment_1", "txt"),
+    ]
+    assert not ea.iter_attachment_binaries(tmp_path / "missing")
+
+
+def test_extract_docx(tmp_path):
+    _docx(tmp_path / "a.docx")
+    assert ea.extract_docx(tmp_path / "a.docx") == "Drones are loud.\n\tSecond paragraph."
+
+
+def test_extracts_in_pool_and_reuses_cache(tmp_path):
+    cache = tmp_path / "cache"
+    counts = {}
+    docket_dir = _docket(tmp_path / "a")
+    records = list(ea.extract_attachments(
+        docket_dir, cache_dir=cache, workers=2, memory_mb=0, counts=counts
+    ))
+    assert counts == {"extracted": 2, "empty": 1, "failed": 1}
+    by_id = {r["attachmentId"]: r for r in records}
+    assert set(by_id) == {f"{DOCKET}-0002_attachment_1", f"{DOCKET}-0003_attachment_2"}
+    docx = by_id[f"{DOCKET}-0002_attachment_1"]
+    assert docx["commentId"] == f"{DOCKET}-0002" and docx["extractedMethod"] == "docx"
+    out = Path(docx["extractedTextPath"])
+    assert out.parts[-3:] == (
+        "comments_extracted_text", "docx", f"{DOCKET}-0002_attachment_1_extracted.txt"
+    )
+    assert out.read_text(encoding="utf-8").startswith("Drones are loud.")
+
+    # Same binaries in another docket folder come from the content-hash cache.
+    counts = {}
+    assert len(list(ea.extract_attachments(
+        _docket(tmp_path / "b"), cache_dir=cache, workers=1, memory_mb=0, counts=counts
+    ))) == 2
+    assert counts == {"cached": 2, "empty": 1, "failed": 1}
+    # Files written by the first run count as existing text, and the empty
+    # attachment's marker keeps it from being submitted again.
+    counts = {}
+    assert not list(ea.extract_attachments(
+        docket_dir, cache_dir=cache, workers=1, memory_mb=0, counts=counts
+    ))
+    assert counts == {"failed": 1}
+    assert not list(ea.extract_attachments(tmp_path / "missing", cache_dir=cache))
+
+
+def _crash(_path):
+    os._exit(1)  # pylint: disable=protected-access
+
+
+def test_dead_worker_counts_as_failed(tmp_path, monkeypatch):
+    monkeypatch.setitem(ea.EXTRACTORS, "pdf", ("pypdf", _crash))
+    counts = {}
+    docket_dir = _docket(tmp_path)
+    records = list(ea.extract_attachments(
+        docket_dir, cache_dir=tmp_path / "cache", workers=1, memory_mb=0, counts=counts
+    ))
+    assert sum(counts.values()) == 4 and counts["failed"] >= 1
+    assert len(records) == counts.get("extracted", 0)
+
+
+def test_per_file_timeout(tmp_path, monkeypatch):
+    monkeypatch.setitem(ea.EXTRACTORS, "txt", ("text", _slow))
+    binary = tmp_path / DOCKET / "raw-data" / f"binary-{DOCKET}"
+    binary.mkdir(parents=True)
+    (binary / f"{DOCKET}-0002_attachment_1.txt").write_text("slow", encoding="utf-8")
+    counts = {}
+    start = time.monotonic()
+    assert not list(ea.extract_attachments(
+        tmp_path / DOCKET, cache_dir=tmp_path / "cache", workers=1, timeout=1,
+        memory_mb=0, counts=counts,
+    ))
+    assert counts == {"failed": 1}
+    assert time.monotonic() - start < 4
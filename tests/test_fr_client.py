@@ -0,0 +1,137 @@
+"""
+Tests for ``db/fr_client.py`` (shared Federal Register API client).
+"""
+import io
+import json
+import sys
+import threading
+import urllib.error
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "db"))
+
+# pylint: disable=wrong-import-position,import-error
+from fr_client import FRClient, RateLimiter
+# pylint: enable=wrong-import-position,import-error
+
+
+class FakeResponse(io.BytesIO):
+    def __init__(self, body, headers=None, status=200):
+        super().__init__(body)
+        self.status = status
+        self.headers = headers or {}
+
+
+class FakeAPI:  # pylint: disable=too-few-public-methods
+    """Opener stand-in: ``script`` maps a doc number to a list of outcomes, one per call."""
+
+    def __init__(self, script=None, docs=None):
+        self.script = {k: list(v) for k, v in (script or {}).items()}
+        self.docs = docs or {}
+        self.requests = []
+        self.lock = threading.Lock()
+
+    def __call__(self, request, timeout):  # pylint: disable=unused-argument
+        num = request.full_url.rsplit("/", 1)[-1][:-len(".json")]
+        with self.lock:
+            self.requests.append(request)
+            outcome = self.script[num].pop(0) if self.script.get(num) else 200
+        if outcome == "reset":
+            raise urllib.error.URLError("connection reset")
+        if outcome != 200:
+            headers = {"Retry-After": "0"} if outcome == 429 else {}
+            raise urllib.error.HTTPError(request.full_url, outcome, "err", headers, None)
+        doc = self.docs.get(num, {"document_number": num, "cfr_references": []})
+        return FakeResponse(json.dumps(doc).encode(), {"ETag": f'"v-{num}"'})
+
+
+def _client(tmp_path, api, **kwargs):
+    kwargs.setdefault("rate", 1000)
+    return FRClient(tmp_path / "cache", opener=api, backoff=0, **kwargs)
+
+
+class TestCache:
+    def test_rerun_makes_zero_network_calls(self, tmp_path):
+        api = FakeAPI()
+        nums = [f"2025-{i:05d}" for i in range(20)]
+        first = dict(_client(tmp_path, api).get_documents(nums))
+        assert len(api.requests) == 20
+        assert first["2025-00003"]["document_number"] == "2025-00003"
+
+        again = _client(tmp_path, api)
+        assert dict(again.get_documents(nums)) == first
+        assert len(api.requests) == 20
+        assert again.stats.cache_hits == 20 and again.stats.network_calls == 0
+
+    def test_stale_entry_is_revalidated(self, tmp_path):
+        now = [1000.0]
+        api = FakeAPI(script={"2025-1": [200, 304]})
+        client = _client(tmp_path, api, max_age=60, clock=lambda: now[0])
+        assert client.get_document("2025-1")
+        now[0] += 61
+        stale = _client(tmp_path, api, max_age=60, clock=lambda: now[0])
+        assert stale.get_document("2025-1")["document_number"] == "2025-1"
+        assert api.requests[-1].get_header("If-none-match") == '"v-2025-1"'
+        assert stale.stats.revalidated == 1
+
+    def test_not_found_is_cached(self, tmp_path):
+        api = FakeAPI(script={"missing": [404]})
+        assert _client(tmp_path, api).get_document("missing") == {}
+        assert _client(tmp_path, api).get_document("missing") == {}
+        assert len(api.requests) == 1
+
+    def test_works_without_disk_cache(self):
+        api = FakeAPI()
+        client = FRClient(None, opener=api, rate=1000)
+        client.get_document("a")
+        client.get_document("a")
+        assert len(api.requests) == 1
+
+
+class TestRetries:
+    def test_transient_errors_are_retried(self, tmp_path):
+        api = FakeAPI(script={"2025-9": ["reset", 503, 429, 200]})
+        client = _client(tmp_path, api)
+        assert client.get_document("2025-9")["document_number"] == "2025-9"
+        assert client.stats.retries == 3
+
+    def test_gives_up_and_serves_stale_copy(self, tmp_path):
+        now = [0.0]
+        api = FakeAPI(script={"x": [200] + [503] * 4})
+        _client(tmp_path, api, clock=lambda: now[0]).get_document("x")
+        now[0] += 10 ** 9
+        client = _client(tmp_path, api, clock=lambda: now[0], max_attempts=4)
+        assert client.get_document("x")["document_number"] == "x"
+        assert client.stats.failures == 1
+
+    def test_client_errors_are_not_retried(self, tmp_path):
+        api = FakeAPI(script={"bad": [400]})
+        client = _client(tmp_path, api)
+        assert client.get_document("bad") == {}
+        assert len(api.requests) == 1
+
+
+class TestRateLimiter:  # pylint: disable=too-few-public-methods
+    def test_spaces_requests(self):
+        now = [0.0]
+        slept = []
+
+        def sleep(seconds):
+            slept.append(seconds)
+            now[0] += seconds
+
+        limiter = RateLimiter(4, clock=lambda: now[0], sleep=sleep)
+        for _ in range(5):
+            limiter.acquire()
+        assert slept == [0.25] * 4
+        limiter.pause(2)
+        limiter.acquire()
+        assert slept[-1] == 2
+
+
+def test_get_documents_keeps_order_and_dedupes(tmp_path):
+    api = FakeAPI()
+    client = _client(tmp_path, api, max_workers=4)
+    out = [n for n, _ in client.get_documents(["b", "a", "b", "c"])]
+    assert out == ["b", "a", "c"]
+    assert len(api.requests) == 3
@@ -1,6 +1,7 @@
 """
 Tests for ``db/ingest.py`` and ``db/ingest_docket.py`` (fetch, OpenSearch, FR helpers, mapping).
 """
+# pylint: disable=too-many-lines
 import json
 import sys
 import tempfile
@@ -16,6 +17,7 @@ sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "db"))
 from ingest import (
     OPENSEARCH_COMMENTS_EXTRACTED_TEXT_INDEX,
     OPENSEARCH_COMMENTS_INDEX,
+    _CommentSink,
     collect_frdocnums_from_docket,
     document_content_html_paths,
     extract_frdocnums_from_document_json,
@@ -25,22 +27,56 @@ from ingest import (
     get_document_ID,
     get_htm_files,
     ingest_comment_json_to_opensearch,
+    ingest_comments_dual_sink,
     ingest_extracted_text_to_comments_extracted_text,
     ingest_htm_files,
+    main as ingest_main,
     read_derived_extracted_text,
     read_document_content_html,
 )
 
+from bulk_copy import MergeResult, copy_sql, merge_sql
 from ingest_docket import (
+    COMMENT_COLS,
+    COMMENT_TARGET,
     _normalize_docket_id,
+    _require_ingest_schema,
     extract_comment,
     extract_self_link,
     load_raw_json,
     map_docket,
+    prepare_comment_row,
+    write_comment_batch,
 )
 # pylint: enable=wrong-import-position,import-error
 
 
+def _comment_payload(comment_id: str, docket_id: str = "FAA-2025-0618", **attrs) -> dict:
+    """Minimal regulations.gov comment JSON accepted by both Postgres and OpenSearch."""
+    base = {
+        "comment": f"Text of {comment_id}",
+        "docketId": docket_id,
+        "agencyId": "FAA",
+        "documentType": "Public Submission",
+        "postedDate": "2025-01-01T00:00:00Z",
+    }
+    base.update(attrs)
+    return {
+        "data": {
+            "id": comment_id,
+            "attributes": base,
+            "links": {"self": f"https://api.regulations.gov/v4/comments/{comment_id}"},
+        }
+    }
+
+
+def _write_comments(docket_dir: Path, payloads: list) -> None:
+    cdir = docket_dir / "raw-data" / "comments"
+    cdir.mkdir(parents=True, exist_ok=True)
+    for i, payload in enumerate(payloads):
+        (cdir / f"c{i:04d}.json").write_text(json.dumps(payload), encoding="utf-8")
+
+
 def _docket_dir_with_derived_json_and_plain_txt(tmpdir: str) -> Path:
     """Build a minimal docket tree with one JSON record and one pypdf plain-text file."""
     root = Path(tmpdir) / "FAA-2025-0618"
@@ -742,13 +778,41 @@ class TestIngestExtractedTextOpenSearch:
                 "extractedText": "hello",
             }
         ]
+        mock_client.bulk.return_value = {"errors": False, "items": []}
         n = ingest_extracted_text_to_comments_extracted_text(mock_client, records)
         assert n == 1
-        mock_client.index.assert_called_once()
-        kw = mock_client.index.call_args[1]
-        assert kw["index"] == OPENSEARCH_COMMENTS_EXTRACTED_TEXT_INDEX
-        assert kw["id"] == "C-1_attachment_1"
-        assert kw["body"]["extractedText"] == "hello"
+        mock_client.bulk.assert_called_once()
+        action, body = mock_client.bulk.call_args[1]["body"]
+        assert action["index"]["_index"] == OPENSEARCH_COMMENTS_EXTRACTED_TEXT_INDEX
+        assert action["index"]["_id"] == "C-1_attachment_1#p0"
+        assert body["extractedText"] == "hello"
+        assert (body["passageIndex"], body["startOffset"], body["endOffset"]) == (0, 0, 5)
+
+    def test_streams_file_into_overlapping_passages(self, tmp_path):  # pylint: disable=too-many-locals
+        path = tmp_path / "C-2_attachment_1_extracted.txt"
+        text = " ".join(f"word{i}" for i in range(200))
+        path.write_text(text, encoding="utf-8")
+        mock_client = MagicMock()
+        mock_client.bulk.return_value = {"errors": False, "items": []}
+        records = [{
+            "docketId": "D-2",
+            "commentId": "C-2",
+            "attachmentId": "C-2_attachment_1",
+            "extractedTextPath": str(path),
+        }]
+        n = ingest_extracted_text_to_comments_extracted_text(
+            mock_client, records, passage_chars=300, passage_overlap=50
+        )
+        assert n == 1
+        docs = mock_client.bulk.call_args[1]["body"][1::2]
+        assert len(docs) > 1
+        assert all(d["commentId"] == "C-2" and "extractedTextPath" not in d for d in docs)
+        for doc in docs:
+            assert text[doc["startOffset"]:doc["endOffset"]] == doc["extractedText"]
+        assert docs[1]["startOffset"] < docs[0]["endOffset"]
+        query = mock_client.delete_by_query.call_args[1]["body"]["query"]["bool"]["should"]
+        assert {"range": {"passageIndex": {"gte": len(docs)}}} in query[0]["bool"]["filter"]
+        assert query[-1]["bool"]["must_not"] == [{"exists": {"field": "passageIndex"}}]
 
     def test_skips_empty_text(self):
         mock_client = MagicMock()
@@ -757,7 +821,8 @@ class TestIngestExtractedTextOpenSearch:
             [{"docketId": "D", "commentId": "C", "extractedText": "   "}],
         )
         assert n == 0
-        mock_client.index.assert_not_called()
+        mock_client.bulk.assert_not_called()
+        mock_client.delete_by_query.assert_not_called()
 
 
 class TestIngestDocketNormalizeAndLinks:
@@ -860,3 +925,313 @@ class TestLoadRawJson:
             p = Path(tmpdir) / "bad.json"
             p.write_text("{not json", encoding="utf-8")
             assert load_raw_json(p) is None
+
+
+class TestCommentDualSink:
+    """``ingest_comments_dual_sink`` parses once and feeds both sinks."""
+
+    @patch(
+        "ingest.write_comment_batch",
+        side_effect=lambda conn, batch, *a: MergeResult(
+            inserted=len(batch), changed_keys=[(r[0],) for r in batch]
+        ),
+    )
+    def test_each_file_parsed_once_and_sent_to_both_sinks(self, mock_write):  # pylint: disable=too-many-locals
+        with tempfile.TemporaryDirectory() as tmpdir:
+            docket_dir = Path(tmpdir) / "FAA-2025-0618"
+            _write_comments(
+                docket_dir,
+                [_comment_payload(f"FAA-2025-0618-{i:04d}") for i in range(1, 6)],
+            )
+            client = MagicMock()
+            client.indices.exists.return_value = True
+            client.bulk.return_value = {"errors": False, "items": []}
+
+            with patch("ingest.extract_comment", wraps=extract_comment) as spy:
+                processed, skipped, stats = ingest_comments_dual_sink(
+                    docket_dir, MagicMock(), client
+                )
+
+            assert spy.call_count == 5
+            assert (processed, skipped) == (5, 0)
+            by_name = {st.name: st for st in stats}
+            assert by_name["postgres"].written == 5
+            assert by_name["opensearch"].written == 5
+            rows = [r for call in mock_write.call_args_list for r in call.args[1]]
+            assert len(rows) == 5
+            actions = client.bulk.call_args.kwargs["body"]
+            assert actions[0] == {
+                "index": {"_index": OPENSEARCH_COMMENTS_INDEX, "_id": "FAA-2025-0618-0001"}
+            }
+            assert actions[1]["commentText"] == "Text of FAA-2025-0618-0001"
+
+    @patch("ingest.write_comment_batch", side_effect=RuntimeError("db down"))
+    def test_sink_failures_are_counted_per_sink(self, _mock_write):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            docket_dir = Path(tmpdir) / "FAA-2025-0618"
+            _write_comments(
+                docket_dir,
+                [_comment_payload("FAA-2025-0618-0001"), _comment_payload("FAA-2025-0618-0002")],
+            )
+            client = MagicMock()
+            client.indices.exists.return_value = True
+            client.bulk.return_value = {
+                "errors": True,
+                "items": [
+                    {"index": {"error": {"type": "mapper_parsing_exception"}}},
+                    {"index": {}},
+                ],
+            }
+            conn = MagicMock()
+
+            _, _, stats = ingest_comments_dual_sink(docket_dir, conn, client)
+
+            by_name = {st.name: st for st in stats}
+            assert (by_name["postgres"].written, by_name["postgres"].failed) == (0, 2)
+            assert (by_name["opensearch"].written, by_name["opensearch"].failed) == (1, 1)
+            conn.rollback.assert_called_once()
+            assert "1 failed" in by_name["opensearch"].summary()
+
+    @staticmethod
+    def _only_first_changed(_conn, batch, *_a):
+        return MergeResult(inserted=1, unchanged=len(batch) - 1, changed_keys=[(batch[0][0],)])
+
+    @staticmethod
+    def _none_changed(_conn, batch, *_a):
+        return MergeResult(unchanged=len(batch))
+
+    def test_unchanged_comments_are_not_reindexed(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            docket_dir = Path(tmpdir) / "FAA-2025-0618"
+            _write_comments(
+                docket_dir, [_comment_payload(f"FAA-2025-0618-{i:04d}") for i in range(1, 4)]
+            )
+            client = MagicMock()
+            client.indices.exists.return_value = True
+            client.bulk.return_value = {"errors": False}
+
+            with patch("ingest.write_comment_batch", side_effect=self._only_first_changed):
+                _, _, stats = ingest_comments_dual_sink(
+                    docket_dir, MagicMock(), client, cluster_comments=False
+                )
+            by_name = {st.name: st for st in stats}
+            assert by_name["postgres"].unchanged == 2
+            assert by_name["opensearch"].written == 1
+            assert client.bulk.call_args.kwargs["body"][1]["commentId"] == "FAA-2025-0618-0001"
+
+            client.bulk.reset_mock()
+            with patch("ingest.write_comment_batch", side_effect=self._only_first_changed):
+                _, _, stats = ingest_comments_dual_sink(
+                    docket_dir, MagicMock(), client, reindex_unchanged=True,
+                    cluster_comments=False,
+                )
+            assert {st.name: st for st in stats}["opensearch"].written == 3
+
+    @staticmethod
+    def _index_client(docs: dict) -> MagicMock:
+        """OpenSearch double that applies bulk ``index`` / ``update`` actions to ``docs``."""
+        def bulk(body, **_kw):
+            for action, source in zip(body[::2], body[1::2]):
+                if "index" in action:
+                    docs[action["index"]["_id"]] = dict(source)
+                else:
+                    docs[action["update"]["_id"]].update(source["doc"])
+            return {"errors": False, "items": []}
+
+        def mget(index, body, _source_includes):
+            assert index == OPENSEARCH_COMMENTS_INDEX
+            return {"docs": [
+                {"_id": i, "found": i in docs, "_source": {
+                    f: docs[i][f] for f in _source_includes if f in docs.get(i, {})
+                }}
+                for i in body["ids"]
+            ]}
+
+        client = MagicMock()
+        client.indices.exists.return_value = True
+        client.bulk.side_effect = bulk
+        client.mget.side_effect = mget
+        return client
+
+    @staticmethod
+    def _match_count(docs: dict, word: str) -> int:
+        """Comment hits for ``word`` the way ``DBLayer`` counts them: hits plus cluster members."""
+        hits = [d for d in docs.values() if word in d.get("commentText", "").lower()]
+        return len(hits) + sum(d.get("clusterSize", 1) - 1 for d in hits)
+
+    def test_reingest_with_clustering_keeps_match_counts(self):
+        letter = "Please do not ban drones over the national parks. " * 4
+        with tempfile.TemporaryDirectory() as tmpdir:
+            docket_dir = Path(tmpdir) / "FAA-2025-0618"
+            _write_comments(
+                docket_dir,
+                [_comment_payload(f"FAA-2025-0618-{i:04d}", comment=letter) for i in range(1, 4)]
+                + [_comment_payload("FAA-2025-0618-0004", comment="Ban them all.")],
+            )
+            docs: dict = {}
+            client = self._index_client(docs)
+
+            # First pass before clustering: every comment is indexed with its text.
+            with patch("ingest.write_comment_batch", side_effect=lambda _c, batch, *_a: (
+                    MergeResult(inserted=len(batch), changed_keys=[(r[0],) for r in batch]))):
+                ingest_comments_dual_sink(docket_dir, MagicMock(), client, cluster_comments=False)
+            assert self._match_count(docs, "ban") == 4
+
+            # Later passes change nothing in Postgres but cluster the form letter:
+            # the first re-indexes the comments whose cluster moved, the next nothing.
+            for written, bulk_calls in ((4, 2), (0, 0)):
+                assert self._clustered_pass(docket_dir, client, self._none_changed) == written
+                assert client.bulk.call_count == bulk_calls
+                assert self._match_count(docs, "ban") == 4
+                assert "commentText" not in docs["FAA-2025-0618-0002"]
+                assert docs["FAA-2025-0618-0001"]["clusterSize"] == 3
+
+            # Only the comment whose text changed is re-indexed.
+            assert self._clustered_pass(docket_dir, client, self._only_first_changed) == 1
+
+    @staticmethod
+    def _clustered_pass(docket_dir, client, merge) -> int:
+        """One clustered ingest with ``merge`` as the Postgres outcome; comments indexed."""
+        client.bulk.reset_mock()
+        with patch("ingest.write_comment_batch", side_effect=merge):
+            _, _, stats = ingest_comments_dual_sink(docket_dir, MagicMock(), client)
+        return {st.name: st for st in stats}["opensearch"].written
+
+    def test_unreadable_clusters_reindex_the_batch(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            docket_dir = Path(tmpdir) / "FAA-2025-0618"
+            _write_comments(
+                docket_dir, [_comment_payload(f"FAA-2025-0618-{i:04d}") for i in range(1, 4)]
+            )
+            client = self._index_client({})
+            client.mget.side_effect = RuntimeError("timeout")
+            with patch("ingest.write_comment_batch", side_effect=self._only_first_changed):
+                _, _, stats = ingest_comments_dual_sink(docket_dir, MagicMock(), client)
+            assert {st.name: st for st in stats}["opensearch"].written == 3
+
+    def test_skips_invalid_files_and_runs_without_postgres(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            docket_dir = Path(tmpdir) / "FAA-2025-0618"
+            _write_comments(docket_dir, [_comment_payload("FAA-2025-0618-0001"), {"nope": 1}])
+            client = MagicMock()
+            client.indices.exists.return_value = True
+            client.bulk.return_value = {"errors": False}
+
+            processed, skipped, stats = ingest_comments_dual_sink(docket_dir, None, client)
+
+            assert (processed, skipped) == (1, 1)
+            assert [st.name for st in stats] == ["opensearch"]
+
+    def test_no_comment_files(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            assert ingest_comments_dual_sink(Path(tmpdir), None, None) == (0, 0, [])
+
+
+class TestWriteCommentBatch:
+    """``write_comment_batch`` resolves dangling document ids in SQL via ``comments_stage``."""
+
+    @staticmethod
+    def _conn(dangling_docs=(), merged=()):
+        conn = MagicMock()
+        cur = conn.cursor.return_value.__enter__.return_value
+        cur.fetchall.side_effect = [list(dangling_docs), list(merged)]
+        return conn, cur
+
+    def test_stages_resolves_and_merges(self):
+        conn, cur = self._conn(
+            dangling_docs=[("C-1", "DOC-MISSING")], merged=[("C-1", "D-1", True)]
+        )
+        nulled: dict = {}
+        rows = [prepare_comment_row(extract_comment(_comment_payload("C-1")["data"]), "c.json")]
+
+        result = write_comment_batch(conn, rows, dry_run=False, nulled=nulled)
+
+        assert (result.inserted, result.changed_keys) == (1, [("C-1", "D-1")])
+
+        assert cur.copy_expert.call_args.args[0] == copy_sql(COMMENT_TARGET)
+        sqls = [call.args[0] for call in cur.execute.call_args_list]
+        assert "CREATE TEMP TABLE IF NOT EXISTS comments_stage" in sqls[0]
+        assert sqls[1] == "TRUNCATE comments_stage"
+        assert "p.docket_id = st.docket_id AND p.document_id = st.document_id" in sqls[2]
+        assert sqls[3] == merge_sql(COMMENT_TARGET)
+        assert "ON CONFLICT (comment_id, docket_id)" in sqls[3]
+        assert nulled == {"document": 1}
+        conn.commit.assert_called_once()
+
+    def test_dry_run_and_empty_batch_do_not_touch_db(self):
+        conn = MagicMock()
+        assert write_comment_batch(conn, [], dry_run=False) == MergeResult()
+        assert write_comment_batch(conn, [("x",)], dry_run=True).inserted == 1
+        conn.cursor.assert_not_called()
+
+    def test_prepare_comment_row_requires_fields(self):
+        record = extract_comment(_comment_payload("C-2")["data"])
+        record["posted_date"] = None
+        assert prepare_comment_row(record, "c.json") is None
+
+    def test_prepare_comment_row_fills_partition_key(self):
+        record = extract_comment(_comment_payload("FAA-2025-0618-0007")["data"])
+        record["docket_id"] = None
+        row = prepare_comment_row(record, "c.json")
+        assert row[COMMENT_COLS.index("docket_id")] == "FAA-2025-0618"
+
+
+class TestRequireIngestSchema:
+    ARGS = MagicMock(dbname="mirrulations", host="h", port=5432, user="u")
+    TABLES = [("dockets",), ("documentswithfrdoc",), ("comments",)]
+    MIGRATED_KEYS = [
+        ("dockets", ["docket_id"]),
+        ("documentswithfrdoc", ["docket_id", "document_id"]),
+        ("comments", ["comment_id", "docket_id"]),
+    ]
+
+    def _conn(self, keys):
+        conn = MagicMock()
+        cur = conn.cursor.return_value.__enter__.return_value
+        cur.fetchall.side_effect = [self.TABLES, keys]
+        return conn
+
+    def test_migrated_database_passes(self):
+        _require_ingest_schema(self._conn(self.MIGRATED_KEYS), self.ARGS)
+
+    def test_unmigrated_database_asks_for_migrations(self, caplog):
+        legacy = [("dockets", ["docket_id"]), ("documentswithfrdoc", ["document_id"]),
+                  ("comments", ["comment_id"])]
+        with pytest.raises(SystemExit):
+            _require_ingest_schema(self._conn(legacy), self.ARGS)
+        assert "documentsWithFRdoc (document_id, docket_id)" in caplog.text
+        assert "comments (comment_id, docket_id)" in caplog.text
+        assert "python db/migrate.py" in caplog.text
+
+
+class TestMainWithoutOpenSearch:
+    """``main`` still loads Postgres (comments without OpenSearch) when OpenSearch is down."""
+
+    @staticmethod
+    def _args(output_dir):
+        return MagicMock(
+            docket_id="faa-2025-0618", output_dir=output_dir, skip_fetch=True,
+            skip_extract=True, dry_run=False, verbose=False,
+        )
+
+    @pytest.mark.parametrize("connect", [
+        {"side_effect": ConnectionError("refused")},
+        {"return_value": MagicMock(**{"ping.return_value": False})},
+    ])
+    def test_postgres_ingest_runs_without_a_client(self, connect, caplog):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            (Path(tmpdir) / "FAA-2025-0618").mkdir()
+            with patch("ingest.parse_args", return_value=self._args(tmpdir)), \
+                    patch("ingest.get_opensearch_connection", **connect), \
+                    patch("ingest.ingest_into_postgresql", return_value=0) as pg, \
+                    patch("ingest.ingest_htm_files") as htm:
+                with pytest.raises(SystemExit):
+                    ingest_main()
+        assert pg.call_args.args[2] is None
+        htm.assert_not_called()
+        assert "ingesting Postgres only" in caplog.text
+        assert "OpenSearch ingest skipped" in caplog.text
+
+    def test_comment_sink_requires_flush(self):
+        with pytest.raises(TypeError):
+            _CommentSink("x", 1)  # pylint: disable=abstract-class-instantiated
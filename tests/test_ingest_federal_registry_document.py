@@ -0,0 +1,99 @@
+"""
+Tests for the batched Federal Register ingest in ``db/ingest_federal_registry_document.py``.
+"""
+import sys
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import psycopg2
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "db"))
+
+# pylint: disable=wrong-import-position,import-error
+from ingest_federal_registry_document import (
+    federal_register_row,
+    ingest_fr_documents,
+    upsert_federal_register_documents,
+)
+# pylint: enable=wrong-import-position,import-error
+
+
+def _doc(number, parts=("1910",)):
+    return {
+        "document_number": number,
+        "title": f"Rule {number}",
+        "type": "Rule",
+        "publication_date": "2025-01-02",
+        "agencies": [{"id": 7, "name": "OSHA"}],
+        "cfr_references": [{"title": 29, "part": p} for p in parts],
+    }
+
+
+def _conn(reject=()):
+    """Connection whose COPY fails when the staged data mentions a rejected number."""
+    cur = MagicMock()
+    cur.fetchall.return_value = []
+    copied = []
+
+    def copy_expert(sql, buf):
+        data = buf.getvalue()
+        if any(r in data for r in reject):
+            raise psycopg2.DataError("value too long")
+        copied.append((sql.split()[1], data))
+
+    cur.copy_expert.side_effect = copy_expert
+    conn = MagicMock()
+    conn.cursor.return_value.__enter__.return_value = cur
+    return conn, cur, copied
+
+
+def _statements(cur):
+    return [c.args[0] for c in cur.execute.call_args_list]
+
+
+class TestIngestFrDocuments:
+    def test_batch_is_one_copy_per_table_and_one_commit(self):
+        conn, cur, copied = _conn()
+        result = ingest_fr_documents(conn, [_doc("2025-1"), _doc("2025-2", ("1904", "1910"))])
+        assert (result.documents, result.cfrparts, result.failed) == (2, 3, [])
+        assert [t for t, _ in copied] == ["federal_register_documents_stage", "cfrparts_stage"]
+        assert conn.commit.call_count == 1
+        assert "SAVEPOINT fr_batch" in _statements(cur)
+        assert sum(s.lstrip().startswith("INSERT INTO docket_cfr") for s in _statements(cur)) == 1
+
+    def test_bad_document_is_isolated_with_savepoints(self):
+        conn, cur, _copied = _conn(reject=("2025-BAD",))
+        result = ingest_fr_documents(conn, [_doc("2025-1"), _doc("2025-BAD"), _doc("2025-3")])
+        assert result.documents == 2
+        assert [n for n, _ in result.failed] == ["2025-BAD"]
+        stmts = _statements(cur)
+        assert "ROLLBACK TO SAVEPOINT fr_batch" in stmts
+        assert stmts.count("SAVEPOINT fr_doc") == 3
+        assert stmts.count("ROLLBACK TO SAVEPOINT fr_doc") == 1
+        assert conn.commit.call_count == 1
+
+    def test_batches_and_duplicates(self):
+        conn, _cur, copied = _conn()
+        docs = [_doc("a"), _doc("a", ("1926",)), _doc("b"), _doc("c")]
+        result = ingest_fr_documents(conn, docs, batch_size=2)
+        assert result.documents == 3
+        assert conn.commit.call_count == 2
+        first_docs, first_parts = copied[0][1], copied[1][1]
+        assert first_docs.count('"a"') == 1 and '"b"' in first_docs
+        assert '"1926"' in first_parts and '"1910"' in first_parts
+
+    def test_missing_number_is_reported(self):
+        conn, _cur, _copied = _conn()
+        result = ingest_fr_documents(conn, [{"title": "no number"}])
+        assert result.documents == 0
+        assert result.failed[0][1].startswith("FR JSON is missing document_number")
+        conn.commit.assert_not_called()
+
+
+def test_row_mapping_and_single_upsert_guard():
+    row = federal_register_row(_doc(" 2025-9 "))
+    assert row["document_number"] == "2025-9"
+    assert row["agency_id"] == "7" and row["agency_names"] == ["OSHA"]
+    with pytest.raises(SystemExit):
+        upsert_federal_register_documents(MagicMock(), {})
@@ -0,0 +1,140 @@
+"""
+Tests for ``db/fed_reg_gov_data/load_documents.py`` (sharded walker + SQLite checkpoint).
+"""
+import json
+import os
+import sys
+from pathlib import Path
+from unittest.mock import MagicMock
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "db"))
+
+# pylint: disable=wrong-import-position,import-error
+from fed_reg_gov_data import load_documents as ld
+# pylint: enable=wrong-import-position,import-error
+
+
+def _doc_json(document_id):
+    return {
+        "data": {
+            "id": document_id,
+            "attributes": {
+                "docketId": document_id.rsplit("-", 1)[0],
+                "modifyDate": "2025-01-02T00:00:00Z",
+                "documentType": "Rule",
+                "agencyId": document_id.split("-", 1)[0],
+                "title": f"Doc {document_id}",
+            },
+            "links": {"self": f"https://api.regulations.gov/v4/documents/{document_id}"},
+        }
+    }
+
+
+def _write(root, agency, docket, document_id, payload=None):
+    path = root / agency / docket / f"text-{docket}" / "documents" / f"{document_id}.json"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(payload if payload is not None else json.dumps(_doc_json(document_id)))
+    return path
+
+
+def _corpus(root):
+    _write(root, "EPA", "EPA-2025-0001", "EPA-2025-0001-0001")
+    _write(root, "EPA", "EPA-2025-0001", "EPA-2025-0001-0002")
+    _write(root, "EPA", "EPA-2025-0002", "EPA-2025-0002-0001")
+    _write(root, "DOL", "DOL-2025-0001", "DOL-2025-0001-0001")
+    _write(root, "DOL", "DOL-2025-0001", "DOL-2025-0001-0002", payload="{not json")
+    comment = root / "DOL" / "DOL-2025-0001" / "text-DOL-2025-0001" / "comments" / "c.json"
+    comment.parent.mkdir(parents=True)
+    comment.write_text("{}")
+
+
+class TestWalker:
+    def test_shards_by_agency_and_docket(self, tmp_path):
+        _corpus(tmp_path)
+        shards = [p.relative_to(tmp_path).as_posix() for p in ld.iter_shards(tmp_path)]
+        assert shards == ["DOL/DOL-2025-0001", "EPA/EPA-2025-0001", "EPA/EPA-2025-0002"]
+
+    def test_shallow_documents_dir_is_own_shard(self, tmp_path):
+        (tmp_path / "documents").mkdir()
+        (tmp_path / "documents" / "a.json").write_text("{}")
+        assert list(ld.iter_shards(tmp_path)) == [tmp_path / "documents"]
+        assert [p.name for p, _ in ld.walk_documents(tmp_path / "documents")] == ["a.json"]
+
+    def test_walk_only_yields_documents_json(self, tmp_path):
+        _corpus(tmp_path)
+        found = sorted(p.name for p, _ in ld.walk_documents(tmp_path / "DOL"))
+        assert found == ["DOL-2025-0001-0001.json", "DOL-2025-0001-0002.json"]
+
+
+class TestCheckpointStore:
+    def test_mtime_change_is_reloaded(self, tmp_path):
+        store = ld.CheckpointStore(tmp_path / "ckpt.sqlite")
+        store.mark([("/data/a.json", 100)])
+        assert store.is_done("/data/a.json", 100)
+        assert not store.is_done("/data/a.json", 200)
+        assert not store.is_done("/data/b.json", 100)
+        reader = ld.CheckpointStore(tmp_path / "ckpt.sqlite", readonly=True)
+        assert reader.is_done("/data/a.json", 100)
+        reader.close()
+        store.close()
+
+    def test_legacy_text_checkpoint_is_imported_once(self, tmp_path):
+        legacy = tmp_path / "old.txt"
+        legacy.write_text("/data/a.json\n\n/data/b.json\n")
+        store = ld.open_checkpoint(tmp_path / "ckpt.sqlite", legacy)
+        assert store.count() == 2
+        assert store.is_done("/data/b.json", 12345)
+        store.close()
+        legacy.write_text("/data/c.json\n")
+        store = ld.open_checkpoint(tmp_path / "ckpt.sqlite", legacy)
+        assert store.count() == 2
+        store.close()
+
+
+class TestRun:
+    def _conn(self):
+        cur = MagicMock()
+        cur.fetchall.return_value = []
+        conn = MagicMock()
+        conn.cursor.return_value = cur
+        return conn, cur
+
+    def _loaded_ids(self, cur):
+        ids = []
+        for call in cur.copy_expert.call_args_list:
+            for line in call.args[1].getvalue().splitlines():
+                ids.append(line.split(",", 1)[0].strip('"'))
+        return sorted(ids)
+
+    def test_parallel_load_then_resume(self, tmp_path):  # pylint: disable=too-many-locals
+        data = tmp_path / "data"
+        _corpus(data)
+        store = ld.open_checkpoint(tmp_path / "ckpt.sqlite", tmp_path / "missing.txt")
+        conn, cur = self._conn()
+        stats = ld.run(conn, store, data, workers=2, batch_size=2)
+        assert (stats.files_seen, stats.inserted, stats.invalid) == (5, 4, 1)
+        assert self._loaded_ids(cur) == [
+            "DOL-2025-0001-0001", "EPA-2025-0001-0001", "EPA-2025-0001-0002", "EPA-2025-0002-0001",
+        ]
+        assert conn.commit.call_count == 2
+
+        touched = data / "EPA" / "EPA-2025-0002" / "text-EPA-2025-0002" / "documents"
+        path = touched / "EPA-2025-0002-0001.json"
+        os.utime(path, ns=(1, path.stat().st_mtime_ns + 1_000_000_000))
+        conn, cur = self._conn()
+        stats = ld.run(conn, store, data, workers=1, batch_size=2)
+        assert (stats.already_done, stats.inserted, stats.invalid) == (3, 1, 1)
+        assert self._loaded_ids(cur) == ["EPA-2025-0002-0001"]
+        store.close()
+
+    def test_failed_batch_is_not_checkpointed(self, tmp_path):
+        data = tmp_path / "data"
+        _write(data, "EPA", "EPA-2025-0001", "EPA-2025-0001-0001")
+        store = ld.open_checkpoint(tmp_path / "ckpt.sqlite", tmp_path / "missing.txt")
+        conn, cur = self._conn()
+        cur.copy_expert.side_effect = RuntimeError("boom")
+        stats = ld.run(conn, store, data, workers=1)
+        assert (stats.inserted, stats.skipped) == (0, 1)
+        conn.rollback.assert_called_once()
+        assert store.count() == 0
+        store.close()
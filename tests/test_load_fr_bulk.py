@@ -0,0 +1,128 @@
+"""
+Tests for the sharded parallel loader in ``db/cfr_and_fr/load_fr_bulk.py``.
+"""
+import gzip
+import json
+import sys
+from pathlib import Path
+
+import psycopg2
+import psycopg2.errors
+import pytest
+from pg_support import copy_conn
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "db"))
+
+# pylint: disable=wrong-import-position,import-error
+from cfr_and_fr import load_fr_bulk as bulk
+# pylint: enable=wrong-import-position,import-error
+
+
+def _docs(n):
+    return [
+        {
+            "document_number": f"2025-{i:05d}",
+            "title": "Tricky }, { title" if i % 7 == 0 else f"Rule {i}",
+            "type": "Rule",
+            "agencies": [{"id": 1, "slug": "epa"}, {"id": 2, "slug": "dol"}],
+            "cfr_references": [
+                {"title": 40, "part": str(60 + i % 3)}, {"title": 29, "part": "1910"},
+            ],
+            "abstract": "x" * (i * 37 % 400),
+        }
+        for i in range(n)
+    ]
+
+
+def _numbers(shards):
+    return [d["document_number"] for s in shards for d in bulk.iter_shard_docs(s)]
+
+
+class TestSharding:
+    @pytest.mark.parametrize("indent", [None, 2])
+    def test_array_split_covers_every_record_once(self, tmp_path, indent):
+        docs = _docs(60)
+        path = tmp_path / "documents.json"
+        path.write_text(json.dumps(docs, indent=indent))
+        shards = bulk.plan_shards(path, 8)
+        assert len(shards) > 4
+        assert _numbers(shards) == [d["document_number"] for d in docs]
+
+    def test_nested_document_lists_are_not_cut(self, tmp_path):
+        docs = _docs(6)
+        for i, doc in enumerate(docs):
+            doc["corrections"] = [
+                {"document_number": f"C-{i}-{j}", "note": "y" * 300} for j in range(40)
+            ]
+        path = tmp_path / "documents.json"
+        path.write_text(json.dumps(docs))
+        shards = bulk.plan_shards(path, 16)
+        assert len(shards) == 1  # a cut landed in a nested list, so nothing is split
+        assert _numbers(shards) == [d["document_number"] for d in docs]
+
+    def test_boundary_check_spans_strings_across_blocks(self, monkeypatch, tmp_path):
+        monkeypatch.setattr(bulk, "VERIFY_BLOCK_BYTES", 5)
+        path = tmp_path / "part.json"
+        path.write_bytes(b'{"a": "x \\"}{[ y", "b": [1, {}]}, {"c": "]"}')
+        size = path.stat().st_size
+        assert bulk._closes_every_value(str(path), 0, size)  # pylint: disable=protected-access
+        assert not bulk._closes_every_value(str(path), 0, size - 4)  # pylint: disable=protected-access
+
+    def test_more_shards_than_records(self, tmp_path):
+        path = tmp_path / "documents.json"
+        path.write_text(json.dumps(_docs(2)))
+        assert _numbers(bulk.plan_shards(path, 16)) == ["2025-00000", "2025-00001"]
+
+    def test_jsonl_split_and_presplit_directory(self, tmp_path):
+        docs = _docs(25)
+        lines = "".join(json.dumps(d) + "\n" for d in docs)
+        path = tmp_path / "all.jsonl"
+        path.write_text(lines)
+        shards = bulk.plan_shards(path, 6)
+        assert len(shards) > 1
+        assert _numbers(shards) == [d["document_number"] for d in docs]
+
+        split = tmp_path / "split"
+        split.mkdir()
+        (split / "a.jsonl").write_text("".join(json.dumps(d) + "\n" for d in docs[:10]))
+        with gzip.open(split / "b.jsonl.gz", "wt") as fh:
+            fh.write("".join(json.dumps(d) + "\n" for d in docs[10:]))
+        (split / "notes.txt").write_text("ignored")
+        assert _numbers(bulk.plan_shards(split, 4)) == [d["document_number"] for d in docs]
+
+    def test_non_array_json_is_rejected(self, tmp_path):
+        path = tmp_path / "documents.json"
+        path.write_text('{"results": []}')
+        with pytest.raises(SystemExit):
+            bulk.plan_shards(path, 4)
+
+
+class TestLoad:
+    def test_run_loads_every_shard(self, monkeypatch, tmp_path):  # pylint: disable=too-many-locals
+        conn, cur = copy_conn(monkeypatch)
+        monkeypatch.setattr(bulk, "BATCH_SIZE", 4)
+        docs = _docs(10) + [{"title": "no number"}]
+        path = tmp_path / "documents.json"
+        path.write_text(json.dumps(docs))
+        processed, skipped, failed = bulk.run(bulk.plan_shards(path, 3), {}, workers=1)
+        assert (processed, skipped, failed) == (11, 1, [])
+        staged = [c.args[0].split()[1] for c in cur.copy_expert.call_args_list]
+        assert staged.count("federal_register_documents_stage") >= 3
+        assert conn.close.call_count == 3
+
+    def test_deadlock_retries_batch(self, monkeypatch, tmp_path):
+        conn, _cur = copy_conn(monkeypatch, fail_first=psycopg2.errors.DeadlockDetected())  # pylint: disable=no-member
+        path = tmp_path / "documents.json"
+        path.write_text(json.dumps(_docs(3)))
+        stats = bulk.load_shard(bulk.plan_shards(path, 1)[0], {})
+        assert stats.error is None and stats.processed == 3
+        assert conn.rollback.call_count == 1 and conn.commit.call_count == 1
+
+    def test_corrupt_shard_is_reported(self, monkeypatch, tmp_path):
+        conn, _cur = copy_conn(monkeypatch)
+        path = tmp_path / "documents.json"
+        path.write_text('[{"document_number": "1"}, {"document_number": ')
+        path.write_text(path.read_text() + "]")
+        stats = bulk.load_shard(bulk.Shard(str(path), "array", 1, path.stat().st_size - 1), {})
+        assert stats.error
+        conn.rollback.assert_called()
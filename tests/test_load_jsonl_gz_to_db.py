@@ -0,0 +1,149 @@
+"""
+Tests for ``db/fed_reg_gov_data/load_jsonl_gz_to_db.py`` (partitioned, verified loader).
+"""
+import csv
+import gzip
+import hashlib
+import json
+import sys
+from pathlib import Path
+
+import psycopg2
+import psycopg2.errors
+from pg_support import copy_conn
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "db"))
+
+# pylint: disable=wrong-import-position,import-error
+from fed_reg_gov_data import load_jsonl_gz_to_db as loader
+# pylint: enable=wrong-import-position,import-error
+
+REPO_DATA = Path(__file__).resolve().parent.parent / "db" / "fed_reg_gov_data"
+
+
+def _record(number, docket="EPA-HQ-OAR-2025-0001", agency="epa"):
+    return {
+        "document_number": number,
+        "canonical_docket_ids": [docket],
+        "agency_id": agency,
+        "document_type": "Rule",
+        "publication_date": "2025-01-02",
+        "json_url": f"https://www.federalregister.gov/api/v1/documents/{number}.json",
+        "document_title": f"Title {number}",
+    }
+
+
+def _dataset(tmp_path, parts, tamper=None):  # pylint: disable=too-many-locals
+    """Write ``{name: [records]}`` as hq_clean/by_agency/<name>/<name>.jsonl.gz + partitions.csv."""
+    rows = []
+    for name, records in parts.items():
+        path = tmp_path / "hq_clean" / "by_agency" / name / f"{name}.jsonl.gz"
+        path.parent.mkdir(parents=True)
+        with gzip.open(path, "wt", encoding="utf-8") as fh:
+            for rec in records:
+                fh.write(json.dumps(rec) + "\n")
+        data = path.read_bytes()
+        rows.append({
+            "relative_path": str(path.relative_to(tmp_path)),
+            "agency_id": name,
+            "partition_key": name,
+            "row_count": len(records) + (1 if tamper == ("count", name) else 0),
+            "compressed_bytes": len(data),
+            "sha256": "0" * 64 if tamper == ("sha", name) else hashlib.sha256(data).hexdigest(),
+        })
+    csv_path = tmp_path / "partitions.csv"
+    with open(csv_path, "w", newline="", encoding="utf-8") as fh:
+        writer = csv.DictWriter(fh, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+    return tmp_path / "hq_clean" / "by_agency", csv_path
+
+
+class TestVerification:
+    def test_shipped_partitions_verify(self):
+        root = REPO_DATA / "hq_clean" / "by_agency"
+        csv_path = loader.find_partitions_csv(root)
+        assert csv_path == REPO_DATA / "partitions.csv"
+        parts = loader.read_partitions(root, csv_path)
+        assert len(parts) == 32
+        result = loader.load_partition(parts[0], None)
+        assert result.ok and result.rows == parts[0].row_count
+
+    def test_sha_and_row_count_mismatch(self, tmp_path):
+        root, csv_path = _dataset(
+            tmp_path, {"epa": [_record("1")], "dol": [_record("2")]}, tamper=("sha", "epa")
+        )
+        by_name = {p.relative_path.split("/")[2]: p for p in loader.read_partitions(root, csv_path)}
+        assert "sha256 mismatch" in loader.load_partition(by_name["epa"], None).error
+        assert loader.load_partition(by_name["dol"], None).ok
+
+        root2, csv2 = _dataset(tmp_path / "b", {"epa": [_record("1")]}, tamper=("count", "epa"))
+        (part,) = loader.read_partitions(root2, csv2)
+        assert "row_count mismatch" in loader.load_partition(part, None).error
+
+    def test_without_partitions_csv(self, tmp_path):
+        root, csv_path = _dataset(tmp_path, {"epa": [_record("1")]})
+        csv_path.unlink()
+        (part,) = loader.read_partitions(root, loader.find_partitions_csv(root))
+        assert part.sha256 is None and loader.load_partition(part, None).ok
+
+
+class TestLoadPartition:
+    def test_batches_commit_once_after_verification(self, monkeypatch, tmp_path):  # pylint: disable=too-many-locals
+        conn, cur = copy_conn(monkeypatch)
+        recs = [_record(str(i), docket=f"EPA-2025-{i % 2:04d}") for i in range(5)]
+        recs.append({"document_number": "x"})
+        root, csv_path = _dataset(tmp_path, {"epa": recs})
+        (part,) = loader.read_partitions(root, csv_path)
+        result = loader.load_partition(part, {"host": "db"}, batch_size=2)
+        assert (result.rows, result.accepted, result.ok) == (6, 5, True)
+        assert result.rejects == {"missing_canonical_docket_id": 1}
+        stages = [c.args[0].split()[1] for c in cur.copy_expert.call_args_list]
+        assert stages == ["dockets_stage", "documents_stage"] * 3
+        conn.commit.assert_called_once()
+        conn.close.assert_called_once()
+
+    def test_mismatch_rolls_back(self, monkeypatch, tmp_path):
+        conn, _cur = copy_conn(monkeypatch)
+        root, csv_path = _dataset(tmp_path, {"epa": [_record("1")]}, tamper=("sha", "epa"))
+        (part,) = loader.read_partitions(root, csv_path)
+        assert not loader.load_partition(part, {"host": "db"}).ok
+        conn.commit.assert_not_called()
+        conn.rollback.assert_called_once()
+
+    def test_deadlock_is_retried(self, monkeypatch, tmp_path):
+        conn, _cur = copy_conn(monkeypatch, fail_first=psycopg2.errors.DeadlockDetected())  # pylint: disable=no-member
+        root, csv_path = _dataset(tmp_path, {"epa": [_record("1")]})
+        (part,) = loader.read_partitions(root, csv_path)
+        assert loader.load_partition(part, {"host": "db"}).ok
+        assert conn.rollback.call_count == 1 and conn.commit.call_count == 1
+
+
+class TestRun:
+    def test_parallel_dry_run_and_checkpoint_skip(self, tmp_path):  # pylint: disable=too-many-locals
+        root, csv_path = _dataset(
+            tmp_path,
+            {"epa": [_record("1"), _record("2")], "dol": [_record("3", docket="DOL-2025-0001")]},
+        )
+        parts = loader.read_partitions(root, csv_path)
+        summary = loader.run(parts, None, workers=2, batch_size=10, checkpoint=None)
+        assert summary["partitions_loaded"] == 2
+        assert summary["accepted_rows"] == 3 and summary["accepted_unique_dockets"] == 2
+
+        checkpoint = tmp_path / loader.CHECKPOINT_NAME
+        done = loader.PartitionResult(parts[0].relative_path, sha256=parts[0].sha256, rows=2)
+        loader.append_checkpoint(checkpoint, done)
+        with open(checkpoint, "a", encoding="utf-8") as fh:
+            fh.write('{"relative_path": "torn')
+        assert loader.load_checkpoint(checkpoint) == {(parts[0].relative_path, parts[0].sha256)}
+        summary = loader.run(parts, None, workers=2, batch_size=10, checkpoint=checkpoint)
+        assert summary["partitions_skipped_checkpoint"] == 1
+        assert summary["partitions_loaded"] == 1
+
+    def test_failed_partition_reported(self, tmp_path):
+        root, csv_path = _dataset(tmp_path, {"epa": [_record("1")]}, tamper=("count", "epa"))
+        summary = loader.run(
+            loader.read_partitions(root, csv_path), None, workers=1, batch_size=10, checkpoint=None
+        )
+        assert list(summary["partitions_failed"]) == ["hq_clean/by_agency/epa/epa.jsonl.gz"]
+        assert summary["partitions_loaded"] == 0
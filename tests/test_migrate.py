@@ -0,0 +1,142 @@
+"""
+Tests for ``db/migrate.py`` (versioned migration runner) and ``db/migrations/``.
+"""
+import sys
+from pathlib import Path
+
+import pytest
+from pg_support import FakeCursorBase
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "db"))
+
+# pylint: disable=wrong-import-position,import-error
+import migrate
+# pylint: enable=wrong-import-position,import-error
+
+
+class FakeCursor(FakeCursorBase):
+    def execute(self, sql, params=None):
+        self.conn.log.append((sql.strip(), params, self.conn.autocommit))
+        if self.conn.fail_on and self.conn.fail_on in sql:
+            raise RuntimeError("boom")
+        if sql.startswith("SELECT version"):
+            self._rows = list(self.conn.applied.items())
+        elif "indisvalid" in sql:
+            self._rows = [(1,)] if params[0] in self.conn.invalid else []
+        elif sql.startswith("INSERT INTO schema_migrations"):
+            self.conn.pending_rows.append(params)
+
+
+class FakeConn:
+    def __init__(self, applied=None, invalid=(), fail_on=None):
+        self.applied = dict(applied or {})
+        self.invalid = set(invalid)
+        self.fail_on = fail_on
+        self.autocommit = False
+        self.log = []
+        self.pending_rows = []
+        self.rollbacks = 0
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def _flush(self):
+        for version, _name, checksum in self.pending_rows:
+            self.applied[version] = checksum
+        self.pending_rows = []
+
+    def commit(self):
+        self._flush()
+
+    def rollback(self):
+        self.pending_rows = []
+        self.rollbacks += 1
+
+    def statements(self):
+        return [sql for sql, _p, _a in self.log]
+
+
+def _write(directory, name, body):
+    path = directory / name
+    path.write_text(body, encoding="utf-8")
+    return path
+
+
+def test_shipped_index_migration():
+    migrations = migrate.discover()
+    assert str(migrations[0]) == "0001_core_indexes"
+    sql = migrations[0].path.read_text(encoding="utf-8")
+    assert sql.startswith(migrate.NO_TRANSACTION)
+    statements = migrate.split_statements(sql)
+    assert len(statements) == 8
+    assert all(s.startswith("CREATE INDEX CONCURRENTLY IF NOT EXISTS") for s in statements)
+    assert any("documentsWithFRdoc (docket_id)" in s for s in statements)
+    assert any("USING GIN (docket_ids)" in s for s in statements)
+
+
+def test_discover_orders_and_rejects_duplicates(tmp_path):
+    _write(tmp_path, "0002_b.sql", "SELECT 2;")
+    _write(tmp_path, "0001_a.py", "def up(conn):\n    pass\n")
+    _write(tmp_path, "notes.txt", "ignored")
+    assert [m.version for m in migrate.discover(tmp_path)] == [1, 2]
+    assert migrate.discover(tmp_path / "missing") == []
+    _write(tmp_path, "0002_c.sql", "SELECT 3;")
+    with pytest.raises(migrate.MigrationError):
+        migrate.discover(tmp_path)
+
+
+def test_split_statements():
+    sql = "-- header\nCREATE TABLE a (x int);\n\nCREATE INDEX b\n    ON a (x);\nSELECT 1"
+    assert migrate.split_statements(sql) == [
+        "CREATE TABLE a (x int)", "CREATE INDEX b\n    ON a (x)", "SELECT 1",
+    ]
+
+
+def test_run_applies_pending_in_order(tmp_path):  # pylint: disable=too-many-statements
+    _write(tmp_path, "0001_tx.sql", "ALTER TABLE a ADD COLUMN b INT;")
+    _write(
+        tmp_path, "0002_idx.sql",
+        f"{migrate.NO_TRANSACTION}\nCREATE INDEX CONCURRENTLY IF NOT EXISTS a_b_idx ON a (b);\n",
+    )
+    _write(tmp_path, "0003_py.py", "TRANSACTIONAL = True\n\ndef up(conn):\n"
+           "    with conn.cursor() as cur:\n        cur.execute('UPDATE a SET b = 1')\n")
+    migrations = migrate.discover(tmp_path)
+    conn = FakeConn(invalid={"a_b_idx"})
+
+    assert [m.version for m in migrate.run(conn, migrations, dry_run=True)] == [1, 2, 3]
+    assert not any("ALTER" in s for s in conn.statements())
+
+    applied = migrate.run(conn, migrations, target=2)
+    assert [m.version for m in applied] == [1, 2]
+    log = conn.log
+    assert ("ALTER TABLE a ADD COLUMN b INT;", None, False) in log
+    # The invalid leftover is dropped before the concurrent build, both in autocommit.
+    drop = next(i for i, e in enumerate(log) if e[0].startswith("DROP INDEX CONCURRENTLY"))
+    build = next(i for i, e in enumerate(log) if e[0].startswith("CREATE INDEX CONCURRENTLY"))
+    assert drop < build and log[drop][2] and log[build][2]
+    assert not conn.autocommit
+    assert conn.statements().count("SELECT pg_advisory_unlock(%s)") == 1
+
+    assert [m.version for m in migrate.run(conn, migrations)] == [3]
+    assert "UPDATE a SET b = 1" in conn.statements()
+    assert migrate.run(conn, migrations) == []
+    assert set(conn.applied) == {1, 2, 3}
+
+
+def test_failed_transactional_step_rolls_back(tmp_path, caplog):
+    _write(tmp_path, "0001_ok.sql", "SELECT 1;")
+    _write(tmp_path, "0002_bad.sql", "ALTER TABLE nope;")
+    migrations = migrate.discover(tmp_path)
+    conn = FakeConn(applied={1: "0" * 64}, fail_on="nope")
+    with pytest.raises(migrate.MigrationError, match="0002_bad"):
+        migrate.run(conn, migrations)
+    assert conn.rollbacks == 1
+    assert set(conn.applied) == {1}
+    assert "edited after it was applied" in caplog.text
+    assert conn.statements()[-1] == "SELECT pg_advisory_unlock(%s)"
+
+
+def test_python_migration_needs_up(tmp_path):
+    _write(tmp_path, "0001_empty.py", "X = 1\n")
+    with pytest.raises(migrate.MigrationError, match="up"):
+        migrate.run(FakeConn(), migrate.discover(tmp_path))
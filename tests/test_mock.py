@@ -7,6 +7,8 @@ test_db.py but relied on DBLayer._items (which no longer exists).
 import pytest
 from mock_db import MockDBLayer
 
+from mirrsearch.internal_logic import InternalLogic
+
 
 @pytest.fixture
 def db():
@@ -285,3 +287,48 @@ def test_text_match_terms_no_results(db):
     """Returns empty list for nonexistent term"""
     result = db.text_match_terms(["nonexistent"])
     assert not result
+
+
+# --- search_with_hits, through InternalLogic.search ---
+
+class _HydratingMockDBLayer(MockDBLayer):
+    """Mock that also knows the dockets only OpenSearch matches."""
+
+    def get_dockets_by_ids(self, docket_ids):
+        known = {"CMS-2019-0100": "Home Health", "CMS-2025-0001": "Information Collection"}
+        return [
+            {"docket_id": did, "docket_title": known[did], "agency_id": "CMS"}
+            for did in docket_ids if did in known
+        ]
+
+
+def test_search_with_hits_splits_title_and_full_text_rows():
+    title_rows, full_text_rows = _HydratingMockDBLayer().search_with_hits(
+        "medicare", ["CMS-2025-0240", "CMS-2019-0100", "CMS-2019-0100", "NOPE"]
+    )
+    assert [(r.docket_id, r.match_source) for r in title_rows] == [("CMS-2025-0240", "title")]
+    assert [(r.docket_id, r.match_source) for r in full_text_rows] == [
+        ("CMS-2019-0100", "full_text")
+    ]
+
+
+def test_search_with_hits_applies_title_filters(db):
+    assert db.search_with_hits("renal", [], agency=["EPA"]) == ([], [])
+
+
+def test_internal_logic_ranks_totals_and_paginates_through_search_with_hits():
+    logic = InternalLogic("x", db_layer=_HydratingMockDBLayer())
+    first = logic.search("medicare", page=1, page_size=2)
+    second = logic.search("medicare", page=2, page_size=2)
+    rows = first["results"] + second["results"]
+    assert [r["docket_id"] for r in rows] == ["CMS-2025-0240", "CMS-2019-0100", "CMS-2025-0001"]
+    assert [r["match_source"] for r in rows] == ["title", "full_text", "full_text"]
+    assert [(r["documentNumerator"], r["commentNumerator"]) for r in rows] == [
+        (4, 2), (2, 4), (1, 0)
+    ]
+    assert [(r["documentDenominator"], r["commentDenominator"]) for r in rows] == [
+        (0, 2), (0, 7), (1, 0)
+    ]
+    assert [r["correlation_score"] for r in rows] == pytest.approx([0.5, 6 / 17, 1 / 11])
+    assert first["pagination"]["total_results"] == 3
+    assert (first["pagination"]["has_next"], second["pagination"]["has_next"]) == (True, False)
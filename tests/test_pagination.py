@@ -26,10 +26,10 @@ class MockDbLayer:  # pylint: disable=too-few-public-methods
     def text_match_terms(self, terms, opensearch_client=None):  # pylint: disable=unused-argument
         return []
 
-    def get_dockets_by_ids(self, docket_ids):  # pylint: disable=unused-argument
-        return []
+    def search_with_hits(self, query, docket_ids, *filters):  # pylint: disable=unused-argument
+        return self.search(query, *filters), []
 
-    def get_docket_document_comment_totals(self, docket_ids, opensearch_client=None):  # pylint: disable=unused-argument
+    def get_comment_totals(self, docket_ids, opensearch_client=None):  # pylint: disable=unused-argument
         return {}
 
 
@@ -0,0 +1,286 @@
+"""
+Tests for ``db/partition_tables.py`` (online hash partitioning of documents and comments).
+"""
+# pylint: disable=redefined-outer-name
+import json
+import sys
+from pathlib import Path
+
+import psycopg2
+import pytest
+from pg_support import FakeCursorBase, pg_schema
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "db"))
+
+# pylint: disable=wrong-import-position,import-error
+import migrate
+import partition_tables as pt
+# pylint: enable=wrong-import-position,import-error
+
+DOCS, COMMENTS = pt.SPECS
+COLS = ["comment_id", "api_link", "docket_id", "comment"]
+
+
+class FakeCursor(FakeCursorBase):
+    def execute(self, sql, params=None):
+        sql = sql.strip()
+        self.conn.log.append((sql, params))
+        if sql.startswith("SELECT relkind"):
+            kind = self.conn.relkinds.get(params[0])
+            self._rows = [(kind,)] if kind else []
+        elif sql.startswith("SELECT attname"):
+            self._rows = [(c,) for c in COLS]
+        elif sql.startswith("SELECT conrelid"):
+            self._rows = list(self.conn.fks)
+        elif sql.startswith(("WITH batch", "SELECT count(*)")):
+            queue = self.conn.batches if sql.startswith("WITH") else self.conn.violations
+            self._rows = [queue.pop(0) if queue else (0,)]
+        elif sql.startswith("SELECT EXISTS"):
+            self._rows = [(self.conn.has_rows,)]
+
+
+class FakeConn:
+    def __init__(self, relkinds=None, batches=(), fks=(), has_rows=False, violations=()):
+        self.relkinds = dict(relkinds or {})
+        self.batches = list(batches)
+        self.fks = list(fks)
+        self.has_rows = has_rows
+        self.violations = [(count,) for count in violations]
+        self.autocommit = False
+        self.log = []
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def statements(self):
+        return [sql for sql, _p in self.log]
+
+
+def test_partitioned_ddl():
+    ddl = pt.create_partitioned_sql(COMMENTS, 4)
+    assert ddl[0] == (
+        "CREATE TABLE comments_partitioned (LIKE comments INCLUDING DEFAULTS) "
+        "PARTITION BY HASH (docket_id)"
+    )
+    assert "PRIMARY KEY (docket_id, comment_id)" in ddl[1]
+    assert ddl[5].endswith("FOR VALUES WITH (MODULUS 4, REMAINDER 3)")
+    assert "CREATE UNIQUE INDEX comments_api_link_part_key ON comments_partitioned " \
+           "(docket_id, api_link)" in ddl
+    assert "CREATE INDEX comments_comment_id_part_idx ON comments_partitioned (comment_id)" in ddl
+    assert ddl[-2:] == [
+        "ALTER TABLE comments_partitioned ADD CONSTRAINT comments_docket_id_fkey "
+        "FOREIGN KEY (docket_id) REFERENCES dockets (docket_id)",
+        "ALTER TABLE comments_partitioned ADD CONSTRAINT comments_document_fkey "
+        "FOREIGN KEY (docket_id, document_id) "
+        "REFERENCES documentswithfrdoc (docket_id, document_id)",
+    ]
+    assert not any("FOREIGN KEY" in s for s in pt.create_partitioned_sql(DOCS, 4))
+
+
+def test_foreign_key_check_counts_filled_rows():
+    docket_fk, document_fk = COMMENTS.foreign_keys
+    assert (document_fk.ref_table, document_fk.ref_columns) == (
+        "documentswithfrdoc", ("docket_id", "document_id")
+    )
+    sql = pt.violations_sql(COMMENTS, docket_fk)
+    assert "COALESCE(docket_id, regexp_replace(comment_id, '-[^-]*$', '')) AS docket_id" in sql
+    assert "NOT EXISTS (SELECT 1 FROM dockets f WHERE f.docket_id = r.docket_id)" in sql
+    sql = pt.violations_sql(COMMENTS, document_fk)
+    assert "r.docket_id IS NOT NULL AND r.document_id IS NOT NULL" in sql
+    assert "f.docket_id = r.docket_id AND f.document_id = r.document_id" in sql
+
+
+def test_comment_rows_get_their_docket_back():
+    trigger = pt.mirror_trigger_sql(COMMENTS, COLS)
+    assert "COALESCE(NEW.docket_id, regexp_replace(NEW.comment_id, '-[^-]*$', ''))" in trigger[0]
+    assert "DELETE FROM comments_partitioned WHERE comment_id = OLD.comment_id" in trigger[0]
+    assert trigger[2].startswith("CREATE TRIGGER comments_mirror_partitions AFTER INSERT OR UPDATE")
+    backfill = pt.backfill_sql(COMMENTS, COLS)
+    assert "COALESCE(docket_id, regexp_replace(comment_id, '-[^-]*$', ''))" in backfill
+    assert "FOR SHARE" in backfill
+    assert "COALESCE" not in pt.backfill_sql(DOCS, ["document_id", "docket_id"])
+
+
+def test_backfill_walks_keyset_batches():
+    conn = FakeConn(batches=[("C-2", 2), ("C-4", 2), (None, 0)])
+    assert pt.backfill(conn, COMMENTS, batch_rows=2) == 4
+    params = [p for sql, p in conn.log if sql.startswith("WITH batch")]
+    assert params == [("", 2), ("C-2", 2), ("C-4", 2)]
+
+
+def test_prepare_keeps_foreign_keys_and_installs_trigger():
+    conn = FakeConn()
+    pt.prepare(conn, COMMENTS, partitions=2)
+    sqls = conn.statements()
+    assert [s for s in sqls if s.startswith("SELECT count(*)")] == [
+        pt.violations_sql(COMMENTS, fk) for fk in COMMENTS.foreign_keys
+    ]
+    assert any(s.startswith(
+        "CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS comments_docket_key_idx"
+    ) for s in sqls)
+    assert not any("DROP CONSTRAINT" in s for s in sqls)
+    body = sqls[sqls.index("BEGIN") + 1:sqls.index("COMMIT")]
+    assert sum(s.startswith("CREATE TABLE comments_p0") for s in body) == 2
+    assert sum("FOREIGN KEY" in s for s in body) == 2
+    assert body[-1].startswith("CREATE TRIGGER")
+
+
+def test_prepare_stops_on_rows_a_foreign_key_would_reject():
+    conn = FakeConn(violations=[0, 3])
+    with pytest.raises(RuntimeError, match="3 row.*comments_document_fkey"):
+        pt.prepare(conn, COMMENTS)
+    assert not any(s.startswith(("CREATE", "BEGIN")) for s in conn.statements())
+
+
+def test_prepare_resumes_existing_copy():
+    conn = FakeConn(relkinds={"comments_partitioned": "p"}, violations=[5])
+    pt.prepare(conn, COMMENTS)
+    sqls = conn.statements()
+    assert not any(s.startswith(("CREATE TABLE", "SELECT count(*)")) for s in sqls)
+
+
+def test_swap_renames_under_lock_and_drops_empty_old_table():
+    conn = FakeConn(fks=[("comments", "comments_document_id_fkey")])
+    assert pt.swap(conn, DOCS) is False
+    sqls = conn.statements()
+    begin = sqls.index("BEGIN")
+    assert sqls[begin:begin + 3] == [
+        "BEGIN",
+        f"SET LOCAL lock_timeout = '{pt.LOCK_TIMEOUT}'",
+        "LOCK TABLE documentswithfrdoc IN ACCESS EXCLUSIVE MODE",
+    ]
+    assert "ALTER TABLE comments DROP CONSTRAINT comments_document_id_fkey" in sqls
+    renames = [s for s in sqls if "RENAME TO" in s]
+    assert renames == [
+        "ALTER TABLE documentswithfrdoc RENAME TO documentswithfrdoc_unpartitioned",
+        "ALTER TABLE documentswithfrdoc_partitioned RENAME TO documentswithfrdoc",
+    ]
+    assert sqls[-1] == "DROP TABLE documentswithfrdoc_unpartitioned"
+
+
+def test_swap_keeps_populated_old_table():
+    conn = FakeConn(has_rows=True)
+    assert pt.swap(conn, COMMENTS) is True
+    assert not any(s.startswith("DROP TABLE") for s in conn.statements())
+
+
+def test_partition_all_skips_partitioned_tables():
+    conn = FakeConn(relkinds={"documentswithfrdoc": "p", "comments": "p"})
+    assert pt.partition_all(conn) == []
+    assert conn.autocommit is True
+    assert pt.status(conn) == ["documentswithfrdoc: partitioned", "comments: partitioned"]
+
+
+def test_drop_old():
+    conn = FakeConn(relkinds={"comments_unpartitioned": "r"})
+    assert pt.drop_old(conn) == ["comments_unpartitioned"]
+
+
+def _migration():
+    migration = next(m for m in migrate.discover() if m.version == 4)
+    return migrate._load_module(migration)  # pylint: disable=protected-access
+
+
+def test_migration_runs_in_autocommit():
+    module = _migration()
+    assert module.TRANSACTIONAL is False
+    assert module.partition_all is pt.partition_all
+
+
+def test_migration_partitions_empty_tables(monkeypatch):
+    monkeypatch.delenv("PARTITION_TABLES", raising=False)
+    conn = FakeConn(relkinds={"documentswithfrdoc": "r", "comments": "r"}, batches=[(None, 0)] * 2)
+    _migration().up(conn)
+    assert "ALTER TABLE comments_partitioned RENAME TO comments" in conn.statements()
+
+
+def test_migration_leaves_populated_tables_to_the_operator(monkeypatch):
+    monkeypatch.delenv("PARTITION_TABLES", raising=False)
+    conn = FakeConn(relkinds={"documentswithfrdoc": "r", "comments": "r"}, has_rows=True)
+    _migration().up(conn)
+    sqls = conn.statements()
+    assert [s.split(" ON ")[0] for s in sqls if s.startswith("CREATE")] == [
+        "CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS documentswithfrdoc_docket_key_idx",
+        "CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS comments_docket_key_idx",
+    ]
+    assert not any("_partitioned" in s for s in sqls)
+
+    monkeypatch.setenv("PARTITION_TABLES", "1")
+    conn = FakeConn(
+        relkinds={"documentswithfrdoc": "r", "comments": "r"},
+        batches=[(None, 0)] * 2, has_rows=True,
+    )
+    _migration().up(conn)
+    assert "ALTER TABLE comments_partitioned RENAME TO comments" in conn.statements()
+
+
+# --- against Postgres ---
+
+SCHEMA = "partition_tables_test"
+
+
+@pytest.fixture(scope="module")
+def pg():
+    # Rows exist before the migrations run, so the migration leaves the tables
+    # alone and partition_all has to copy them.
+    for conn in pg_schema(SCHEMA, setup_sql=[
+        "INSERT INTO dockets (docket_id, docket_api_link, agency_id, docket_type, modify_date) "
+        "SELECT 'D-' || g, 'https://x/' || g, 'EPA', 'Rulemaking', NOW() "
+        "FROM generate_series(1, 50) g",
+        "INSERT INTO comments (comment_id, api_link, agency_id, docket_id, document_type, "
+        "posted_date) SELECT 'D-' || (g % 50 + 1) || '-' || g, 'https://c/' || g, 'EPA', "
+        "CASE WHEN g % 7 = 0 THEN NULL ELSE 'D-' || (g % 50 + 1) END, 'Public Submission', "
+        "NOW() FROM generate_series(1, 5000) g",
+    ]):
+        with conn.cursor() as cur:
+            kinds = [pt.relkind(cur, spec.table) for spec in pt.SPECS]
+        conn.rollback()
+        assert kinds == ["r", "r"]
+        assert pt.partition_all(conn) == ["documentswithfrdoc", "comments"]
+        with conn.cursor() as cur:
+            cur.execute("ANALYZE")
+        conn.autocommit = False
+        yield conn
+
+
+@pytest.mark.integration
+def test_tables_are_partitioned_with_every_row(pg):
+    with pg.cursor() as cur:
+        assert pt.relkind(cur, "comments") == "p"
+        assert pt.relkind(cur, "documentswithfrdoc") == "p"
+        cur.execute("SELECT count(*), count(*) FILTER (WHERE docket_id IS NULL) FROM comments")
+        assert cur.fetchone() == (5000, 0)
+        cur.execute("SELECT count(*) FROM comments_unpartitioned")
+        assert cur.fetchone() == (5000,)
+    pg.rollback()
+
+
+@pytest.mark.integration
+def test_per_docket_query_reads_one_partition(pg):
+    with pg.cursor() as cur:
+        cur.execute(
+            "EXPLAIN (FORMAT JSON) SELECT count(*) FROM comments WHERE docket_id = %s", ("D-7",)
+        )
+        plan = cur.fetchone()[0]
+    pg.rollback()
+    text = json.dumps(plan if not isinstance(plan, str) else json.loads(plan))
+    assert text.count('"Relation Name": "comments_p') == 1
+
+
+@pytest.mark.integration
+def test_comments_keep_their_foreign_keys(pg):
+    with pg.cursor() as cur:
+        cur.execute(
+            "SELECT conname FROM pg_constraint WHERE contype = 'f' "
+            "AND conparentid = 0 AND conrelid = to_regclass('comments') ORDER BY conname"
+        )
+        assert [name for (name,) in cur.fetchall()] == [
+            "comments_docket_id_fkey", "comments_document_fkey"
+        ]
+        with pytest.raises(psycopg2.IntegrityError, match="comments_docket_id_fkey"):
+            cur.execute(
+                "INSERT INTO comments (comment_id, api_link, agency_id, docket_id, "
+                "document_type, posted_date) VALUES ('X-1-1', 'https://c/x', 'EPA', 'X-1', "
+                "'Public Submission', NOW())"
+            )
+    pg.rollback()
@@ -0,0 +1,62 @@
+"""
+Tests for ``db/passages.py`` (overlapping passage chunking of extracted text).
+"""
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "db"))
+
+# pylint: disable=wrong-import-position,import-error
+from passages import iter_passages, read_text_chunks
+# pylint: enable=wrong-import-position,import-error
+
+TEXT = " ".join(f"token{i}" for i in range(400))
+
+
+def _pieces(text, n):
+    return [text[i:i + n] for i in range(0, len(text), n)]
+
+
+def test_offsets_cover_text_with_overlap():
+    passages = list(iter_passages([TEXT], size=500, overlap=100))
+    assert [p.index for p in passages] == list(range(len(passages)))
+    assert passages[0].start == 0 and passages[-1].end == len(TEXT)
+    for prev, cur in zip(passages, passages[1:]):
+        assert cur.start < prev.end
+        assert TEXT[cur.start - 1] == " "
+    for p in passages:
+        assert TEXT[p.start:p.end] == p.text
+        assert len(p.text) <= 500
+
+
+def test_chunking_does_not_change_passages():
+    whole = list(iter_passages([TEXT], size=500, overlap=100))
+    assert list(iter_passages(_pieces(TEXT, 37), size=500, overlap=100)) == whole
+
+
+def test_read_text_chunks(tmp_path):
+    path = tmp_path / "a.txt"
+    path.write_text(TEXT, encoding="utf-8")
+    chunks = list(read_text_chunks(path, block=1000))
+    assert max(len(c) for c in chunks) == 1000
+    assert "".join(chunks) == TEXT
+
+
+def test_short_and_blank_text():
+    assert [p.text for p in iter_passages(["hello"], size=10, overlap=2)] == ["hello"]
+    assert not list(iter_passages(["   ", "\n"], size=10, overlap=2))
+    assert not list(iter_passages([], size=10, overlap=2))
+
+
+def test_tail_only_repeating_overlap_is_dropped():
+    passages = list(iter_passages(["aaaa bbbb cccc"], size=10, overlap=5))
+    assert passages[-1].end == 14
+    assert all(p.text.strip() for p in passages)
+
+
+@pytest.mark.parametrize("size,overlap", [(0, 0), (10, 10), (10, -1)])
+def test_rejects_bad_sizes(size, overlap):
+    with pytest.raises(ValueError):
+        list(iter_passages(["x"], size=size, overlap=overlap))
@@ -0,0 +1,99 @@
+"""
+Tests for ``db/populate_links.py`` (eCFR structure walk, cache, bulk link insert).
+"""
+import sys
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import psycopg2
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "db"))
+
+# pylint: disable=wrong-import-position,import-error
+import populate_links as pl
+# pylint: enable=wrong-import-position,import-error
+
+TREE = {
+    "type": "title", "identifier": "40", "children": [
+        {"type": "chapter", "identifier": "I", "children": [
+            {"type": "subchapter", "identifier": "A", "children": [
+                {"type": "part", "identifier": "1"},
+                {"type": "part", "identifier": "2", "reserved": True},
+                {"type": "subpart", "identifier": "X", "children": [
+                    {"type": "part", "identifier": "3"},
+                ]},
+            ]},
+            {"type": "part", "identifier": "9"},
+        ]},
+    ],
+}
+
+
+class TestIterParts:
+    def test_document_order_and_urls(self):
+        assert pl.extract_parts(TREE, []) == [
+            ("1", f"{pl.CURRENT_URL}/title-40/chapter-I/subchapter-A/part-1?toc=1"),
+            ("3", f"{pl.CURRENT_URL}/title-40/chapter-I/subchapter-A/part-3?toc=1"),
+            ("9", f"{pl.CURRENT_URL}/title-40/chapter-I/part-9?toc=1"),
+        ]
+
+    def test_deep_tree_does_not_recurse(self):
+        node = {"type": "part", "identifier": "7"}
+        for _ in range(sys.getrecursionlimit() * 2):
+            node = {"type": "subpart", "children": [node]}
+        title = {"type": "title", "identifier": "1", "children": [node]}
+        assert [p for p, _ in pl.iter_parts(title)] == ["7"]
+
+
+class TestStructureCache:
+    def test_reuses_cache_until_date_changes(self, tmp_path, monkeypatch):
+        calls = []
+
+        def fetch(title, date):
+            calls.append((title, date))
+            return TREE
+
+        monkeypatch.setattr(pl, "fetch_structure", fetch)
+        assert pl.cached_structure(40, "2025-01-01", tmp_path) == TREE
+        assert pl.cached_structure(40, "2025-01-01", tmp_path) == TREE
+        assert calls == [(40, "2025-01-01")]
+
+        pl.cached_structure(40, "2025-02-01", tmp_path)
+        assert [p.name for p in tmp_path.iterdir()] == ["title-40-2025-02-01.json"]
+        pl.cached_structure(40, "2025-02-01", tmp_path, refresh=True)
+        assert len(calls) == 3
+
+    def test_load_title_skips_http_errors(self, monkeypatch):
+        err = pl.requests.HTTPError(response=MagicMock(status_code=503))
+
+        def fail(*_a, **_kw):
+            raise err
+
+        monkeypatch.setattr(pl, "cached_structure", fail)
+        assert pl.load_title({"number": 5}, "2025-01-01") == (5, None)
+
+
+class TestUpsertLinks:
+    def _conn(self, rowcount=2):
+        cur = MagicMock(rowcount=rowcount)
+        conn = MagicMock()
+        conn.cursor.return_value.__enter__.return_value = cur
+        return conn, cur
+
+    def test_one_statement_per_title(self):
+        conn, cur = self._conn(rowcount=2)
+        rows = [("40", "1", "u1"), ("40", "3", "u3"), ("40", "9", "u9")]
+        assert pl.upsert_links(conn, rows) == (2, 1)
+        (insert, refresh) = (c.args for c in cur.execute.call_args_list)
+        sql, params = insert
+        assert "unnest" in sql and "ON CONFLICT DO NOTHING" in sql
+        assert params == (["40", "40", "40"], ["1", "3", "9"], ["u1", "u3", "u9"])
+        assert "UPDATE docket_cfr" in refresh[0] and refresh[1] == (["40"],)
+        conn.commit.assert_called_once()
+
+    def test_empty_and_integrity_error(self):
+        conn, cur = self._conn()
+        assert pl.upsert_links(conn, []) == (0, 0)
+        cur.execute.side_effect = psycopg2.IntegrityError("dup")
+        assert pl.upsert_links(conn, [("1", "2", "u")]) == (0, 1)
+        conn.rollback.assert_called_once()
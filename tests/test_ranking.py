@@ -0,0 +1,102 @@
+"""
+Tests for vectorised candidate ranking (``ranking.py``): scores and order
+must match a row-at-a-time reference exactly, ties included.
+"""
+import random
+
+import numpy as np
+import pytest
+
+from mirrsearch import ranking
+from mirrsearch.docket_result import DocketResult
+
+SORT_MODES = [None, "relevance", "modify_date", "comment_count", "document_count"]
+
+
+def _candidates(count, seed):
+    rnd = random.Random(seed)
+    rows = []
+    for i in range(count):
+        row = {
+            "document_match_count": rnd.randint(0, 3),
+            "comment_match_count": rnd.choice([0, 0, 1, 5]),
+            "document_total_count": rnd.choice([0, 1, 4, 10]),
+            "comment_total_count": rnd.choice([0, 2, 2, 30]),
+            "modify_date": rnd.choice([None, "2024-01-01", "2024-06-01", "2025-02-03"]),
+            "pos": i,
+        }
+        # Ties on everything but the docket id, and a few rows without one.
+        if i % 7:
+            row["docket_id"] = f"D-{rnd.randint(0, count // 3)}-{i}"
+        rows.append(row)
+    return rows
+
+
+def _results(rows):
+    return [DocketResult.from_mapping(r) for r in rows]
+
+
+def _positions(rows):
+    return [r.extra["pos"] for r in rows]
+
+
+def _scores(rows):
+    return [r.correlation_score for r in rows]
+
+
+def _correlation_score(row, support_k=10):
+    match_total = row.document_match_count + row.comment_match_count
+    total = row.document_total_count + row.comment_total_count
+    if total <= 0:
+        return 0.0
+    return (match_total / total) * (total / (total + support_k))
+
+
+def _reference(rows, sort_by):
+    rows = _results(rows)
+    for row in rows:
+        row.correlation_score = _correlation_score(row)
+    if sort_by == "modify_date":
+        rows.sort(key=lambda r: r.modify_date or "", reverse=True)
+    elif sort_by == "comment_count":
+        rows.sort(key=lambda r: r.comment_total_count, reverse=True)
+    elif sort_by == "document_count":
+        rows.sort(key=lambda r: r.document_total_count, reverse=True)
+    else:
+        rows.sort(key=lambda r: (
+            r.correlation_score,
+            r.document_match_count + r.comment_match_count,
+            r.document_total_count + r.comment_total_count,
+            r.docket_id or "",
+        ), reverse=True)
+    return rows
+
+
+@pytest.mark.parametrize("sort_by", SORT_MODES)
+@pytest.mark.parametrize("seed", [1, 2, 3])
+def test_full_order_matches_reference(sort_by, seed):
+    rows = _candidates(300, seed)
+    expected = _reference(rows, sort_by)
+    got = ranking.rank(_results(rows), sort_by=sort_by)
+    assert _positions(got) == _positions(expected)
+    assert _scores(got) == _scores(expected)
+
+
+@pytest.mark.parametrize("sort_by", SORT_MODES)
+@pytest.mark.parametrize("limit", [1, 10, 37, 299, 300, 500])
+def test_top_k_matches_reference_head(sort_by, limit):
+    rows = _candidates(300, 7)
+    expected = _reference(rows, sort_by)[:limit]
+    got = ranking.rank(_results(rows), sort_by=sort_by, limit=limit)
+    assert len(got) == 300
+    assert sorted(_positions(got)) == list(range(300))
+    head = got[:limit]
+    assert _positions(head) == _positions(expected)
+    assert _scores(head) == _scores(expected)
+
+
+def test_scores_handle_zero_totals():
+    scores = ranking.correlation_scores(np.array([0, 3, 2]), np.array([0, 0, 10]))
+    assert scores.tolist() == [0.0, 0.0, _correlation_score(
+        DocketResult(document_match_count=2, document_total_count=10))]
+    assert not ranking.rank([])
@@ -0,0 +1,256 @@
+"""
+Tests for ``db/s3_download.py`` against an in-memory S3 stand-in.
+"""
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "db"))
+
+# pylint: disable=wrong-import-position,import-error
+from s3_download import (
+    MANIFEST_NAME,
+    ConcurrencyController,
+    DownloadStats,
+    ListingJob,
+    Manifest,
+    docket_jobs,
+    download_docket_from_s3,
+    download_prefixes,
+    is_up_to_date,
+    iter_s3_objects,
+)
+# pylint: enable=wrong-import-position,import-error
+
+DOCKET = "FAA-2025-0618"
+TEXT = f"raw-data/FAA/{DOCKET}/text-{DOCKET}/"
+
+
+class FakePaginator:  # pylint: disable=too-few-public-methods
+    def __init__(self, s3, page_size):
+        self.s3 = s3
+        self.page_size = page_size
+
+    def paginate(self, Bucket, Prefix):  # pylint: disable=invalid-name,unused-argument
+        keys = sorted(k for k in self.s3.objects if k.startswith(Prefix))
+        for i in range(0, len(keys), self.page_size):
+            self.s3.pages_served += 1
+            yield {
+                "Contents": [
+                    {"Key": k, "Size": len(self.s3.objects[k]), "ETag": f'"{self.s3.etags[k]}"'}
+                    for k in keys[i:i + self.page_size]
+                ]
+            }
+
+
+class FakeS3:
+    """Just enough of the boto3 S3 client for the downloader."""
+
+    def __init__(self, objects, page_size=2, fail=None):
+        self.objects = dict(objects)
+        self.etags = {k: f"etag-{len(v)}-{hash(v) & 0xffff}" for k, v in self.objects.items()}
+        self.page_size = page_size
+        self.fail = dict(fail or {})
+        self.downloads = []
+        self.pages_served = 0
+
+    def get_paginator(self, name):
+        assert name == "list_objects_v2"
+        return FakePaginator(self, self.page_size)
+
+    def list_objects_v2(self, Bucket, Prefix, MaxKeys=1000):  # pylint: disable=invalid-name,unused-argument
+        keys = sorted(k for k in self.objects if k.startswith(Prefix))[:MaxKeys]
+        if not keys:
+            return {"KeyCount": 0}
+        return {"Contents": [{"Key": k, "Size": len(self.objects[k])} for k in keys]}
+
+    def download_file(self, bucket, key, filename):  # pylint: disable=unused-argument
+        self.downloads.append(key)
+        if self.fail.get(key, 0) > 0:
+            self.fail[key] -= 1
+            raise ConnectionError("connection reset")
+        Path(filename).write_bytes(self.objects[key])
+
+
+def _bundle():
+    return {
+        f"{TEXT}docket/{DOCKET}.json": b'{"docket": 1}',
+        f"{TEXT}documents/{DOCKET}-0001.json": b'{"doc": 1}',
+        f"{TEXT}documents/{DOCKET}-0002.json": b'{"doc": 22}',
+        f"{TEXT}comments/{DOCKET}-0003.json": b'{"comment": 333}',
+        f"derived-data/FAA/{DOCKET}/mirrulations/extracted.txt": b"text",
+        f"raw-data/FAA/{DOCKET}/binary-{DOCKET}/attachment.pdf": b"%PDF-1.4",
+    }
+
+
+def _download(tmp_path, s3, **kwargs):
+    return download_docket_from_s3(
+        DOCKET, output_folder=str(tmp_path), client=s3,
+        min_workers=2, max_workers=4, backoff=0, **kwargs,
+    )
+
+
+class TestLayout:
+    def test_docket_lands_in_expected_local_tree(self, tmp_path):
+        root = _download(tmp_path, FakeS3(_bundle()), include_binary=True)
+        assert root == tmp_path.resolve() / DOCKET
+        assert (root / "raw-data" / "docket" / f"{DOCKET}.json").read_bytes() == b'{"docket": 1}'
+        assert (root / "raw-data" / "documents" / f"{DOCKET}-0002.json").exists()
+        assert (root / "raw-data" / "comments" / f"{DOCKET}-0003.json").exists()
+        assert (root / "derived-data" / "mirrulations" / "extracted.txt").exists()
+        assert (root / "raw-data" / f"binary-{DOCKET}" / "attachment.pdf").exists()
+        assert not list(root.rglob("*.part"))
+
+    def test_skip_comments_and_binary(self, tmp_path):
+        s3 = FakeS3(_bundle())
+        root = _download(tmp_path, s3, no_comments=True)
+        assert not (root / "raw-data" / "comments").exists()
+        assert not (root / "derived-data").exists()
+        assert not (root / "raw-data" / f"binary-{DOCKET}").exists()
+        assert sorted(s3.downloads) == sorted(
+            k for k in _bundle() if "/text-" in k and "comments" not in k
+        )
+
+    def test_missing_docket_exits(self, tmp_path):
+        with pytest.raises(SystemExit):
+            _download(tmp_path, FakeS3({}))
+
+    def test_docket_jobs(self):
+        kinds = [j.file_type for j in docket_jobs(DOCKET, include_binary=True)]
+        assert kinds == ["docket", "documents", "comments", "derived", "binary"]
+        jobs = docket_jobs(DOCKET, no_comments=True)
+        assert [j.file_type for j in jobs] == ["docket", "documents"]
+
+
+class TestResume:
+    def test_second_run_downloads_nothing(self, tmp_path):
+        s3 = FakeS3(_bundle())
+        root = _download(tmp_path, s3)
+        first = len(s3.downloads)
+        assert first == 5
+        manifest = json.loads((root / MANIFEST_NAME).read_text())
+        assert set(manifest) == {k for k in _bundle() if "binary-" not in k}
+
+        _download(tmp_path, s3)
+        assert len(s3.downloads) == first
+
+    def test_changed_size_or_etag_is_downloaded_again(self, tmp_path):
+        s3 = FakeS3(_bundle())
+        _download(tmp_path, s3)
+        s3.downloads.clear()
+        grown = f"{TEXT}documents/{DOCKET}-0001.json"
+        s3.objects[grown] = b'{"doc": 1, "more": true}'
+        same_size = f"{TEXT}documents/{DOCKET}-0002.json"
+        s3.objects[same_size] = b'{"doc": 99}'
+        s3.etags[same_size] = "new-etag"
+
+        root = _download(tmp_path, s3)
+        assert sorted(s3.downloads) == sorted([grown, same_size])
+        written = root / "raw-data" / "documents" / f"{DOCKET}-0002.json"
+        assert written.read_bytes() == b'{"doc": 99}'
+
+    def test_size_match_without_manifest_is_trusted(self, tmp_path):
+        local = tmp_path / "x.json"
+        local.write_bytes(b"abc")
+        manifest = Manifest(tmp_path / MANIFEST_NAME)
+        assert is_up_to_date(str(local), {"Key": "k", "Size": 3, "ETag": "e"}, manifest)
+        assert not is_up_to_date(str(local), {"Key": "k", "Size": 4, "ETag": "e"}, manifest)
+        manifest.record("k", "other")
+        assert not is_up_to_date(str(local), {"Key": "k", "Size": 3, "ETag": "e"}, manifest)
+        assert not is_up_to_date(str(tmp_path / "missing"), {"Key": "m", "Size": 0}, manifest)
+
+    def test_unreadable_manifest_is_ignored(self, tmp_path):
+        (tmp_path / MANIFEST_NAME).write_text("{not json")
+        assert Manifest(tmp_path / MANIFEST_NAME).etag("anything") is None
+
+
+class TestRetries:
+    def test_transient_failure_is_retried(self, tmp_path):
+        key = f"{TEXT}documents/{DOCKET}-0001.json"
+        s3 = FakeS3(_bundle(), fail={key: 2})
+        jobs = docket_jobs(DOCKET)
+        stats = download_prefixes(
+            jobs, tmp_path, client=s3, min_workers=1, max_workers=2, backoff=0, progress=False,
+        )
+        assert not stats.failed
+        assert stats.retries == 2
+        assert s3.downloads.count(key) == 3
+        assert (tmp_path / "raw-data" / "documents" / f"{DOCKET}-0001.json").exists()
+
+    def test_persistent_failure_is_reported_not_fatal(self, tmp_path):
+        key = f"{TEXT}comments/{DOCKET}-0003.json"
+        s3 = FakeS3(_bundle(), fail={key: 100})
+        stats = download_prefixes(
+            docket_jobs(DOCKET), tmp_path, client=s3,
+            min_workers=2, max_workers=2, max_attempts=3, backoff=0, progress=False,
+        )
+        assert [k for k, _ in stats.failed] == [key]
+        assert "ConnectionError" in stats.failed[0][1]
+        assert sum(stats.downloaded.values()) == 4
+        assert not (tmp_path / "raw-data" / "comments" / f"{DOCKET}-0003.json").exists()
+        assert not list(tmp_path.rglob("*.part"))
+        assert key not in json.loads((tmp_path / MANIFEST_NAME).read_text())
+
+    def test_listing_is_paginated(self):
+        s3 = FakeS3(_bundle(), page_size=1)
+        keys = [o["Key"] for o in iter_s3_objects(s3, TEXT)]
+        assert len(keys) == 4
+        assert s3.pages_served == 4
+
+    def test_listing_error_is_recorded(self, tmp_path):
+        class Broken(FakeS3):
+            def get_paginator(self, name):
+                raise RuntimeError("listing denied")
+
+        stats = download_prefixes(
+            [ListingJob("docket", TEXT, TEXT, "raw-data")], tmp_path,
+            client=Broken({}), min_workers=1, max_workers=1, progress=False,
+        )
+        assert stats.failed and "listing denied" in stats.failed[0][1]
+
+
+class TestConcurrencyController:
+    def _controller(self):
+        now = [0.0]
+        ctl = ConcurrencyController(2, 6, interval=1.0, clock=lambda: now[0])
+        return ctl, now
+
+    def test_grows_while_throughput_improves(self):
+        ctl, now = self._controller()
+        for rate in (100, 200, 300):
+            now[0] += 1.0
+            ctl.record(rate)
+        assert ctl.target == 5
+
+    def test_halves_on_errors_and_respects_bounds(self):
+        ctl, now = self._controller()
+        ctl.target = 6
+        now[0] += 1.0
+        ctl.record(error=True)
+        assert ctl.target == 3
+        now[0] += 1.0
+        ctl.record(error=True)
+        assert ctl.target == 2
+
+    def test_backs_off_when_throughput_drops(self):
+        ctl, now = self._controller()
+        now[0] += 1.0
+        ctl.record(1000)
+        now[0] += 1.0
+        ctl.record(100)
+        assert ctl.target == 2
+
+    def test_parked_worker_released_on_close(self):
+        ctl, _ = self._controller()
+        assert ctl.wait_turn(0)
+        ctl.close()
+        assert not ctl.wait_turn(5)
+
+    def test_stats_line(self):
+        stats = DownloadStats()
+        stats.add_listed("docket")
+        stats.add_done("docket", 2_000_000)
+        assert "1/1+" in stats.line(3)
+        assert "workers: 3" in stats.line(3)
@@ -0,0 +1,133 @@
+"""
+Tests for ``search_filters.py`` (search parameters → index-friendly SQL).
+
+The ``integration`` tests run EXPLAIN against a real Postgres when
+``TEST_DATABASE_URL`` is set; they build the schema and migrations in a
+throwaway schema and drop it afterwards.
+"""
+# pylint: disable=redefined-outer-name
+import json
+from datetime import date
+
+import pytest
+from pg_support import pg_schema
+
+from mirrsearch.search_filters import (
+    agency_filter_ids,
+    compile_search_filters,
+    parse_filter_date,
+    resolve_agencies,
+)
+
+AGENCIES = ["CMS", "EPA", "EPA-HQ", "FAA", "FDA"]
+
+
+def test_resolve_agencies_exact_or_prefix():
+    assert resolve_agencies(["epa"], AGENCIES) == ["EPA", "EPA-HQ"]
+    assert resolve_agencies(["epa-hq"], AGENCIES) == ["EPA-HQ"]
+    assert resolve_agencies(["F"], AGENCIES) == ["FAA", "FDA"]
+    assert resolve_agencies(["EPA-", " cms ", "", None], AGENCIES) == ["CMS", "EPA-HQ"]
+    assert resolve_agencies(["MS"], AGENCIES) == []
+
+
+def test_agency_filter_ids_keep_unknown_values():
+    assert agency_filter_ids(["epa", "new"], AGENCIES) == ["EPA", "EPA-HQ", "NEW"]
+    assert agency_filter_ids([" zzz ", ""], []) == ["ZZZ"]
+    assert not agency_filter_ids(None, AGENCIES)
+
+
+def test_parse_filter_date():
+    assert parse_filter_date(None) is None
+    assert parse_filter_date("2025-03-04T10:00:00") == date(2025, 3, 4)
+    with pytest.raises(ValueError):
+        parse_filter_date("March 4")
+
+
+def test_compile_all_filters_in_order():
+    compiled = compile_search_filters(
+        "Rulemaking", ["epa"], [{"title": "40", "part": "80"}, "81"],
+        "2025-01-01", "2025-12-31", known_agencies=AGENCIES,
+    )
+    assert compiled.predicates[:4] == [
+        "d.docket_type = %s",
+        "d.agency_id = ANY(%s)",
+        "d.modify_date >= %s",
+        "d.modify_date < %s",
+    ]
+    assert compiled.params == [
+        "Rulemaking", ["EPA", "EPA-HQ"], date(2025, 1, 1), date(2026, 1, 1), "40", "80",
+    ]
+    # No predicate wraps a dockets column in a cast or function.
+    assert "::" not in compiled.where_sql() and "ILIKE" not in compiled.where_sql()
+
+
+def test_compile_unknown_agency_matches_literally():
+    # The known list is cached and may not have a newly ingested agency yet.
+    compiled = compile_search_filters(agency=["zzz"], known_agencies=AGENCIES)
+    assert (compiled.predicates, compiled.params) == (["d.agency_id = ANY(%s)"], [["ZZZ"]])
+    assert compile_search_filters(agency=["  "]).predicates == []
+
+
+def test_compile_empty():
+    compiled = compile_search_filters()
+    assert (compiled.where_sql(), compiled.params) == ("", [])
+
+
+# --- EXPLAIN against Postgres ---
+
+SCHEMA = "search_filters_explain"
+
+
+@pytest.fixture(scope="module")
+def pg():
+    yield from pg_schema(SCHEMA, after_migrations=[
+        "INSERT INTO dockets (docket_id, docket_api_link, agency_id, docket_type, "
+        "modify_date, docket_title) "
+        "SELECT 'D-' || g, 'https://x/' || g, (ARRAY['CMS','EPA','FAA','FDA'])[1 + g % 4], "
+        "'Rulemaking', TIMESTAMPTZ '2020-01-01' + g * INTERVAL '1 hour', 'title ' || g "
+        "FROM generate_series(1, 20000) g",
+        "ANALYZE dockets",
+    ])
+
+
+def _plan(conn, where_sql, params):
+    with conn.cursor() as cur:
+        cur.execute("SET enable_seqscan = off")
+        cur.execute(
+            f"EXPLAIN (FORMAT JSON) SELECT d.docket_id FROM dockets d WHERE TRUE{where_sql}",
+            params,
+        )
+        plan = cur.fetchone()[0]
+    conn.rollback()
+    return json.dumps(plan if not isinstance(plan, str) else json.loads(plan))
+
+
+@pytest.mark.integration
+def test_date_range_uses_modify_date_index(pg):
+    compiled = compile_search_filters(start_date="2021-01-01", end_date="2021-01-31")
+    plan = _plan(pg, compiled.where_sql(), compiled.params)
+    assert "dockets_modify_date_idx" in plan
+    assert '"Index Cond": "((modify_date >=' in plan
+    # The cast form it replaced cannot be an index condition; with seqscans off
+    # the planner may still walk the whole index and filter every row.
+    legacy = _plan(pg, " AND d.modify_date::date >= %s::date", ["2021-01-01"])
+    assert '"Index Cond"' not in legacy
+
+
+@pytest.mark.integration
+def test_agency_filter_uses_agency_index(pg):
+    compiled = compile_search_filters(agency=["fa"], known_agencies=["CMS", "FAA"])
+    plan = _plan(pg, compiled.where_sql(), compiled.params)
+    assert "dockets_agency_id_idx" in plan
+    legacy = _plan(pg, " AND d.agency_id ILIKE %s", ["%fa%"])
+    assert "dockets_agency_id_idx" not in legacy
+
+
+@pytest.mark.integration
+def test_cfr_filter_is_one_semi_join(pg):
+    compiled = compile_search_filters(cfr_part_param=[{"title": "40", "part": "80"}])
+    plan = json.loads(_plan(pg, compiled.where_sql(), compiled.params))
+    text = json.dumps(plan)
+    assert text.count('"Relation Name": "docket_cfr"') == 1
+    assert '"Relation Name": "cfrparts"' not in text
+    assert "SubPlan" not in text
@@ -1,36 +1,43 @@
 # pylint: disable=too-few-public-methods,unused-argument
-"""Tests for OpenSearch merge path in InternalLogic.search()."""
+"""Tests for merging title and OpenSearch hits in InternalLogic.search()."""
 from datetime import date
 
+from mirrsearch.docket_result import as_results
 from mirrsearch.internal_logic import InternalLogic
 
 
 class _FakeDbMerge:
+    """
+    ``search_with_hits`` like ``DBLayer``: the title rows, then the other
+    OpenSearch hits that Postgres has, once each, with document totals.
+    """
+    DOCUMENT_TOTALS = {"A": 10, "B": 4, "C": 7}
+    COMMENT_TOTALS = {"A": 2, "B": 5, "C": 3}
+
     def __init__(self, sql_rows, os_hits, by_id_rows):
         self._sql_rows = sql_rows
         self._os_hits = os_hits
         self._by_id_rows = by_id_rows
-        self.get_dockets_by_ids_calls = []
-
-    def search(self, query, *args, **kwargs):  # pylint: disable=unused-argument
-        return list(self._sql_rows)
+        self.search_with_hits_calls = []
 
     def text_match_terms(self, terms, opensearch_client=None):
         return list(self._os_hits)
 
-    def get_dockets_by_ids(self, docket_ids):
-        self.get_dockets_by_ids_calls.append(list(docket_ids))
-        return list(self._by_id_rows)
+    def search_with_hits(self, query, docket_ids, *filters):  # pylint: disable=too-many-locals
+        self.search_with_hits_calls.append((list(docket_ids), filters))
+        title_rows = as_results([dict(r) for r in self._sql_rows], "title")
+        title_ids = {r.key for r in title_rows}
+        by_id = {r["docket_id"]: r for r in self._by_id_rows}
+        full_text_rows = as_results([
+            dict(by_id[d]) for d in dict.fromkeys(docket_ids)
+            if d in by_id and d not in title_ids
+        ], "full_text")
+        for row in title_rows + full_text_rows:
+            row.document_total_count = self.DOCUMENT_TOTALS.get(row.key, 0)
+        return title_rows, full_text_rows
 
-    def get_docket_document_comment_totals(self, docket_ids, opensearch_client=None):  # pylint: disable=unused-argument
-        # Provide deterministic denominators for assertions.
-        dids = [str(d) for d in docket_ids]
-        totals = {
-            "A": {"document_total_count": 10, "comment_total_count": 2},
-            "B": {"document_total_count": 4, "comment_total_count": 5},
-            "C": {"document_total_count": 7, "comment_total_count": 3},
-        }
-        return {d: totals[d] for d in dids if d in totals}
+    def get_comment_totals(self, docket_ids, opensearch_client=None):
+        return {d: self.COMMENT_TOTALS[d] for d in docket_ids if d in self.COMMENT_TOTALS}
 
 
 def test_search_json_sanitizes_modify_date():
@@ -63,8 +70,7 @@ def test_merge_opensearch_empty_uses_sql_only_with_match_source():
     assert out["results"][0]["commentNumerator"] == 0
     assert out["results"][0]["documentDenominator"] == 10
     assert out["results"][0]["commentDenominator"] == 2
-    assert not db.get_dockets_by_ids_calls
-
+    assert db.search_with_hits_calls == [([], (None, None, None, None, None))]
 
 
 def test_merge_appends_full_text_with_counts_and_order():  # pylint: disable=too-many-statements
@@ -96,7 +102,7 @@ def test_merge_appends_full_text_with_counts_and_order():  # pylint: disable=too
     assert merged[2]["match_source"] == "full_text"
     assert merged[2]["documentNumerator"] == 1
     assert merged[2]["documentDenominator"] == 7
-    assert db.get_dockets_by_ids_calls == [["B", "C"]]
+    assert db.search_with_hits_calls[0][0] == ["A", "B", "C"]
 
 
 def test_merge_skips_os_docket_missing_in_postgres():
@@ -128,82 +134,8 @@ def test_row_docket_key_accepts_id_for_mocks():
     assert out["results"][0]["commentDenominator"] == 0
 
 
-def test_merge_full_text_dropped_when_agency_filter_no_match():
-    """OpenSearch-only dockets must satisfy the same agency filter as title search."""
-    sql_rows = [{"docket_id": "A", "docket_title": "ta", "cfr_refs": [], "agency_id": "CMS"}]
-    os_hits = [
-        {"docket_id": "A", "document_match_count": 1, "comment_match_count": 0},
-        {"docket_id": "B", "document_match_count": 5, "comment_match_count": 1},
-    ]
-    by_id_rows = [
-        {"docket_id": "B", "docket_title": "tb", "cfr_refs": [], "agency_id": "EPA"},
-    ]
-    db = _FakeDbMerge(sql_rows, os_hits, by_id_rows)
-    logic = InternalLogic("x", db_layer=db)
-    out = logic.search("q", agency=["CMS"], page=1, page_size=10)
-    assert len(out["results"]) == 1
-    assert out["results"][0]["docket_id"] == "A"
-    assert db.get_dockets_by_ids_calls == [["B"]]
-
-
-def test_merge_full_text_kept_when_agency_filter_matches():
-    sql_rows = [{"docket_id": "A", "docket_title": "ta", "cfr_refs": [], "agency_id": "CMS"}]
-    os_hits = [
-        {"docket_id": "B", "document_match_count": 2, "comment_match_count": 0},
-    ]
-    by_id_rows = [
-        {"docket_id": "B", "docket_title": "tb", "cfr_refs": [], "agency_id": "CMS-FOO"},
-    ]
-    db = _FakeDbMerge(sql_rows, os_hits, by_id_rows)
-    logic = InternalLogic("x", db_layer=db)
-    out = logic.search("q", agency=["CMS"], page=1, page_size=10)
-    # B ranks above A (higher match counts vs totals from _FakeDbMerge).
-    assert [r["docket_id"] for r in out["results"]] == ["B", "A"]
-
-
-def test_merge_full_text_dropped_when_docket_type_filter_no_match():
-    sql_rows = [
-        {"docket_id": "A", "docket_title": "ta", "cfr_refs": [], "agency_id": "X",
-         "docket_type": "Rulemaking"},
-    ]
-    os_hits = [{"docket_id": "B", "document_match_count": 1, "comment_match_count": 0}]
-    by_id_rows = [
-        {"docket_id": "B", "docket_title": "tb", "cfr_refs": [], "agency_id": "X",
-         "docket_type": "Notice"},
-    ]
-    db = _FakeDbMerge(sql_rows, os_hits, by_id_rows)
-    logic = InternalLogic("x", db_layer=db)
-    out = logic.search("q", docket_type_param="Rulemaking", page=1, page_size=10)
-    assert len(out["results"]) == 1
-    assert out["results"][0]["docket_id"] == "A"
-
-
-def test_merge_full_text_dropped_when_cfr_part_filter_no_match():
-    sql_rows = [
-        {"docket_id": "A", "docket_title": "ta", "cfr_refs": [
-            {"title": "Title 42", "cfrParts": {"413": "http://a"}},
-        ], "agency_id": "CMS"},
-    ]
-    os_hits = [{"docket_id": "B", "document_match_count": 1, "comment_match_count": 0}]
-    by_id_rows = [
-        {"docket_id": "B", "docket_title": "tb", "cfr_refs": [
-            {"title": "Title 40", "cfrParts": {"99": "http://b"}},
-        ], "agency_id": "CMS"},
-    ]
-    db = _FakeDbMerge(sql_rows, os_hits, by_id_rows)
-    logic = InternalLogic("x", db_layer=db)
-    out = logic.search(
-        "q",
-        cfr_part_param=[{"title": "42 CFR", "part": "413"}],
-        page=1,
-        page_size=10,
-    )
-    assert len(out["results"]) == 1
-    assert out["results"][0]["docket_id"] == "A"
-
-
 def test_merge_os_hits_all_title_matches_falls_back_to_title_only():
-    """OpenSearch returns hits but none are new vs title search → no get_dockets_by_ids."""
+    """OpenSearch returns hits but all of them are title hits → title rows only."""
     sql_rows = [{"docket_id": "A", "docket_title": "ta", "cfr_refs": []}]
     os_hits = [{"docket_id": "A", "document_match_count": 9, "comment_match_count": 1}]
     db = _FakeDbMerge(sql_rows, os_hits, by_id_rows=[])
@@ -215,11 +147,11 @@ def test_merge_os_hits_all_title_matches_falls_back_to_title_only():
     assert out["results"][0]["commentNumerator"] == 1
     assert out["results"][0]["documentDenominator"] == 10
     assert out["results"][0]["commentDenominator"] == 2
-    assert not db.get_dockets_by_ids_calls
+    assert db.search_with_hits_calls[0][0] == ["A"]
 
 
-def test_merge_duplicate_os_hits_for_same_docket_only_fetch_once():
-    """Second OpenSearch row with the same docket_id is skipped in _get_new_docket_ids."""
+def test_merge_duplicate_os_hits_for_same_docket_give_one_row():
+    """A docket_id repeated in the OpenSearch hits is one result row."""
     sql_rows = [{"docket_id": "A", "docket_title": "ta", "cfr_refs": []}]
     os_hits = [
         {"docket_id": "B", "document_match_count": 1, "comment_match_count": 0},
@@ -229,30 +161,11 @@ def test_merge_duplicate_os_hits_for_same_docket_only_fetch_once():
     db = _FakeDbMerge(sql_rows, os_hits, by_id_rows)
     logic = InternalLogic("x", db_layer=db)
     out = logic.search("q", page=1, page_size=10)
-    assert db.get_dockets_by_ids_calls == [["B"]]
     b_rows = [r for r in out["results"] if r["docket_id"] == "B"]
     assert len(b_rows) == 1
     assert b_rows[0]["documentNumerator"] == 1
 
 
-def test_merge_full_text_kept_when_cfr_pattern_filter_matches():
-    """Non-dict CFR filter (substring patterns) uses _cfr_part_patterns_match_row."""
-    sql_rows = [{"docket_id": "A", "docket_title": "ta", "cfr_refs": [], "agency_id": "CMS"}]
-    os_hits = [{"docket_id": "B", "document_match_count": 1, "comment_match_count": 0}]
-    by_id_rows = [
-        {
-            "docket_id": "B",
-            "docket_title": "tb",
-            "cfr_refs": [{"title": "42", "cfrParts": {"413": "http://x"}}],
-            "agency_id": "CMS",
-        },
-    ]
-    db = _FakeDbMerge(sql_rows, os_hits, by_id_rows)
-    logic = InternalLogic("x", db_layer=db)
-    out = logic.search("q", cfr_part_param=["413"], page=1, page_size=10)
-    assert [r["docket_id"] for r in out["results"]] == ["B", "A"]
-
-
 class _FakeDbCollectionDockets:
     """Minimal db_layer for InternalLogic.get_collection_dockets."""
 